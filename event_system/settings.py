@@ -1,4 +1,5 @@
 import os
+import tempfile
 import dj_database_url
 from pathlib import Path
 from dotenv import load_dotenv
@@ -24,7 +25,8 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # --- Templates Directory ---
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing renders for the metrics (see events/metrics.py)
+        'BACKEND': 'events.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # Fixed: use Path consistently
         'APP_DIRS': True,
         'OPTIONS': {
@@ -67,10 +69,12 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'events.metrics.MetricsMiddleware',  # after WhiteNoise, so static files are not timed
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'events.dbrouting.ReplicaRoutingMiddleware',  # after sessions: stamps visitors who wrote
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -130,6 +134,133 @@ BANK_NAME = os.getenv('BANK_NAME', 'Standard Chartered Bank')
 BANK_ACCOUNT_NUMBER = os.getenv('BANK_ACCOUNT_NUMBER', '0152516138300')
 BANK_ACCOUNT_NAME = os.getenv('BANK_ACCOUNT_NAME', 'Momenta')
 
+# Background jobs (payment provider calls run in `manage.py run_jobs`, not in the request)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+PAYMENT_STATUS_POLL_INTERVAL = 3  # seconds between the success page's status requests
+# Provider stub for load tests (`manage.py loadtest_checkout`): no real provider calls
+PAYMENT_PROVIDER_STUB = os.getenv('PAYMENT_PROVIDER_STUB', 'False') == 'True'
+PAYMENT_STUB_LATENCY_MS = os.getenv('PAYMENT_STUB_LATENCY_MS', '50')  # '50' or a range like '20-200'
+PAYMENT_STUB_FAILURE_RATE = float(os.getenv('PAYMENT_STUB_FAILURE_RATE', '0'))
+
+# Seat holds (see events/holds.py)
+SEAT_HOLD_SELECTION_TTL = int(os.getenv('SEAT_HOLD_SELECTION_TTL', '600'))  # choosing seats -> paying
+SEAT_HOLD_PAYMENT_TTL = int(os.getenv('SEAT_HOLD_PAYMENT_TTL', str(48 * 3600)))  # paid -> admin review
+SEAT_HOLD_SWEEP_INTERVAL = int(os.getenv('SEAT_HOLD_SWEEP_INTERVAL', '0'))  # >0 runs the sweeper in-process
+
+# Admin dashboard metrics (see events/dashboard.py)
+DASHBOARD_METRICS_TTL = 300  # seconds the windowed snapshot is reused
+DASHBOARD_RECONCILE_INTERVAL = 3600  # counters are recomputed from the tables at least this often
+DASHBOARD_CACHE_ALIAS = 'shared'  # run_jobs and every web worker update the same counters
+
+# Facilities dashboard / public page figures (see events/facilities.py)
+FACILITIES_METRICS_TTL = int(os.getenv('FACILITIES_METRICS_TTL', '60'))  # seconds the snapshot is reused
+FACILITIES_CACHE_ALIAS = 'shared'  # a booking saved in one worker must drop every worker's snapshot
+
+# Full-text search for the list pages (see events/search.py)
+SEARCH_MAX_RESULTS = 1000  # matches kept per query, best first
+SEARCH_CACHE_SIZE = 256  # normalized queries remembered per process
+SEARCH_CACHE_TTL = 60  # seconds a cached result may be reused
+
+# Caches. Anything one process writes and another must see (page tags,
+# dashboard counters, model rows, image derivative lists) lives on a shared
+# backend: a file cache by default, or memcached/a database cache through the
+# *_CACHE_BACKEND/LOCATION variables. Only 'default' is per process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'momenta-default',
+    },
+    'pages': {
+        'BACKEND': os.getenv('PAGE_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('PAGE_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'momenta-pages')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'objects': {
+        'BACKEND': os.getenv('MODEL_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('MODEL_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'momenta-objects')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    # Small cross-process state: dashboard counters, image derivative lists.
+    # memcached makes the counters' incr atomic; file/database caches may
+    # lose a concurrent increment until the next reconcile.
+    'shared': {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'momenta-shared')),
+    },
+}
+
+# The test run swaps these caches for locmem and switches the page cache,
+# model cache, metrics and replicas off (see event_system/test_runner.py)
+TEST_RUNNER = 'event_system.test_runner.MomentaTestRunner'
+
+# Anonymous full-page cache (see events/pagecache.py)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '300'))  # seconds, upper bound on staleness
+PAGE_CACHE_LOCK_TIMEOUT = 30  # seconds one render may hold the single-flight lock
+PAGE_CACHE_LOCK_WAIT = 2  # seconds a request waits for another's render before rendering itself
+
+# Two-tier model object cache (see events/modelcache.py)
+MODEL_CACHE_ENABLED = os.getenv('MODEL_CACHE_ENABLED', 'True') == 'True'
+MODEL_CACHE_ALIAS = 'objects'
+MODEL_CACHE_LOCAL_SIZE = 1024  # rows kept per process
+MODEL_CACHE_POLL_INTERVAL = 2  # seconds a worker trusts its local copy before re-checking the version
+MODEL_CACHE_TTL = 60 * 60  # seconds a row stays in the shared cache
+
+# Responsive image derivatives (see events/images.py)
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)  # srcset widths, capped at the original's width
+IMAGE_THUMBNAIL_SIZE = 160  # square previews in the admin
+IMAGE_WEBP_QUALITY = 80
+IMAGE_JPEG_QUALITY = 82
+IMAGE_DERIVATIVE_CACHE_ALIAS = 'shared'  # the job worker's deletes must reach the web workers
+IMAGE_DERIVATIVE_CACHE_TTL = 60 * 60  # seconds a source's derivative list is cached
+IMAGE_DERIVATIVE_MISS_TTL = 30  # seconds "no derivatives yet" is cached
+
+# Keyset pagination for the public listings (see events/pagination.py)
+LISTING_PAGE_SIZE = 12  # events per page on home, events and category pages
+PROFILE_PAGE_SIZE = 20  # bookings per page on the profile
+
+# Time-ordered transaction IDs (see events/snowflake.py). Worker ids are
+# leased from the database unless SNOWFLAKE_WORKER_ID pins one (0-1023).
+SNOWFLAKE_WORKER_ID = int(os.environ['SNOWFLAKE_WORKER_ID']) if os.getenv('SNOWFLAKE_WORKER_ID') else None
+SNOWFLAKE_LEASE_SECONDS = 600  # a worker id is renewed after half of this
+
+# Request, query and template metrics, served at /admin/metrics/ (see events/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '0.1'))  # share of requests whose queries and templates are timed
+METRICS_FLUSH_INTERVAL = 15  # seconds between writes of a process's totals
+METRICS_PROCESS_TTL = 300  # seconds before a silent process drops out of the totals
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # bearer token for a Prometheus scraper
+
+# Signed e-tickets and gate check-in (see events/tickets.py). Each event's
+# scanner key is derived from TICKET_SIGNING_KEY (SECRET_KEY if unset), so
+# changing it invalidates every ticket already issued.
+TICKET_SIGNING_KEY = os.getenv('TICKET_SIGNING_KEY', '')
+CHECKIN_TOKEN = os.getenv('CHECKIN_TOKEN', '')  # secret each event's scanner token is derived from
+CHECKIN_MAX_BATCH = 5000  # scans per sync request
+
+# Read replicas (see events/dbrouting.py). DATABASE_REPLICA_URLS is a
+# comma-separated list; each URL becomes DATABASES['replica_<n>']. Read-only
+# views use a healthy replica, everything else the primary. Under test a
+# replica mirrors the primary's test database.
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv('DATABASE_REPLICA_URLS', os.getenv('DATABASE_REPLICA_URL', '')).split(',')
+    if url.strip()
+]
+for _index, _url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f'replica_{_index}'] = dict(dj_database_url.parse(_url), TEST={'MIRROR': 'default'})
+DATABASE_REPLICAS = [f'replica_{index}' for index in range(len(DATABASE_REPLICA_URLS))]
+DATABASE_ROUTERS = ['events.dbrouting.ReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = 15  # a visitor reads from the primary for this long after writing
+DATABASE_REPLICA_HEALTH_INTERVAL = 5  # seconds between health checks of a replica, per process
+DATABASE_REPLICA_MAX_LAG = 10  # seconds of replication lag before a replica is skipped
+
+# Daily revenue rollups (see events/rollups.py)
+REVENUE_ROLLUP_OVERLAP = 600  # seconds before the high-water mark re-read by each build (late commits)
+REVENUE_REPORT_DAYS = 30  # default window of the staff revenue report
+
 # Email Configuration
 # To send real emails, you MUST set up Gmail App Password:
 # 1. Go to: https://myaccount.google.com/security
@@ -164,6 +295,11 @@ DEFAULT_FROM_EMAIL = 'Momenta <nalisaimbula282@gmail.com>'
 EMAIL_SUBJECT_PREFIX = '[Momenta] '
 EMAIL_TIMEOUT = 60
 
+# Email outbox: requests only queue mail, `manage.py deliver_emails` sends it
+EMAIL_OUTBOX_BATCH_SIZE = 100  # messages per SMTP connection
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE = 60  # seconds; doubles with each attempt
+
 # For testing only (prints to console instead of sending):
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
@@ -0,0 +1,40 @@
+"""
+Test runner for Momenta (``TEST_RUNNER``)
+=========================================
+
+Used by ``manage.py test`` and ``run_tests.py`` alike. For the whole run it
+points every cache alias at a private locmem cache and switches off the
+features that keep state outside the test database, so nothing cached or
+counted in one test leaks into the next (or into the real shared caches):
+the anonymous page cache, the model object cache, request metrics and read
+replicas. Tests that exercise one of them turn it back on with
+``override_settings``.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    'PAGE_CACHE_ENABLED': False,
+    'MODEL_CACHE_ENABLED': False,
+    'METRICS_ENABLED': False,
+    'DATABASE_REPLICAS': [],
+}
+
+
+class MomentaTestRunner(DiscoverRunner):
+    """DiscoverRunner with the test-run settings above applied"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        caches = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'momenta-test-{alias}'}
+            for alias in settings.CACHES
+        }
+        self._test_settings = override_settings(CACHES=caches, **TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -2,8 +2,20 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import path, include
 from django.contrib import admin
+from events import views as event_views
 
 urlpatterns = [
+    # Staff endpoints of the events app that live under /admin/ must be
+    # matched before the admin site's catch-all pattern swallows them
+    path('admin/approve-payment/<int:payment_id>/', event_views.approve_payment),
+    path('admin/reject-payment/<int:payment_id>/', event_views.reject_payment),
+    path('admin/facilities/', event_views.facilities_dashboard),
+    path('admin/page-cache/', event_views.page_cache_stats),
+    path('admin/metrics/', event_views.metrics_endpoint),
+    path('admin/checkin/<int:event_id>/roster/', event_views.checkin_roster),
+    path('admin/checkin/<int:event_id>/sync/', event_views.checkin_sync),
+    path('admin/revenue/', event_views.revenue_report),
+    path('admin/revenue/json/', event_views.revenue_report_json),
     path('admin/', admin.site.urls),
     path('', include('events.urls')),
 ]
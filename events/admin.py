@@ -2,11 +2,18 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
-from .models import Category, Event, Booking, EventGallery, PaymentTransaction, UserProfile, Venue, Resource, VenueBooking, ResourceAllocation
+from django.contrib import messages
+from .inventory import add_seats, move_seats
+from .approvals import bulk_approve
+from .conflicts import find_resource_overloads, find_venue_conflicts
+from .images import preview_url, thumbnail_url
+from . import dashboard, dbrouting, exports
+from .models import Category, Event, Booking, EventGallery, PaymentTransaction, UserProfile, Venue, Resource, VenueBooking, ResourceAllocation, Job, SeatHold, OutboundEmail, CheckIn, EventSalesSummary
 
 
 # ============================
@@ -19,6 +26,9 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
     list_per_page = 20
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(event_total=Count('events'))
+
     def name_with_icon(self, obj):
         icons = {
             'music': '🎵',
@@ -31,13 +41,14 @@ class CategoryAdmin(admin.ModelAdmin):
     name_with_icon.short_description = "Category"
 
     def event_count_badge(self, obj):
-        count = obj.events.count()
+        count = obj.event_total
         color = '#28a745' if count > 0 else '#6c757d'
         return format_html(
             '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 12px; font-weight: bold;">{}</span>',
             color, count
         )
     event_count_badge.short_description = "Events"
+    event_count_badge.admin_order_field = "event_total"
     
     def view_events_link(self, obj):
         url = f"/admin/events/event/?category__id__exact={obj.id}"
@@ -93,7 +104,15 @@ class EventAdmin(admin.ModelAdmin):
                       "experience_image_preview", "performance_image_preview", 
                       "image_upload_status")
     list_per_page = 25
-    actions = ['duplicate_events', 'mark_as_sold_out', 'add_more_seats', 'export_event_data']
+    list_select_related = ("category",)
+    actions = ['duplicate_events', 'mark_as_sold_out', 'add_more_seats', 'export_event_data', 'export_event_data_ndjson']
+
+    def get_queryset(self, request):
+        # At most one sales summary row per tier instead of every booking
+        return super().get_queryset(request).annotate(
+            booking_total=Coalesce(Sum('sales__bookings'), 0),
+            revenue_total=Sum('sales__revenue'),
+        )
     
     fieldsets = (
         ("Event Information", {
@@ -189,15 +208,16 @@ class EventAdmin(admin.ModelAdmin):
     seats_status.short_description = "Availability"
 
     def booking_count(self, obj):
-        count = obj.bookings.count()
+        count = obj.booking_total
         return format_html(
             '<span style="background-color: #17a2b8; color: white; padding: 3px 10px; border-radius: 12px; font-weight: bold;">{}</span>',
             count
         )
     booking_count.short_description = "Bookings"
+    booking_count.admin_order_field = "booking_total"
 
     def revenue(self, obj):
-        total = obj.bookings.aggregate(total=Sum('total_price'))['total']
+        total = obj.revenue_total
         if total is None:
             total = 0
         else:
@@ -205,34 +225,35 @@ class EventAdmin(admin.ModelAdmin):
         formatted_amount = f"K{total:,.0f}"
         return format_html('<strong style="color: #28a745;">{}</strong>', formatted_amount)
     revenue.short_description = "Revenue"
+    revenue.admin_order_field = "revenue_total"
 
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="max-width: 300px; border-radius: 10px;" />', obj.image.url)
+            return format_html('<img src="{}" style="max-width: 300px; border-radius: 10px;" />', preview_url(obj.image))
         return "No image"
     image_preview.short_description = "Legacy Image"
 
     def main_image_preview(self, obj):
         if obj.main_image:
-            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #007bff;" />', obj.main_image.url)
+            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #007bff;" />', preview_url(obj.main_image))
         return format_html('<span style="color: #dc3545;">❌ No main image</span>')
     main_image_preview.short_description = "Main Event Image"
 
     def crowd_image_preview(self, obj):
         if obj.crowd_image:
-            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #28a745;" />', obj.crowd_image.url)
+            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #28a745;" />', preview_url(obj.crowd_image))
         return format_html('<span style="color: #dc3545;">❌ No crowd image</span>')
     crowd_image_preview.short_description = "Amazing Crowd Image"
 
     def experience_image_preview(self, obj):
         if obj.experience_image:
-            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #ffc107;" />', obj.experience_image.url)
+            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #ffc107;" />', preview_url(obj.experience_image))
         return format_html('<span style="color: #dc3545;">❌ No experience image</span>')
     experience_image_preview.short_description = "Premium Experience Image"
 
     def performance_image_preview(self, obj):
         if obj.performance_image:
-            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #e91e63;" />', obj.performance_image.url)
+            return format_html('<img src="{}" style="max-width: 200px; border-radius: 8px; border: 2px solid #e91e63;" />', preview_url(obj.performance_image))
         return format_html('<span style="color: #dc3545;">❌ No performance image</span>')
     performance_image_preview.short_description = "Live Performances Image"
 
@@ -266,17 +287,12 @@ class EventAdmin(admin.ModelAdmin):
     image_upload_status.short_description = "Upload Progress"
 
     def booking_stats(self, obj):
-        bookings = obj.bookings.all()
-        vip_count = bookings.filter(ticket_type='vip').count()
-        gold_count = bookings.filter(ticket_type='gold').count()
-        standard_count = bookings.filter(ticket_type='standard').count()
-        total_revenue = bookings.aggregate(total=Sum('total_price'))['total']
-        if total_revenue is None:
-            total_revenue = 0
-        else:
-            total_revenue = float(total_revenue)
+        tiers = {row.ticket_type: row for row in obj.sales.all()}
+        rows = [tiers.get(tier) or EventSalesSummary(ticket_type=tier) for tier in ('vip', 'gold', 'standard')]
+        total_revenue = float(sum(row.revenue for row in rows))
         
         formatted_revenue = f"K{total_revenue:,.0f}"
+        tickets = [f"{row.sold_tickets} sold, {row.pending_tickets} pending, {row.refunded_tickets} refunded" for row in rows]
         return format_html(
             '<div style="background: #f8f9fa; padding: 15px; border-radius: 8px;">'
             '<h3 style="margin-top: 0;">Booking Statistics</h3>'
@@ -286,7 +302,7 @@ class EventAdmin(admin.ModelAdmin):
             '<p><strong>Total Bookings:</strong> {}</p>'
             '<p><strong>Total Revenue:</strong> {}</p>'
             '</div>',
-            vip_count, gold_count, standard_count, bookings.count(), formatted_revenue
+            *tickets, sum(row.bookings for row in rows), formatted_revenue
         )
     booking_stats.short_description = "Statistics"
     
@@ -333,46 +349,20 @@ class EventAdmin(admin.ModelAdmin):
     
     def add_more_seats(self, request, queryset):
         """Add 50 more seats to each ticket type"""
-        count = 0
-        for event in queryset:
-            event.vip_seats_left = (event.vip_seats_left or 0) + 50
-            event.gold_seats_left = (event.gold_seats_left or 0) + 50
-            event.standard_seats_left = (event.standard_seats_left or 0) + 50
-            event.save()
-            count += 1
+        count = add_seats(queryset, 50)
         self.message_user(request, f"🎟️ Added 50 seats to each type for {count} event(s).")
     add_more_seats.short_description = "🎟️ Add 50 seats to each type"
     
     def export_event_data(self, request, queryset):
-        """Export event data with booking statistics"""
-        import csv
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="events_export.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Event', 'Category', 'Date', 'Location', 'Total Bookings', 'Revenue', 'VIP Left', 'Gold Left', 'Standard Left'])
-        
-        for event in queryset:
-            total_bookings = event.bookings.count()
-            revenue = event.bookings.aggregate(total=Sum('total_price'))['total'] or 0
-            writer.writerow([
-                event.title,
-                event.category.name,
-                event.date.strftime('%Y-%m-%d'),
-                event.location,
-                total_bookings,
-                float(revenue),
-                event.vip_seats_left or 0,
-                event.gold_seats_left or 0,
-                event.standard_seats_left or 0
-            ])
-        
-        self.message_user(request, f"📊 Exported {queryset.count()} events to CSV.")
-        return response
+        """Stream event data with booking statistics as CSV"""
+        return exports.stream_export('events', queryset, 'csv')
     export_event_data.short_description = "📊 Export event data to CSV"
 
+    def export_event_data_ndjson(self, request, queryset):
+        """Stream event data with booking statistics as NDJSON"""
+        return exports.stream_export('events', queryset, 'ndjson')
+    export_event_data_ndjson.short_description = "📊 Export event data to NDJSON"
+
 
 # ============================
 # BOOKING ADMIN
@@ -405,6 +395,7 @@ class BookingAdmin(admin.ModelAdmin):
     readonly_fields = ("booked_at", "total_price", "booking_details")
     date_hierarchy = "booked_at"
     list_per_page = 30
+    list_select_related = ("user", "event", "payment")
     actions = ['send_confirmation_emails', 'refund_bookings', 'upgrade_to_vip']
     
     fieldsets = (
@@ -459,6 +450,7 @@ class BookingAdmin(admin.ModelAdmin):
         try:
             payment = obj.payment
             status_colors = {
+                'submitted': '#17a2b8',
                 'completed': '#28a745',
                 'pending': '#ffc107',
                 'failed': '#dc3545',
@@ -530,7 +522,7 @@ class BookingAdmin(admin.ModelAdmin):
                 count += 1
             except Exception as e:
                 pass
-        self.message_user(request, f"📧 Sent confirmation emails for {count} booking(s).")
+        self.message_user(request, f"📧 Queued confirmation emails for {count} booking(s).")
     send_confirmation_emails.short_description = "📧 Send confirmation emails"
     
     def refund_bookings(self, request, queryset):
@@ -538,21 +530,12 @@ class BookingAdmin(admin.ModelAdmin):
         count = 0
         for booking in queryset:
             try:
-                # Mark payment as refunded
+                # Mark payment as refunded; the pre_save signal gives the
+                # seats back through the inventory service
                 payment = booking.payment
                 payment.status = 'refunded'
                 payment.notes += f"\n\nRefunded by admin: {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
                 payment.save()
-                
-                # Restore seats
-                event = booking.event
-                if booking.ticket_type == 'vip':
-                    event.vip_seats_left = (event.vip_seats_left or 0) + booking.tickets
-                elif booking.ticket_type == 'gold':
-                    event.gold_seats_left = (event.gold_seats_left or 0) + booking.tickets
-                elif booking.ticket_type == 'standard':
-                    event.standard_seats_left = (event.standard_seats_left or 0) + booking.tickets
-                event.save()
                 count += 1
             except Exception as e:
                 pass
@@ -563,22 +546,12 @@ class BookingAdmin(admin.ModelAdmin):
         """Upgrade selected bookings to VIP (if VIP seats available)"""
         count = 0
         for booking in queryset.filter(ticket_type__in=['gold', 'standard']):
-            event = booking.event
-            if (event.vip_seats_left or 0) >= booking.tickets:
-                # Update booking
-                old_type = booking.ticket_type
-                booking.ticket_type = 'vip'
-                booking.total_price = booking.tickets * 1500  # VIP price
-                booking.save()
-                
-                # Update seat counts
-                if old_type == 'gold':
-                    event.gold_seats_left = (event.gold_seats_left or 0) + booking.tickets
-                elif old_type == 'standard':
-                    event.standard_seats_left = (event.standard_seats_left or 0) + booking.tickets
-                event.vip_seats_left = (event.vip_seats_left or 0) - booking.tickets
-                event.save()
-                count += 1
+            # Take the VIP seats first; skipped when VIP is full
+            if not move_seats(booking.event_id, booking.ticket_type, 'vip', booking.tickets):
+                continue
+            booking.ticket_type = 'vip'
+            booking.save()  # Booking.save recalculates the VIP price
+            count += 1
         self.message_user(request, f"⭐ Upgraded {count} booking(s) to VIP status.")
     upgrade_to_vip.short_description = "⭐ Upgrade to VIP (free)"
 
@@ -593,6 +566,7 @@ class EventGalleryAdmin(admin.ModelAdmin):
     search_fields = ("event__title", "caption")
     list_editable = ("order",)
     list_per_page = 20
+    list_select_related = ("event",)
     
     fieldsets = (
         ("📋 Basic Information", {
@@ -608,7 +582,7 @@ class EventGalleryAdmin(admin.ModelAdmin):
         if obj.image:
             return format_html(
                 '<img src="{}" style="width: 80px; height: 80px; object-fit: cover; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);" />',
-                obj.image.url
+                thumbnail_url(obj.image)
             )
         else:
             return format_html(
@@ -658,8 +632,16 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     readonly_fields = ("transaction_id", "created_at", "updated_at", "transaction_details", "payment_summary", "user_booking_history")
     date_hierarchy = "created_at"
     list_per_page = 25
-    actions = ['approve_payments', 'reject_payments', 'mark_as_pending', 'export_transactions']
+    actions = ['approve_payments', 'reject_payments', 'mark_as_pending', 'export_transactions', 'export_transactions_gzip', 'export_transactions_ndjson', 'export_transactions_background']
     ordering = ('-created_at',)
+    list_select_related = ("booking__user", "booking__event__category")
+
+    def get_queryset(self, request):
+        user_bookings = (
+            Booking.objects.filter(user=OuterRef('booking__user'))
+            .order_by().values('user').annotate(total=Count('id')).values('total')
+        )
+        return super().get_queryset(request).annotate(user_booking_total=Subquery(user_bookings))
     
     fieldsets = (
         ("🔍 Transaction Overview", {
@@ -716,9 +698,8 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     transaction_id_display.short_description = "TRANSACTION ID"
 
     def user_details(self, obj):
-        # Count user's total bookings
-        user_bookings = obj.booking.user.booking_set.count()
-        user_payments = PaymentTransaction.objects.filter(booking__user=obj.booking.user).count()
+        # User's total bookings (annotated in get_queryset)
+        user_bookings = obj.user_booking_total
         
         # Determine user status
         if user_bookings >= 5:
@@ -811,6 +792,7 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
 
     def status_badge(self, obj):
         status_config = {
+            'submitted': ('#17a2b8', '📨', 'Submitted'),
             'completed': ('#28a745', '✅', 'Approved'),
             'pending': ('#ffc107', '⏳', 'Pending'),
             'failed': ('#dc3545', '❌', 'Failed'),
@@ -913,6 +895,7 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     def payment_summary(self, obj):
         """Enhanced payment overview with visual elements"""
         status_colors = {
+            'submitted': '#17a2b8',
             'completed': '#28a745',
             'pending': '#ffc107', 
             'failed': '#dc3545',
@@ -1009,14 +992,18 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     user_booking_history.short_description = "User History"
 
     def approve_payments(self, request, queryset):
-        """Bulk action to approve pending payments"""
-        count = 0
-        for payment in queryset.filter(status='pending'):
-            payment.status = 'completed'
-            payment.notes += f"\n\nApproved by admin: {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            payment.save()
-            count += 1
-        self.message_user(request, f"✅ Successfully approved {count} payment(s). Confirmation emails sent to users.")
+        """Bulk action to approve pending payments (set-based, see events/approvals.py)"""
+        summary = bulk_approve(queryset, approved_by=request.user.username)
+        timings = summary['timings']
+        self.message_user(
+            request,
+            f"✅ Successfully approved {summary['approved']} payment(s) in {timings['total']:.0f} ms "
+            f"({summary['seats_reserved']} seat(s) reserved, {summary['emails_queued']} confirmation email(s) queued)."
+        )
+        if summary['sold_out']:
+            self.message_user(request, f"❌ {summary['sold_out']} payment(s) not approved: not enough seats left.", level=messages.WARNING)
+        if summary['skipped']:
+            self.message_user(request, f"⏭️ {summary['skipped']} selected payment(s) were not pending and were skipped.", level=messages.INFO)
     approve_payments.short_description = "✅ Approve selected payments"
 
     def reject_payments(self, request, queryset):
@@ -1042,33 +1029,30 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     mark_as_pending.short_description = "⏳ Mark as pending review"
 
     def export_transactions(self, request, queryset):
-        """Export selected transactions to CSV"""
-        import csv
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="payment_transactions.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Transaction ID', 'User', 'Email', 'Event', 'Amount', 'Method', 'Status', 'Created', 'Phone'])
-        
-        for payment in queryset:
-            writer.writerow([
-                payment.transaction_id,
-                payment.booking.user.username,
-                payment.booking.user.email,
-                payment.booking.event.title,
-                float(payment.amount),
-                payment.get_payment_method_display(),
-                payment.get_status_display(),
-                payment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                payment.phone_number or ''
-            ])
-        
-        self.message_user(request, f"📊 Exported {queryset.count()} transactions to CSV.")
-        return response
+        """Stream selected transactions as CSV"""
+        return exports.stream_export('transactions', queryset, 'csv')
     export_transactions.short_description = "📊 Export to CSV"
 
+    def export_transactions_gzip(self, request, queryset):
+        """Stream selected transactions as gzip-compressed CSV"""
+        return exports.stream_export('transactions', queryset, 'csv', compress=True)
+    export_transactions_gzip.short_description = "📊 Export to CSV (gzip)"
+
+    def export_transactions_ndjson(self, request, queryset):
+        """Stream selected transactions as NDJSON"""
+        return exports.stream_export('transactions', queryset, 'ndjson')
+    export_transactions_ndjson.short_description = "📊 Export to NDJSON"
+
+    def export_transactions_background(self, request, queryset):
+        """Write the export in the job worker and email a download link"""
+        job = exports.queue_export('transactions', queryset, 'csv', compress=True, requested_by=request.user)
+        notice = f" The download link will be emailed to {request.user.email}." if request.user.email else ""
+        self.message_user(
+            request,
+            f"📦 Export of {len(job.payload['ids'])} transactions queued as job #{job.id}.{notice}"
+        )
+    export_transactions_background.short_description = "📦 Export to CSV in the background (large exports)"
+
     def transaction_details(self, obj):
         proof_html = ''
         if obj.payment_proof:
@@ -1118,6 +1102,13 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "user__email", "phone_number")
     readonly_fields = ("created_at", "updated_at", "user_stats")
     list_per_page = 30
+    list_select_related = ("user",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            booking_total=Count('user__booking'),
+            spent_total=Sum('user__booking__total_price'),
+        )
     
     fieldsets = (
         ("User Information", {
@@ -1150,7 +1141,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     phone_display.short_description = "Phone Number"
     
     def bookings_count(self, obj):
-        count = obj.user.booking_set.count()
+        count = obj.booking_total
         return format_html(
             '<span style="background: #17a2b8; color: white; padding: 3px 10px; border-radius: 12px; font-weight: bold;">{}</span>',
             count
@@ -1158,7 +1149,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     bookings_count.short_description = "Bookings"
     
     def total_spent(self, obj):
-        total = obj.user.booking_set.aggregate(total=Sum('total_price'))['total']
+        total = obj.spent_total
         if total is None:
             total = 0
         else:
@@ -1166,6 +1157,7 @@ class UserProfileAdmin(admin.ModelAdmin):
         formatted_amount = f"K{total:,.0f}"
         return format_html('<strong style="color: #28a745;">{}</strong>', formatted_amount)
     total_spent.short_description = "Total Spent"
+    total_spent.admin_order_field = "spent_total"
     
     def date_joined(self, obj):
         return format_html(
@@ -1221,63 +1213,14 @@ admin.site.index_title = "Welcome to Momenta Management Dashboard"
 
 # Custom admin context processor for dashboard data
 def admin_dashboard_context(request):
-    """Add dashboard analytics to admin context"""
-    if not request.path.startswith('/admin/'):
+    """Add dashboard analytics to the admin index (cached, see events/dashboard.py)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.view_name != 'admin:index':
         return {}
     
     try:
-        # Get current date ranges
-        today = timezone.now().date()
-        this_week = today - timedelta(days=7)
-        this_month = today - timedelta(days=30)
-        
-        # Revenue analytics
-        total_revenue = PaymentTransaction.objects.filter(status='completed').aggregate(
-            total=Sum('amount'))['total'] or 0
-        weekly_revenue = PaymentTransaction.objects.filter(
-            status='completed', created_at__date__gte=this_week).aggregate(
-            total=Sum('amount'))['total'] or 0
-        monthly_revenue = PaymentTransaction.objects.filter(
-            status='completed', created_at__date__gte=this_month).aggregate(
-            total=Sum('amount'))['total'] or 0
-        
-        # Booking analytics
-        total_bookings = Booking.objects.count()
-        pending_payments = PaymentTransaction.objects.filter(status='pending').count()
-        completed_payments = PaymentTransaction.objects.filter(status='completed').count()
-        
-        # Event analytics
-        upcoming_events = Event.objects.filter(date__gte=today).count()
-        past_events = Event.objects.filter(date__lt=today).count()
-        
-        # User analytics
-        total_users = UserProfile.objects.count()
-        new_users_this_week = UserProfile.objects.filter(created_at__date__gte=this_week).count()
-        
-        # Popular events (most bookings)
-        popular_events = Event.objects.annotate(
-            booking_count=Count('bookings')
-        ).order_by('-booking_count')[:5]
-        
-        # Recent activity
-        recent_bookings = Booking.objects.select_related('user', 'event').order_by('-booked_at')[:10]
-        recent_payments = PaymentTransaction.objects.select_related('booking__user', 'booking__event').order_by('-created_at')[:10]
-        
-        return {
-            'total_revenue': float(total_revenue),
-            'weekly_revenue': float(weekly_revenue),
-            'monthly_revenue': float(monthly_revenue),
-            'total_bookings': total_bookings,
-            'pending_payments': pending_payments,
-            'completed_payments': completed_payments,
-            'upcoming_events': upcoming_events,
-            'past_events': past_events,
-            'total_users': total_users,
-            'new_users_this_week': new_users_this_week,
-            'popular_events': popular_events,
-            'recent_bookings': recent_bookings,
-            'recent_payments': recent_payments,
-        }
+        with dbrouting.replica_reads(request):
+            return dashboard.get_metrics()
     except Exception as e:
         # Return empty context if there's any error
         return {}
@@ -1292,6 +1235,9 @@ class VenueAdmin(admin.ModelAdmin):
     search_fields = ("name", "address", "contact_person")
     readonly_fields = ("created_at", "venue_stats")
     list_per_page = 20
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(booking_total=Count('bookings'))
     
     fieldsets = (
         ("Venue Information", {
@@ -1343,7 +1289,7 @@ class VenueAdmin(admin.ModelAdmin):
     contact_info.short_description = "Contact"
     
     def bookings_count(self, obj):
-        count = obj.bookings.count()
+        count = obj.booking_total
         return format_html(
             '<span style="background: #ffc107; color: white; padding: 3px 10px; border-radius: 12px; font-weight: bold;">{}</span>',
             count
@@ -1454,6 +1400,8 @@ class VenueBookingAdmin(admin.ModelAdmin):
     readonly_fields = ("total_cost", "created_at", "updated_at", "booking_details")
     date_hierarchy = "start_datetime"
     list_per_page = 20
+    list_select_related = ("venue", "event")
+    actions = ['check_conflicts']
     
     fieldsets = (
         ("Booking Information", {
@@ -1504,13 +1452,13 @@ class VenueBookingAdmin(admin.ModelAdmin):
         duration = (obj.end_datetime - obj.start_datetime).total_seconds() / 3600
         total_hours = duration + obj.setup_hours + obj.cleanup_hours
         return format_html(
-            '<div style="text-align: center;"><strong>{:.1f}h</strong><br><span style="font-size: 10px;">({:.1f}h event + {}h setup + {}h cleanup)</span></div>',
-            total_hours, duration, obj.setup_hours, obj.cleanup_hours
+            '<div style="text-align: center;"><strong>{}h</strong><br><span style="font-size: 10px;">({}h event + {}h setup + {}h cleanup)</span></div>',
+            f"{total_hours:.1f}", f"{duration:.1f}", obj.setup_hours, obj.cleanup_hours
         )
     duration_display.short_description = "Duration"
     
     def cost_display(self, obj):
-        return format_html('<strong style="color: #28a745; font-size: 14px;">K{:,.0f}</strong>', float(obj.total_cost))
+        return format_html('<strong style="color: #28a745; font-size: 14px;">K{}</strong>', f"{obj.total_cost:,.0f}")
     cost_display.short_description = "Total Cost"
     
     def status_badge(self, obj):
@@ -1528,6 +1476,8 @@ class VenueBookingAdmin(admin.ModelAdmin):
     status_badge.short_description = "Status"
     
     def booking_details(self, obj):
+        if not obj.pk:
+            return "-"
         duration = (obj.end_datetime - obj.start_datetime).total_seconds() / 3600
         total_hours = duration + obj.setup_hours + obj.cleanup_hours
         
@@ -1538,12 +1488,12 @@ class VenueBookingAdmin(admin.ModelAdmin):
             '<p><strong>Venue:</strong> {} (Capacity: {})</p>'
             '<p><strong>Date:</strong> {}</p>'
             '<p><strong>Time:</strong> {} - {}</p>'
-            '<p><strong>Event Duration:</strong> {:.1f} hours</p>'
+            '<p><strong>Event Duration:</strong> {} hours</p>'
             '<p><strong>Setup Time:</strong> {} hours</p>'
             '<p><strong>Cleanup Time:</strong> {} hours</p>'
-            '<p><strong>Total Hours:</strong> {:.1f} hours</p>'
-            '<p><strong>Hourly Rate:</strong> K{:,.0f}</p>'
-            '<p><strong>Total Cost:</strong> K{:,.0f}</p>'
+            '<p><strong>Total Hours:</strong> {} hours</p>'
+            '<p><strong>Hourly Rate:</strong> K{}</p>'
+            '<p><strong>Total Cost:</strong> K{}</p>'
             '<p><strong>Status:</strong> {}</p>'
             '<p><strong>Notes:</strong> {}</p>'
             '</div>',
@@ -1552,16 +1502,35 @@ class VenueBookingAdmin(admin.ModelAdmin):
             obj.start_datetime.strftime('%B %d, %Y'),
             obj.start_datetime.strftime('%I:%M %p'),
             obj.end_datetime.strftime('%I:%M %p'),
-            duration,
+            f"{duration:.1f}",
             obj.setup_hours,
             obj.cleanup_hours,
-            total_hours,
-            float(obj.venue.hourly_rate),
-            float(obj.total_cost),
+            f"{total_hours:.1f}",
+            f"{obj.venue.hourly_rate:,.0f}",
+            f"{obj.total_cost:,.0f}",
             obj.get_status_display(),
             obj.notes or 'No notes'
         )
     booking_details.short_description = "Details"
+
+    def check_conflicts(self, request, queryset):
+        """Report overlapping venue bookings among the selection and the schedule"""
+        found = find_venue_conflicts(queryset.select_related('venue', 'event'))
+        if not found:
+            self.message_user(request, "✅ No double bookings found.")
+            return
+        for conflict in found[:20]:
+            self.message_user(
+                request,
+                f"⚠️ {conflict.item.venue.name}: '{conflict.item.event.title}' overlaps '{conflict.other.event.title}' "
+                f"(setup/cleanup included).",
+                messages.WARNING
+            )
+        if len(found) > 20:
+            self.message_user(request, f"⚠️ ... and {len(found) - 20} more conflict(s).", messages.WARNING)
+    check_conflicts.short_description = "⚠️ Check for double bookings"
+
+
 # ============================
 # RESOURCE ALLOCATION ADMIN
 # ============================
@@ -1573,6 +1542,8 @@ class ResourceAllocationAdmin(admin.ModelAdmin):
     readonly_fields = ("total_cost", "created_at", "allocation_details")
     date_hierarchy = "start_date"
     list_per_page = 25
+    list_select_related = ("event", "resource")
+    actions = ['check_overallocation']
     
     fieldsets = (
         ("Allocation Information", {
@@ -1627,7 +1598,7 @@ class ResourceAllocationAdmin(admin.ModelAdmin):
     duration_display.short_description = "Duration"
     
     def cost_display(self, obj):
-        return format_html('<strong style="color: #28a745; font-size: 14px;">K{:,.0f}</strong>', float(obj.total_cost))
+        return format_html('<strong style="color: #28a745; font-size: 14px;">K{}</strong>', f"{obj.total_cost:,.0f}")
     cost_display.short_description = "Total Cost"
     
     def status_badge(self, obj):
@@ -1646,6 +1617,8 @@ class ResourceAllocationAdmin(admin.ModelAdmin):
     status_badge.short_description = "Status"
     
     def allocation_details(self, obj):
+        if not obj.pk:
+            return "-"
         duration_days = (obj.end_date - obj.start_date).days + 1
         
         return format_html(
@@ -1657,8 +1630,8 @@ class ResourceAllocationAdmin(admin.ModelAdmin):
             '<p><strong>Start Date:</strong> {}</p>'
             '<p><strong>End Date:</strong> {}</p>'
             '<p><strong>Duration:</strong> {} days</p>'
-            '<p><strong>Daily Rate:</strong> K{:,.0f}</p>'
-            '<p><strong>Total Cost:</strong> K{:,.0f}</p>'
+            '<p><strong>Daily Rate:</strong> K{}</p>'
+            '<p><strong>Total Cost:</strong> K{}</p>'
             '<p><strong>Status:</strong> {}</p>'
             '<p><strong>Supplier:</strong> {}</p>'
             '<p><strong>Notes:</strong> {}</p>'
@@ -1669,10 +1642,179 @@ class ResourceAllocationAdmin(admin.ModelAdmin):
             obj.start_date.strftime('%B %d, %Y'),
             obj.end_date.strftime('%B %d, %Y'),
             duration_days,
-            float(obj.resource.cost_per_day),
-            float(obj.total_cost),
+            f"{obj.resource.cost_per_day:,.0f}",
+            f"{obj.total_cost:,.0f}",
             obj.get_status_display(),
             obj.resource.supplier_name or 'No supplier info',
             obj.notes or 'No notes'
         )
-    allocation_details.short_description = "Details"
\ No newline at end of file
+    allocation_details.short_description = "Details"
+
+    def check_overallocation(self, request, queryset):
+        """Report days where the selected allocations need more units than are in stock"""
+        found = find_resource_overloads(queryset.select_related('resource'))
+        if not found:
+            self.message_user(request, "✅ No resource is over-allocated.")
+            return
+        for overload in found[:20]:
+            self.message_user(
+                request,
+                f"⚠️ {overload.resource.name}: {overload.in_use} of {overload.available} unit(s) needed "
+                f"{overload.first_day:%b %d} - {overload.last_day:%b %d, %Y}.",
+                messages.WARNING
+            )
+    check_overallocation.short_description = "⚠️ Check for over-allocated resources"
+
+
+# ============================
+# BACKGROUND JOB ADMIN
+# ============================
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("job_info", "kind", "status_badge", "attempts_display", "run_after", "locked_by", "updated_at")
+    list_filter = ("status", "kind")
+    search_fields = ("kind", "locked_by", "last_error")
+    readonly_fields = ("kind", "payload", "attempts", "locked_by", "locked_at", "result", "last_error", "created_at", "updated_at")
+    date_hierarchy = "created_at"
+    list_per_page = 50
+    actions = ['retry_jobs']
+
+    def job_info(self, obj):
+        return format_html('<strong>#{}</strong>', obj.id)
+    job_info.short_description = "Job ID"
+
+    def status_badge(self, obj):
+        colors = {
+            'queued': '#ffc107',
+            'running': '#17a2b8',
+            'done': '#28a745',
+            'failed': '#dc3545'
+        }
+        color = colors.get(obj.status, '#6c757d')
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 6px 12px; border-radius: 15px; font-size: 11px; font-weight: bold;">{}</span>',
+            color, obj.get_status_display()
+        )
+    status_badge.short_description = "Status"
+
+    def attempts_display(self, obj):
+        return format_html('<span>{} / {}</span>', obj.attempts, obj.max_attempts)
+    attempts_display.short_description = "Attempts"
+
+    def retry_jobs(self, request, queryset):
+        """Put failed jobs back on the queue"""
+        count = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_after=timezone.now(), locked_by='', locked_at=None
+        )
+        self.message_user(request, f"🔁 Re-queued {count} job(s).")
+    retry_jobs.short_description = "🔁 Retry failed jobs"
+
+
+
+# ============================
+# SEAT HOLD ADMIN
+# ============================
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("hold_info", "event", "user", "ticket_type", "quantity", "status_badge", "expires_at", "booking")
+    list_filter = ("status", "ticket_type", "event")
+    search_fields = ("user__username", "event__title")
+    readonly_fields = ("created_at", "updated_at")
+    raw_id_fields = ("booking",)
+    list_select_related = ("event", "user", "booking")
+    date_hierarchy = "created_at"
+    list_per_page = 50
+    actions = ['release_holds']
+
+    def hold_info(self, obj):
+        return format_html('<strong>#{}</strong>', obj.id)
+    hold_info.short_description = "Hold ID"
+
+    def status_badge(self, obj):
+        colors = {
+            'active': '#17a2b8' if obj.is_live else '#ffc107',
+            'converted': '#28a745',
+            'released': '#6c757d',
+            'expired': '#dc3545'
+        }
+        color = colors.get(obj.status, '#6c757d')
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 6px 12px; border-radius: 15px; font-size: 11px; font-weight: bold;">{}</span>',
+            color, obj.get_status_display()
+        )
+    status_badge.short_description = "Status"
+
+    def release_holds(self, request, queryset):
+        """Give held seats back to sale"""
+        count = queryset.filter(status='active').update(status='released', updated_at=timezone.now())
+        self.message_user(request, f"🔓 Released {count} seat hold(s).")
+    release_holds.short_description = "🔓 Release selected holds"
+
+
+
+# ============================
+# EMAIL OUTBOX ADMIN
+# ============================
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("email_info", "to_email", "subject", "status_badge", "attempts_display", "next_attempt_at", "sent_at")
+    list_filter = ("status", "recipient_domain")
+    search_fields = ("to_email", "subject", "last_error")
+    readonly_fields = ("to_email", "recipient_domain", "from_email", "subject", "body", "is_html", "attempts",
+                       "locked_by", "locked_at", "last_error", "sent_at", "created_at", "updated_at")
+    date_hierarchy = "created_at"
+    list_per_page = 50
+    actions = ['retry_emails']
+
+    def email_info(self, obj):
+        return format_html('<strong>#{}</strong>', obj.id)
+    email_info.short_description = "Email ID"
+
+    def status_badge(self, obj):
+        colors = {
+            'queued': '#ffc107',
+            'sending': '#17a2b8',
+            'sent': '#28a745',
+            'failed': '#dc3545'
+        }
+        color = colors.get(obj.status, '#6c757d')
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 6px 12px; border-radius: 15px; font-size: 11px; font-weight: bold;">{}</span>',
+            color, obj.get_status_display()
+        )
+    status_badge.short_description = "Status"
+
+    def attempts_display(self, obj):
+        return format_html('<span>{} / {}</span>', obj.attempts, obj.max_attempts)
+    attempts_display.short_description = "Attempts"
+
+    def retry_emails(self, request, queryset):
+        """Put failed emails back in the outbox"""
+        count = queryset.filter(status='failed').update(
+            status='queued', attempts=0, next_attempt_at=timezone.now(), locked_by='', locked_at=None
+        )
+        self.message_user(request, f"🔁 Re-queued {count} email(s).")
+    retry_emails.short_description = "🔁 Retry failed emails"
+
+
+
+# ============================
+# GATE CHECK-IN ADMIN
+# ============================
+@admin.register(CheckIn)
+class CheckInAdmin(admin.ModelAdmin):
+    list_display = ("ticket_info", "event", "gate", "device", "scanned_at", "synced_at")
+    list_filter = ("event", "gate")
+    search_fields = ("booking__id", "booking__user__username", "device", "gate")
+    readonly_fields = ("event", "booking", "seat", "device", "gate", "scanned_at", "synced_at")
+    list_select_related = ("event",)
+    date_hierarchy = "scanned_at"
+    list_per_page = 100
+
+    def ticket_info(self, obj):
+        return format_html('<strong>#{}</strong> / {}', f'{obj.booking_id:06d}', obj.seat)
+    ticket_info.short_description = "Ticket"
+
+    def has_add_permission(self, request):
+        # Check-ins come from the scanners
+        return False
@@ -0,0 +1,122 @@
+"""
+Bulk Payment Approval
+=====================
+
+``bulk_approve`` approves many pending payments at once without going
+through ``PaymentTransaction.save()`` (and therefore without the per-row
+``pre_save`` signal):
+
+1. one SELECT loads the pending rows with their booking's event, tier and
+   ticket count (locked FOR UPDATE where the database supports it);
+2. seat deltas are summed per (event, tier) and applied with one conditional
+   UPDATE per group; when a tier cannot take the whole group, payments are
+   approved oldest first while seats last and the rest stay pending;
+3. one UPDATE moves the approved rows to 'completed' and appends the admin
+   note, one UPDATE converts their seat holds;
+4. one INSERT queues every confirmation email in the outbox, the cached
+   dashboard counters get one delta for the whole batch and the sales
+   summary one increment per (event, tier).
+
+The result is a summary dict with counts and per-stage timings (ms).
+"""
+
+import time
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from . import dashboard, sales
+from .inventory import reserve_seats, seat_field
+from .models import Booking, Event, PaymentTransaction, SeatHold
+from .outbox import queue_many
+from .signals import confirmation_email
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _fit_to_stock(event_id, ticket_type, rows):
+    """Pick the rows (oldest first) that fit into what is left of the tier"""
+    field = seat_field(ticket_type)
+    left = Event.objects.select_for_update().values_list(field, flat=True).get(pk=event_id) or 0
+    chosen = []
+    for row in sorted(rows, key=lambda r: (r['created_at'], r['id'])):
+        if row['booking__tickets'] <= left:
+            chosen.append(row)
+            left -= row['booking__tickets']
+    return chosen
+
+
+def bulk_approve(queryset, approved_by):
+    """Approve the pending payments in ``queryset``; returns a summary dict"""
+    summary = {
+        'approved': 0,
+        'sold_out': 0,
+        'skipped': 0,
+        'seats_reserved': 0,
+        'emails_queued': 0,
+        'timings': {},
+    }
+    timings = summary['timings']
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        stage = time.perf_counter()
+        rows = list(
+            queryset.filter(status='pending').select_for_update()
+            .values('id', 'amount', 'created_at', 'booking_id', 'booking__event_id', 'booking__ticket_type', 'booking__tickets')
+        )
+        summary['skipped'] = queryset.count() - len(rows)
+        timings['select'] = _ms(stage)
+
+        stage = time.perf_counter()
+        groups = defaultdict(list)
+        for row in rows:
+            groups[(row['booking__event_id'], row['booking__ticket_type'])].append(row)
+
+        approved = []
+        for (event_id, ticket_type), group in groups.items():
+            wanted = sum(row['booking__tickets'] for row in group)
+            if not reserve_seats(event_id, ticket_type, wanted):
+                group = _fit_to_stock(event_id, ticket_type, group)
+                wanted = sum(row['booking__tickets'] for row in group)
+                if not group or not reserve_seats(event_id, ticket_type, wanted):
+                    group = []
+            approved.extend(group)
+            summary['seats_reserved'] += sum(row['booking__tickets'] for row in group)
+        timings['seats'] = _ms(stage)
+
+        stage = time.perf_counter()
+        approved_ids = [row['id'] for row in approved]
+        booking_ids = [row['booking_id'] for row in approved]
+        note = (
+            f"\n\nApproved by admin: {approved_by} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            f"\n\nPayment confirmed by admin (bulk approval). Seats reserved."
+        )
+        summary['approved'] = PaymentTransaction.objects.filter(id__in=approved_ids).update(
+            status='completed',
+            notes=Concat('notes', Value(note)),
+            updated_at=timezone.now(),
+        )
+        SeatHold.objects.filter(booking_id__in=booking_ids, status__in=['active', 'expired']).update(
+            status='converted', updated_at=timezone.now()
+        )
+        summary['sold_out'] = len(rows) - len(approved)
+        dashboard.payment_status_changed(
+            'pending', 'completed', sum(row['amount'] for row in approved), count=summary['approved']
+        )
+        sales.payments_approved(approved)
+        timings['update'] = _ms(stage)
+
+        stage = time.perf_counter()
+        bookings = Booking.objects.filter(id__in=booking_ids).select_related('user', 'event', 'payment')
+        emails = [confirmation_email(booking, booking.event, booking.payment) for booking in bookings]
+        summary['emails_queued'] = len(queue_many(emails))
+        timings['emails'] = _ms(stage)
+
+    timings['total'] = _ms(started)
+    return summary
@@ -6,3 +6,6 @@ class EventsConfig(AppConfig):
     
     def ready(self):
         import events.signals  # Register signals
+        import events.payments  # Register background job handlers
+        from events.holds import start_sweeper
+        start_sweeper()  # Only runs when SEAT_HOLD_SWEEP_INTERVAL is set
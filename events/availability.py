@@ -0,0 +1,159 @@
+"""
+Venue Availability
+==================
+
+Answers "when is this venue busy?" for any window with one query:
+
+* ``occupied_intervals`` loads the venue's pending/confirmed bookings that
+  touch the window in a single range query. Each booking occupies the venue
+  from ``start - setup_hours`` to ``end + cleanup_hours`` (the same hours
+  ``VenueBooking.save`` bills for), and may span several days.
+* ``merge_intervals`` folds overlapping/adjacent intervals together so busy
+  time is never counted twice.
+* ``day_calendar`` / ``month_view`` / ``year_view`` sweep the intervals
+  across local days (or months) in one pass.
+* ``venue_stats`` aggregates booking count and revenue in the database.
+"""
+
+import calendar
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import VenueBooking
+
+BLOCKING_STATUSES = ('pending', 'confirmed')
+
+# Setup/cleanup widen a booking beyond its own start/end. The range query pads
+# the window by this much so those bookings are found; the exact per-booking
+# padding is applied in Python. VenueBooking validates both fields against the
+# same bound, so nothing can reach further than the padding.
+MAX_TURNAROUND = timedelta(hours=VenueBooking.MAX_TURNAROUND_HOURS)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def occupied_intervals(venue, start, end):
+    """
+    (occupied_from, occupied_until, booking) for every blocking booking that
+    overlaps [start, end), including setup and cleanup time. One query.
+    """
+    bookings = (
+        VenueBooking.objects.filter(
+            venue=venue,
+            status__in=BLOCKING_STATUSES,
+            start_datetime__lt=end + MAX_TURNAROUND,
+            end_datetime__gt=start - MAX_TURNAROUND,
+        )
+        .select_related('event')
+        .order_by('start_datetime')
+    )
+    intervals = []
+    for booking in bookings:
+        occupied_from = booking.start_datetime - timedelta(hours=booking.setup_hours)
+        occupied_until = booking.end_datetime + timedelta(hours=booking.cleanup_hours)
+        if occupied_from < end and occupied_until > start:
+            intervals.append((occupied_from, occupied_until, booking))
+    return intervals
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end, ...) intervals into sorted (start, end) pairs"""
+    merged = []
+    for start, end, *_ in sorted(intervals, key=lambda interval: interval[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _overlap_hours(busy, window_start, window_end):
+    seconds = 0
+    for start, end in busy:
+        if start >= window_end:
+            break
+        if end > window_start:
+            seconds += (min(end, window_end) - max(start, window_start)).total_seconds()
+    return round(seconds / 3600, 2)
+
+
+def _days(first_day, last_day):
+    day = first_day
+    while day <= last_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_calendar(venue, first_day, last_day, intervals=None):
+    """
+    One entry per local day from ``first_day`` to ``last_day`` inclusive:
+    ``date``, ``available``, ``bookings_count`` and ``busy_hours``.
+    """
+    if intervals is None:
+        intervals = occupied_intervals(venue, _day_start(first_day), _day_start(last_day + timedelta(days=1)))
+    busy = merge_intervals(intervals)
+    by_start = sorted(intervals, key=lambda interval: interval[0])
+
+    days = []
+    active = []  # intervals that started before the current day ends
+    cursor = 0
+    for day in _days(first_day, last_day):
+        day_start, day_end = _day_start(day), _day_start(day + timedelta(days=1))
+        while cursor < len(by_start) and by_start[cursor][0] < day_end:
+            active.append(by_start[cursor])
+            cursor += 1
+        active = [interval for interval in active if interval[1] > day_start]
+        # Drop merged blocks that finished before today so the scan stays short
+        while busy and busy[0][1] <= day_start:
+            busy.pop(0)
+        days.append({
+            'date': day,
+            'available': not active,
+            'bookings_count': len(active),
+            'busy_hours': _overlap_hours(busy, day_start, day_end),
+        })
+    return days
+
+
+def month_view(venue, year, month):
+    """Day calendar for one month"""
+    last = calendar.monthrange(year, month)[1]
+    first_day = datetime(year, month, 1).date()
+    return day_calendar(venue, first_day, first_day.replace(day=last))
+
+
+def year_view(venue, year):
+    """Per-month summary for a year, from one query"""
+    first_day = datetime(year, 1, 1).date()
+    last_day = datetime(year, 12, 31).date()
+    intervals = occupied_intervals(venue, _day_start(first_day), _day_start(last_day + timedelta(days=1)))
+    days = day_calendar(venue, first_day, last_day, intervals=intervals)
+
+    months = []
+    for month in range(1, 13):
+        month_days = [day for day in days if day['date'].month == month]
+        busy_hours = round(sum(day['busy_hours'] for day in month_days), 2)
+        months.append({
+            'month': month,
+            'name': calendar.month_name[month],
+            'days': len(month_days),
+            'booked_days': sum(1 for day in month_days if not day['available']),
+            'busy_hours': busy_hours,
+            'occupancy': round(100 * busy_hours / (24 * len(month_days)), 1),
+        })
+    return months
+
+
+def venue_stats(venue):
+    """Total bookings and revenue for a venue, aggregated in the database"""
+    totals = VenueBooking.objects.filter(venue=venue).aggregate(
+        total_bookings=Count('id'),
+        total_revenue=Sum('total_cost'),
+    )
+    totals['total_revenue'] = totals['total_revenue'] or 0
+    return totals
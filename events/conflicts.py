@@ -0,0 +1,284 @@
+"""
+Booking Conflict Detection
+==========================
+
+Keeps venues from being double-booked and resources from being allocated
+beyond ``quantity_available``:
+
+* **Venues** — a booking occupies its venue from ``start - setup_hours`` to
+  ``end + cleanup_hours`` (see ``availability.occupied_intervals``). A
+  pending/confirmed booking may not overlap another one on the same venue.
+  Single checks are one range query on the ``(venue, start_datetime,
+  end_datetime)`` index.
+* **Resources** — allocations are inclusive date ranges. A sweep-line over
+  the overlapping allocations gives the peak number of units in use on any
+  day; adding the new allocation must not push it past the stock.
+* **Batches** (importing a season, the admin "check" actions) load each
+  venue's bookings once and query an in-memory ``IntervalTree`` instead of
+  comparing every pair.
+
+``VenueBooking``/``ResourceAllocation`` call ``check_venue_booking`` /
+``check_allocation`` from ``clean()`` (form errors in the admin) and again in
+``save()`` under a row lock on the venue/resource, raising ``BookingConflict``.
+"""
+
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+
+from .availability import BLOCKING_STATUSES, MAX_TURNAROUND, occupied_intervals
+
+ACTIVE_ALLOCATION_STATUSES = ('requested', 'confirmed', 'delivered')
+
+Conflict = namedtuple('Conflict', 'item other')
+Overload = namedtuple('Overload', 'resource first_day last_day in_use available')
+
+
+class BookingConflict(ValidationError):
+    """A venue booking or resource allocation clashes with existing ones"""
+
+    def __init__(self, message, conflicts=()):
+        super().__init__(message, code='conflict')
+        self.conflicts = list(conflicts)
+
+
+# ============================
+# INTERVAL TREE
+# ============================
+class _Node:
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+
+class IntervalTree:
+    """
+    Static centred interval tree over half-open ``[start, end)`` intervals
+    given as ``(start, end, payload)``. ``overlapping(start, end)`` returns
+    the intervals intersecting the query in O(log n + k).
+    """
+
+    def __init__(self, intervals):
+        self.root = self._build([interval for interval in intervals if interval[0] < interval[1]])
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        starts = sorted(interval[0] for interval in intervals)
+        center = starts[len(starts) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        node = _Node()
+        node.center = center
+        node.by_start = sorted(here, key=lambda interval: interval[0])
+        node.by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def overlapping(self, start, end):
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                # Every interval here ends after the centre, so only the start matters
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    found.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                for interval in node.by_end:
+                    if interval[1] <= start:
+                        break
+                    found.append(interval)
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return found
+
+
+# ============================
+# VENUES
+# ============================
+def occupied_span(booking):
+    """The [from, until) a booking keeps its venue busy, turnaround included"""
+    return (
+        booking.start_datetime - timedelta(hours=booking.setup_hours or 0),
+        booking.end_datetime + timedelta(hours=booking.cleanup_hours or 0),
+    )
+
+
+def venue_conflicts(booking):
+    """Blocking bookings on the same venue that overlap ``booking`` (one query)"""
+    start, end = occupied_span(booking)
+    return [
+        other for _, _, other in occupied_intervals(booking.venue_id, start, end)
+        if other.pk != booking.pk
+    ]
+
+
+def _describe_booking(other):
+    return (
+        f"'{other.event.title}' ({other.start_datetime:%b %d %H:%M} - {other.end_datetime:%b %d %H:%M}, "
+        f"{other.get_status_display().lower()})"
+    )
+
+
+def check_venue_booking(booking):
+    """Raise BookingConflict if a blocking ``booking`` overlaps another one"""
+    if booking.status not in BLOCKING_STATUSES:
+        return
+    conflicts = venue_conflicts(booking)
+    if conflicts:
+        listed = ', '.join(_describe_booking(other) for other in conflicts[:3])
+        more = f" and {len(conflicts) - 3} more" if len(conflicts) > 3 else ""
+        raise BookingConflict(
+            f"{booking.venue.name} is already booked (including setup/cleanup) by {listed}{more}.",
+            conflicts,
+        )
+
+
+def find_venue_conflicts(bookings):
+    """
+    Conflicts for a batch of (saved or unsaved) venue bookings, against the
+    database and against each other. One query per venue; returns a list of
+    ``Conflict(item, other)`` with each clashing pair reported once.
+    """
+    from .models import VenueBooking
+
+    by_venue = defaultdict(list)
+    for booking in bookings:
+        if booking.status in BLOCKING_STATUSES:
+            by_venue[booking.venue_id].append(booking)
+
+    conflicts = []
+    for venue_id, batch in by_venue.items():
+        spans = [occupied_span(booking) for booking in batch]
+        window_start = min(start for start, _ in spans)
+        window_end = max(end for _, end in spans)
+        batch_pks = {booking.pk for booking in batch if booking.pk}
+        existing = (
+            VenueBooking.objects.filter(
+                venue_id=venue_id,
+                status__in=BLOCKING_STATUSES,
+                start_datetime__lt=window_end + MAX_TURNAROUND,
+                end_datetime__gt=window_start - MAX_TURNAROUND,
+            )
+            .exclude(pk__in=batch_pks)
+            .select_related('event')
+        )
+        # Payload: (position in batch or None for stored rows, booking)
+        intervals = [(*occupied_span(other), (None, other)) for other in existing]
+        intervals += [(start, end, (index, booking)) for index, (booking, (start, end)) in enumerate(zip(batch, spans))]
+        tree = IntervalTree(intervals)
+        for index, (booking, (start, end)) in enumerate(zip(batch, spans)):
+            for _, _, (other_index, other) in tree.overlapping(start, end):
+                # Stored rows are reported for every item; pairs inside the batch once
+                if other_index is None or other_index > index:
+                    conflicts.append(Conflict(booking, other))
+    return conflicts
+
+
+# ============================
+# RESOURCES
+# ============================
+def sweep_usage(allocations):
+    """
+    Units in use per stretch of days for ``(start_date, end_date, quantity)``
+    items with inclusive dates. Yields ``(first_day, last_day, in_use)`` for
+    each maximal stretch with constant usage, in date order.
+    """
+    deltas = defaultdict(int)
+    for start, end, quantity in allocations:
+        deltas[start] += quantity
+        deltas[end + timedelta(days=1)] -= quantity
+    in_use = 0
+    days = sorted(deltas)
+    for day, next_day in zip(days, days[1:]):
+        in_use += deltas[day]
+        if in_use:
+            yield day, next_day - timedelta(days=1), in_use
+
+
+def peak_usage(allocations):
+    """(peak units in use, first day of the peak) for the given allocations"""
+    peak, peak_day = 0, None
+    for first_day, _, in_use in sweep_usage(allocations):
+        if in_use > peak:
+            peak, peak_day = in_use, first_day
+    return peak, peak_day
+
+
+def _active_allocations(resource_id, start_date, end_date, exclude=()):
+    from .models import ResourceAllocation
+
+    return (
+        ResourceAllocation.objects.filter(
+            resource_id=resource_id,
+            status__in=ACTIVE_ALLOCATION_STATUSES,
+            start_date__lte=end_date,
+            end_date__gte=start_date,
+        )
+        .exclude(pk__in=[pk for pk in exclude if pk])
+        .values_list('start_date', 'end_date', 'quantity_needed')
+        .order_by()  # sweep_usage sorts; skip the default created_at sort
+    )
+
+
+def check_allocation(allocation):
+    """Raise BookingConflict if ``allocation`` would exceed the resource's stock on any day"""
+    if allocation.status not in ACTIVE_ALLOCATION_STATUSES:
+        return
+    resource = allocation.resource
+    others = [
+        (max(start, allocation.start_date), min(end, allocation.end_date), quantity)
+        for start, end, quantity in _active_allocations(
+            resource.pk, allocation.start_date, allocation.end_date, exclude=[allocation.pk]
+        )
+    ]
+    peak, day = peak_usage(others)
+    if peak + allocation.quantity_needed > resource.quantity_available:
+        left = max(resource.quantity_available - peak, 0)
+        # Nothing else overlaps: the request alone is too big, from its first day
+        day = day or allocation.start_date
+        raise BookingConflict(
+            f"Only {left} of {resource.quantity_available} {resource.name} unit(s) are free on "
+            f"{day:%b %d, %Y}; {allocation.quantity_needed} requested."
+        )
+
+
+def find_resource_overloads(allocations):
+    """
+    Days where a batch of (saved or unsaved) allocations, together with the
+    stored ones, needs more units than a resource has. One query per resource.
+    """
+    by_resource = defaultdict(list)
+    for allocation in allocations:
+        if allocation.status in ACTIVE_ALLOCATION_STATUSES:
+            by_resource[allocation.resource_id].append(allocation)
+
+    overloads = []
+    for batch in by_resource.values():
+        resource = batch[0].resource
+        items = [(allocation.start_date, allocation.end_date, allocation.quantity_needed) for allocation in batch]
+        items += list(_active_allocations(
+            resource.pk,
+            min(allocation.start_date for allocation in batch),
+            max(allocation.end_date for allocation in batch),
+            exclude=[allocation.pk for allocation in batch],
+        ))
+        for first_day, last_day, in_use in sweep_usage(items):
+            if in_use > resource.quantity_available:
+                overloads.append(Overload(resource, first_day, last_day, in_use, resource.quantity_available))
+    return overloads
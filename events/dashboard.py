@@ -0,0 +1,194 @@
+"""
+Admin Dashboard Metrics
+=======================
+
+The admin index shows revenue, booking, payment and user figures. They are
+served from the cache instead of being aggregated on every admin page:
+
+* **Counters** (all-time revenue, bookings, pending/completed payments,
+  users) live in the ``DASHBOARD_CACHE_ALIAS`` cache, shared by the web
+  workers and ``run_jobs`` (which moves payments out of ``submitted``).
+  They are cached until the next reconcile and kept current incrementally:
+  the booking/payment/profile signals and the bulk approval path call
+  ``payment_status_changed`` / ``bump`` after commit, which re-set the
+  cached value with the time left until the reconcile deadline (``incr``
+  would restart the expiry at the cache's default timeout). Revenue is kept
+  in ngwee (integer cents). The read-modify-write is not atomic across
+  processes; an update lost to a race is corrected by the next reconcile.
+* **Windowed figures** (7/30-day revenue, event counts, new users, popular
+  events) are a snapshot with a ``DASHBOARD_METRICS_TTL`` expiry and can be
+  dropped explicitly with ``invalidate()``.
+* ``reconcile()`` recomputes everything from the source tables; it runs when
+  the counters expire (``DASHBOARD_RECONCILE_INTERVAL``) or from
+  ``manage.py reconcile_dashboard``, and corrects any drift from rolled-back
+  transactions or changes made outside the signals.
+"""
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, Event, EventSalesSummary, PaymentTransaction, UserProfile
+
+KEY_PREFIX = 'dashboard'
+COUNTERS = ('revenue_cents', 'total_bookings', 'pending_payments', 'completed_payments', 'total_users')
+SNAPSHOT_KEY = f'{KEY_PREFIX}:snapshot'
+RECONCILE_AT_KEY = f'{KEY_PREFIX}:reconcile_at'
+
+
+def counter_cache():
+    return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+
+def _key(name):
+    return f'{KEY_PREFIX}:{name}'
+
+
+def _store_counters(cache, counters):
+    """Cache freshly computed counters until the next reconcile is due"""
+    interval = settings.DASHBOARD_RECONCILE_INTERVAL
+    values = {_key(name): value for name, value in counters.items()}
+    values[RECONCILE_AT_KEY] = time.time() + interval
+    cache.set_many(values, interval)
+
+
+def _cents(amount):
+    return int((Decimal(amount or 0) * 100).to_integral_value())
+
+
+def compute_counters():
+    """All-time counters straight from the source tables (3 queries)"""
+    payments = PaymentTransaction.objects.aggregate(
+        revenue=Sum('amount', filter=Q(status='completed')),
+        pending=Count('id', filter=Q(status='pending')),
+        completed=Count('id', filter=Q(status='completed')),
+    )
+    return {
+        'revenue_cents': _cents(payments['revenue']),
+        'total_bookings': Booking.objects.count(),
+        'pending_payments': payments['pending'],
+        'completed_payments': payments['completed'],
+        'total_users': UserProfile.objects.count(),
+    }
+
+
+def compute_snapshot():
+    """Windowed figures and the popular events list (4 queries)"""
+    now = timezone.now()
+    today = timezone.localdate()
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+
+    revenue = PaymentTransaction.objects.filter(status='completed', created_at__gte=month_ago).aggregate(
+        weekly=Sum('amount', filter=Q(created_at__gte=week_ago)),
+        monthly=Sum('amount'),
+    )
+    events = Event.objects.aggregate(
+        upcoming=Count('id', filter=Q(date__gte=today)),
+        past=Count('id', filter=Q(date__lt=today)),
+    )
+    # Grouped over the sales summary (a row per event and tier), not every booking
+    popular = (
+        EventSalesSummary.objects.values('event_id', 'event__title', 'event__date', 'event__category__name')
+        .annotate(booking_count=Sum('bookings'))
+        .order_by('-booking_count', 'event_id')[:5]
+    )
+    return {
+        'weekly_revenue': float(revenue['weekly'] or 0),
+        'monthly_revenue': float(revenue['monthly'] or 0),
+        'upcoming_events': events['upcoming'],
+        'past_events': events['past'],
+        'new_users_this_week': UserProfile.objects.filter(created_at__gte=week_ago).count(),
+        # Plain dicts so the snapshot can be cached; shaped like the template expects
+        'popular_events': [
+            {
+                'id': row['event_id'],
+                'title': row['event__title'],
+                'date': row['event__date'],
+                'category': {'name': row['event__category__name']},
+                'booking_count': row['booking_count'],
+            }
+            for row in popular
+        ],
+    }
+
+
+def reconcile():
+    """Recompute counters and snapshot from the database and cache them"""
+    cache = counter_cache()
+    counters = compute_counters()
+    _store_counters(cache, counters)
+    snapshot = compute_snapshot()
+    cache.set(SNAPSHOT_KEY, snapshot, settings.DASHBOARD_METRICS_TTL)
+    return counters, snapshot
+
+
+def invalidate():
+    """Drop the windowed snapshot so the next admin index recomputes it"""
+    counter_cache().delete(SNAPSHOT_KEY)
+
+
+def bump(name, delta=1):
+    """Apply a delta to a cached counter once the current transaction commits"""
+    def apply():
+        cache = counter_cache()
+        cached = cache.get_many([_key(name), RECONCILE_AT_KEY])
+        value, reconcile_at = cached.get(_key(name)), cached.get(RECONCILE_AT_KEY)
+        if value is None or reconcile_at is None:
+            return  # Not cached yet: the next read computes it from the database
+        remaining = reconcile_at - time.time()
+        if remaining > 0:
+            # Keep the reconcile deadline; incr() would reset it to the default timeout
+            cache.set(_key(name), value + delta, remaining)
+    transaction.on_commit(apply)
+
+
+def payment_status_changed(old_status, new_status, amount, count=1):
+    """Keep payment counters and revenue in step with a status transition"""
+    if old_status == new_status:
+        return
+    for status, sign in ((old_status, -1), (new_status, 1)):
+        if status == 'pending':
+            bump('pending_payments', sign * count)
+        elif status == 'completed':
+            bump('completed_payments', sign * count)
+            bump('revenue_cents', sign * _cents(amount))
+    if 'completed' in (old_status, new_status):
+        transaction.on_commit(invalidate)
+
+
+def get_metrics():
+    """
+    Dashboard context for the admin index. Cached figures are used when
+    present; missing ones are recomputed. Recent activity lists are lazy
+    querysets, evaluated only if the template renders them.
+    """
+    cache = counter_cache()
+    cached = cache.get_many([_key(name) for name in COUNTERS] + [SNAPSHOT_KEY])
+    counters = {name: cached.get(_key(name)) for name in COUNTERS}
+    if any(value is None for value in counters.values()):
+        counters = compute_counters()
+        _store_counters(cache, counters)
+
+    snapshot = cached.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = compute_snapshot()
+        cache.set(SNAPSHOT_KEY, snapshot, settings.DASHBOARD_METRICS_TTL)
+
+    metrics = dict(snapshot)
+    metrics.update({
+        'total_revenue': counters['revenue_cents'] / 100,
+        'total_bookings': counters['total_bookings'],
+        'pending_payments': counters['pending_payments'],
+        'completed_payments': counters['completed_payments'],
+        'total_users': counters['total_users'],
+        'recent_bookings': Booking.objects.select_related('user', 'event').order_by('-booked_at')[:10],
+        'recent_payments': PaymentTransaction.objects.select_related('booking__user', 'booking__event').order_by('-created_at')[:10],
+    })
+    return metrics
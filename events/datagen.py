@@ -0,0 +1,556 @@
+"""
+Synthetic Dataset Generator
+===========================
+
+Fills a database with production-sized, realistic-looking data for
+benchmarks (``manage.py generate_dataset --scale N``). One unit of scale is
+``USERS_PER_SCALE`` users, ``EVENTS_PER_SCALE`` events and
+``BOOKINGS_PER_SCALE`` bookings (each with a payment), plus venues,
+resources, venue bookings and resource allocations.
+
+* **Realistic shape** — event popularity follows a Zipf curve (a few events
+  sell most tickets), event dates follow the season (December and weekends
+  are busy) over ``PAST_DAYS`` back to ``FUTURE_DAYS`` ahead, tickets are
+  bought mostly in the last weeks before an event, future events have only
+  sold part of their stock, and payment statuses/methods follow the
+  production mix. Seat counters, venue bookings and resource allocations are
+  consistent: nothing is oversold, double-booked or over-allocated.
+* **Deterministic** — the plan (every event's date, venue, resources and
+  booking count) comes from one seeded RNG; each shard of users or events
+  then uses its own RNG seeded from ``(seed, shard)``. The same seed and
+  anchor date give the same rows however many workers run. Only primary
+  keys and the time-ordered ``transaction_id``s differ between runs.
+* **Fast** — ``bulk_create`` in batches, one password hash shared by every
+  user, ``auto_now`` fields switched off so historical timestamps survive.
+  Shards run in parallel processes on PostgreSQL; SQLite (one writer) runs
+  them one after another.
+
+``bulk_create`` skips the signals, so ``finish()`` rebuilds the search
+index, reconciles the dashboard and purges the caches afterwards. Generated
+rows are recognisable by ``DOMAIN`` (user e-mails, venue contacts) and the
+``ds-`` category slugs; ``clear()`` removes them.
+"""
+
+import math
+import multiprocessing
+import random
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import accumulate
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .models import (
+    Booking, Category, CheckIn, Event, PaymentTransaction, Resource, ResourceAllocation, SeatHold, UserProfile, Venue,
+    VenueBooking,
+)
+
+USERS_PER_SCALE = 500
+EVENTS_PER_SCALE = 20
+BOOKINGS_PER_SCALE = 10_000
+VENUES_PER_SCALE = 1
+RESOURCES_PER_SCALE = 3
+
+PAST_DAYS = 540
+FUTURE_DAYS = 180
+ZIPF_EXPONENT = 0.8
+USERS_PER_SHARD = 5_000
+BOOKINGS_PER_SHARD = 20_000
+EVENTS_PER_SHARD = 200
+
+DOMAIN = 'dataset.invalid'
+USERNAME_PREFIX = 'ds_'
+SLUG_PREFIX = 'ds-'
+PASSWORD = 'password'
+
+TICKET_PRICES = {'vip': 1500, 'gold': 850, 'standard': 450}
+TIERS = (('standard', 0.70), ('gold', 0.20), ('vip', 0.10))
+TICKETS_PER_BOOKING = ((1, 0.55), (2, 0.30), (3, 0.08), (4, 0.07))
+BASE_CAPACITY = {'vip': 20, 'gold': 60, 'standard': 200}
+PAYMENT_METHODS = (('mtn', 0.45), ('airtel', 0.35), ('zamtel', 0.10), ('bank', 0.10))
+# Settled payments (booked more than two days ago) versus ones still in flight
+SETTLED_STATUSES = (('completed', 0.86), ('failed', 0.06), ('refunded', 0.03), ('pending', 0.03), ('submitted', 0.02))
+RECENT_STATUSES = (('completed', 0.55), ('pending', 0.25), ('submitted', 0.12), ('failed', 0.08))
+
+MONTH_WEIGHTS = (0.6, 0.6, 0.8, 1.0, 0.9, 0.9, 1.1, 1.2, 1.0, 1.1, 1.2, 1.6)
+WEEKDAY_WEIGHTS = (0.4, 0.4, 0.6, 0.8, 1.6, 2.0, 1.2)
+START_TIMES = ((time(9, 0), 0.15), (time(10, 0), 0.10), (time(14, 0), 0.15), (time(18, 0), 0.25),
+               (time(19, 0), 0.20), (time(20, 0), 0.15))
+
+CATEGORIES = (
+    ('Music & Concerts', 0.30, ('Jazz Night', 'Gospel Concert', 'Music Festival', 'Afro Beats Live', 'Acoustic Sessions')),
+    ('Tech & Innovation', 0.15, ('Tech Summit', 'Developer Meetup', 'Startup Pitch Day', 'AI Workshop', 'Hackathon')),
+    ('Food & Festivals', 0.15, ('Food & Wine Festival', 'Braai Day', 'Street Food Market', 'Coffee Expo')),
+    ('Business & Conferences', 0.12, ('Business Leaders Conference', 'Investment Forum', 'Mining Indaba', 'SME Expo')),
+    ('Sports & Fitness', 0.10, ('Fun Run', 'Boxing Night', 'Football Derby', 'Cycling Classic')),
+    ('Arts & Theatre', 0.08, ('Theatre Premiere', 'Poetry Slam', 'Art Exhibition', 'Dance Showcase')),
+    ('Comedy', 0.05, ('Comedy Night', 'Stand-up Special', 'Improv Evening')),
+    ('Community & Faith', 0.05, ('Charity Gala', 'Youth Conference', 'Prayer Breakfast')),
+)
+CITIES = ('Lusaka', 'Ndola', 'Kitwe', 'Livingstone', 'Kabwe', 'Chipata', 'Solwezi', 'Kasama', 'Mongu', 'Choma')
+VENUE_KINDS = (('Stadium', 20_000, 60_000, 2500), ('Conference Centre', 800, 4_000, 1200), ('Hall', 200, 1_500, 600),
+               ('Showgrounds', 5_000, 20_000, 1800), ('Theatre', 150, 800, 450), ('Hotel Ballroom', 200, 1_000, 900))
+FIRST_NAMES = ('Chanda', 'Mwila', 'Bwalya', 'Mutale', 'Natasha', 'Kondwani', 'Thandiwe', 'Musonda', 'Lubasi',
+               'Chipo', 'Mapalo', 'Taonga', 'Kalaba', 'Njavwa', 'Mulenga', 'Precious', 'Joseph', 'Grace')
+LAST_NAMES = ('Banda', 'Phiri', 'Mwale', 'Tembo', 'Zulu', 'Lungu', 'Mulenga', 'Chilufya', 'Sakala', 'Daka',
+              'Ngoma', 'Kabwe', 'Musonda', 'Mumba', 'Simwanza', 'Hamoonga')
+
+EventPlan = namedtuple('EventPlan', 'index day start_time category title bookings venue allocations')
+VenuePlan = namedtuple('VenuePlan', 'index hours setup_hours cleanup_hours status')
+AllocationPlan = namedtuple('AllocationPlan', 'resource quantity start_date end_date status')
+Sizes = namedtuple('Sizes', 'users events bookings venues resources')
+
+# State of the running generation, set before forking so workers inherit it
+_run = {}
+
+
+def sizes(scale):
+    """How many rows of each kind ``scale`` stands for"""
+    return Sizes(
+        users=max(1, round(USERS_PER_SCALE * scale)),
+        events=max(1, round(EVENTS_PER_SCALE * scale)),
+        bookings=round(BOOKINGS_PER_SCALE * scale),
+        venues=max(3, round(VENUES_PER_SCALE * scale)),
+        resources=max(8, round(RESOURCES_PER_SCALE * scale)),
+    )
+
+
+@lru_cache(maxsize=None)
+def _cumulative(choices):
+    values, weights = zip(*choices)
+    return values, list(accumulate(weights))
+
+
+def _pick(rng, choices):
+    """One value from ``((value, weight), ...)``"""
+    values, cum_weights = _cumulative(choices)
+    return rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def _username(index):
+    return f'{USERNAME_PREFIX}{index:08d}'
+
+
+# ============================
+# PLAN
+# ============================
+def plan_events(seed, scale, anchor, venues, resources):
+    """
+    Every event's date, category, booking count, venue booking and resource
+    allocations, from one RNG. ``venues`` holds one entry per venue and
+    ``resources`` ``(quantity_available, cost_per_day)`` per resource.
+    """
+    rng = random.Random(f'{seed}:plan')
+    size = sizes(scale)
+
+    days = [anchor + timedelta(days=offset) for offset in range(-PAST_DAYS, FUTURE_DAYS + 1)]
+    day_weights = list(accumulate(MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] for day in days))
+    category_weights = list(accumulate(weight for _, weight, _ in CATEGORIES))
+
+    # Popularity: Zipf over a random ranking; future events have only sold part of their stock
+    ranks = list(range(size.events))
+    rng.shuffle(ranks)
+    drafts, demand = [], []
+    for index in range(size.events):
+        day = rng.choices(days, cum_weights=day_weights)[0]
+        category = rng.choices(range(len(CATEGORIES)), cum_weights=category_weights)[0]
+        sold_share = min(1.0, max(0.15, 1 - (day - anchor).days / 120))
+        drafts.append((day, category))
+        demand.append(sold_share / (ranks[index] + 1) ** ZIPF_EXPONENT)
+    total_demand = sum(demand)
+
+    venue_days = set()
+    resource_use = defaultdict(int)
+    plans = []
+    for index, ((day, category), share) in enumerate(zip(drafts, demand)):
+        expected = size.bookings * share / total_demand
+        bookings = int(expected) + (rng.random() < expected % 1)
+        name, _, titles = CATEGORIES[category]
+        title = f'{rng.choice(CITIES)} {rng.choice(titles)} {day.year} #{index + 1}'
+        start_time = _pick(rng, START_TIMES)
+        past = day < anchor
+
+        # Venue: 60% of events book one; a venue takes one event per day with a free day either side
+        venue = None
+        if rng.random() < 0.6:
+            for candidate in rng.sample(range(len(venues)), min(3, len(venues))):
+                if not {(candidate, day + timedelta(days=delta)) for delta in (-1, 0, 1)} & venue_days:
+                    venue_days.add((candidate, day))
+                    status = (_pick(rng, (('completed', 0.85), ('cancelled', 0.10), ('confirmed', 0.05))) if past
+                              else _pick(rng, (('confirmed', 0.60), ('pending', 0.30), ('cancelled', 0.10))))
+                    venue = VenuePlan(candidate, rng.randint(2, 8), rng.randint(1, 4), rng.randint(1, 2), status)
+                    break
+
+        # Resources: up to three, never beyond the stock on any day
+        allocations = []
+        if venue is not None:
+            for resource in rng.sample(range(len(resources)), min(rng.randint(0, 3), len(resources))):
+                start_date = day - timedelta(days=rng.randint(0, 1))
+                span = [start_date + timedelta(days=offset) for offset in range((day - start_date).days + 1)]
+                free = resources[resource][0] - max(resource_use[resource, d] for d in span)
+                if free <= 0:
+                    continue
+                quantity = rng.randint(1, min(3, free))
+                for d in span:
+                    resource_use[resource, d] += quantity
+                status = (_pick(rng, (('returned', 0.80), ('delivered', 0.10), ('cancelled', 0.10))) if past
+                          else _pick(rng, (('confirmed', 0.50), ('requested', 0.40), ('cancelled', 0.10))))
+                allocations.append(AllocationPlan(resource, quantity, start_date, day, status))
+
+        plans.append(EventPlan(index, day, start_time, category, title, bookings, venue, allocations))
+    return plans
+
+
+def shard_events(plans):
+    """Group the plan into shards of at most ``EVENTS_PER_SHARD`` events / ~``BOOKINGS_PER_SHARD`` bookings"""
+    shards, current, bookings = [], [], 0
+    for plan in plans:
+        if current and (len(current) >= EVENTS_PER_SHARD or bookings + plan.bookings > BOOKINGS_PER_SHARD):
+            shards.append(current)
+            current, bookings = [], 0
+        current.append(plan)
+        bookings += plan.bookings
+    if current:
+        shards.append(current)
+    return shards
+
+
+# ============================
+# WRITING
+# ============================
+@contextmanager
+def historical_timestamps():
+    """Let ``bulk_create`` keep generated ``created_at``/``booked_at`` values instead of stamping now"""
+    fields = [
+        field
+        for model in (UserProfile, Booking, PaymentTransaction, Venue, VenueBooking, ResourceAllocation)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _insert(model, objs, batch_size):
+    """``bulk_create`` that always leaves primary keys on ``objs``"""
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if objs and objs[0].pk is None:
+        # No RETURNING for bulk inserts here (SQLite): inside the transaction we are
+        # the only writer, so our rows carry the highest ids, in insertion order
+        pks = list(model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objs)])
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+    return objs
+
+
+def _aware(day, at=time.min):
+    return timezone.make_aware(datetime.combine(day, at))
+
+
+def _phone(rng):
+    return f"+260 9{rng.choice('567')}{rng.randint(0, 9)} {rng.randint(100, 999)} {rng.randint(100, 999)}"
+
+
+def create_reference_data(seed, scale, batch_size):
+    """Categories, venues and resources (small; written by the parent process)"""
+    rng = random.Random(f'{seed}:reference')
+    size = sizes(scale)
+    categories = _insert(Category, [
+        Category(name=f'{name} ({DOMAIN})', slug=f'{SLUG_PREFIX}{index + 1}')
+        for index, (name, _, _) in enumerate(CATEGORIES)
+    ], batch_size)
+
+    venues = []
+    for index in range(size.venues):
+        kind, smallest, largest, rate = rng.choice(VENUE_KINDS)
+        city = rng.choice(CITIES)
+        venues.append(Venue(
+            name=f'{city} {kind} {index + 1}',
+            address=f'Plot {rng.randint(1, 9999)}, {city}, Zambia',
+            capacity=rng.randint(smallest, largest),
+            contact_person=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            contact_phone=_phone(rng),
+            contact_email=f'venue{index + 1}@{DOMAIN}',
+            hourly_rate=Decimal(rate + rng.randint(-4, 8) * 50),
+            facilities=', '.join(rng.sample(
+                ['Parking', 'Sound system', 'Air conditioning', 'Floodlights', 'VIP lounge', 'WiFi', 'Catering kitchen',
+                 'Security', 'Stage', 'Backup generator'], 4)),
+            is_available=rng.random() < 0.95,
+            created_at=_aware(date.today()),
+        ))
+    _insert(Venue, venues, batch_size)
+
+    resources = []
+    for index in range(size.resources):
+        resource_type, label = rng.choice(Resource.RESOURCE_TYPES)
+        resources.append(Resource(
+            name=f'{label} {index + 1}',
+            resource_type=resource_type,
+            description=f'{label} for hire ({DOMAIN})',
+            cost_per_day=Decimal(rng.randint(4, 60) * 50),
+            quantity_available=rng.randint(2, 20),
+            supplier_name=f'{rng.choice(LAST_NAMES)} Event Supplies',
+            supplier_phone=_phone(rng),
+            is_available=rng.random() < 0.95,
+        ))
+    _insert(Resource, resources, batch_size)
+    return categories, venues, resources
+
+
+def _write_users(shard):
+    """Users ``[first, last)`` of the dataset, with their profiles"""
+    first, last = shard
+    rng = random.Random(f"{_run['seed']}:users:{first}")
+    anchor, batch_size = _run['anchor'], _run['batch_size']
+    users, joined = [], []
+    for index in range(first, last):
+        # Sign-ups grow over the three years up to the anchor date
+        day = anchor - timedelta(days=int(1095 * (1 - math.sqrt(rng.random()))))
+        at = _aware(day) + timedelta(seconds=rng.randint(0, 86_399))
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        users.append(User(
+            username=_username(index), first_name=first_name, last_name=last_name,
+            email=f'{first_name}.{last_name}.{index}@{DOMAIN}'.lower(),
+            password=_run['password_hash'], date_joined=at, last_login=at,
+        ))
+        joined.append(at)
+    with transaction.atomic():
+        _insert(User, users, batch_size)
+        UserProfile.objects.bulk_create([
+            UserProfile(user_id=user.pk, phone_number=_phone(rng), created_at=at, updated_at=at)
+            for user, at in zip(users, joined)
+        ], batch_size=batch_size)
+    return {'users': len(users)}
+
+
+def _write_events(shard):
+    """One shard of the event plan: events, bookings, payments, venue bookings, allocations"""
+    plans = _run['event_shards'][shard]
+    rng = random.Random(f"{_run['seed']}:events:{shard}")
+    anchor, batch_size = _run['anchor'], _run['batch_size']
+    now = _aware(anchor) + timedelta(hours=12)
+    user_ids = _run['user_ids']
+
+    events, bookings, payments = [], [], []
+    for plan in plans:
+        start = _aware(plan.day, plan.start_time)
+        sold = defaultdict(int)
+        for _ in range(plan.bookings):
+            ticket_type = _pick(rng, TIERS)
+            tickets = _pick(rng, TICKETS_PER_BOOKING)
+            # Most tickets go in the last two weeks; sales for future events are still running
+            booked_at = start - timedelta(days=min(90.0, rng.expovariate(1 / 14)))
+            if booked_at >= now:
+                booked_at = now - timedelta(days=rng.uniform(0, 60))
+            # Repeat customers: low user indexes buy far more often
+            user_id = user_ids[int(len(user_ids) * rng.random() ** 2)]
+            settled = booked_at < now - timedelta(days=2)
+            status = _pick(rng, SETTLED_STATUSES if settled else RECENT_STATUSES)
+            if status == 'completed':
+                sold[ticket_type] += tickets
+            method = _pick(rng, PAYMENT_METHODS)
+            created_at = booked_at + timedelta(seconds=rng.randint(5, 300))
+            updated_at = created_at if status in ('pending', 'submitted') else created_at + timedelta(
+                minutes=rng.randint(2, 2880))
+            total_price = Decimal(tickets * TICKET_PRICES[ticket_type])
+            bookings.append(Booking(
+                user_id=user_id, event_id=plan.index, ticket_type=ticket_type, tickets=tickets,
+                total_price=total_price, booked_at=booked_at,
+            ))
+            payments.append(PaymentTransaction(
+                payment_method=method, amount=total_price, status=status,
+                phone_number=None if method == 'bank' else _phone(rng),
+                created_at=created_at, updated_at=min(updated_at, now),
+            ))
+
+        # Seat counters: what was sold plus headroom; roughly one event in twelve sold out
+        seats_left = {}
+        for ticket_type, base in BASE_CAPACITY.items():
+            sold_out = rng.random() < 0.08 and sold[ticket_type]
+            seats_left[ticket_type] = 0 if sold_out else int(max(sold[ticket_type], base) * rng.uniform(0.1, 1.5))
+        name, _, _ = CATEGORIES[plan.category]
+        events.append(Event(
+            title=plan.title,
+            description=f'{plan.title.rsplit(" #", 1)[0]} ({name}, {plan.title.split()[0]}). '
+                        f'Tickets, food and entertainment for the whole family.',
+            date=plan.day, time=plan.start_time, location=plan.title.split()[0],
+            category_id=_run['category_ids'][plan.category],
+            vip_seats_left=seats_left['vip'], gold_seats_left=seats_left['gold'],
+            standard_seats_left=seats_left['standard'],
+        ))
+
+    with transaction.atomic():
+        _insert(Event, events, batch_size)
+        event_ids = {plan.index: event.pk for plan, event in zip(plans, events)}
+        for booking in bookings:
+            booking.event_id = event_ids[booking.event_id]
+        _insert(Booking, bookings, batch_size)
+        for booking, payment in zip(bookings, payments):
+            payment.booking_id = booking.pk
+        PaymentTransaction.assign_transaction_ids(payments)
+        PaymentTransaction.objects.bulk_create(payments, batch_size=batch_size)
+
+        venue_bookings, allocations = [], []
+        for plan, event in zip(plans, events):
+            if plan.venue is None:
+                continue
+            start = _aware(plan.day, plan.start_time)
+            hourly_rate = _run['venues'][plan.venue.index]
+            created_at = min(now, start - timedelta(days=rng.randint(14, 120)))
+            venue_bookings.append(VenueBooking(
+                event_id=event.pk, venue_id=_run['venue_ids'][plan.venue.index],
+                start_datetime=start, end_datetime=start + timedelta(hours=plan.venue.hours),
+                setup_hours=plan.venue.setup_hours, cleanup_hours=plan.venue.cleanup_hours,
+                total_cost=Decimal(str(float(plan.venue.hours + plan.venue.setup_hours + plan.venue.cleanup_hours)))
+                * hourly_rate,
+                status=plan.venue.status, created_at=created_at, updated_at=created_at,
+            ))
+            for allocation in plan.allocations:
+                days = (allocation.end_date - allocation.start_date).days + 1
+                allocations.append(ResourceAllocation(
+                    event_id=event.pk, resource_id=_run['resource_ids'][allocation.resource],
+                    quantity_needed=allocation.quantity, start_date=allocation.start_date,
+                    end_date=allocation.end_date,
+                    total_cost=days * _run['resources'][allocation.resource][1] * allocation.quantity,
+                    status=allocation.status, created_at=created_at,
+                ))
+        VenueBooking.objects.bulk_create(venue_bookings, batch_size=batch_size)
+        ResourceAllocation.objects.bulk_create(allocations, batch_size=batch_size)
+    return {'events': len(events), 'bookings': len(bookings), 'venue_bookings': len(venue_bookings),
+            'allocations': len(allocations)}
+
+
+def _run_shard(task):
+    kind, shard = task
+    return (_write_users if kind == 'users' else _write_events)(shard)
+
+
+def _run_shards(kind, shards, workers, progress):
+    """Write every shard, in ``workers`` forked processes when there is more than one"""
+    totals = defaultdict(int)
+    tasks = [(kind, shard) for shard in shards]
+    if workers > 1 and len(tasks) > 1:
+        # Children must open their own connections, not share the parent's socket
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(min(workers, len(tasks))) as pool:
+            results = pool.imap_unordered(_run_shard, tasks)
+            for done, counts in enumerate(results, 1):
+                for name, count in counts.items():
+                    totals[name] += count
+                progress(kind, done, len(tasks))
+    else:
+        for done, task in enumerate(tasks, 1):
+            for name, count in _run_shard(task).items():
+                totals[name] += count
+            progress(kind, done, len(tasks))
+    return dict(totals)
+
+
+def generate(scale, seed=0, anchor=None, workers=1, batch_size=2000, progress=lambda kind, done, total: None):
+    """Write a dataset of ``scale`` units; returns row counts by kind"""
+    anchor = anchor or timezone.localdate()
+    size = sizes(scale)
+    with historical_timestamps():
+        with transaction.atomic():
+            categories, venues, resources = create_reference_data(seed, scale, batch_size)
+        _run.clear()
+        _run.update(
+            seed=seed, anchor=anchor, batch_size=batch_size,
+            # One hash for everyone: hashing a million passwords would take hours
+            password_hash=make_password(PASSWORD),
+            category_ids=[category.pk for category in categories],
+            venue_ids=[venue.pk for venue in venues],
+            venues=[venue.hourly_rate for venue in venues],
+            resource_ids=[resource.pk for resource in resources],
+            resources=[(resource.quantity_available, resource.cost_per_day) for resource in resources],
+        )
+        try:
+            user_shards = [(first, min(first + USERS_PER_SHARD, size.users))
+                           for first in range(0, size.users, USERS_PER_SHARD)]
+            totals = _run_shards('users', user_shards, workers, progress)
+
+            # Bookings refer to users by position; the usernames give the order
+            _run['user_ids'] = list(
+                User.objects.filter(username__range=(_username(0), _username(size.users - 1)))
+                .order_by('username').values_list('pk', flat=True)
+            )
+            plans = plan_events(seed, scale, anchor, _run['venues'], _run['resources'])
+            _run['event_shards'] = shard_events(plans)
+            totals.update(_run_shards('events', range(len(_run['event_shards'])), workers, progress))
+        finally:
+            _run.clear()
+    totals.update(categories=len(categories), venues=len(venues), resources=len(resources))
+    return totals
+
+
+# ============================
+# AFTERWARDS
+# ============================
+def finish():
+    """Bring the derived data up to date after a load (the bulk inserts skipped the signals)"""
+    from . import dashboard, facilities, modelcache, pagecache, rollups, sales, search
+
+    if connection.vendor in ('sqlite', 'postgresql'):
+        # Fresh planner statistics, so EXPLAIN and benchmarks see the real row counts
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    for kind in search.INDEXES:
+        search.rebuild(kind)
+    sales.rebuild()
+    # Generated payments carry historical updated_at values, behind any high-water mark
+    rollups.build(full=True)
+    dashboard.reconcile()
+    facilities.invalidate()
+    for model in (Category, Event, Venue, Resource):
+        modelcache.invalidate_model(model)
+    pagecache.purge_tags(pagecache.model_tag(model) for model in (Category, Event, Venue, Resource, Booking))
+
+
+def clear():
+    """
+    Delete a previously generated dataset, dependants first; returns the number
+    of rows. Payments and bookings go in one plain DELETE each: a queryset
+    delete would load every row to run the per-row sales receivers. The sales
+    summary and the revenue rollups are rebuilt once afterwards instead.
+    """
+    from . import rollups, sales
+
+    events = Event.objects.filter(category__slug__startswith=SLUG_PREFIX)
+    bookings = Booking.objects.filter(event__in=events)
+    payments = PaymentTransaction.objects.filter(booking__event__in=events)
+    querysets = [
+        # What references the bookings, so the raw DELETEs below break no foreign key
+        CheckIn.objects.filter(booking__in=bookings),
+        SeatHold.objects.filter(booking__in=bookings),
+        payments,
+        bookings,
+        ResourceAllocation.objects.filter(event__in=events),
+        VenueBooking.objects.filter(event__in=events),
+        events,
+        Category.objects.filter(slug__startswith=SLUG_PREFIX),
+        Venue.objects.filter(contact_email__endswith=f'@{DOMAIN}'),
+        Resource.objects.filter(description__endswith=f'({DOMAIN})'),
+        User.objects.filter(username__startswith=USERNAME_PREFIX, email__endswith=f'@{DOMAIN}'),
+    ]
+    deleted = 0
+    for queryset in querysets:
+        with transaction.atomic():
+            if queryset.model in (PaymentTransaction, Booking):
+                deleted += queryset._raw_delete(queryset.db)
+            else:
+                deleted += queryset.delete()[0]
+    sales.rebuild()
+    rollups.build(full=True)
+    return deleted
@@ -0,0 +1,232 @@
+"""
+Read Replica Routing
+====================
+
+Sends the heavy read-only pages to read replicas and everything else to the
+primary (``default``). Replicas come from ``DATABASE_REPLICA_URLS`` (or
+``DATABASE_REPLICA_URL``) and are named ``replica_0``, ``replica_1``, ...
+
+* **Opt-in** — only work inside ``replica_reads()`` may read from a replica:
+  views decorated with ``@read_only``, the admin dashboard figures and the
+  CSV exports. Writes always go to the primary.
+* **Read your writes** — ``ReplicaRoutingMiddleware`` notices requests that
+  write (INSERT/UPDATE/DELETE on the primary) and stamps the session. For
+  ``DATABASE_REPLICA_STICKY_SECONDS`` afterwards that visitor reads from the
+  primary everywhere, so a customer who just booked sees the booking. A
+  request that has already written, or is inside ``transaction.atomic()``,
+  also stays on the primary.
+* **Cache fills** — data that goes into a shared cache (an anonymous page
+  render, a model cache miss) is read inside ``primary_reads()``: a
+  replica's lag would otherwise be kept for the cache's whole TTL, and
+  under tag versions that already claim to be current.
+* **Health** — each process checks a replica at most every
+  ``DATABASE_REPLICA_HEALTH_INTERVAL`` seconds: it must answer, have the
+  schema, and (PostgreSQL) lag less than ``DATABASE_REPLICA_MAX_LAG``
+  seconds. A replica that fails a check or a query is skipped until it
+  passes again; with none healthy, reads go to the primary.
+
+Locally, point ``DATABASE_REPLICA_URL`` at a second SQLite file and refresh
+it with ``manage.py sync_replica`` (or a second PostgreSQL instance).
+"""
+
+import contextvars
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+STICKY_SESSION_KEY = '_db_write_at'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLAC')
+
+# Replica alias the current unit of work may read from (None: the primary)
+_reads = contextvars.ContextVar('replica_reads', default=None)
+# Set once the current request has written to the primary
+_wrote = contextvars.ContextVar('wrote_primary', default=None)
+# Set while filling a shared cache: every read goes to the primary
+_pinned = contextvars.ContextVar('primary_reads', default=False)
+
+# alias -> (healthy, checked_at), per process
+_health = {}
+_health_lock = threading.Lock()
+
+
+# ============================
+# HEALTH
+# ============================
+def replicas():
+    return list(settings.DATABASE_REPLICAS)
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind (0 if unknown or caught up)"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+            "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )
+        return float(cursor.fetchone()[0] or 0)
+
+
+def check(alias):
+    """Run the health check now; returns (healthy, detail)"""
+    try:
+        with connections[alias].cursor() as cursor:
+            # Answers, and has been given the schema (an unsynced SQLite copy has not)
+            cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+        lag = replica_lag(alias)
+    except DatabaseError as error:
+        connections[alias].close()
+        return False, str(error).splitlines()[0] if str(error) else type(error).__name__
+    if lag > settings.DATABASE_REPLICA_MAX_LAG:
+        return False, f'{lag:.1f}s behind'
+    return True, f'{lag:.1f}s behind'
+
+
+def is_healthy(alias):
+    """Cached health of a replica, re-checked every DATABASE_REPLICA_HEALTH_INTERVAL seconds"""
+    healthy, checked_at = _health.get(alias, (None, 0.0))
+    if time.monotonic() - checked_at < settings.DATABASE_REPLICA_HEALTH_INTERVAL:
+        return healthy
+    with _health_lock:
+        # Another thread may have checked while we waited for the lock
+        healthy, checked_at = _health.get(alias, (None, 0.0))
+        if time.monotonic() - checked_at >= settings.DATABASE_REPLICA_HEALTH_INTERVAL:
+            healthy, _ = check(alias)
+            _health[alias] = (healthy, time.monotonic())
+    return healthy
+
+
+def mark_unhealthy(alias):
+    _health[alias] = (False, time.monotonic())
+
+
+def reset_health():
+    _health.clear()
+
+
+# ============================
+# CHOOSING A DATABASE
+# ============================
+def is_sticky(request):
+    """True if this visitor wrote recently and must read their own writes"""
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    wrote_at = session.get(STICKY_SESSION_KEY)
+    return bool(wrote_at) and time.time() - wrote_at < settings.DATABASE_REPLICA_STICKY_SECONDS
+
+
+def read_alias(request=None):
+    """The replica a read-only unit of work should use, or None for the primary"""
+    if request is not None and is_sticky(request):
+        return None
+    healthy = [alias for alias in replicas() if is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def _watch(alias, execute, sql, params, many, context):
+    try:
+        return execute(sql, params, many, context)
+    except DatabaseError:
+        # Skip this replica until its next health check passes
+        connections[alias].close_if_unusable_or_obsolete()
+        mark_unhealthy(alias)
+        raise
+
+
+@contextmanager
+def replica_reads(request=None):
+    """Let reads inside the block go to a healthy replica; yields its alias (or None)"""
+    alias = read_alias(request) if replicas() and not _pinned.get() else None
+    token = _reads.set(alias)
+    try:
+        with ExitStack() as stack:
+            if alias is not None:
+                stack.enter_context(connections[alias].execute_wrapper(
+                    lambda *args: _watch(alias, *args)
+                ))
+            yield alias
+    finally:
+        _reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Keep reads inside the block on the primary, even within ``replica_reads()``"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def read_only(view):
+    """Mark a view as read-only so it may be served from a replica"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads inside ``replica_reads()`` go to its replica; all else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        alias = _reads.get()
+        if alias is None or _pinned.get() or _wrote.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related lookups follow the object they start from
+            return instance._state.db
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary
+        return db not in replicas()
+
+
+# ============================
+# MIDDLEWARE
+# ============================
+class ReplicaRoutingMiddleware:
+    """Stamps the session of visitors whose request wrote, for read-your-writes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrote = {'flag': False}
+        token = _wrote.set(None)
+
+        def track(execute, sql, params, many, context):
+            if not wrote['flag'] and sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+                wrote['flag'] = True
+                _wrote.set(True)
+            return execute(sql, params, many, context)
+
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(track):
+                response = self.get_response(request)
+        finally:
+            _wrote.reset(token)
+        if wrote['flag'] and replicas() and hasattr(request, 'session'):
+            request.session[STICKY_SESSION_KEY] = time.time()
+        return response
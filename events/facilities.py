@@ -0,0 +1,135 @@
+"""
+Facilities Metrics
+==================
+
+Figures for the staff facilities dashboard and the public facilities page,
+computed with a handful of grouped queries instead of one count per resource
+type and per venue:
+
+* resources are grouped by type with ``values('resource_type').annotate()``;
+  utilization is the quantity allocated today against ``quantity_available``
+  (units, not rows);
+* today's and this month's venue bookings come from one grouped query over
+  the month, using range predicates rather than ``__date``/``__month``.
+
+The result is a plain-dict snapshot cached for ``FACILITIES_METRICS_TTL``
+seconds in the ``FACILITIES_CACHE_ALIAS`` cache, which every worker shares.
+Saving or deleting a venue booking, resource allocation, venue or resource
+drops it (after commit), so the next request in any worker recomputes it.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Resource, ResourceAllocation, Venue, VenueBooking
+
+SNAPSHOT_KEY = 'facilities:snapshot'
+ALLOCATED_STATUSES = ('confirmed', 'delivered')
+TODAY_BOOKING_STATUSES = ('confirmed', 'pending')
+MONTH_BOOKING_STATUSES = ('confirmed', 'completed')
+TOP_VENUES = 10
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def compute_snapshot():
+    """All facilities figures from the database (5 queries)"""
+    today = timezone.localdate()
+    today_start, today_end = _local_midnight(today), _local_midnight(today + timedelta(days=1))
+    month_first = today.replace(day=1)
+    month_start = _local_midnight(month_first)
+    month_end = _local_midnight((month_first + timedelta(days=32)).replace(day=1))
+
+    # Units on hand per resource type
+    stock = {
+        row['resource_type']: row
+        for row in Resource.objects.filter(is_available=True)
+        .values('resource_type')
+        .annotate(resources=Count('id'), units=Sum('quantity_available'))
+        .order_by()
+    }
+    # Units allocated today per resource type
+    allocated = {
+        row['resource__resource_type']: row
+        for row in ResourceAllocation.objects.filter(
+            start_date__lte=today, end_date__gte=today, status__in=ALLOCATED_STATUSES
+        )
+        .values('resource__resource_type')
+        .annotate(allocations=Count('id'), units=Sum('quantity_needed'))
+        .order_by()
+    }
+    resource_utilization = []
+    for resource_type, display_name in Resource.RESOURCE_TYPES:
+        units = (stock.get(resource_type) or {}).get('units') or 0
+        in_use = (allocated.get(resource_type) or {}).get('units') or 0
+        rate = round(in_use / units * 100, 1) if units else 0
+        resource_utilization.append({
+            'type': resource_type,
+            'display_name': display_name,
+            'resources': (stock.get(resource_type) or {}).get('resources', 0),
+            'total': units,
+            'allocated': in_use,
+            'utilization_rate': rate,
+            'bar_width': min(rate, 100),
+        })
+
+    # Today's and this month's bookings per venue in one grouped query
+    bookings = {
+        row['venue']: row
+        for row in VenueBooking.objects.filter(start_datetime__gte=month_start, start_datetime__lt=month_end)
+        .values('venue')
+        .annotate(
+            this_month=Count('id', filter=Q(status__in=MONTH_BOOKING_STATUSES)),
+            today=Count('id', filter=Q(
+                status__in=TODAY_BOOKING_STATUSES, start_datetime__gte=today_start, start_datetime__lt=today_end
+            )),
+        )
+        .order_by()
+    }
+    venues = Venue.objects.filter(is_available=True)
+    top_venues = venues.order_by('-capacity').values('id', 'name', 'capacity', 'address', 'hourly_rate')[:TOP_VENUES]
+    venue_capacity_data = [
+        {
+            'venue': venue,
+            'bookings_this_month': (bookings.get(venue['id']) or {}).get('this_month', 0),
+        }
+        for venue in top_venues
+    ]
+
+    return {
+        'total_venues': venues.count(),
+        'total_resources': sum(row['resources'] for row in stock.values()),
+        'venue_bookings_today': sum(row['today'] for row in bookings.values()),
+        'resource_allocations_today': sum(row['allocations'] for row in allocated.values()),
+        'resource_utilization': resource_utilization,
+        'venue_capacity_data': venue_capacity_data,
+    }
+
+
+def snapshot_cache():
+    return caches[settings.FACILITIES_CACHE_ALIAS]
+
+
+def get_snapshot():
+    """Cached facilities figures, recomputed when missing or expired"""
+    snapshot = snapshot_cache().get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = compute_snapshot()
+        snapshot_cache().set(SNAPSHOT_KEY, snapshot, settings.FACILITIES_METRICS_TTL)
+    return snapshot
+
+
+def invalidate():
+    """Drop the snapshot so the next request recomputes it"""
+    snapshot_cache().delete(SNAPSHOT_KEY)
+
+
+def invalidate_on_commit():
+    transaction.on_commit(invalidate)
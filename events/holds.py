@@ -0,0 +1,163 @@
+"""
+Seat Holds
+==========
+
+A ``SeatHold`` sets seats aside for one customer for a limited time:
+
+* choosing seats on ``select_seat`` / ``payment_page`` places (or extends) a
+  short selection hold, ``SEAT_HOLD_SELECTION_TTL`` seconds;
+* submitting payment attaches the hold to the booking and extends it to
+  ``SEAT_HOLD_PAYMENT_TTL`` so it survives until staff review it;
+* approval converts the hold into a sale (the seat counter is decremented by
+  ``inventory.reserve_seats``), rejection or a declined payment releases it.
+
+Seats available to sell are ``<tier>_seats_left`` minus the live holds, read
+with one ``SUM(quantity) ... GROUP BY ticket_type`` over the
+``events_hold_avail_idx`` index. Expired holds stop counting as soon as their
+``expires_at`` passes; ``release_expired`` (``manage.py release_expired_holds``
+or the in-process ``HoldSweeper``) only tidies their status up in bulk.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .inventory import SEAT_FIELDS, SoldOut, seat_field
+from .models import Event, SeatHold
+
+logger = logging.getLogger('events')
+
+
+def held_seats(event_id, exclude_user=None):
+    """Seats held per tier for an event, ignoring ``exclude_user``'s unpaid hold"""
+    live = SeatHold.objects.filter(event_id=event_id, status='active', expires_at__gt=timezone.now())
+    if exclude_user is not None:
+        live = live.exclude(user=exclude_user, booking__isnull=True)
+    totals = dict.fromkeys(SEAT_FIELDS, 0)
+    for row in live.values('ticket_type').annotate(held=Sum('quantity')).order_by():
+        totals[row['ticket_type']] = row['held']
+    return totals
+
+
+def availability(event, user=None):
+    """Seats that can still be sold per tier, from the user's point of view"""
+    held = held_seats(event.id, exclude_user=user)
+    return {
+        ticket_type: max((getattr(event, field) or 0) - held[ticket_type], 0)
+        for ticket_type, field in SEAT_FIELDS.items()
+    }
+
+
+def place_hold(event, user, ticket_type, quantity, ttl=None):
+    """
+    Hold ``quantity`` seats of ``ticket_type`` for ``user``, reusing their
+    current unpaid hold for the event. Raises SoldOut (with ``available``)
+    when not enough seats are free.
+    """
+    field = seat_field(ticket_type)
+    ttl = settings.SEAT_HOLD_SELECTION_TTL if ttl is None else ttl
+    with transaction.atomic():
+        # Lock the event row so two customers cannot hold the same last seats
+        locked = Event.objects.select_for_update().only('id', field).get(pk=event.pk)
+        available = availability(locked, user=user)[ticket_type]
+        if quantity > available:
+            raise SoldOut(event.pk, ticket_type, quantity, available=available)
+
+        hold = SeatHold.objects.filter(
+            event_id=event.pk, user=user, status='active', booking__isnull=True
+        ).first()
+        if hold is None:
+            hold = SeatHold(event_id=event.pk, user=user)
+        hold.ticket_type = ticket_type
+        hold.quantity = quantity
+        hold.expires_at = timezone.now() + timedelta(seconds=ttl)
+        hold.save()
+    return hold
+
+
+def extend_hold(event, user, ttl=None):
+    """Push back the expiry of the user's live unpaid hold, if there is one"""
+    ttl = settings.SEAT_HOLD_SELECTION_TTL if ttl is None else ttl
+    return SeatHold.objects.filter(
+        event_id=event.pk, user=user, status='active', booking__isnull=True, expires_at__gt=timezone.now()
+    ).update(expires_at=timezone.now() + timedelta(seconds=ttl))
+
+
+def attach_booking(hold, booking, ttl=None):
+    """Tie a hold to the booking being paid for and keep it until review"""
+    ttl = settings.SEAT_HOLD_PAYMENT_TTL if ttl is None else ttl
+    hold.booking = booking
+    hold.expires_at = timezone.now() + timedelta(seconds=ttl)
+    hold.save(update_fields=['booking', 'expires_at', 'updated_at'])
+    return hold
+
+
+def convert_hold(booking):
+    """Mark the booking's hold as sold (called when the payment is approved)"""
+    return SeatHold.objects.filter(booking=booking, status__in=['active', 'expired']).update(
+        status='converted', updated_at=timezone.now()
+    )
+
+
+def release_hold(booking):
+    """Give the booking's held seats back (payment declined or rejected)"""
+    return SeatHold.objects.filter(booking=booking, status='active').update(
+        status='released', updated_at=timezone.now()
+    )
+
+
+def release_expired(batch_size=1000):
+    """Flip every active hold past its expiry to 'expired'; returns how many"""
+    released = 0
+    while True:
+        now = timezone.now()
+        ids = list(
+            SeatHold.objects.filter(status='active', expires_at__lte=now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return released
+        released += SeatHold.objects.filter(id__in=ids, status='active').update(status='expired', updated_at=now)
+
+
+class HoldSweeper(threading.Thread):
+    """Background thread calling ``release_expired`` every ``interval`` seconds"""
+
+    def __init__(self, interval):
+        super().__init__(name='seat-hold-sweeper', daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.wait(self.interval):
+                close_old_connections()
+                try:
+                    count = release_expired()
+                    if count:
+                        logger.info(f"Released {count} expired seat hold(s)")
+                except Exception as e:
+                    logger.error(f"Seat hold sweep failed: {e}")
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_sweeper = None
+
+
+def start_sweeper(interval=None):
+    """Start the in-process sweeper once per process (SEAT_HOLD_SWEEP_INTERVAL)"""
+    global _sweeper
+    interval = settings.SEAT_HOLD_SWEEP_INTERVAL if interval is None else interval
+    if _sweeper is None and interval:
+        _sweeper = HoldSweeper(interval)
+        _sweeper.start()
+    return _sweeper
@@ -0,0 +1,252 @@
+"""
+Hot Query Registry
+==================
+
+The queries that run on every page view or worker poll, registered by name
+so ``manage.py explain_queries`` can ``EXPLAIN`` each one against the real
+schema and flag full table scans (a missing or unusable index).
+
+* A builder takes no arguments and returns the queryset as the hot path
+  shapes it; any ids it needs come from ``sample_pk`` (EXPLAIN needs no rows).
+* Builders reuse the callers' status tuples and queryset helpers, so a
+  changed filter shows up here too.
+* On PostgreSQL the plan is taken with ``enable_seqscan`` off, so tiny
+  development tables (where a sequential scan is cheapest) do not hide a
+  missing index; a scan that remains has no index to use.
+
+    @register('payments.pending')
+    def pending_payments():
+        return PaymentTransaction.objects.filter(status='pending')
+"""
+
+import re
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import availability, conflicts, facilities
+from .models import (
+    Booking, CheckIn, Event, Job, OutboundEmail, PaymentTransaction, Resource, ResourceAllocation, RevenueDaily,
+    SeatHold, UserProfile, Venue, VenueBooking,
+)
+
+HotQuery = namedtuple('HotQuery', 'name build description')
+Explained = namedtuple('Explained', 'query plan scans')
+
+registry = {}
+
+# SQLite: "SCAN events_booking" is a full scan, "SCAN t USING [COVERING] INDEX i"
+# walks an index. PostgreSQL: "Seq Scan on events_booking".
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX)')
+POSTGRES_SCAN = re.compile(r'\bSeq Scan on (\w+)')
+NOT_TABLES = {'CONSTANT', 'SUBQUERY'}
+
+
+def register(name, description=''):
+    """Register a queryset builder under ``name``"""
+    def decorator(build):
+        registry[name] = HotQuery(name, build, description or (build.__doc__ or '').strip())
+        return build
+    return decorator
+
+
+def sample_pk(model):
+    """Some existing primary key of ``model`` (or 1), to fill in a filter"""
+    return model.objects.order_by().values_list('pk', flat=True).first() or 1
+
+
+# ============================
+# EXPLAIN
+# ============================
+def full_scans(plan, vendor):
+    """Tables read in full according to ``plan``"""
+    if vendor == 'postgresql':
+        return POSTGRES_SCAN.findall(plan)
+    if vendor == 'sqlite':
+        return [table for table in SQLITE_SCAN.findall(plan) if table not in NOT_TABLES]
+    return []
+
+
+def explain(query, using='default'):
+    """``Explained`` plan of one registered query"""
+    connection = connections[using]
+    queryset = query.build().using(using)
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=using):
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+    else:
+        plan = queryset.explain()
+    return Explained(query, plan, full_scans(plan, connection.vendor))
+
+
+def explain_all(names=None, using='default'):
+    return [explain(registry[name], using) for name in (names or sorted(registry))]
+
+
+# ============================
+# PUBLIC PAGES
+# ============================
+@register('events.upcoming')
+def upcoming_events():
+    """Events list: upcoming events, keyset-paginated by (date, id)"""
+    return Event.objects.filter(date__gte=timezone.localdate()).select_related('category').order_by('date', 'id')[:13]
+
+
+@register('events.by_category')
+def category_events():
+    """Category page: one category's events, newest first"""
+    category_id = Event.objects.values_list('category_id', flat=True).first() or 1
+    return Event.objects.filter(category_id=category_id).order_by('-date', '-id')[:13]
+
+
+@register('bookings.profile')
+def profile_bookings():
+    """Profile: a user's bookings, newest first"""
+    user_id = Booking.objects.values_list('user_id', flat=True).first() or 1
+    return (
+        Booking.objects.filter(user_id=user_id)
+        .select_related('event__category', 'payment')
+        .order_by('-booked_at', '-id')[:21]
+    )
+
+
+@register('venue_bookings.upcoming')
+def venue_upcoming_bookings():
+    """Venue page: the next few bookings of one venue"""
+    return VenueBooking.objects.filter(
+        venue_id=sample_pk(Venue),
+        start_datetime__gte=timezone.now(),
+        status__in=['confirmed', 'pending'],
+    ).order_by('start_datetime')[:5]
+
+
+@register('venue_bookings.occupied')
+def venue_occupied():
+    """Availability calendar and conflict checks: blocking bookings overlapping a window"""
+    start = timezone.now()
+    end = start + timedelta(days=30)
+    return VenueBooking.objects.filter(
+        venue_id=sample_pk(Venue),
+        status__in=availability.BLOCKING_STATUSES,
+        start_datetime__lt=end + availability.MAX_TURNAROUND,
+        end_datetime__gt=start - availability.MAX_TURNAROUND,
+    ).select_related('event').order_by('start_datetime')
+
+
+@register('allocations.overlap')
+def allocation_overlap():
+    """Allocation checks: one resource's active allocations overlapping a date range"""
+    today = timezone.localdate()
+    return conflicts._active_allocations(sample_pk(Resource), today, today + timedelta(days=7))
+
+
+# ============================
+# ADMIN DASHBOARDS
+# ============================
+@register('payments.revenue_window')
+def revenue_window():
+    """Admin dashboard: completed payments of the last 30 days"""
+    return PaymentTransaction.objects.filter(
+        status='completed', created_at__gte=timezone.now() - timedelta(days=30)
+    ).values_list('amount', 'created_at')
+
+
+@register('payments.recent')
+def recent_payments():
+    """Admin dashboard: latest payments"""
+    return PaymentTransaction.objects.select_related('booking__user', 'booking__event').order_by('-created_at')[:10]
+
+
+@register('payments.pending')
+def pending_payments():
+    """Approval queue: payments awaiting review, newest first"""
+    return PaymentTransaction.objects.filter(status='pending').order_by('-created_at')[:100]
+
+
+@register('bookings.recent')
+def recent_bookings():
+    """Admin dashboard: latest bookings"""
+    return Booking.objects.select_related('user', 'event').order_by('-booked_at')[:10]
+
+
+@register('users.new')
+def new_users():
+    """Admin dashboard: users who joined this week"""
+    return UserProfile.objects.filter(created_at__gte=timezone.now() - timedelta(days=7))
+
+
+@register('rollups.revenue_report')
+def revenue_report():
+    """Revenue report: a month of daily rollup rows, by event"""
+    today = timezone.localdate()
+    return RevenueDaily.objects.filter(
+        day__gte=today - timedelta(days=30), day__lte=today,
+    ).values('event_id').annotate(total=Sum('revenue')).order_by()
+
+
+@register('venue_bookings.month')
+def month_venue_bookings():
+    """Facilities dashboard: this month's bookings across venues"""
+    now = timezone.now()
+    return VenueBooking.objects.filter(
+        start_datetime__gte=now - timedelta(days=now.day), start_datetime__lt=now + timedelta(days=31),
+    ).values('venue', 'status').order_by()
+
+
+@register('allocations.today')
+def allocations_today():
+    """Facilities dashboard: allocations running today"""
+    today = timezone.localdate()
+    return ResourceAllocation.objects.filter(
+        start_date__lte=today, end_date__gte=today, status__in=facilities.ALLOCATED_STATUSES,
+    ).values('resource_id', 'quantity_needed').order_by()
+
+
+# ============================
+# WORKERS
+# ============================
+@register('holds.live')
+def live_holds():
+    """Availability: an event's unexpired seat holds"""
+    return SeatHold.objects.filter(
+        event_id=sample_pk(Event), status='active', expires_at__gt=timezone.now()
+    ).values('ticket_type', 'quantity').order_by()
+
+
+@register('jobs.due')
+def due_jobs():
+    """Job workers: next runnable jobs"""
+    return Job.objects.filter(status='queued', run_after__lte=timezone.now()).order_by('run_after', 'id')[:10]
+
+
+@register('emails.due')
+def due_emails():
+    """Email outbox: next messages to send"""
+    return OutboundEmail.objects.filter(
+        status='queued', next_attempt_at__lte=timezone.now()
+    ).order_by('next_attempt_at', 'id')[:100]
+
+
+@register('rollups.changed_payments')
+def changed_payments():
+    """Revenue rollup builder: payments changed since the high-water mark"""
+    return PaymentTransaction.objects.filter(
+        updated_at__gte=timezone.now() - timedelta(minutes=10)
+    ).values_list('created_at', flat=True).order_by()
+
+
+@register('checkins.admitted')
+def admitted_tickets():
+    """Scan sync: who got in first, for a batch's bookings"""
+    return CheckIn.objects.filter(booking_id__in=[sample_pk(Booking)]).values_list('booking_id', 'seat', 'device')
+
+
+@register('checkins.roster')
+def roster_check_ins():
+    """Scanner roster: an event's admitted tickets"""
+    return CheckIn.objects.filter(event_id=sample_pk(Event)).values_list('booking_id', 'seat')
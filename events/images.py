@@ -0,0 +1,217 @@
+"""
+Responsive Image Derivatives
+============================
+
+Uploads (event images and gallery photos) are often multi-megabyte phone
+photos. For each one this module makes, with Pillow:
+
+* WebP and JPEG copies at ``IMAGE_DERIVATIVE_WIDTHS`` (never wider than the
+  original), for ``srcset``;
+* a square WebP/JPEG thumbnail (``IMAGE_THUMBNAIL_SIZE``) for previews.
+
+Derivatives are stored next to the original, in a ``derived/`` folder, under
+names built from the SHA-256 of the original's bytes
+(``event_images/main/derived/3f2a…-640w.webp``), so identical uploads share
+files and the URLs never change content. ``ImageDerivative`` rows map an
+original's storage name to its copies.
+
+Saving an event or gallery item with a new image queues an
+``images.derive`` job for the worker pool (``manage.py run_jobs``);
+``manage.py build_image_derivatives`` backfills existing media in parallel.
+``render()`` is pure (bytes in, files out) so it can run in a process pool.
+The ``{% responsive_image %}`` tag (``responsive_images`` library) turns the
+rows into ``<picture>`` markup.
+"""
+
+import hashlib
+import io
+import os
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from . import jobs, pagecache
+from .models import Event, EventGallery, ImageDerivative
+
+Rendition = namedtuple('Rendition', 'width height format is_thumbnail content')
+
+# Model -> image fields that get derivatives
+IMAGE_FIELDS = {
+    Event: ('main_image', 'crowd_image', 'experience_image', 'performance_image', 'image'),
+    EventGallery: ('image',),
+}
+FORMATS = ('webp', 'jpeg')
+CACHE_PREFIX = 'images:derived:'
+
+
+# ============================
+# RENDERING (pure)
+# ============================
+def derivative_cache():
+    return caches[settings.IMAGE_DERIVATIVE_CACHE_ALIAS]
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, 'JPEG', quality=settings.IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render(data):
+    """(content hash, [Rendition]) for the image bytes ``data``"""
+    content_hash = hashlib.sha256(data).hexdigest()
+    with Image.open(io.BytesIO(data)) as original:
+        # Phone photos store their rotation in EXIF
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    renditions = []
+    widths = sorted({min(width, image.width) for width in settings.IMAGE_DERIVATIVE_WIDTHS})
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            renditions.append(Rendition(width, height, fmt, False, _encode(resized, fmt)))
+
+    size = settings.IMAGE_THUMBNAIL_SIZE
+    thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+    for fmt in FORMATS:
+        renditions.append(Rendition(size, size, fmt, True, _encode(thumbnail, fmt)))
+    return content_hash, renditions
+
+
+def derivative_name(source, content_hash, rendition):
+    label = f'thumb{rendition.width}' if rendition.is_thumbnail else f'{rendition.width}w'
+    directory = os.path.dirname(source)
+    return os.path.join(directory, 'derived', f'{content_hash[:32]}-{label}.{rendition.format}')
+
+
+# ============================
+# STORAGE
+# ============================
+def store(source, content_hash, renditions, storage=default_storage):
+    """Save renditions of ``source`` (skipping files that already exist) and record them"""
+    rows = []
+    for rendition in renditions:
+        name = derivative_name(source, content_hash, rendition)
+        if not storage.exists(name):
+            name = storage.save(name, ContentFile(rendition.content))
+        rows.append(ImageDerivative(
+            source=source,
+            content_hash=content_hash,
+            width=rendition.width,
+            height=rendition.height,
+            format=rendition.format,
+            is_thumbnail=rendition.is_thumbnail,
+            name=name,
+        ))
+    with transaction.atomic():
+        ImageDerivative.objects.filter(source=source).delete()
+        ImageDerivative.objects.bulk_create(rows)
+    derivative_cache().delete(CACHE_PREFIX + source)
+    return rows
+
+
+def derive(source, storage=default_storage):
+    """Read, render and store the derivatives of one original"""
+    with storage.open(source, 'rb') as handle:
+        data = handle.read()
+    content_hash, renditions = render(data)
+    return store(source, content_hash, renditions, storage)
+
+
+@jobs.register('images.derive')
+def derive_job(source, purge=()):
+    """Worker entry point; ``purge`` lists page-cache tags showing the image"""
+    rows = derive(source)
+    pagecache.purge_tags(purge)
+    return {'source': source, 'derivatives': len(rows)}
+
+
+# ============================
+# UPLOAD HOOK
+# ============================
+def image_names(instance):
+    """Storage names of the images set on ``instance``"""
+    return [
+        getattr(instance, field).name
+        for field in IMAGE_FIELDS[type(instance)]
+        if getattr(instance, field)
+    ]
+
+
+def queue_missing(instance):
+    """Queue derivative jobs for images of ``instance`` that have none yet"""
+    names = image_names(instance)
+    if not names:
+        return []
+    done = set(ImageDerivative.objects.filter(source__in=names).values_list('source', flat=True).distinct())
+    event = instance.event if isinstance(instance, EventGallery) else instance
+    purge = [pagecache.model_tag(Event), pagecache.instance_tag(event)]
+    return [
+        jobs.enqueue('images.derive', {'source': name, 'purge': purge})
+        for name in names
+        if name not in done
+    ]
+
+
+# ============================
+# LOOKUP
+# ============================
+def derivatives(source):
+    """
+    Derivative rows of ``source`` as dicts, empty until the job has run. Found
+    rows are cached for ``IMAGE_DERIVATIVE_CACHE_TTL``; an empty answer only
+    for ``IMAGE_DERIVATIVE_MISS_TTL``, so pages switch from the original soon
+    after the job finishes even if its cache delete was missed.
+    """
+    if not source:
+        return []
+    cache = derivative_cache()
+    key = CACHE_PREFIX + source
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(ImageDerivative.objects.filter(source=source).values(
+            'width', 'height', 'format', 'is_thumbnail', 'name'
+        ))
+        ttl = settings.IMAGE_DERIVATIVE_CACHE_TTL if rows else settings.IMAGE_DERIVATIVE_MISS_TTL
+        cache.set(key, rows, ttl)
+    return rows
+
+
+def srcset(source, fmt):
+    """``url 320w, url 640w`` for one format, narrowest first"""
+    return ', '.join(
+        f"{default_storage.url(row['name'])} {row['width']}w"
+        for row in derivatives(source)
+        if row['format'] == fmt and not row['is_thumbnail']
+    )
+
+
+def preview_url(image, min_width=320):
+    """URL of the narrowest JPEG at least ``min_width`` wide (else the widest), or the original"""
+    if not image:
+        return ''
+    jpeg = [row for row in derivatives(image.name) if row['format'] == 'jpeg' and not row['is_thumbnail']]
+    if not jpeg:
+        return image.url
+    wide_enough = [row for row in jpeg if row['width'] >= min_width]
+    row = min(wide_enough, key=lambda row: row['width']) if wide_enough else max(jpeg, key=lambda row: row['width'])
+    return default_storage.url(row['name'])
+
+
+def thumbnail_url(image, fmt='jpeg'):
+    """URL of the square thumbnail of ``image``, or the original until it exists"""
+    if not image:
+        return ''
+    for row in derivatives(image.name):
+        if row['is_thumbnail'] and row['format'] == fmt:
+            return default_storage.url(row['name'])
+    return image.url
@@ -0,0 +1,88 @@
+"""
+Seat Inventory Service
+======================
+
+All changes to ``Event.vip_seats_left`` / ``gold_seats_left`` /
+``standard_seats_left`` go through this module. Each change is one
+conditional ``UPDATE`` on a single column::
+
+    UPDATE events_event SET vip_seats_left = vip_seats_left - 2
+    WHERE id = 7 AND vip_seats_left >= 2
+
+so concurrent approvals can neither lose updates nor oversell, and nothing
+needs to be read first. The functions return True/False depending on whether
+the row was changed. ``UPDATE`` sends no signals, so successful changes purge
+the event's cached pages here.
+"""
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import Event
+from .pagecache import model_tag, purge_tags, row_tag
+
+
+def _purge_pages(event_ids):
+    purge_tags([model_tag(Event)] + [row_tag(Event, event_id) for event_id in event_ids])
+
+SEAT_FIELDS = {
+    'vip': 'vip_seats_left',
+    'gold': 'gold_seats_left',
+    'standard': 'standard_seats_left',
+}
+
+
+class SoldOut(Exception):
+    """Raised when a tier does not have enough seats left for a sale"""
+
+    def __init__(self, event_id, ticket_type, quantity, available=None):
+        self.event_id = event_id
+        self.ticket_type = ticket_type
+        self.quantity = quantity
+        self.available = available
+        super().__init__(f"Not enough {ticket_type.upper()} seats left for {quantity} ticket(s) (event {event_id})")
+
+
+def seat_field(ticket_type):
+    try:
+        return SEAT_FIELDS[ticket_type]
+    except KeyError:
+        raise ValueError(f"Unknown ticket type: {ticket_type}")
+
+
+def reserve_seats(event_id, ticket_type, quantity):
+    """Take ``quantity`` seats from a tier; False if not enough are left"""
+    field = seat_field(ticket_type)
+    updated = Event.objects.filter(pk=event_id, **{f'{field}__gte': quantity}).update(
+        **{field: F(field) - quantity}
+    )
+    if updated:
+        _purge_pages([event_id])
+    return updated == 1
+
+
+def release_seats(event_id, ticket_type, quantity):
+    """Give ``quantity`` seats back to a tier (refunds, downgrades)"""
+    field = seat_field(ticket_type)
+    updated = Event.objects.filter(pk=event_id).update(
+        **{field: Coalesce(F(field), 0) + quantity}
+    )
+    if updated:
+        _purge_pages([event_id])
+    return updated == 1
+
+
+def move_seats(event_id, from_type, to_type, quantity):
+    """Move a sale between tiers; False (and nothing changed) if ``to_type`` is full"""
+    if not reserve_seats(event_id, to_type, quantity):
+        return False
+    release_seats(event_id, from_type, quantity)
+    return True
+
+
+def add_seats(queryset, quantity):
+    """Add ``quantity`` seats to every tier of every event in ``queryset``"""
+    _purge_pages(queryset.values_list('pk', flat=True))
+    return queryset.update(**{
+        field: Coalesce(F(field), 0) + quantity for field in SEAT_FIELDS.values()
+    })
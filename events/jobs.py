@@ -0,0 +1,203 @@
+"""
+Background Job Queue for Momenta
+================================
+
+A small job queue backed by the ``Job`` table, so slow work (payment provider
+calls and the like) can leave the request thread without an external broker.
+
+Handlers are registered by name::
+
+    @jobs.register('payments.process')
+    def process_payment_job(payment_id):
+        ...
+
+and queued with ``jobs.enqueue('payments.process', {'payment_id': 42})``.
+A handler may name an ``on_failure`` callback, called with the same payload
+once the job has used up its attempts, to undo whatever it was holding.
+``python manage.py run_jobs`` starts a ``WorkerPool`` that claims jobs with a
+conditional UPDATE, so several workers (threads or processes) can share the
+same table safely.
+"""
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('events')
+
+_handlers = {}
+_failure_handlers = {}
+
+
+def register(kind, on_failure=None):
+    """
+    Decorator registering ``func`` as the handler for jobs of ``kind``.
+    ``on_failure(**payload)`` runs when such a job fails for the last time.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        if on_failure is not None:
+            _failure_handlers[kind] = on_failure
+        else:
+            _failure_handlers.pop(kind, None)
+        return func
+    return decorator
+
+
+def _give_up(job):
+    """Run the kind's on-failure callback for a job that will not be retried"""
+    on_failure = _failure_handlers.get(job.kind)
+    if on_failure is None:
+        return
+    try:
+        on_failure(**job.payload)
+    except Exception:
+        logger.exception(f"On-failure callback of job {job} raised")
+
+
+def enqueue(kind, payload=None, delay=0, max_attempts=3):
+    """Queue a job for the worker pool and return it"""
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+
+
+def claim_next(worker_name, kinds=None):
+    """
+    Claim the next runnable job for ``worker_name``.
+    Returns None when the queue is empty.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(status='queued', run_after__lte=now)
+    if kinds:
+        candidates = candidates.filter(kind__in=kinds)
+
+    for job_id in candidates.order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        # Only one worker can move a given row out of 'queued'
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            locked_by=worker_name,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome"""
+    handler = _handlers.get(job.kind)
+    if handler is None:
+        job.status = 'failed'
+        job.last_error = f"No handler registered for '{job.kind}'"
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+        return job
+
+    try:
+        result = handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            # Exponential backoff: 2s, 4s, 8s, ...
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        else:
+            job.status = 'failed'
+        logger.warning(f"Job {job} raised (attempt {job.attempts}/{job.max_attempts})")
+        job.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+        if job.status == 'failed':
+            _give_up(job)
+        return job
+
+    job.status = 'done'
+    job.result = result if isinstance(result, dict) else {'result': result}
+    job.save(update_fields=['status', 'result', 'updated_at'])
+    return job
+
+
+def run_pending(limit=None, kinds=None, worker_name='inline'):
+    """Drain runnable jobs in the current thread; returns how many ran"""
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker_name, kinds=kinds)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale(timeout=300):
+    """Put jobs back on the queue whose worker died mid-run"""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None
+    )
+
+
+class WorkerPool:
+    """
+    A pool of worker threads polling the job table.
+    Each thread owns its own database connection.
+    """
+
+    def __init__(self, workers=4, poll_interval=1.0, kinds=None, name=None):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.kinds = kinds
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, args=(f"{self.name}/{index}",), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _work(self, worker_name):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next(worker_name, kinds=self.kinds)
+                except Exception as e:
+                    logger.error(f"Worker {worker_name} could not claim a job: {e}")
+                    job = None
+                if job is None:
+                    self._stop.wait(self.poll_interval)
+                    continue
+                run_job(job)
+        finally:
+            connection.close()
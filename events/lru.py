@@ -0,0 +1,54 @@
+"""
+In-Process LRU Cache
+====================
+
+A small thread-safe LRU with a per-entry TTL, for per-process caches that
+sit in front of the database or a shared cache (search results, model
+objects). Keys are tuples whose first element is a namespace, so one
+namespace can be cleared at a time.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU of (namespace, ...) -> value with a per-entry TTL"""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, kind=None):
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == kind]:
+                    del self._entries[key]
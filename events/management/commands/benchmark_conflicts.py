@@ -0,0 +1,158 @@
+# events/management/commands/benchmark_conflicts.py
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events.conflicts import (
+    IntervalTree, find_resource_overloads, find_venue_conflicts, occupied_span, peak_usage, venue_conflicts,
+)
+from events.models import Category, Event, Resource, ResourceAllocation, Venue, VenueBooking
+
+
+class Command(BaseCommand):
+    help = 'Benchmark double-booking detection against a venue and a resource with many bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=10000, help='Stored bookings on the venue')
+        parser.add_argument('--allocations', type=int, default=10000, help='Stored allocations of the resource')
+        parser.add_argument('--checks', type=int, default=500, help='Single-booking checks to time')
+        parser.add_argument('--batch', type=int, default=10000, help='Bookings in the imported season batch')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark rows afterwards')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"🏗️  Seeding {options['bookings']} bookings and {options['allocations']} allocations...")
+        venue, resource, category, start = self.create_fixtures(options['bookings'], options['allocations'], rng)
+        try:
+            self.bench_single(venue, start, options['bookings'], options['checks'], rng)
+            self.bench_batch(venue, start, options['bookings'], options['batch'], rng)
+            self.bench_resource(resource, start, options['allocations'], rng)
+        finally:
+            if not options['keep']:
+                Event.objects.filter(category=category).delete()
+                venue.delete()
+                resource.delete()
+                category.delete()
+
+    # ----------------------------------------------------------------
+    def _candidate(self, venue, start, span_hours, rng):
+        begin = start + timedelta(hours=rng.uniform(0, span_hours))
+        return VenueBooking(
+            venue=venue,
+            start_datetime=begin,
+            end_datetime=begin + timedelta(hours=rng.choice([2, 3, 4])),
+            setup_hours=1,
+            cleanup_hours=1,
+            status='pending',
+        )
+
+    def bench_single(self, venue, start, bookings, checks, rng):
+        candidates = [self._candidate(venue, start, bookings * 5, rng) for _ in range(checks)]
+        plan = VenueBooking.objects.filter(
+            venue=venue, start_datetime__lt=start, end_datetime__gt=start
+        ).explain()
+        started = time.perf_counter()
+        clashes = sum(1 for candidate in candidates if venue_conflicts(candidate))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'🔎 Indexed overlap query: {checks} checks in {elapsed:.3f}s '
+                          f'({elapsed / checks * 1000:.2f} ms each), {clashes} clash(es)')
+        self.stdout.write(f'   plan: {plan.splitlines()[-1].strip()}')
+
+    def bench_batch(self, venue, start, bookings, batch, rng):
+        candidates = [self._candidate(venue, start, bookings * 5, rng) for _ in range(batch)]
+        started = time.perf_counter()
+        conflicts = find_venue_conflicts(candidates)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'🌲 Interval tree batch: {batch} new vs {bookings} stored in {elapsed:.3f}s, '
+                          f'{len(conflicts)} conflict pair(s)')
+
+        # Pairwise comparison for scale, on a sample and extrapolated
+        stored = [occupied_span(booking) for booking in VenueBooking.objects.filter(venue=venue).only(
+            'start_datetime', 'end_datetime', 'setup_hours', 'cleanup_hours')]
+        sample = [occupied_span(candidate) for candidate in candidates[:200]]
+        started = time.perf_counter()
+        for begin, end in sample:
+            sum(1 for other_begin, other_end in stored if other_begin < end and begin < other_end)
+        per_item = (time.perf_counter() - started) / len(sample)
+        self.stdout.write(f'🐢 Pairwise scan (estimated): {per_item * batch:.3f}s for the same batch')
+
+        tree = IntervalTree([(begin, end, None) for begin, end in stored])
+        started = time.perf_counter()
+        for begin, end in sample:
+            tree.overlapping(begin, end)
+        per_item = (time.perf_counter() - started) / len(sample)
+        self.stdout.write(f'   tree lookups alone: {per_item * 1000 * 1000:.1f} µs each')
+
+    def bench_resource(self, resource, start, allocations, rng):
+        rows = list(ResourceAllocation.objects.filter(resource=resource).values_list('start_date', 'end_date', 'quantity_needed'))
+        started = time.perf_counter()
+        peak, day = peak_usage(rows)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'📈 Sweep-line over {allocations} allocations: peak {peak} unit(s) on {day} in {elapsed * 1000:.1f} ms')
+
+        first = start.date()
+        batch = [
+            ResourceAllocation(
+                resource=resource,
+                start_date=first + timedelta(days=offset),
+                end_date=first + timedelta(days=offset + rng.randint(0, 3)),
+                quantity_needed=rng.randint(1, 5),
+                status='requested',
+            )
+            for offset in (rng.randint(0, 365) for _ in range(1000))
+        ]
+        started = time.perf_counter()
+        overloads = find_resource_overloads(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'📦 Batch of 1000 new allocations checked in {elapsed:.3f}s, '
+                          f'{len(overloads)} over-allocated stretch(es)')
+
+    # ----------------------------------------------------------------
+    def create_fixtures(self, bookings, allocations, rng):
+        category = Category.objects.create(name=f'Conflict Benchmark {int(time.time())}')
+        venue = Venue.objects.create(name='Benchmark Arena', address='Benchmark', capacity=1000, hourly_rate=Decimal('100'))
+        resource = Resource.objects.create(
+            name='Benchmark Speakers', resource_type='sound', cost_per_day=Decimal('50'), quantity_available=40
+        )
+        start = timezone.make_aware(datetime.combine(date.today() + timedelta(days=1), datetime.min.time()))
+
+        # One event per booking/allocation (VenueBooking.event is one-to-one)
+        Event.objects.bulk_create([
+            Event(title=f'Benchmark {i}', description='Temporary', date=start.date(), category=category)
+            for i in range(bookings + allocations)
+        ], batch_size=2000)
+        event_ids = list(Event.objects.filter(category=category).order_by('id').values_list('id', flat=True))
+
+        # Back-to-back 3h slots with 1h setup and 1h cleanup: 5h apart, no overlaps
+        VenueBooking.objects.bulk_create([
+            VenueBooking(
+                event_id=event_ids[i],
+                venue=venue,
+                start_datetime=start + timedelta(hours=5 * i + 1),
+                end_datetime=start + timedelta(hours=5 * i + 4),
+                setup_hours=1,
+                cleanup_hours=1,
+                total_cost=Decimal('500'),
+                status='confirmed',
+            )
+            for i in range(bookings)
+        ], batch_size=2000)
+
+        ResourceAllocation.objects.bulk_create([
+            ResourceAllocation(
+                event_id=event_ids[bookings + i],
+                resource=resource,
+                start_date=start.date() + timedelta(days=day),
+                end_date=start.date() + timedelta(days=day + rng.randint(0, 3)),
+                quantity_needed=rng.randint(1, 3),
+                total_cost=Decimal('50'),
+                status='confirmed',
+            )
+            for i, day in enumerate(rng.randint(0, 365) for _ in range(allocations))
+        ], batch_size=2000)
+        return venue, resource, category, start
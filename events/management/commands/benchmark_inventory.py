@@ -0,0 +1,113 @@
+# events/management/commands/benchmark_inventory.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+from events.inventory import SEAT_FIELDS, SoldOut, reserve_seats, seat_field
+from events.models import Category, Event, Booking, PaymentTransaction
+
+
+class Command(BaseCommand):
+    help = 'Concurrency benchmark: many threads approve payments for one event at once; fails if any seat is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=200, help='Concurrent approvals (one payment each)')
+        parser.add_argument('--seats', type=int, default=150, help='Seats available in the tier')
+        parser.add_argument('--ticket-type', default='vip', choices=['vip', 'gold', 'standard'])
+        parser.add_argument('--lock-timeout', type=float, default=120, help='Seconds an approval keeps retrying on database lock errors')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark event and payments afterwards')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        seats = options['seats']
+        ticket_type = options['ticket_type']
+        field = seat_field(ticket_type)
+
+        event, user, payment_ids = self.create_fixtures(threads, seats, ticket_type)
+        self.stdout.write(f'🎫 {threads} threads approving 1 {ticket_type.upper()} ticket each, {seats} seat(s) available...')
+
+        barrier = threading.Barrier(threads)
+        lock_retries = []
+
+        def approve(payment):
+            # Each thread races on the single conditional UPDATE that decides the sale,
+            # then records the outcome on its own payment row
+            payment_id, tickets = payment
+            try:
+                barrier.wait()
+                deadline = time.monotonic() + options['lock_timeout']
+                backoff = 0.005
+                while time.monotonic() < deadline:
+                    try:
+                        with transaction.atomic():
+                            if not reserve_seats(event.id, ticket_type, tickets):
+                                raise SoldOut(event.id, ticket_type, tickets)
+                            PaymentTransaction.objects.filter(pk=payment_id).update(status='completed')
+                        return 'approved'
+                    except SoldOut:
+                        return 'sold_out'
+                    except OperationalError:
+                        # SQLite allows a single writer; back off and retry
+                        lock_retries.append(1)
+                        time.sleep(random.uniform(0, backoff))
+                        backoff = min(backoff * 2, 0.25)
+                return 'error'
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(approve, [(payment_id, 1) for payment_id in payment_ids]))
+        elapsed = time.perf_counter() - started
+
+        approved = results.count('approved')
+        sold_out = results.count('sold_out')
+        errors = results.count('error')
+        seats_left = Event.objects.values_list(field, flat=True).get(pk=event.pk)
+        completed = PaymentTransaction.objects.filter(id__in=payment_ids, status='completed').count()
+
+        self.stdout.write(f'⏱️  {elapsed:.3f}s total, {threads / elapsed:.1f} approvals/s')
+        self.stdout.write(f'✅ approved: {approved}   ❌ sold out: {sold_out}   ⚠️ errors: {errors}   🔁 lock retries: {len(lock_retries)}')
+        self.stdout.write(f'💺 seats left: {seats_left}   completed payments: {completed}')
+
+        oversold = seats_left < 0 or completed + seats_left != seats or approved != completed
+        if not options['keep']:
+            event.delete()
+            user.delete()
+
+        if oversold:
+            raise CommandError('Oversell detected: seat count and completed payments disagree')
+        if errors:
+            raise CommandError(f'{errors} approval(s) gave up after repeated lock errors')
+        self.stdout.write(self.style.SUCCESS('🎉 No oversell'))
+
+    def create_fixtures(self, threads, seats, ticket_type):
+        category, _ = Category.objects.get_or_create(name='Benchmark')
+        tiers = {field: 0 for field in SEAT_FIELDS.values()}
+        tiers[seat_field(ticket_type)] = seats
+        event = Event.objects.create(
+            title='Inventory Benchmark',
+            description='Temporary event created by benchmark_inventory',
+            date=date.today() + timedelta(days=30),
+            location='Benchmark',
+            category=category,
+            **tiers
+        )
+        user, _ = User.objects.get_or_create(username='inventory-benchmark', defaults={'email': 'bench@example.com'})
+        payment_ids = []
+        for _ in range(threads):
+            booking = Booking.objects.create(user=user, event=event, ticket_type=ticket_type, tickets=1)
+            payment = PaymentTransaction.objects.create(
+                booking=booking,
+                payment_method='mtn',
+                amount=booking.total_price,
+                status='pending',
+            )
+            payment_ids.append(payment.id)
+        return event, user, payment_ids
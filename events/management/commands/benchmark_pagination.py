@@ -0,0 +1,80 @@
+# events/management/commands/benchmark_pagination.py
+
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from events.models import Category, Event
+from events.pagination import paginate
+
+
+class Command(BaseCommand):
+    help = 'Time keyset pages against OFFSET pages from page 1 to the last page of a large catalogue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=500, help='Pages to walk')
+        parser.add_argument('--per-page', type=int, default=settings.LISTING_PAGE_SIZE)
+        parser.add_argument('--repeat', type=int, default=5, help='Timings per sampled page (median is reported)')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark rows afterwards')
+
+    def handle(self, *args, **options):
+        pages, per_page = options['pages'], options['per_page']
+        total = pages * per_page
+        self.stdout.write(f'🏗️  Seeding {total} events...')
+        category = Category.objects.create(name=f'Pagination Benchmark {int(time.time())}')
+        first_day = date.today()
+        Event.objects.bulk_create([
+            # A few events per day so the id tie-break matters
+            Event(title=f'Benchmark {i}', description='Temporary', location='Lusaka',
+                  date=first_day + timedelta(days=i // 4), category=category)
+            for i in range(total)
+        ], batch_size=2000)
+        try:
+            self.run(Event.objects.filter(category=category), pages, per_page, options['repeat'])
+        finally:
+            if not options['keep']:
+                Event.objects.filter(category=category).delete()
+                category.delete()
+
+    def run(self, events, pages, per_page, repeat):
+        keys = ('date', 'id')
+
+        # Walk every page once, remembering each page's cursor
+        cursors, cursor, seen = [None], None, 0
+        started = time.perf_counter()
+        for _ in range(pages):
+            page = paginate(events, keys, cursor, per_page)
+            seen += len(page)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+            cursors.append(cursor)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'🚶 Walked {len(cursors)} keyset pages ({seen} rows) in {elapsed:.3f}s')
+
+        samples = sorted({1, 2, 10, 50, 100, 250, pages // 2, pages - 1, pages} & set(range(1, len(cursors) + 1)))
+        ordered = events.order_by(*keys)
+        self.stdout.write(f"\n{'page':>6} {'keyset ms':>10} {'offset ms':>10}")
+        keyset_times, offset_times = [], []
+        for number in samples:
+            keyset_ms = self.median_ms(lambda: paginate(events, keys, cursors[number - 1], per_page), repeat)
+            start = (number - 1) * per_page
+            offset_ms = self.median_ms(lambda: list(ordered[start:start + per_page + 1]), repeat)
+            keyset_times.append(keyset_ms)
+            offset_times.append(offset_ms)
+            self.stdout.write(f'{number:>6} {keyset_ms:>10.2f} {offset_ms:>10.2f}')
+
+        self.stdout.write(
+            f'\n📈 Last page / first page: keyset {keyset_times[-1] / keyset_times[0]:.1f}x, '
+            f'offset {offset_times[-1] / offset_times[0]:.1f}x'
+        )
+
+    def median_ms(self, fetch, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
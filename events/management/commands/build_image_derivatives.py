@@ -0,0 +1,73 @@
+# events/management/commands/build_image_derivatives.py
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from events import images
+from events.models import ImageDerivative
+
+
+class Command(BaseCommand):
+    help = 'Backfill WebP/JPEG derivatives for existing event and gallery images, rendering in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Rendering processes')
+        parser.add_argument('--force', action='store_true', help='Rebuild images that already have derivatives')
+
+    def handle(self, *args, **options):
+        sources = self.find_sources(options['force'])
+        if not sources:
+            self.stdout.write('✅ Every image already has derivatives.')
+            return
+        self.stdout.write(f"🖼️  Rendering {len(sources)} image(s) with {options['workers']} worker(s)...")
+
+        started = time.perf_counter()
+        done = failed = 0
+        # Workers only run images.render (bytes in, bytes out); reading and
+        # storing stay in this process, which owns the database connection
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+            pending = {}
+            queue = iter(sources)
+            while True:
+                # Keep a couple of images per worker in flight to bound memory
+                while len(pending) < options['workers'] * 2:
+                    source = next(queue, None)
+                    if source is None:
+                        break
+                    try:
+                        with default_storage.open(source, 'rb') as handle:
+                            pending[pool.submit(images.render, handle.read())] = source
+                    except OSError as exc:
+                        failed += 1
+                        self.stderr.write(f'❌ {source}: {exc}')
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    source = pending.pop(future)
+                    try:
+                        content_hash, renditions = future.result()
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f'❌ {source}: {exc}')
+                        continue
+                    images.store(source, content_hash, renditions)
+                    done += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'🎉 Built derivatives for {done} image(s) in {elapsed:.1f}s' + (f', {failed} failed' if failed else '')
+        ))
+
+    def find_sources(self, force):
+        sources = set()
+        for model, fields in images.IMAGE_FIELDS.items():
+            for row in model.objects.values_list(*fields):
+                sources.update(name for name in row if name)
+        if not force:
+            sources -= set(ImageDerivative.objects.values_list('source', flat=True).distinct())
+        return sorted(sources)
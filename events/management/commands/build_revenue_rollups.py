@@ -0,0 +1,33 @@
+# events/management/commands/build_revenue_rollups.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events import rollups
+
+
+class Command(BaseCommand):
+    help = 'Roll payments changed since the last run up into daily revenue (see events/rollups.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every day, not just the changed ones')
+        parser.add_argument('--every', type=int, default=0, help='Keep running, building every N seconds')
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            started = time.perf_counter()
+            result = rollups.build(full=full)
+            self.stdout.write(self.style.SUCCESS(
+                f"📈 Revenue rollup: {result['days']} day(s) rebuilt, {result['rows']} row(s) in "
+                f"{time.perf_counter() - started:.2f}s (payments read up to "
+                f"{timezone.localtime(result['high_water']):%Y-%m-%d %H:%M:%S})"
+            ))
+            if not options['every']:
+                return
+            full = False
+            try:
+                time.sleep(options['every'])
+            except KeyboardInterrupt:
+                return
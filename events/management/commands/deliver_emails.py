@@ -0,0 +1,53 @@
+# events/management/commands/deliver_emails.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from events import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Messages sent per SMTP connection',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait between polls when the outbox is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox and exit',
+        )
+
+    def handle(self, *args, **options):
+        stale = outbox.requeue_stale()
+        if stale:
+            self.stdout.write(f'♻️ Re-queued {stale} stale email(s)')
+
+        worker_name = outbox.default_worker_name()
+        self.stdout.write(self.style.SUCCESS(f'📬 Email delivery worker {worker_name} started. Press Ctrl+C to stop.'))
+        try:
+            while True:
+                stats = outbox.deliver_pending(batch_size=options['batch_size'], worker_name=worker_name)
+                if any(stats.values()):
+                    self.stdout.write(
+                        f"📧 sent {stats['sent']}, retrying {stats['retry']}, "
+                        f"failed {stats['failed']}, deferred {stats['deferred']}"
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('👋 Email delivery worker stopped')
@@ -0,0 +1,45 @@
+# events/management/commands/explain_queries.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from events import hotqueries
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every registered hot query (events/hotqueries.py) and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these queries (default: all)')
+        parser.add_argument('--database', default='default', help='Database alias to explain against')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any query scans a table (for CI)')
+
+    def handle(self, *args, **options):
+        unknown = sorted(set(options['names']) - set(hotqueries.registry))
+        if unknown:
+            raise CommandError(f"Unknown hot query: {', '.join(unknown)} (known: {', '.join(sorted(hotqueries.registry))})")
+
+        vendor = connections[options['database']].vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(f'ℹ️ Scan detection supports SQLite and PostgreSQL; showing {vendor} plans only.')
+
+        flagged = []
+        for explained in hotqueries.explain_all(options['names'], options['database']):
+            query = explained.query
+            if explained.scans:
+                flagged.append(query.name)
+                tables = ', '.join(sorted(set(explained.scans)))
+                self.stdout.write(self.style.WARNING(f'⚠️ {query.name}: full scan of {tables} — {query.description}'))
+            else:
+                self.stdout.write(f'✅ {query.name}: indexed — {query.description}')
+            if explained.scans or options['verbosity'] > 1:
+                for line in explained.plan.splitlines():
+                    self.stdout.write(f'      {line}')
+
+        total = len(options['names'] or hotqueries.registry)
+        if flagged:
+            message = f'{len(flagged)} of {total} hot queries scan a table: {", ".join(flagged)}'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(f'📋 {message}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'📋 All {total} hot queries use an index'))
@@ -0,0 +1,73 @@
+# events/management/commands/generate_dataset.py
+
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from events import datagen
+from events.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Generate a production-sized synthetic dataset for benchmarks (see events/datagen.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help=f'Units of data: each is {datagen.USERS_PER_SCALE} users, {datagen.EVENTS_PER_SCALE} events and '
+                 f'{datagen.BOOKINGS_PER_SCALE} bookings with payments (100 ≈ production)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Same seed and anchor, same data')
+        parser.add_argument('--anchor', type=date.fromisoformat, help="Date treated as today (default: today)")
+        parser.add_argument(
+            '--workers', type=int,
+            help='Writer processes (default: one per CPU on PostgreSQL; SQLite always uses one)',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--clear', action='store_true', help='Delete a previously generated dataset first')
+
+    def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        workers = options['workers'] or (os.cpu_count() if connection.vendor == 'postgresql' else 1)
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stdout.write(self.style.WARNING('⚠️ SQLite allows one writer at a time; using a single process.'))
+            workers = 1
+
+        if options['clear']:
+            self.stdout.write('🧹 Removing the previous dataset...')
+            self.stdout.write(f'   {datagen.clear()} row(s) deleted')
+        elif Category.objects.filter(slug__startswith=datagen.SLUG_PREFIX).exists():
+            raise CommandError('A generated dataset already exists; pass --clear to replace it.')
+
+        size = datagen.sizes(options['scale'])
+        self.stdout.write(
+            f'🏗️  Generating {size.users:,} users, {size.events:,} events, ~{size.bookings:,} bookings, '
+            f'{size.venues} venues and {size.resources} resources (seed {options["seed"]}, {workers} worker(s))...'
+        )
+        started = time.perf_counter()
+        totals = datagen.generate(
+            options['scale'], seed=options['seed'], anchor=options['anchor'], workers=workers,
+            batch_size=options['batch_size'], progress=self.progress,
+        )
+        written = time.perf_counter() - started
+
+        self.stdout.write('🔄 Refreshing statistics, search index, sales summary, revenue rollup, dashboard and caches...')
+        datagen.finish()
+        elapsed = time.perf_counter() - started
+
+        rows = totals['users'] * 2 + totals['bookings'] * 2 + sum(
+            totals[name] for name in ('events', 'venue_bookings', 'allocations', 'categories', 'venues', 'resources'))
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ Dataset ready in {elapsed:.1f}s ({rows / written:,.0f} rows/s while writing):\n"
+            f"  {totals['users']:,} users (password '{datagen.PASSWORD}'), {totals['events']:,} events, "
+            f"{totals['bookings']:,} bookings and payments,\n"
+            f"  {totals['venue_bookings']:,} venue bookings, {totals['allocations']:,} resource allocations, "
+            f"{totals['venues']} venues, {totals['resources']} resources"
+        ))
+
+    def progress(self, kind, done, total):
+        if done == total or done % 10 == 0:
+            self.stdout.write(f'   {kind}: {done}/{total} shard(s)')
@@ -0,0 +1,332 @@
+# events/management/commands/loadtest_checkout.py
+
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import urljoin
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from events.inventory import SEAT_FIELDS, seat_field
+from events.jobs import WorkerPool
+from events.models import Category, Event, PaymentTransaction
+from events.payments import stub_latency_range
+
+STAGES = ('select_seat', 'ticket_selection', 'payment', 'provider', 'approval', 'checkout')
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Load test the checkout flow (seat page → ticket selection → payment → provider → approval) '
+            'with N concurrent virtual users and stubbed providers; reports per-stage latency and oversells')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Virtual users (one checkout each)')
+        parser.add_argument('--concurrency', type=int, default=None, help='Users running at once (default: all)')
+        parser.add_argument('--seats', type=int, default=None, help='Seats in the tier (default: half the users, to force sell-outs)')
+        parser.add_argument('--tickets', type=int, default=1, help='Tickets per checkout')
+        parser.add_argument('--ticket-type', default='standard', choices=sorted(SEAT_FIELDS))
+        parser.add_argument('--payment-method', default='mtn', choices=['mtn', 'airtel', 'zamtel'])
+        parser.add_argument('--provider-latency', default='50', help="Stub provider latency in ms: '50' or a range like '20-200'")
+        parser.add_argument('--provider-failure-rate', type=float, default=0.0, help='Share of provider calls the stub declines')
+        parser.add_argument('--job-workers', type=int, default=4, help='In-process job worker threads running the provider calls')
+        parser.add_argument('--url', help='Base URL of a running deployment sharing this database (run it with '
+                                          'PAYMENT_PROVIDER_STUB=True and its own run_jobs); default: an in-process server')
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for any one stage')
+        parser.add_argument('--output', help='Result file (default: loadtest-checkout-<timestamp>.json)')
+        parser.add_argument('--keep', action='store_true', help='Keep the load-test event, users and sessions afterwards')
+
+    def handle(self, *args, **options):
+        users = options['users']
+        if users < 1 or options['tickets'] < 1:
+            raise CommandError('--users and --tickets must be at least 1')
+        try:
+            stub_latency_range(options['provider_latency'])
+        except ValueError:
+            raise CommandError(f"Invalid --provider-latency {options['provider_latency']!r}")
+        options['concurrency'] = options['concurrency'] or users
+        options['seats'] = users * options['tickets'] // 2 if options['seats'] is None else options['seats']
+
+        fixtures = self.create_fixtures(options)
+        overrides = {
+            'PAYMENT_PROVIDER_STUB': True,
+            'PAYMENT_STUB_LATENCY_MS': options['provider_latency'],
+            'PAYMENT_STUB_FAILURE_RATE': options['provider_failure_rate'],
+        }
+        if not options['url']:
+            # Production-like in-process server: no debug toolbar or SQL logging, plain HTTP,
+            # and static URLs that do not need a collectstatic manifest
+            overrides.update(
+                DEBUG=False, SECURE_SSL_REDIRECT=False, SESSION_COOKIE_SECURE=False, CSRF_COOKIE_SECURE=False,
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            )
+        server = pool = None
+        try:
+            with override_settings(**overrides):
+                if options['url']:
+                    base_url = options['url'].rstrip('/')
+                    mode = 'live'
+                else:
+                    server, base_url = self.start_server()
+                    pool = WorkerPool(workers=options['job_workers'], poll_interval=0.02, kinds=['payments.process'])
+                    pool.start()
+                    mode = 'in-process'
+                if connection.vendor == 'sqlite':
+                    self.stdout.write('ℹ️ SQLite allows one writer at a time, so expect "database is locked" errors at '
+                                      'high concurrency; point DATABASE_URL at PostgreSQL for production-like numbers.')
+                self.stdout.write(
+                    f"🛒 {users} virtual user(s), {options['concurrency']} at a time, against {base_url} ({mode}); "
+                    f"{options['seats']} {options['ticket_type'].upper()} seat(s), provider stub {options['provider_latency']} ms"
+                )
+                report = self.run(base_url, fixtures, options)
+                report['mode'] = mode
+        finally:
+            if pool:
+                pool.stop(timeout=5)
+            if server:
+                server.shutdown()
+                server.server_close()
+            if not options['keep']:
+                self.delete_fixtures(fixtures)
+
+        self.print_report(report)
+        path = options['output'] or f"loadtest-checkout-{timezone.now():%Y%m%d-%H%M%S}.json"
+        with open(path, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(f'💾 Results written to {path}')
+        if report['oversold']:
+            raise CommandError(f"Oversell detected: {report['oversold']} ticket(s) sold beyond the {options['seats']} seat(s)")
+
+    # ============================
+    # FIXTURES
+    # ============================
+    def create_fixtures(self, options):
+        category, _ = Category.objects.get_or_create(name='Load Test')
+        tiers = {field: 0 for field in SEAT_FIELDS.values()}
+        tiers[seat_field(options['ticket_type'])] = options['seats']
+        event = Event.objects.create(
+            title='Checkout Load Test',
+            description='Temporary event created by loadtest_checkout',
+            date=date.today() + timedelta(days=30),
+            location='Load Test',
+            category=category,
+            **tiers
+        )
+        stamp = f'{timezone.now():%H%M%S%f}'
+        customers = [
+            User.objects.create_user(username=f'loadtest-{stamp}-{index}', email=f'loadtest{index}@example.com')
+            for index in range(options['users'])
+        ]
+        admin = User.objects.create_user(username=f'loadtest-{stamp}-admin', is_staff=True, is_superuser=True)
+        return {
+            'event': event,
+            'users': [(user, self.session_for(user)) for user in customers],
+            'admin': (admin, self.session_for(admin)),
+        }
+
+    def session_for(self, user):
+        """A logged-in session key, so the run does not measure the login form"""
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return session.session_key
+
+    def delete_fixtures(self, fixtures):
+        users = [user for user, _ in fixtures['users']] + [fixtures['admin'][0]]
+        Session.objects.filter(session_key__in=[key for _, key in fixtures['users']] + [fixtures['admin'][1]]).delete()
+        fixtures['event'].delete()
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def start_server(self):
+        """Django's threaded WSGI server on a free local port"""
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+        server.set_app(get_wsgi_application())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f'http://127.0.0.1:{server.server_port}'
+
+    # ============================
+    # VIRTUAL USERS
+    # ============================
+    def run(self, base_url, fixtures, options):
+        event = fixtures['event']
+        timings = defaultdict(list)
+        errors = Counter()
+        error_samples = {}
+        outcomes = Counter()
+        lock = threading.Lock()
+        admin_cookie = fixtures['admin'][1]
+
+        def record(stage, started=None, seconds=None):
+            with lock:
+                timings[stage].append(time.perf_counter() - started if seconds is None else seconds)
+
+        def checkout(entry):
+            user, session_key = entry
+            client = requests.Session()
+            client.cookies.set(settings.SESSION_COOKIE_NAME, session_key)
+            seat_url = urljoin(base_url, reverse('events:select_seat', args=[event.id]))
+            payment_url = urljoin(base_url, reverse('events:payment_page', args=[event.id]))
+            form = {'ticket_type': options['ticket_type'], 'tickets': options['tickets']}
+            stage = 'select_seat'
+            try:
+                began = started = time.perf_counter()
+                response = client.get(seat_url, timeout=options['timeout'])
+                if response.status_code != 200:
+                    raise ValueError(f'HTTP {response.status_code}')
+                record(stage, started)
+                form['csrfmiddlewaretoken'] = client.cookies.get(settings.CSRF_COOKIE_NAME, '')
+                headers = {'Referer': seat_url}
+
+                stage = 'ticket_selection'
+                started = time.perf_counter()
+                response = client.post(payment_url, data=form, headers=headers, allow_redirects=False, timeout=options['timeout'])
+                record(stage, started)
+                if response.status_code == 302:
+                    return 'sold_out_at_hold'
+                if response.status_code != 200:
+                    raise ValueError(f'HTTP {response.status_code}')
+
+                stage = 'payment'
+                started = time.perf_counter()
+                response = client.post(payment_url, data=dict(
+                    form, payment_method=options['payment_method'], phone_number='0977123456',
+                ), headers=headers, allow_redirects=False, timeout=options['timeout'])
+                if response.status_code != 200:
+                    raise ValueError(f'HTTP {response.status_code}')
+                record(stage, started)
+
+                stage = 'provider'
+                payment_id, status, seconds = self.wait_for_provider(user, event, options['timeout'])
+                record(stage, seconds=seconds)
+                if status == 'failed':
+                    return 'declined'
+
+                stage = 'approval'
+                started = time.perf_counter()
+                response = requests.post(
+                    urljoin(base_url, reverse('events:approve_payment', args=[payment_id])),
+                    cookies={settings.SESSION_COOKIE_NAME: admin_cookie},
+                    timeout=options['timeout'],
+                )
+                record(stage, started)
+                if response.status_code == 409:
+                    return 'sold_out_at_approval'
+                if response.status_code != 200:
+                    raise ValueError(f'HTTP {response.status_code}')
+                record('checkout', began)
+                return 'approved'
+            except Exception as e:
+                with lock:
+                    errors[stage] += 1
+                    error_samples.setdefault(stage, f'{type(e).__name__}: {e}')
+                return 'error'
+            finally:
+                client.close()
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            outcomes.update(pool.map(checkout, fixtures['users']))
+        elapsed = time.perf_counter() - started
+
+        field = seat_field(options['ticket_type'])
+        seats_left = Event.objects.values_list(field, flat=True).get(pk=event.pk)
+        sold = sum(PaymentTransaction.objects.filter(
+            booking__event=event, status='completed',
+        ).values_list('booking__tickets', flat=True))
+        oversold = max(0, sold - options['seats'], -seats_left)
+        requests_made = sum(len(values) for stage, values in timings.items() if stage not in ('provider', 'checkout'))
+        return {
+            'started_at': timezone.now().isoformat(),
+            'base_url': base_url,
+            'options': {name: options[name] for name in (
+                'users', 'concurrency', 'seats', 'tickets', 'ticket_type', 'payment_method',
+                'provider_latency', 'provider_failure_rate', 'job_workers',
+            )},
+            'duration_seconds': round(elapsed, 3),
+            'throughput': {
+                'checkouts_per_second': round(outcomes['approved'] / elapsed, 2),
+                'requests_per_second': round(requests_made / elapsed, 2),
+            },
+            'stages': {stage: self.stage_stats(timings[stage], errors[stage]) for stage in STAGES},
+            'error_samples': error_samples,
+            'outcomes': dict(outcomes),
+            'seats': {'initial': options['seats'], 'sold': sold, 'left': seats_left},
+            'oversold': oversold,
+        }
+
+    def wait_for_provider(self, user, event, timeout):
+        """
+        Poll until the worker has called the provider: (payment id, status,
+        seconds from submission to the provider's answer, queueing included)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            row = PaymentTransaction.objects.filter(
+                booking__user=user, booking__event=event,
+            ).values_list('id', 'status', 'created_at', 'updated_at').first()
+            if row and row[1] != 'submitted':
+                return row[0], row[1], (row[3] - row[2]).total_seconds()
+            time.sleep(0.01)
+        raise TimeoutError('Payment was never processed; is a job worker running?')
+
+    def stage_stats(self, samples, errors):
+        ordered = sorted(samples)
+        as_ms = lambda value: None if value is None else round(value * 1000, 2)
+        return {
+            'count': len(ordered),
+            'errors': errors,
+            'p50_ms': as_ms(percentile(ordered, 0.50)),
+            'p95_ms': as_ms(percentile(ordered, 0.95)),
+            'p99_ms': as_ms(percentile(ordered, 0.99)),
+            'mean_ms': as_ms(sum(ordered) / len(ordered)) if ordered else None,
+            'max_ms': as_ms(ordered[-1]) if ordered else None,
+        }
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"⏱️  {report['duration_seconds']:.2f}s total, "
+            f"{report['throughput']['checkouts_per_second']:.2f} checkouts/s, "
+            f"{report['throughput']['requests_per_second']:.2f} requests/s"
+        )
+        self.stdout.write(f"{'stage':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for stage, stats in report['stages'].items():
+            cells = [f"{stats[key]:>10.1f}" if stats[key] is not None else f"{'-':>10}" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+            self.stdout.write(f"{stage:<18}{stats['count']:>7}{stats['errors']:>8}{''.join(cells)}")
+        outcomes = ', '.join(f'{name}: {count}' for name, count in sorted(report['outcomes'].items()))
+        self.stdout.write(f'🎫 {outcomes}')
+        seats = report['seats']
+        self.stdout.write(f"💺 sold {seats['sold']} of {seats['initial']}, {seats['left']} left")
+        if report['oversold']:
+            self.stdout.write(self.style.ERROR(f"🚨 Oversold by {report['oversold']} ticket(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS('🎉 No oversell'))
@@ -0,0 +1,38 @@
+# events/management/commands/rebuild_sales_summary.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from events import sales
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-event sales summary from bookings and payments, then verify it (see events/sales.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=sales.CHUNK_SIZE, help='Events per transaction')
+        parser.add_argument('--verify-only', action='store_true', help='Only compare the summary with the source tables')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        if not options['verify_only']:
+            total = Event.objects.count()
+            self.stdout.write(f'🔄 Rebuilding the sales summary of {total:,} events...')
+            started = time.perf_counter()
+            rows = sales.rebuild(options['chunk_size'], progress=lambda done: self.progress(done, total))
+            self.stdout.write(self.style.SUCCESS(f'✓ {rows:,} summary rows written in {time.perf_counter() - started:.1f}s'))
+
+        self.stdout.write('🔍 Verifying against bookings and payments...')
+        drift = sales.verify(options['chunk_size'])
+        for event_id, ticket_type, field, stored, actual in drift[:20]:
+            self.stdout.write(f'   event {event_id} {ticket_type} {field}: summary {stored}, actual {actual}')
+        if drift:
+            raise CommandError(f'{len(drift)} figure(s) differ from the source tables')
+        self.stdout.write(self.style.SUCCESS('✓ The sales summary matches the source tables'))
+
+    def progress(self, done, total):
+        if done == total or done % (10 * sales.CHUNK_SIZE) == 0:
+            self.stdout.write(f'   {done:,}/{total:,} events')
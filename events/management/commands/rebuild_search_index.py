@@ -0,0 +1,26 @@
+# events/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from events import search
+
+
+class Command(BaseCommand):
+    help = 'Refill the full-text search index (needed after bulk_create/update(), which skip the signals)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            choices=sorted(search.INDEXES),
+            help='Only rebuild this index (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        backend = search.backend()
+        if backend != 'fts5':
+            self.stdout.write(f'ℹ️ The {backend} backend keeps itself up to date; nothing to rebuild.')
+            return
+        for kind in options['kinds'] or sorted(search.INDEXES):
+            rows = search.rebuild(kind)
+            self.stdout.write(self.style.SUCCESS(f'🔎 Indexed {rows} {kind} row(s)'))
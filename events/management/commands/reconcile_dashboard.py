@@ -0,0 +1,28 @@
+# events/management/commands/reconcile_dashboard.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from events import dashboard
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached admin dashboard metrics from the database (run from cron, or with --every to loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0, help='Keep running, reconciling every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            counters, snapshot = dashboard.reconcile()
+            self.stdout.write(self.style.SUCCESS(
+                f"📊 Dashboard reconciled: K{counters['revenue_cents'] / 100:,.0f} revenue, "
+                f"{counters['total_bookings']} bookings, {counters['pending_payments']} pending payments, "
+                f"{counters['total_users']} users"
+            ))
+            if not options['every']:
+                return
+            try:
+                time.sleep(options['every'])
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,25 @@
+# events/management/commands/release_expired_holds.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from events.holds import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release seat holds whose expiry has passed (run from cron, or with --every to loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0, help='Keep running, sweeping every N seconds')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Holds updated per UPDATE statement')
+
+    def handle(self, *args, **options):
+        while True:
+            count = release_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'🧹 Released {count} expired seat hold(s)'))
+            if not options['every']:
+                return
+            try:
+                time.sleep(options['every'])
+            except KeyboardInterrupt:
+                return
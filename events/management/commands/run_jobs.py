@@ -0,0 +1,55 @@
+# events/management/commands/run_jobs.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from events import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the background job worker pool (payment processing and other queued work)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.JOB_WORKERS,
+            help='Number of worker threads',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind (can be repeated)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue in the current thread and exit',
+        )
+
+    def handle(self, *args, **options):
+        stale = jobs.requeue_stale()
+        if stale:
+            self.stdout.write(f'♻️ Re-queued {stale} stale job(s)')
+
+        if options['once']:
+            count = jobs.run_pending(kinds=options['kinds'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Ran {count} job(s)'))
+            return
+
+        pool = jobs.WorkerPool(
+            workers=options['workers'],
+            poll_interval=options['poll_interval'],
+            kinds=options['kinds'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Job worker pool started with {options["workers"]} worker(s). Press Ctrl+C to stop.'
+        ))
+        pool.run_forever()
+        self.stdout.write('👋 Job worker pool stopped')
@@ -0,0 +1,23 @@
+# events/management/commands/scanner_token.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from events import tickets
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = "Print the bearer token for an event's gate scanners (it opens that event's roster and sync only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='+', type=int, help='Events to print a scanner token for')
+
+    def handle(self, *args, **options):
+        if not settings.CHECKIN_TOKEN:
+            raise CommandError('Set CHECKIN_TOKEN first; scanner tokens are derived from it')
+        events = dict(Event.objects.filter(pk__in=options['event_ids']).values_list('pk', 'title'))
+        missing = [str(event_id) for event_id in options['event_ids'] if event_id not in events]
+        if missing:
+            raise CommandError(f"No such event: {', '.join(missing)}")
+        for event_id in options['event_ids']:
+            self.stdout.write(f'{event_id}\t{events[event_id]}\t{tickets.scanner_token(event_id)}')
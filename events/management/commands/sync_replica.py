@@ -0,0 +1,53 @@
+# events/management/commands/sync_replica.py
+
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from events import dbrouting
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary into local SQLite replicas and report replica health (see events/dbrouting.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help='Keep copying every N seconds (simulates replication lag)')
+        parser.add_argument('--check', action='store_true', help='Only report health, copy nothing')
+
+    def handle(self, *args, **options):
+        aliases = dbrouting.replicas()
+        if not aliases:
+            raise CommandError('No replicas configured; set DATABASE_REPLICA_URL (e.g. sqlite:///replica.sqlite3).')
+        if options['every'] is not None and options['every'] <= 0:
+            raise CommandError('--every must be positive')
+
+        while True:
+            for alias in aliases:
+                if not options['check']:
+                    self.copy(alias)
+                healthy, detail = dbrouting.check(alias)
+                icon = '✅' if healthy else '❌'
+                self.stdout.write(f'{icon} {alias} ({connections[alias].vendor}): {detail}')
+            dbrouting.reset_health()
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
+
+    def copy(self, alias):
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if replica.vendor != 'sqlite':
+            # A real replica is fed by the database's own replication
+            return
+        if primary.vendor != 'sqlite':
+            raise CommandError(f'{alias} is SQLite but the primary is {primary.vendor}; only SQLite can be copied.')
+        started = time.perf_counter()
+        primary.ensure_connection()
+        replica.close()
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            # Online backup: readers of the primary are not blocked
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(f'📥 Copied the primary into {alias} in {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,35 @@
+# events/management/commands/warm_model_cache.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from events import modelcache
+from events.models import Category, Event, Venue
+
+
+class Command(BaseCommand):
+    help = 'Load upcoming events, categories and venues into the shared model cache (e.g. after a deploy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all-events', action='store_true', help='Include past events')
+
+    def handle(self, *args, **options):
+        if not settings.MODEL_CACHE_ENABLED:
+            self.stdout.write('ℹ️ The model cache is disabled (MODEL_CACHE_ENABLED); nothing to warm.')
+            return
+        events = Event.objects.all()
+        if not options['all_events']:
+            events = events.filter(date__gte=timezone.localdate())
+
+        started = time.perf_counter()
+        counts = {
+            'event': modelcache.warm(Event, events),
+            'category': modelcache.warm(Category),
+            'venue': modelcache.warm(Venue),
+        }
+        modelcache.get_all_cached(Category)
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f'{count} {kind}(s)' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'🔥 Warmed {summary} in {elapsed:.2f}s'))
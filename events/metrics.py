@@ -0,0 +1,326 @@
+"""
+Request Metrics
+===============
+
+Always-on, low-overhead instrumentation (no DEBUG, no ``connection.queries``):
+
+* ``MetricsMiddleware`` times every request into a per-view latency
+  histogram and counts responses per status class;
+* for a sampled share of requests (``METRICS_SAMPLE_RATE``) it also counts
+  and times database queries with ``connection.execute_wrapper``, and the
+  ``InstrumentedDjangoTemplates`` backend times top-level template renders;
+* each process keeps its figures in memory and, every
+  ``METRICS_FLUSH_INTERVAL`` seconds, writes the cumulative totals to its
+  ``MetricsSnapshot`` row, so every gunicorn worker is counted;
+* ``/admin/metrics/`` sums the live processes in the Prometheus text format
+  (staff, or ``Authorization: Bearer $METRICS_TOKEN`` for a scraper);
+  ``?format=json`` lists views by estimated p99 instead.
+
+Labels are bounded: the resolved view name (``events:home``, ``unmatched``
+for 404s), the status class and the template name. A process that has not
+flushed for ``METRICS_PROCESS_TTL`` seconds is dropped from the totals,
+which Prometheus sees as a counter reset.
+"""
+
+import contextlib
+import hmac
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils import timezone
+
+from .models import MetricsSnapshot
+
+logger = logging.getLogger('events')
+
+PREFIX = 'momenta_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+registry = {}
+_lock = threading.Lock()
+_values = {}
+_state = threading.local()
+_flush = {'process': None, 'due': 0.0}
+
+
+# ============================
+# METRIC TYPES
+# ============================
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label):
+        self.name, self.help, self.label = PREFIX + name, help_text, label
+        registry[self.name] = self
+
+    def empty(self):
+        return 0.0
+
+    def inc(self, label_value, amount=1):
+        with _lock:
+            series = _values.setdefault(self.name, {})
+            series[label_value] = series.get(label_value, 0.0) + amount
+
+    def exposition(self, series):
+        for label_value, value in sorted(series.items()):
+            yield f'{self.name}{{{self.label}="{_escape(label_value)}"}} {_number(value)}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label, buckets):
+        self.name, self.help, self.label, self.buckets = PREFIX + name, help_text, label, buckets
+        registry[self.name] = self
+
+    def empty(self):
+        # One count per bucket, one for +Inf, then the sum
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def observe(self, label_value, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with _lock:
+            data = _values.setdefault(self.name, {}).setdefault(label_value, self.empty())
+            data[index] += 1
+            data[-1] += value
+
+    def exposition(self, series):
+        for label_value, data in sorted(series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), data[:-1]):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{{label}}} {_number(data[-1])}'
+            yield f'{self.name}_count{{{label}}} {cumulative}'
+
+    def quantile(self, data, q):
+        """Estimate of the ``q`` quantile from bucket counts (as Prometheus' histogram_quantile)"""
+        total = sum(data[:-1])
+        if not total:
+            return None
+        rank, cumulative, lower = q * total, 0, 0.0
+        for bound, count in zip(self.buckets, data):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return f'{value:.6f}'.rstrip('0').rstrip('.') if isinstance(value, float) else str(value)
+
+
+request_seconds = Histogram('http_request_duration_seconds', 'Request latency per view', 'view', LATENCY_BUCKETS)
+responses = Counter('http_responses_total', 'Responses per status class', 'status')
+sampled_requests = Counter('sampled_requests_total', 'Requests whose queries and templates were timed', 'view')
+db_queries = Histogram('db_queries_per_request', 'Database queries per sampled request', 'view', QUERY_COUNT_BUCKETS)
+db_seconds = Histogram('db_time_per_request_seconds', 'Database time per sampled request', 'view', LATENCY_BUCKETS)
+template_seconds = Histogram('template_render_duration_seconds', 'Top-level template render time (sampled)', 'template', LATENCY_BUCKETS)
+
+
+# ============================
+# COLLECTION
+# ============================
+class QueryTimer:
+    """``execute_wrapper`` that counts and times a request's queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class MetricsMiddleware:
+    """Time requests (and, when sampled, their queries and templates)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timer = QueryTimer() if random.random() < settings.METRICS_SAMPLE_RATE else None
+        if timer is None:
+            response = self.get_response(request)
+        else:
+            _state.sampled = True
+            try:
+                with contextlib.ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(timer))
+                    response = self.get_response(request)
+            finally:
+                _state.sampled = False
+        elapsed = time.perf_counter() - started
+
+        view = view_name(request)
+        request_seconds.observe(view, elapsed)
+        responses.inc(f'{response.status_code // 100}xx')
+        if timer is not None:
+            sampled_requests.inc(view)
+            db_queries.observe(view, timer.count)
+            db_seconds.observe(view, timer.seconds)
+        try:
+            flush()
+        except DatabaseError as e:
+            # The response is already built; a busy database must not turn it
+            # into a 500. The totals go out with the next flush.
+            logger.warning(f"Metrics flush failed: {e}")
+        return response
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        if not getattr(_state, 'sampled', False):
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            template_seconds.observe(self.origin.template_name or '<string>', time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The standard Django backend, timing each top-level render (includes count toward their parent)"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ============================
+# PROCESS SNAPSHOTS
+# ============================
+def local_snapshot():
+    with _lock:
+        return {name: {label: list(data) if isinstance(data, list) else data for label, data in series.items()}
+                for name, series in _values.items()}
+
+
+def flush(force=False):
+    """Write this process's totals to its ``MetricsSnapshot`` row when due"""
+    now = time.monotonic()
+    if not force and now < _flush['due']:
+        return
+    _flush['due'] = now + settings.METRICS_FLUSH_INTERVAL
+    if _flush['process'] is None:
+        _flush['process'] = f'{socket.gethostname()[:60]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    MetricsSnapshot.objects.update_or_create(process=_flush['process'], defaults={'data': local_snapshot()})
+
+
+def merge(snapshots):
+    """Sum snapshots series by series"""
+    totals = {}
+    for snapshot in snapshots:
+        for name, series in snapshot.items():
+            if name not in registry:
+                continue  # metric removed since that process flushed
+            merged = totals.setdefault(name, {})
+            for label, data in series.items():
+                if isinstance(data, list):
+                    current = merged.setdefault(label, registry[name].empty())
+                    merged[label] = [a + b for a, b in zip(current, data)]
+                else:
+                    merged[label] = merged.get(label, 0.0) + data
+    return totals
+
+
+def collect():
+    """Totals across every process that flushed within ``METRICS_PROCESS_TTL``"""
+    flush(force=True)
+    cutoff = timezone.now() - timedelta(seconds=settings.METRICS_PROCESS_TTL)
+    MetricsSnapshot.objects.filter(updated_at__lt=cutoff).delete()
+    return merge(MetricsSnapshot.objects.values_list('data', flat=True))
+
+
+def exposition(totals=None):
+    """Prometheus text format"""
+    totals = collect() if totals is None else totals
+    lines = []
+    for name, metric in registry.items():
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        lines.extend(metric.exposition(totals.get(name, {})))
+    return '\n'.join(lines) + '\n'
+
+
+def summary(totals=None):
+    """Per-view request count, latency quantiles and sampled query figures, slowest p99 first"""
+    totals = collect() if totals is None else totals
+    rows = []
+    for view, data in totals.get(request_seconds.name, {}).items():
+        queries = totals.get(db_queries.name, {}).get(view)
+        db_time = totals.get(db_seconds.name, {}).get(view)
+        sampled = sum(queries[:-1]) if queries else 0
+        rows.append({
+            'view': view,
+            'requests': sum(data[:-1]),
+            'p50': request_seconds.quantile(data, 0.5),
+            'p95': request_seconds.quantile(data, 0.95),
+            'p99': request_seconds.quantile(data, 0.99),
+            'mean': data[-1] / max(sum(data[:-1]), 1),
+            'sampled': sampled,
+            'queries_per_request': queries[-1] / sampled if sampled else None,
+            'db_seconds_per_request': db_time[-1] / sampled if sampled else None,
+        })
+    return sorted(rows, key=lambda row: row['p99'] or 0, reverse=True)
+
+
+def bearer_token_ok(request):
+    """True if the request carries ``METRICS_TOKEN`` (for a Prometheus scraper)"""
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def reset():
+    """Forget this process's figures"""
+    with _lock:
+        _values.clear()
+    _flush.update(process=None, due=0.0)
+
+
+def _forget():
+    """A forked child starts from zero under its own process name"""
+    global _lock
+    _lock = threading.Lock()
+    reset()
+
+
+os.register_at_fork(after_in_child=_forget)
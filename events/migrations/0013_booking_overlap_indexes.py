@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resourceallocation',
+            index=models.Index(fields=['resource', 'start_date', 'end_date'], name='events_alloc_overlap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['venue', 'start_datetime', 'end_datetime'], name='events_vbook_overlap_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Full-text search indexes (see events/search.py)
+
+from django.db import migrations
+
+# kind -> (table, columns); kept here so later model changes do not alter this migration
+SEARCH_TABLES = {
+    'event': ('events_event', ('title', 'location', 'description')),
+    'venue': ('events_venue', ('name', 'address', 'facilities')),
+    'resource': ('events_resource', ('name', 'supplier_name', 'description')),
+}
+WEIGHTS = ('A', 'B', 'C')
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for kind, (table, columns) in SEARCH_TABLES.items():
+        if vendor == 'sqlite':
+            fts = f'events_search_{kind}'
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, "
+                f"tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            source = ', '.join(f"coalesce({column}, '')" for column in columns)
+            schema_editor.execute(f"INSERT INTO {fts} (rowid, {', '.join(columns)}) SELECT id, {source} FROM {table}")
+        elif vendor == 'postgresql':
+            vector = ' || '.join(
+                f"setweight(to_tsvector('english', coalesce(\"{column}\", '')), '{weight}')"
+                for column, weight in zip(columns, WEIGHTS)
+            )
+            schema_editor.execute(f"CREATE INDEX {table}_search_gin ON {table} USING GIN (({vector}))")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for kind, (table, _) in SEARCH_TABLES.items():
+        if vendor == 'sqlite':
+            schema_editor.execute(f"DROP TABLE IF EXISTS events_search_{kind}")
+        elif vendor == 'postgresql':
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_booking_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0015_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(help_text='Storage name of the original upload', max_length=255)),
+                ('content_hash', models.CharField(help_text="SHA-256 of the original's bytes", max_length=64)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10)),
+                ('is_thumbnail', models.BooleanField(default=False, help_text='Square crop for previews')),
+                ('name', models.CharField(help_text='Storage name of the derivative', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['source', 'is_thumbnail', 'width', 'format'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagederivative',
+            constraint=models.UniqueConstraint(fields=('source', 'width', 'format', 'is_thumbnail'), name='events_imgderiv_unique'),
+        ),
+    ]
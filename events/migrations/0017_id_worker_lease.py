@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:59
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdWorkerLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.PositiveSmallIntegerField(unique=True)),
+                ('owner', models.CharField(help_text='host:pid:token of the process holding the id', max_length=100)),
+                ('expires_at', models.DateTimeField(help_text='Another process may take the id after this')),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['worker_id'],
+            },
+        ),
+    ]
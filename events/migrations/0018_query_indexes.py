@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_id_worker_lease'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['booked_at'], name='events_booking_booked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['status', 'created_at'], name='events_pay_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['created_at'], name='events_pay_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='events_pay_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resourceallocation',
+            index=models.Index(fields=['end_date', 'start_date'], name='events_alloc_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resourceallocation',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['start_date'], name='events_alloc_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['created_at'], name='events_profile_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['venue', 'status', 'start_datetime'], name='events_vbook_venue_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(fields=['start_datetime'], name='events_vbook_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venuebooking',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['start_datetime'], name='events_vbook_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0018_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('process', models.CharField(help_text='host:pid:token of the web process', max_length=100, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['process'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_metrics_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seat', models.PositiveSmallIntegerField(help_text="Which of the booking's tickets (1-based)")),
+                ('device', models.CharField(help_text='Scanner that admitted the ticket', max_length=100)),
+                ('gate', models.CharField(blank=True, max_length=50)),
+                ('scanned_at', models.DateTimeField(help_text='When the scanner read the ticket')),
+                ('synced_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_ins', to='events.booking')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='check_ins', to='events.event')),
+            ],
+            options={
+                'ordering': ['-scanned_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['event', 'scanned_at'], name='events_checkin_event_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='checkin',
+            constraint=models.UniqueConstraint(fields=('booking', 'seat'), name='events_checkin_unique'),
+        ),
+    ]
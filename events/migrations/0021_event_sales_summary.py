@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_checkin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_type', models.CharField(choices=[('vip', 'VIP - K1,500'), ('gold', 'Gold - K850'), ('standard', 'Standard - K450')], max_length=10)),
+                ('bookings', models.IntegerField(default=0, help_text='Bookings made, whatever their payment status')),
+                ('sold_tickets', models.IntegerField(default=0, help_text='Tickets with a completed payment')),
+                ('pending_tickets', models.IntegerField(default=0, help_text='Tickets whose payment awaits review')),
+                ('refunded_tickets', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Completed payments', max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales', to='events.event')),
+            ],
+            options={
+                'verbose_name_plural': 'Event sales summaries',
+                'ordering': ['event', 'ticket_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eventsalessummary',
+            constraint=models.UniqueConstraint(fields=('event', 'ticket_type'), name='events_sales_event_tier_unique'),
+        ),
+    ]
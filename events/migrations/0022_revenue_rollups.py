@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0021_event_sales_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local date the payment was made')),
+                ('payment_method', models.CharField(choices=[('mtn', 'MTN Mobile Money'), ('airtel', 'Airtel Money'), ('zamtel', 'Zamtel Money'), ('bank', 'Bank Transfer')], max_length=20)),
+                ('ticket_type', models.CharField(choices=[('vip', 'VIP - K1,500'), ('gold', 'Gold - K850'), ('standard', 'Standard - K450')], max_length=10)),
+                ('payments', models.IntegerField(default=0, help_text='Completed payments')),
+                ('tickets', models.IntegerField(default=0, help_text='Tickets paid for by the completed payments')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refunds', models.IntegerField(default=0, help_text='Refunded payments')),
+                ('refunded_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Revenue (daily)',
+                'ordering': ['-day', 'event', 'payment_method', 'ticket_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('high_water', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['updated_at'], name='events_pay_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='revenuedaily',
+            name='event',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revenue_days', to='events.event'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuedaily',
+            constraint=models.UniqueConstraint(fields=('day', 'event', 'payment_method', 'ticket_type'), name='events_revenue_daily_unique'),
+        ),
+    ]
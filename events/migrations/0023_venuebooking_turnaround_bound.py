@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:59
+
+import django.core.validators
+from django.db import migrations, models
+
+MAX_TURNAROUND_HOURS = 72
+
+
+def clamp_turnaround(apps, schema_editor):
+    VenueBooking = apps.get_model('events', 'VenueBooking')
+    for field in ('setup_hours', 'cleanup_hours'):
+        VenueBooking.objects.filter(**{f'{field}__gt': MAX_TURNAROUND_HOURS}).update(**{field: MAX_TURNAROUND_HOURS})
+        VenueBooking.objects.filter(**{f'{field}__lt': 0}).update(**{field: 0})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0022_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_turnaround, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='venuebooking',
+            name='cleanup_hours',
+            field=models.IntegerField(default=1, help_text='Hours needed for cleanup after event', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(72)]),
+        ),
+        migrations.AlterField(
+            model_name='venuebooking',
+            name='setup_hours',
+            field=models.IntegerField(default=2, help_text='Hours needed for setup before event', validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(72)]),
+        ),
+    ]
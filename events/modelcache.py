@@ -0,0 +1,199 @@
+"""
+Model Object Cache
+==================
+
+Two-tier cache for rows that hot paths fetch again and again (the event on
+the detail, seat and payment pages; the category list):
+
+1. a per-process LRU (``events/lru.py``) whose entries are trusted for
+   ``MODEL_CACHE_POLL_INTERVAL`` seconds;
+2. a cache shared by every worker (the ``objects`` alias — file-based by
+   default, or the database cache, so no Redis is needed).
+
+Shared entries are keyed by a per-row version (``…:event:7:<version>``).
+``post_save`` / ``post_delete`` replace the version (immediately and again
+after commit) and drop the local copy, so other workers notice within one
+poll interval: when a local entry expires they re-read the version, and a
+changed version sends them back to the database. Misses are filled from the
+primary (``dbrouting.primary_reads``) even inside a read-only view, so a
+lagging replica's copy is never cached.
+
+Fields that must never be stale (an event's seat counts) are listed in
+``VOLATILE_FIELDS``. They are not cached; ``get_cached`` always loads them
+fresh with a small primary-key query. Seat sales themselves are
+conditional ``UPDATE``s in ``events/inventory.py`` and never read this cache,
+so it cannot cause an oversell.
+
+    event = get_cached(Event, 7)          # Event.DoesNotExist if gone
+    event = get_cached_or_404(Event, 7)
+    categories = get_all_cached(Category)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404
+
+from . import dbrouting
+from .lru import LRUCache
+from .models import Category, Event, Venue
+
+KEY_PREFIX = 'objcache'
+CACHED_MODELS = (Event, Category, Venue)
+VOLATILE_FIELDS = {
+    Event: ('vip_seats_left', 'gold_seats_left', 'standard_seats_left'),
+}
+ALL_ROWS = '*'
+
+local_cache = LRUCache(settings.MODEL_CACHE_LOCAL_SIZE, settings.MODEL_CACHE_POLL_INTERVAL)
+
+
+def shared_cache():
+    return caches[settings.MODEL_CACHE_ALIAS]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _version_key(label, pk):
+    return f'{KEY_PREFIX}:ver:{label}:{pk}'
+
+
+def _version(label, pk):
+    """Current version of a row (or of the whole table for ALL_ROWS)"""
+    cache = shared_cache()
+    version = cache.get(_version_key(label, pk))
+    if version is None:
+        # Time-based so a version lost to eviction never matches an old entry
+        cache.add(_version_key(label, pk), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(label, pk))
+    return version
+
+
+def _bump(keys):
+    cache = shared_cache()
+    # A fresh value rather than incr(): file and database caches do not
+    # increment atomically, and two writers must never leave the old value
+    cache.set_many({_version_key(label, pk): time.time_ns() for label, pk in keys}, timeout=None)
+
+
+def _cached_fields(model):
+    volatile = VOLATILE_FIELDS.get(model, ())
+    return [field.attname for field in model._meta.concrete_fields if field.attname not in volatile]
+
+
+def _build(model, values):
+    """A fresh instance from cached values (callers may modify it freely)"""
+    return model.from_db('default', _cached_fields(model), values)
+
+
+# ============================
+# READ
+# ============================
+def get_cached(model, pk):
+    """``model.objects.get(pk=pk)``, served from the cache where possible"""
+    if not settings.MODEL_CACHE_ENABLED:
+        return model.objects.get(pk=pk)
+
+    label = _label(model)
+    pk = model._meta.pk.to_python(pk)
+    fields = _cached_fields(model)
+    volatile = VOLATILE_FIELDS.get(model, ())
+    values = local_cache.get((label, pk))
+    if values is None:
+        object_key = f'{KEY_PREFIX}:obj:{label}:{pk}:{_version(label, pk)}'
+        values = shared_cache().get(object_key)
+        if values is None:
+            # Miss: one query for the cached and the volatile fields together
+            with dbrouting.primary_reads():
+                row = model.objects.filter(pk=pk).values_list(*fields, *volatile).first()
+            if row is None:
+                raise model.DoesNotExist(f'{model.__name__} matching query does not exist.')
+            values = row[:len(fields)]
+            shared_cache().set(object_key, values, settings.MODEL_CACHE_TTL)
+            local_cache.set((label, pk), values)
+            instance = _build(model, values)
+            for name, value in zip(volatile, row[len(fields):]):
+                setattr(instance, name, value)
+            return instance
+        local_cache.set((label, pk), values)
+
+    instance = _build(model, values)
+    if volatile:
+        row = model.objects.filter(pk=pk).values_list(*volatile).first()
+        if row is None:
+            invalidate(instance)
+            raise model.DoesNotExist(f'{model.__name__} matching query does not exist.')
+        for name, value in zip(volatile, row):
+            setattr(instance, name, value)
+    return instance
+
+
+def get_cached_or_404(model, pk):
+    try:
+        return get_cached(model, pk)
+    except (model.DoesNotExist, ValidationError):
+        raise Http404(f'No {model._meta.object_name} matches the given query.')
+
+
+def get_all_cached(model):
+    """Every row of a small table (e.g. categories), in the model's default order"""
+    if not settings.MODEL_CACHE_ENABLED:
+        return list(model.objects.all())
+
+    label = _label(model)
+    rows = local_cache.get((label, ALL_ROWS))
+    if rows is None:
+        object_key = f'{KEY_PREFIX}:all:{label}:{_version(label, ALL_ROWS)}'
+        rows = shared_cache().get(object_key)
+        if rows is None:
+            fields = _cached_fields(model)
+            with dbrouting.primary_reads():
+                rows = list(model.objects.values_list(*fields))
+            shared_cache().set(object_key, rows, settings.MODEL_CACHE_TTL)
+        local_cache.set((label, ALL_ROWS), rows)
+    return [_build(model, values) for values in rows]
+
+
+# ============================
+# WRITE
+# ============================
+def invalidate(instance):
+    """Forget a row (and its table's list) in every worker"""
+    label = _label(type(instance))
+    keys = [(label, instance.pk), (label, ALL_ROWS)]
+    for key in keys:
+        local_cache.delete(key)
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_model(model):
+    """Forget a table's cached list in every worker (after bulk loads, which send no signals)"""
+    key = (_label(model), ALL_ROWS)
+    local_cache.delete(key)
+    _bump([key])
+    transaction.on_commit(lambda: _bump([key]))
+
+
+def warm(model, queryset=None, batch_size=500):
+    """Load rows into the shared cache ahead of traffic; returns how many"""
+    label = _label(model)
+    fields = _cached_fields(model)
+    queryset = model.objects.all() if queryset is None else queryset
+    count = 0
+    rows = queryset.values_list('pk', *fields).iterator(chunk_size=batch_size)
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            return count
+        versions = {row[0]: _version(label, row[0]) for row in batch}
+        shared_cache().set_many({
+            f'{KEY_PREFIX}:obj:{label}:{row[0]}:{versions[row[0]]}': tuple(row[1:])
+            for row in batch
+        }, settings.MODEL_CACHE_TTL)
+        count += len(batch)
@@ -1,10 +1,13 @@
 # events/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -23,6 +26,10 @@ class UserProfile(models.Model):
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
+        indexes = [
+            # Dashboard: new users this week
+            models.Index(fields=['created_at'], name='events_profile_created_idx'),
+        ]
 
 
 # Auto-create profile when user is created
@@ -104,6 +111,11 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Keyset pagination of the listings: ORDER BY date, id
+            models.Index(fields=['date', 'id'], name='events_event_date_id_idx'),
+            models.Index(fields=['category', 'date', 'id'], name='events_event_cat_date_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -158,6 +170,14 @@ class Booking(models.Model):
     total_price = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     booked_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the profile: user = ? ORDER BY booked_at, id
+            models.Index(fields=['user', 'booked_at', 'id'], name='events_booking_user_page_idx'),
+            # Dashboard / admin: most recent bookings
+            models.Index(fields=['booked_at'], name='events_booking_booked_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         # Auto-calculate price
         prices = {'vip': 1500, 'gold': 850, 'standard': 450}
@@ -190,6 +210,7 @@ class EventGallery(models.Model):
 # ============================
 class PaymentTransaction(models.Model):
     PAYMENT_STATUS = [
+        ('submitted', 'Submitted'),
         ('pending', 'Pending'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
@@ -216,15 +237,36 @@ class PaymentTransaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Revenue windows: status = 'completed' AND created_at >= ?
+            models.Index(fields=['status', 'created_at'], name='events_pay_status_created_idx'),
+            # Admin list and recent payments: ORDER BY created_at DESC
+            models.Index(fields=['created_at'], name='events_pay_created_idx'),
+            # Approval queue: the few payments still awaiting review
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='events_pay_pending_idx'),
+            # Revenue rollups: payments changed since the last build
+            models.Index(fields=['updated_at'], name='events_pay_updated_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.transaction_id:
-            import random
-            import string
-            prefix = self.payment_method.upper()[:3]
-            random_str = ''.join(random.choices(string.digits, k=10))
-            self.transaction_id = f"{prefix}{random_str}"
+            from .snowflake import next_id
+            self.transaction_id = self.format_transaction_id(self.payment_method, next_id())
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def format_transaction_id(payment_method, snowflake_id):
+        """Provider prefix + time-ordered Snowflake id, e.g. ``MTN151806738431475712``"""
+        return f"{payment_method.upper()[:3]}{snowflake_id}"
+
+    @classmethod
+    def assign_transaction_ids(cls, payments):
+        """Fill in missing IDs before ``bulk_create`` (which skips ``save``), in one allocation"""
+        from .snowflake import allocate
+        missing = [payment for payment in payments if not payment.transaction_id]
+        for payment, snowflake_id in zip(missing, allocate(len(missing))):
+            payment.transaction_id = cls.format_transaction_id(payment.payment_method, snowflake_id)
+        return payments
     
     def __str__(self):
         return f"{self.transaction_id} - {self.get_payment_method_display()} - {self.status}"
@@ -290,31 +332,68 @@ class VenueBooking(models.Model):
         ('completed', 'Completed'),
     ]
     
+    # Conflict checks and availability pad their range queries by this much
+    # to find bookings whose setup/cleanup reaches into the window
+    MAX_TURNAROUND_HOURS = 72
+
     event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='venue_booking')
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='bookings')
     start_datetime = models.DateTimeField(help_text="Event start date and time")
     end_datetime = models.DateTimeField(help_text="Event end date and time")
-    setup_hours = models.IntegerField(default=2, help_text="Hours needed for setup before event")
-    cleanup_hours = models.IntegerField(default=1, help_text="Hours needed for cleanup after event")
+    setup_hours = models.IntegerField(
+        default=2, validators=[MinValueValidator(0), MaxValueValidator(MAX_TURNAROUND_HOURS)],
+        help_text="Hours needed for setup before event"
+    )
+    cleanup_hours = models.IntegerField(
+        default=1, validators=[MinValueValidator(0), MaxValueValidator(MAX_TURNAROUND_HOURS)],
+        help_text="Hours needed for cleanup after event"
+    )
     total_cost = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     status = models.CharField(max_length=20, choices=BOOKING_STATUS, default='pending')
     notes = models.TextField(blank=True, help_text="Special requirements or notes")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    def clean(self):
+        from .conflicts import check_venue_booking
+        if self.start_datetime and self.end_datetime:
+            if self.end_datetime <= self.start_datetime:
+                raise ValidationError({'end_datetime': "End time must be after the start time."})
+            if self.venue_id:
+                check_venue_booking(self)
+
     def save(self, *args, **kwargs):
+        from .conflicts import check_venue_booking
+        # The conflict re-check below relies on the turnaround bound, so enforce
+        # it on every save and not only on forms
+        self.clean_fields(exclude=[
+            field.name for field in self._meta.fields if field.name not in ('setup_hours', 'cleanup_hours')
+        ])
         # Calculate total cost based on duration and venue hourly rate
         if self.start_datetime and self.end_datetime and self.venue:
             duration_hours = (self.end_datetime - self.start_datetime).total_seconds() / 3600
             total_hours = duration_hours + self.setup_hours + self.cleanup_hours
             self.total_cost = Decimal(str(total_hours)) * self.venue.hourly_rate
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Lock the venue so two overlapping bookings cannot both pass the check
+            list(Venue.objects.select_for_update().filter(pk=self.venue_id).values_list('pk', flat=True))
+            check_venue_booking(self)
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.venue.name} - {self.event.title}"
     
     class Meta:
         ordering = ['-start_datetime']
+        indexes = [
+            # Overlap checks: venue = ? AND start < ? AND end > ?
+            models.Index(fields=['venue', 'start_datetime', 'end_datetime'], name='events_vbook_overlap_idx'),
+            # Venue page: venue = ? AND status IN (...) AND start >= ? ORDER BY start
+            models.Index(fields=['venue', 'status', 'start_datetime'], name='events_vbook_venue_status_idx'),
+            # Facilities: this month's bookings across venues
+            models.Index(fields=['start_datetime'], name='events_vbook_start_idx'),
+            models.Index(fields=['start_datetime'], condition=models.Q(status='pending'), name='events_vbook_pending_idx'),
+        ]
 # ============================
 # RESOURCE ALLOCATION MODEL
 # ============================
@@ -335,15 +414,308 @@ class ResourceAllocation(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    def clean(self):
+        from .conflicts import check_allocation
+        if self.start_date and self.end_date:
+            if self.end_date < self.start_date:
+                raise ValidationError({'end_date': "End date cannot be before the start date."})
+            if self.resource_id and self.quantity_needed:
+                check_allocation(self)
+
     def save(self, *args, **kwargs):
+        from .conflicts import check_allocation
         # Calculate total cost based on duration and resource daily rate
         if self.start_date and self.end_date and self.resource:
             duration_days = (self.end_date - self.start_date).days + 1
             self.total_cost = duration_days * self.resource.cost_per_day * self.quantity_needed
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Lock the resource so concurrent allocations see each other
+            list(Resource.objects.select_for_update().filter(pk=self.resource_id).values_list('pk', flat=True))
+            check_allocation(self)
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.resource.name} for {self.event.title}"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['resource', 'start_date', 'end_date'], name='events_alloc_overlap_idx'),
+            # Facilities: allocations running today (end_date >= ? AND start_date <= ?);
+            # end_date first since few allocations are still running
+            models.Index(fields=['end_date', 'start_date'], name='events_alloc_current_idx'),
+            models.Index(fields=['start_date'], condition=models.Q(status='pending'), name='events_alloc_pending_idx'),
+        ]
+
+
+# ============================
+# BACKGROUND JOB MODEL
+# ============================
+class Job(models.Model):
+    """A unit of background work, queued in the database (see events/jobs.py)"""
+    JOB_STATUS = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=100, help_text="Registered handler name (e.g. payments.process)")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Earliest time a worker may pick this job up")
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='events_job_status_run_idx'),
+        ]
+
+
+# ============================
+# SEAT HOLD MODEL
+# ============================
+class SeatHold(models.Model):
+    """
+    Seats set aside for a customer while they pay (see events/holds.py).
+    Active, unexpired holds are subtracted from the seat counters when
+    showing availability; approval converts the hold into a sale.
+    """
+    HOLD_STATUS = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='seat_holds')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='seat_holds')
+    booking = models.OneToOneField(Booking, on_delete=models.CASCADE, null=True, blank=True, related_name='seat_hold')
+    ticket_type = models.CharField(max_length=10, choices=Booking.TICKET_CHOICES)
+    quantity = models.PositiveIntegerField(default=1)
+    status = models.CharField(max_length=20, choices=HOLD_STATUS, default='active')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.event.title} ({self.quantity} × {self.ticket_type}, {self.status})"
+
+    @property
+    def is_live(self):
+        return self.status == 'active' and self.expires_at > timezone.now()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Availability aggregate: SUM(quantity) per tier for one event
+            models.Index(fields=['event', 'status', 'ticket_type', 'expires_at'], name='events_hold_avail_idx'),
+            # Sweeper: active holds past their expiry
+            models.Index(fields=['status', 'expires_at'], name='events_hold_sweep_idx'),
+        ]
+
+
+# ============================
+# EMAIL OUTBOX MODEL
+# ============================
+class OutboundEmail(models.Model):
+    """One queued email to one recipient, delivered by `manage.py deliver_emails` (see events/outbox.py)"""
+    EMAIL_STATUS = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    recipient_domain = models.CharField(max_length=255, help_text="Lower-cased domain of to_email, used to batch deliveries")
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    is_html = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=EMAIL_STATUS, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.subject} → {self.to_email} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='events_email_due_idx'),
+        ]
+
+
+# ============================
+# IMAGE DERIVATIVE MODEL
+# ============================
+class ImageDerivative(models.Model):
+    """A resized WebP/JPEG copy of an uploaded image (see events/images.py)"""
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    source = models.CharField(max_length=255, help_text="Storage name of the original upload")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the original's bytes")
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    is_thumbnail = models.BooleanField(default=False, help_text="Square crop for previews")
+    name = models.CharField(max_length=255, help_text="Storage name of the derivative")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.source} → {self.width}w {self.format}"
+
+    class Meta:
+        ordering = ['source', 'is_thumbnail', 'width', 'format']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'width', 'format', 'is_thumbnail'], name='events_imgderiv_unique'),
+        ]
+
+
+# ============================
+# ID WORKER LEASE MODEL
+# ============================
+class IdWorkerLease(models.Model):
+    """A process's claim on a Snowflake worker id (see events/snowflake.py)"""
+    worker_id = models.PositiveSmallIntegerField(unique=True)
+    owner = models.CharField(max_length=100, help_text="host:pid:token of the process holding the id")
+    expires_at = models.DateTimeField(help_text="Another process may take the id after this")
+    claimed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"worker {self.worker_id} → {self.owner}"
+
+    class Meta:
+        ordering = ['worker_id']
+
+
+# ============================
+# METRICS SNAPSHOT MODEL
+# ============================
+class MetricsSnapshot(models.Model):
+    """One process's cumulative request metrics (see events/metrics.py)"""
+    process = models.CharField(max_length=100, unique=True, help_text="host:pid:token of the web process")
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.process} @ {self.updated_at:%H:%M:%S}"
+
+    class Meta:
+        ordering = ['process']
+
+
+# ============================
+# GATE CHECK-IN MODEL
+# ============================
+class CheckIn(models.Model):
+    """One ticket admitted at the gate, synced from a scanner (see events/tickets.py)"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='check_ins')
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='check_ins')
+    seat = models.PositiveSmallIntegerField(help_text="Which of the booking's tickets (1-based)")
+    device = models.CharField(max_length=100, help_text="Scanner that admitted the ticket")
+    gate = models.CharField(max_length=50, blank=True)
+    scanned_at = models.DateTimeField(help_text="When the scanner read the ticket")
+    synced_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.booking_id:06d}/{self.seat} @ {self.gate or self.device}"
+
+    class Meta:
+        ordering = ['-scanned_at']
+        constraints = [
+            # A ticket gets in once; later scans are reported as duplicates
+            models.UniqueConstraint(fields=['booking', 'seat'], name='events_checkin_unique'),
+        ]
+        indexes = [
+            # Roster and attendance: event = ? ORDER BY scanned_at
+            models.Index(fields=['event', 'scanned_at'], name='events_checkin_event_idx'),
+        ]
+
+
+# ============================
+# EVENT SALES SUMMARY MODEL
+# ============================
+class EventSalesSummary(models.Model):
+    """Running sales figures for one event and tier (see events/sales.py)"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='sales')
+    ticket_type = models.CharField(max_length=10, choices=Booking.TICKET_CHOICES)
+    bookings = models.IntegerField(default=0, help_text="Bookings made, whatever their payment status")
+    sold_tickets = models.IntegerField(default=0, help_text="Tickets with a completed payment")
+    pending_tickets = models.IntegerField(default=0, help_text="Tickets whose payment awaits review")
+    refunded_tickets = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Completed payments")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.event_id} {self.ticket_type}: {self.sold_tickets} sold"
+
+    class Meta:
+        verbose_name_plural = "Event sales summaries"
+        ordering = ['event', 'ticket_type']
+        constraints = [
+            # One row per event and tier; the F() increments rely on it
+            models.UniqueConstraint(fields=['event', 'ticket_type'], name='events_sales_event_tier_unique'),
+        ]
+
+
+# ============================
+# REVENUE ROLLUP MODELS
+# ============================
+class RevenueDaily(models.Model):
+    """Revenue of one day, event, payment method and tier (see events/rollups.py)"""
+    day = models.DateField(help_text="Local date the payment was made")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='revenue_days')
+    payment_method = models.CharField(max_length=20, choices=PaymentTransaction.PAYMENT_METHODS)
+    ticket_type = models.CharField(max_length=10, choices=Booking.TICKET_CHOICES)
+    payments = models.IntegerField(default=0, help_text="Completed payments")
+    tickets = models.IntegerField(default=0, help_text="Tickets paid for by the completed payments")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds = models.IntegerField(default=0, help_text="Refunded payments")
+    refunded_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.day} {self.event_id} {self.payment_method}/{self.ticket_type}: K{self.revenue}"
+
+    class Meta:
+        verbose_name_plural = "Revenue (daily)"
+        ordering = ['-day', 'event', 'payment_method', 'ticket_type']
+        constraints = [
+            # The fact table's grain; also serves day-range reports
+            models.UniqueConstraint(
+                fields=['day', 'event', 'payment_method', 'ticket_type'], name='events_revenue_daily_unique',
+            ),
+        ]
+
+
+class RollupCheckpoint(models.Model):
+    """How far a rollup has read its source table (a high-water mark on updated_at)"""
+    name = models.CharField(max_length=50, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water}"
@@ -0,0 +1,186 @@
+"""
+Email Outbox
+============
+
+Request paths never talk to the SMTP server. They call
+``queue_mail(subject, message, recipient_list, *, from_email=None,
+html=False)``, which stores one ``OutboundEmail`` row per recipient and
+returns immediately; ``queue_many`` does the same for a whole batch in one
+INSERT. Unlike ``django.core.mail.send_mail`` the recipients come third and
+the sender is keyword-only, so a ``send_mail``-style positional call fails
+loudly instead of mailing the sender address.
+
+``python manage.py deliver_emails`` drains the outbox:
+
+* claims a batch of due messages with a conditional UPDATE, so several
+  workers can run side by side;
+* sends the whole batch over ONE authenticated connection from
+  ``EMAIL_BACKEND``, grouped by recipient domain;
+* records per-message status; failures are retried with exponential backoff
+  (``EMAIL_OUTBOX_RETRY_BASE * 2**attempts`` seconds) until ``max_attempts``.
+"""
+
+import logging
+import os
+import socket
+import smtplib
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger('events')
+
+# After this many failures in a row for one domain, the rest of its batch is
+# put back on the queue instead of being tried now
+DOMAIN_FAILURE_LIMIT = 3
+
+
+def _outbound_rows(subject, message, recipient_list, *, from_email=None, html=False):
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    return [
+        OutboundEmail(
+            to_email=address,
+            recipient_domain=address.rsplit('@', 1)[-1].lower(),
+            from_email=from_email,
+            subject=subject,
+            body=message,
+            is_html=html,
+            max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        )
+        for address in recipient_list if address
+    ]
+
+
+def queue_mail(subject, message, recipient_list, *, from_email=None, html=False):
+    """Queue an email for the delivery worker; returns the created rows"""
+    return OutboundEmail.objects.bulk_create(
+        _outbound_rows(subject, message, recipient_list, from_email=from_email, html=html)
+    )
+
+
+def queue_many(emails):
+    """Queue many emails (dicts of queue_mail arguments) with one INSERT"""
+    rows = []
+    for email in emails:
+        rows.extend(_outbound_rows(**email))
+    return OutboundEmail.objects.bulk_create(rows, batch_size=500)
+
+
+def claim_batch(worker_name, limit=100):
+    """Claim up to ``limit`` due messages for ``worker_name``, ordered by domain"""
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(status='queued', next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    # Only one worker can move a given row out of 'queued'
+    OutboundEmail.objects.filter(id__in=ids, status='queued').update(
+        status='sending', locked_by=worker_name, locked_at=now, attempts=F('attempts') + 1
+    )
+    return list(
+        OutboundEmail.objects.filter(id__in=ids, status='sending', locked_by=worker_name, locked_at=now)
+        .order_by('recipient_domain', 'id')
+    )
+
+
+def _build_message(outbound, connection):
+    message = EmailMessage(
+        subject=outbound.subject,
+        body=outbound.body,
+        from_email=outbound.from_email,
+        to=[outbound.to_email],
+        connection=connection,
+    )
+    if outbound.is_html:
+        message.content_subtype = 'html'
+    return message
+
+
+def _retry_later(outbound, error, now):
+    outbound.last_error = str(error)[:2000]
+    if outbound.attempts < outbound.max_attempts:
+        outbound.status = 'queued'
+        outbound.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BASE * 2 ** outbound.attempts)
+    else:
+        outbound.status = 'failed'
+    outbound.locked_by = ''
+    outbound.save(update_fields=['status', 'next_attempt_at', 'last_error', 'locked_by', 'updated_at'])
+    return outbound.status
+
+
+def _defer(outbounds, now):
+    """Put claimed messages back without counting the attempt"""
+    OutboundEmail.objects.filter(id__in=[o.id for o in outbounds], status='sending').update(
+        status='queued', locked_by='', attempts=F('attempts') - 1,
+        next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BASE),
+    )
+
+
+def deliver_pending(batch_size=100, worker_name='inline'):
+    """
+    Send one batch of due messages over a single connection.
+    Returns a dict of counts: sent / retry / failed / deferred.
+    """
+    stats = {'sent': 0, 'retry': 0, 'failed': 0, 'deferred': 0}
+    batch = claim_batch(worker_name, limit=batch_size)
+    if not batch:
+        return stats
+
+    connection = get_connection(fail_silently=False)
+    try:
+        for domain, group in groupby(batch, key=lambda o: o.recipient_domain):
+            group = list(group)
+            failures_in_a_row = 0
+            for index, outbound in enumerate(group):
+                if failures_in_a_row >= DOMAIN_FAILURE_LIMIT:
+                    rest = group[index:]
+                    _defer(rest, timezone.now())
+                    stats['deferred'] += len(rest)
+                    logger.warning(f"Deferred {len(rest)} email(s) to {domain} after repeated failures")
+                    break
+                try:
+                    connection.open()  # no-op while the connection is up
+                    connection.send_messages([_build_message(outbound, connection)])
+                except Exception as e:
+                    failures_in_a_row += 1
+                    status = _retry_later(outbound, e, timezone.now())
+                    stats['retry' if status == 'queued' else 'failed'] += 1
+                    logger.warning(f"Email #{outbound.id} to {outbound.to_email} failed: {e}")
+                    if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                        _close_quietly(connection)
+                    continue
+                failures_in_a_row = 0
+                outbound.status = 'sent'
+                outbound.sent_at = timezone.now()
+                outbound.last_error = ''
+                outbound.locked_by = ''
+                outbound.save(update_fields=['status', 'sent_at', 'last_error', 'locked_by', 'updated_at'])
+                stats['sent'] += 1
+    finally:
+        _close_quietly(connection)
+    return stats
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def requeue_stale(timeout=600):
+    """Put messages back on the queue whose worker died mid-send"""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return OutboundEmail.objects.filter(status='sending', locked_at__lt=cutoff).update(
+        status='queued', locked_by='', locked_at=None
+    )
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,239 @@
+"""
+Anonymous Page Cache
+====================
+
+Whole-response caching of the public pages for visitors who are not logged
+in (GET/HEAD only), keyed by host, path and sorted query string:
+
+* **Tags** — each entry records the tags it depends on, with the tag
+  versions at render time. A view decorated with
+  ``@cache_anonymous_page(Event, Category)`` depends on every row of those
+  models (``events.event``); ``depends_on(request, event)`` narrows a page to
+  single rows (``events.event:7``). ``purge(instance)`` bumps the row's tag
+  and its model's tag, so only the pages that showed it go stale. The
+  ``post_save`` / ``post_delete`` receivers and the seat inventory call it
+  (immediately, and again after commit so no other worker re-caches
+  pre-commit data). Cached renders read from the primary
+  (``dbrouting.primary_reads``), never from a lagging replica.
+* **Single flight** — on a miss one request takes a short lock and renders;
+  concurrent requests for the same page get the stale copy if there is one,
+  or wait briefly for the fresh one instead of all rendering at once.
+* **CSRF** — cached HTML gets this visitor's CSRF token swapped in, so
+  forms on cached pages still post.
+* **Counters** — hits, misses and stale serves per view, kept in the cache
+  (``stats()``, served to staff at ``admin/page-cache/``), plus an
+  ``X-Page-Cache`` response header.
+"""
+
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from . import dbrouting
+
+KEY_PREFIX = 'pagecache'
+OUTCOMES = ('hit', 'miss', 'stale')
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+# Names of the decorated views, for stats()
+registered_views = set()
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+# ============================
+# TAGS
+# ============================
+def model_tag(model):
+    return model._meta.label_lower
+
+
+def row_tag(model, pk):
+    return f'{model_tag(model)}:{pk}'
+
+
+def instance_tag(instance):
+    return row_tag(type(instance), instance.pk)
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def _tag_versions(tags):
+    """Current version of each tag, creating missing ones"""
+    cache = page_cache()
+    keys = {tag: _tag_key(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in found:
+            # Time-based so a version lost to eviction never matches an old entry
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions[tag] = found[key]
+    return versions
+
+
+def _bump(tags):
+    cache = page_cache()
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.set(_tag_key(tag), time.time_ns(), timeout=None)
+
+
+def purge(*instances):
+    """Invalidate every cached page showing these rows or listing their models"""
+    tags = set()
+    for instance in instances:
+        tags.add(model_tag(type(instance)))
+        if instance.pk is not None:
+            tags.add(instance_tag(instance))
+    purge_tags(tags)
+
+
+def purge_tags(tags):
+    tags = set(tags)
+    _bump(tags)
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def depends_on(request, *instances):
+    """Tag the page being rendered with specific rows (call right after loading them)"""
+    if hasattr(request, '_page_cache_versions'):
+        request._page_cache_versions.update(_tag_versions(instance_tag(instance) for instance in instances))
+
+
+# ============================
+# COUNTERS
+# ============================
+def _count(view_name, outcome):
+    cache = page_cache()
+    key = f'{KEY_PREFIX}:stats:{view_name}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def stats():
+    """{view name: {'hit': n, 'miss': n, 'stale': n}} for every cached view"""
+    keys = {
+        (view_name, outcome): f'{KEY_PREFIX}:stats:{view_name}:{outcome}'
+        for view_name in registered_views
+        for outcome in OUTCOMES
+    }
+    found = page_cache().get_many(keys.values())
+    result = {}
+    for (view_name, outcome), key in sorted(keys.items()):
+        result.setdefault(view_name, {})[outcome] = found.get(key, 0)
+    return result
+
+
+# ============================
+# DECORATOR
+# ============================
+def _cacheable(request):
+    return (
+        settings.PAGE_CACHE_ENABLED
+        and request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        # A pending flash message would be baked into the page
+        and 'messages' not in request.COOKIES
+    )
+
+
+def _page_key(request):
+    query = '&'.join(sorted(request.META.get('QUERY_STRING', '').split('&')))
+    raw = f'{request.get_host()}{request.path}?{query}'
+    return f'{KEY_PREFIX}:page:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def _is_fresh(entry):
+    versions = page_cache().get_many([_tag_key(tag) for tag in entry['tags']])
+    return all(versions.get(_tag_key(tag)) == version for tag, version in entry['tags'].items())
+
+
+def _replay(request, entry, outcome):
+    content = entry['content']
+    if b'csrfmiddlewaretoken' in content:
+        token = get_token(request).encode()
+        content = CSRF_INPUT_RE.sub(lambda match: match.group(1) + token + match.group(2), content)
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = outcome
+    return response
+
+
+def cache_anonymous_page(*models):
+    """
+    Cache the view for anonymous visitors. ``models`` are the models whose
+    changes should drop every page of this view (list pages); views add
+    row-level dependencies with ``depends_on``.
+    """
+    model_tags = {model_tag(model) for model in models}
+
+    def decorator(view):
+        view_name = view.__name__
+        registered_views.add(view_name)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            cache = page_cache()
+            key = _page_key(request)
+            entry = cache.get(key)
+            if entry is not None and _is_fresh(entry):
+                _count(view_name, 'hit')
+                return _replay(request, entry, 'hit')
+
+            lock_key = f'{key}:lock'
+            locked = cache.add(lock_key, 1, timeout=settings.PAGE_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                # Someone else is rendering this page
+                if entry is not None:
+                    _count(view_name, 'stale')
+                    return _replay(request, entry, 'stale')
+                deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        _count(view_name, 'hit')
+                        return _replay(request, entry, 'hit')
+
+            try:
+                # Versions are read before the data: a purge during the
+                # render leaves the entry already stale
+                request._page_cache_versions = _tag_versions(model_tags)
+                with dbrouting.primary_reads():
+                    response = view(request, *args, **kwargs)
+                _count(view_name, 'miss')
+                if response.status_code == 200 and not response.streaming and not response.cookies:
+                    cache.set(key, {
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                        'tags': request._page_cache_versions,
+                    }, settings.PAGE_CACHE_TTL)
+                response['X-Page-Cache'] = 'miss'
+                return response
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,226 @@
+"""
+Payment Pipeline for Momenta
+============================
+
+Checkout no longer talks to the mobile-money providers inside the request.
+``payment_page`` creates the ``PaymentTransaction`` in the ``submitted`` state
+and queues a ``payments.process`` job; a worker from ``manage.py run_jobs``
+then calls the provider and moves the payment to ``pending`` (awaiting admin
+confirmation) or ``failed``. If the job runs out of attempts the payment is
+marked ``failed`` too, which releases its seat hold. The browser follows
+along by polling ``payment_status``.
+
+With ``PAYMENT_PROVIDER_STUB`` on (load tests, see ``manage.py
+loadtest_checkout``) every provider is replaced by ``stub_payment``, which
+only waits a configurable latency.
+"""
+
+import random
+import time
+
+from django.conf import settings
+
+from . import jobs
+from .models import PaymentTransaction
+
+
+def submit_payment(payment_transaction):
+    """Queue provider processing for a freshly created ``submitted`` payment"""
+    return jobs.enqueue('payments.process', {'payment_id': payment_transaction.id})
+
+
+def payment_job_failed(payment_id):
+    """The provider call kept raising: fail the payment so its seats go back"""
+    payment = PaymentTransaction.objects.filter(pk=payment_id, status='submitted').first()
+    if payment is None:
+        return
+    payment.status = 'failed'
+    payment.notes += "\n\nThe payment could not be processed. Please try again."
+    payment.save(update_fields=['status', 'notes', 'updated_at'])
+
+
+@jobs.register('payments.process', on_failure=payment_job_failed)
+def process_payment_job(payment_id):
+    """
+    Worker side of checkout: call the provider and record the outcome
+    """
+    payment = PaymentTransaction.objects.select_related('booking__user', 'booking__event').get(pk=payment_id)
+    if payment.status != 'submitted':
+        # Already handled (re-delivered job or manual admin action)
+        return {'skipped': payment.status}
+
+    payment_details = {'phone': payment.phone_number}
+    if payment.payment_method == 'bank':
+        payment_details['proof'] = payment.payment_proof
+
+    payment_success = process_payment(payment.payment_method, payment.amount, payment_details)
+
+    if payment_success:
+        payment.status = 'pending'  # Requires admin confirmation
+        payment.notes += "\n\nProvider accepted the payment. Awaiting admin confirmation."
+    else:
+        payment.status = 'failed'
+        payment.notes += "\n\nProvider declined the payment."
+    payment.save(update_fields=['status', 'notes', 'updated_at'])
+
+    if payment_success:
+        from .views import send_booking_confirmation_email
+        send_booking_confirmation_email(
+            booking=payment.booking,
+            event=payment.booking.event,
+            payment_method=payment.get_payment_method_display(),
+            payment_details=payment_details
+        )
+
+    return {'status': payment.status}
+
+
+# ==============================
+# PAYMENT PROCESSING FUNCTION
+# ==============================
+def process_payment(payment_method, amount, payment_details):
+    """
+    Process payment through various Zambian payment providers
+    This is a simulation - in production, integrate with real APIs
+    """
+    if settings.PAYMENT_PROVIDER_STUB:
+        return stub_payment(payment_method, amount, payment_details)
+    
+    if payment_method == "mtn":
+        return process_mtn_payment(amount, payment_details.get('phone'))
+    elif payment_method == "airtel":
+        return process_airtel_payment(amount, payment_details.get('phone'))
+    elif payment_method == "zamtel":
+        return process_zamtel_payment(amount, payment_details.get('phone'))
+    elif payment_method == "bank":
+        return process_bank_transfer(amount, payment_details)
+    
+    return False
+
+
+def process_mtn_payment(amount, phone_number):
+    """
+    Process MTN Mobile Money payment
+    In production, integrate with MTN MoMo API
+    """
+    try:
+        # Simulate API call to MTN Mobile Money
+        print(f"Processing MTN payment: K{amount} from {phone_number}")
+        
+        # Simulate processing time
+        time.sleep(2)
+        
+        # Simulate success/failure (90% success rate for demo, 100% for test numbers)
+        if phone_number in ['0977111111', '0977123456']:  # Test phone numbers
+            success = True
+        else:
+            success = random.random() > 0.1
+        
+        if success:
+            print(f"MTN payment successful: Transaction ID MTN{random.randint(100000, 999999)}")
+            return True
+        else:
+            print("MTN payment failed: Insufficient balance or user cancelled")
+            return False
+            
+    except Exception as e:
+        print(f"MTN payment error: {e}")
+        return False
+
+
+def process_airtel_payment(amount, phone_number):
+    """
+    Process Airtel Money payment
+    In production, integrate with Airtel Money API
+    """
+    try:
+        # Simulate API call to Airtel Money
+        print(f"Processing Airtel payment: K{amount} from {phone_number}")
+        
+        # Simulate processing time
+        time.sleep(2)
+        
+        # Simulate success/failure (90% success rate for demo)
+        success = random.random() > 0.1
+        
+        if success:
+            print(f"Airtel payment successful: Transaction ID AIR{random.randint(100000, 999999)}")
+            return True
+        else:
+            print("Airtel payment failed: Insufficient balance or user cancelled")
+            return False
+            
+    except Exception as e:
+        print(f"Airtel payment error: {e}")
+        return False
+
+
+def process_zamtel_payment(amount, phone_number):
+    """
+    Process Zamtel Money payment
+    In production, integrate with Zamtel Money API
+    """
+    try:
+        # Simulate API call to Zamtel Money
+        print(f"Processing Zamtel payment: K{amount} from {phone_number}")
+        
+        # Simulate processing time
+        time.sleep(2)
+        
+        # Simulate success/failure (90% success rate for demo)
+        success = random.random() > 0.1
+        
+        if success:
+            print(f"Zamtel payment successful: Transaction ID ZMT{random.randint(100000, 999999)}")
+            return True
+        else:
+            print("Zamtel payment failed: Insufficient balance or user cancelled")
+            return False
+            
+    except Exception as e:
+        print(f"Zamtel payment error: {e}")
+        return False
+
+
+def process_bank_transfer(amount, payment_details):
+    """
+    Process bank transfer payment
+    In production, integrate with bank APIs or manual verification
+    """
+    try:
+        print(f"Processing bank transfer: K{amount}")
+        
+        # For bank transfers, we typically need manual verification
+        # In production, you might:
+        # 1. Save the proof of payment file
+        # 2. Send notification to admin for verification
+        # 3. Mark payment as "pending verification"
+        
+        # For demo, we'll simulate immediate success
+        time.sleep(1)
+        
+        print(f"Bank transfer received: Reference BNK{random.randint(100000, 999999)}")
+        return True
+        
+    except Exception as e:
+        print(f"Bank transfer error: {e}")
+        return False
+
+
+# ==============================
+# LOAD-TEST PROVIDER STUB
+# ==============================
+def stub_latency_range(spec):
+    """``'50'`` or ``'20-200'`` (milliseconds) as a (low, high) pair"""
+    low, _, high = str(spec).partition('-')
+    return float(low), float(high or low)
+
+
+def stub_payment(payment_method, amount, payment_details):
+    """
+    Stand-in for every provider (PAYMENT_PROVIDER_STUB): waits a random
+    PAYMENT_STUB_LATENCY_MS and declines PAYMENT_STUB_FAILURE_RATE of calls
+    """
+    low, high = stub_latency_range(settings.PAYMENT_STUB_LATENCY_MS)
+    time.sleep(random.uniform(low, high) / 1000)
+    return random.random() >= settings.PAYMENT_STUB_FAILURE_RATE
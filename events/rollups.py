@@ -0,0 +1,148 @@
+"""
+Daily Revenue Rollups
+=====================
+
+Finance reports (revenue by day, event, payment method and ticket tier) read
+``RevenueDaily`` — one row per day, event, method and tier — instead of
+aggregating ``PaymentTransaction`` on demand.
+
+* **Grain** — ``day`` is the local date the payment was made (its
+  ``created_at``, as in the dashboard's revenue windows). A row counts the
+  completed payments (with their tickets and amount) and the refunded ones.
+* **Incremental builds** — ``build()`` reads which payments changed since the
+  ``RollupCheckpoint`` high-water mark (``updated_at``, indexed) and
+  recomputes only the days they fall on, each from that day's payments
+  alone. Rebuilding a whole day makes a run idempotent: running twice, or
+  over the same changes again, writes the same rows. The mark moves to the
+  time the run started; each run also re-reads the last
+  ``REVENUE_ROLLUP_OVERLAP`` seconds before it, so a transaction that
+  committed late is still picked up.
+* **Full builds** — ``build(full=True)`` recomputes every day and drops
+  days left without payments; use it after deleting payments or changing
+  bookings (tier upgrades do not touch the payment's ``updated_at``).
+
+Run ``manage.py build_revenue_rollups`` from cron (or with ``--every``).
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PaymentTransaction, RevenueDaily, RollupCheckpoint
+
+CHECKPOINT = 'revenue_daily'
+DAYS_PER_TRANSACTION = 31
+MEASURES = ('payments', 'tickets', 'revenue', 'refunds', 'refunded_amount')
+
+TIER_LABELS = {'vip': 'VIP', 'gold': 'Gold', 'standard': 'Standard'}
+
+# Report dimension -> (RevenueDaily fields, how a row is labelled)
+DIMENSIONS = {
+    'day': (('day',), lambda row: row['day'].isoformat()),
+    'event': (('event_id', 'event__title'), lambda row: row['event__title']),
+    'method': (('payment_method',), lambda row: dict(PaymentTransaction.PAYMENT_METHODS)[row['payment_method']]),
+    'tier': (('ticket_type',), lambda row: TIER_LABELS[row['ticket_type']]),
+}
+
+
+# ============================
+# BUILD
+# ============================
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def changed_days(since=None):
+    """Local dates of the payments changed at or after ``since`` (all of them if None)"""
+    payments = PaymentTransaction.objects.order_by()
+    if since is not None:
+        payments = payments.filter(updated_at__gte=since)
+    return sorted(set(payments.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()))
+
+
+def compute_days(days):
+    """Fresh ``RevenueDaily`` rows (unsaved) for ``days``, from their payments"""
+    window = Q()
+    for day in days:
+        start, end = _day_bounds(day)
+        window |= Q(created_at__gte=start, created_at__lt=end)
+    completed, refunded = Q(status='completed'), Q(status='refunded')
+    rows = (
+        PaymentTransaction.objects.filter(window, status__in=['completed', 'refunded'])
+        .order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'booking__event_id', 'payment_method', 'booking__ticket_type')
+        .annotate(
+            payments=Count('id', filter=completed),
+            tickets=Sum('booking__tickets', filter=completed),
+            revenue=Sum('amount', filter=completed),
+            refunds=Count('id', filter=refunded),
+            refunded_amount=Sum('amount', filter=refunded),
+        )
+    )
+    return [
+        RevenueDaily(
+            day=row['day'], event_id=row['booking__event_id'], payment_method=row['payment_method'],
+            ticket_type=row['booking__ticket_type'], **{measure: row[measure] or 0 for measure in MEASURES},
+        )
+        for row in rows
+    ]
+
+
+def build(full=False):
+    """Bring the rollup up to date; returns ``{'days': ..., 'rows': ..., 'high_water': ...}``"""
+    started = timezone.now()
+    checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    since = None
+    if not full and checkpoint.high_water is not None:
+        since = checkpoint.high_water - timedelta(seconds=settings.REVENUE_ROLLUP_OVERLAP)
+    days = changed_days(since)
+
+    rows = 0
+    for index in range(0, len(days), DAYS_PER_TRANSACTION):
+        chunk = days[index:index + DAYS_PER_TRANSACTION]
+        with transaction.atomic():
+            facts = compute_days(chunk)
+            RevenueDaily.objects.filter(day__in=chunk).delete()
+            RevenueDaily.objects.bulk_create(facts)
+        rows += len(facts)
+    if full:
+        # Days whose payments are all gone
+        stale = set(RevenueDaily.objects.order_by().values_list('day', flat=True).distinct()) - set(days)
+        RevenueDaily.objects.filter(day__in=sorted(stale)).delete()
+
+    RollupCheckpoint.objects.filter(pk=checkpoint.pk).update(high_water=started, updated_at=timezone.now())
+    return {'days': len(days), 'rows': rows, 'high_water': started}
+
+
+def high_water():
+    """When the rollup last read the payments (None: never built)"""
+    return RollupCheckpoint.objects.filter(name=CHECKPOINT).values_list('high_water', flat=True).first()
+
+
+# ============================
+# REPORTS
+# ============================
+def report(start, end, by='day'):
+    """
+    Revenue between ``start`` and ``end`` (inclusive dates) grouped by one of
+    ``DIMENSIONS``, read from the rollup only.
+    """
+    fields, label = DIMENSIONS[by]
+    rows = (
+        RevenueDaily.objects.filter(day__gte=start, day__lte=end)
+        .values(*fields)
+        .annotate(**{f'total_{measure}': Sum(measure) for measure in MEASURES})
+        .order_by(*(fields if by == 'day' else ('-total_revenue', *fields)))
+    )
+    rows = [
+        {'key': row[fields[0]], 'label': label(row), **{measure: row[f'total_{measure}'] for measure in MEASURES}}
+        for row in rows
+    ]
+    totals = {measure: sum(row[measure] for row in rows) for measure in MEASURES}
+    return {'start': start, 'end': end, 'by': by, 'rows': rows, 'totals': totals, 'as_of': high_water()}
@@ -0,0 +1,230 @@
+"""
+Event Sales Summary
+===================
+
+Per-event, per-tier sales figures in ``EventSalesSummary``, so the event
+admin, the event export and the dashboard's popular events read a few
+summary rows instead of aggregating every booking:
+
+* ``bookings`` — bookings made, whatever became of their payment;
+* ``sold_tickets`` / ``pending_tickets`` / ``refunded_tickets`` — tickets
+  whose payment is completed, awaiting review (submitted or pending) or
+  refunded; failed payments are not counted;
+* ``revenue`` — the amount of the completed payments.
+
+The booking and payment signals and the bulk approval path apply ``F()``
+increments in the caller's transaction, so the figures commit or roll back
+with the change that caused them, and concurrent bookings add up instead of
+overwriting each other. A row is created with its event's first booking in
+that tier.
+
+``rebuild()`` (``manage.py rebuild_sales_summary``) recomputes the table
+from bookings and payments one chunk of events at a time — the initial
+backfill, and after bulk loads that skip the signals. ``verify()`` lists
+the rows that differ from the source tables.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, Event, EventSalesSummary
+
+CHUNK_SIZE = 500  # events per rebuild transaction
+PENDING_STATUSES = ('submitted', 'pending')
+FIELDS = ('bookings', 'sold_tickets', 'pending_tickets', 'refunded_tickets', 'revenue')
+
+
+# ============================
+# INCREMENTS
+# ============================
+def _ticket_field(status):
+    """The ticket counter a payment status belongs to (None: not counted)"""
+    if status == 'completed':
+        return 'sold_tickets'
+    if status in PENDING_STATUSES:
+        return 'pending_tickets'
+    if status == 'refunded':
+        return 'refunded_tickets'
+    return None
+
+
+def payment_deltas(status, tickets, amount, sign=1):
+    """What a payment in ``status`` contributes to its summary row"""
+    deltas = {}
+    field = _ticket_field(status)
+    if field:
+        deltas[field] = sign * tickets
+    if status == 'completed':
+        deltas['revenue'] = sign * Decimal(amount or 0)
+    return deltas
+
+
+def _combine(*parts):
+    total = defaultdict(int)
+    for part in parts:
+        for field, delta in part.items():
+            total[field] += delta
+    return total
+
+
+def apply(event_id, ticket_type, deltas, create=True):
+    """Add ``deltas`` to one summary row with F() increments, creating it if needed"""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    rows = EventSalesSummary.objects.filter(event_id=event_id, ticket_type=ticket_type)
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(updated_at=timezone.now(), **changes) or not create:
+        return
+    try:
+        with transaction.atomic():
+            EventSalesSummary.objects.create(event_id=event_id, ticket_type=ticket_type, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first
+        rows.update(updated_at=timezone.now(), **changes)
+
+
+def booking_created(booking):
+    apply(booking.event_id, booking.ticket_type, {'bookings': 1})
+
+
+def booking_changed(booking):
+    """Move a booking's figures when its event, tier or ticket count is edited"""
+    old = (
+        Booking.objects.filter(pk=booking.pk)
+        .values('event_id', 'ticket_type', 'tickets', 'payment__status', 'payment__amount')
+        .first()
+    )
+    if old is None or (old['event_id'], old['ticket_type'], old['tickets']) == (
+            booking.event_id, booking.ticket_type, booking.tickets):
+        return
+    status, amount = old['payment__status'], old['payment__amount']
+    apply(old['event_id'], old['ticket_type'], _combine(
+        {'bookings': -1}, payment_deltas(status, old['tickets'], amount, -1),
+    ))
+    apply(booking.event_id, booking.ticket_type, _combine(
+        {'bookings': 1}, payment_deltas(status, booking.tickets, amount),
+    ))
+
+
+def booking_deleted(booking):
+    # The event may be going too: never create rows here
+    apply(booking.event_id, booking.ticket_type, {'bookings': -1}, create=False)
+
+
+def payment_changed(payment, old_status=None, old_amount=None):
+    """Move a payment's tickets and revenue from its old status (None: new payment) to its current one"""
+    if old_status == payment.status and old_amount == payment.amount:
+        return
+    booking = payment.booking
+    deltas = _combine(
+        payment_deltas(old_status, booking.tickets, old_amount, -1),
+        payment_deltas(payment.status, booking.tickets, payment.amount),
+    )
+    apply(booking.event_id, booking.ticket_type, deltas)
+
+
+def payment_deleted(payment):
+    booking = Booking.objects.filter(pk=payment.booking_id).values('event_id', 'ticket_type', 'tickets').first()
+    if booking is not None:
+        deltas = payment_deltas(payment.status, booking['tickets'], payment.amount, -1)
+        apply(booking['event_id'], booking['ticket_type'], deltas, create=False)
+
+
+def payments_approved(rows):
+    """
+    Bulk approval: ``rows`` are pending payments (``amount``,
+    ``booking__event_id``, ``booking__ticket_type``, ``booking__tickets``)
+    that are now completed. One UPDATE per event and tier.
+    """
+    groups = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        deltas = groups[row['booking__event_id'], row['booking__ticket_type']]
+        deltas['pending_tickets'] -= row['booking__tickets']
+        deltas['sold_tickets'] += row['booking__tickets']
+        deltas['revenue'] += row['amount']
+    for (event_id, ticket_type), deltas in groups.items():
+        apply(event_id, ticket_type, deltas)
+
+
+# ============================
+# REBUILD AND VERIFY
+# ============================
+def compute(event_ids):
+    """``{(event_id, ticket_type): figures}`` for these events, from bookings and payments"""
+    completed = Q(payment__status='completed')
+    rows = (
+        Booking.objects.filter(event_id__in=event_ids)
+        .order_by()
+        .values('event_id', 'ticket_type')
+        .annotate(
+            bookings=Count('id'),
+            sold_tickets=Sum('tickets', filter=completed),
+            pending_tickets=Sum('tickets', filter=Q(payment__status__in=PENDING_STATUSES)),
+            refunded_tickets=Sum('tickets', filter=Q(payment__status='refunded')),
+            revenue=Sum('payment__amount', filter=completed),
+        )
+    )
+    return {
+        (row['event_id'], row['ticket_type']): {field: row[field] or 0 for field in FIELDS}
+        for row in rows
+    }
+
+
+def stored(event_ids):
+    """``{(event_id, ticket_type): figures}`` as currently in the summary table"""
+    rows = EventSalesSummary.objects.filter(event_id__in=event_ids).values('event_id', 'ticket_type', *FIELDS)
+    return {(row['event_id'], row['ticket_type']): {field: row[field] for field in FIELDS} for row in rows}
+
+
+def event_chunks(chunk_size=CHUNK_SIZE):
+    """Event ids in ascending chunks (keyset, so the list is never held in full)"""
+    last = 0
+    while True:
+        ids = list(
+            Event.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def rebuild(chunk_size=CHUNK_SIZE, progress=None):
+    """Recompute the summary of every event, one transaction per chunk; returns rows written"""
+    written = done = 0
+    for event_ids in event_chunks(chunk_size):
+        with transaction.atomic():
+            # New bookings (FK to the event) and signal increments (the summary rows)
+            # wait until this chunk is swapped
+            list(Event.objects.select_for_update().filter(pk__in=event_ids).values_list('pk', flat=True))
+            list(EventSalesSummary.objects.select_for_update().filter(event_id__in=event_ids).values_list('pk', flat=True))
+            figures = compute(event_ids)
+            EventSalesSummary.objects.filter(event_id__in=event_ids).delete()
+            EventSalesSummary.objects.bulk_create([
+                EventSalesSummary(event_id=event_id, ticket_type=ticket_type, **values)
+                for (event_id, ticket_type), values in figures.items()
+            ])
+        written += len(figures)
+        done += len(event_ids)
+        if progress:
+            progress(done)
+    return written
+
+
+def verify(chunk_size=CHUNK_SIZE):
+    """``(event_id, ticket_type, field, stored, actual)`` for every figure that is off"""
+    drift = []
+    zero = dict.fromkeys(FIELDS, 0)
+    for event_ids in event_chunks(chunk_size):
+        actual, current = compute(event_ids), stored(event_ids)
+        for key in sorted(actual.keys() | current.keys()):
+            for field in FIELDS:
+                have, want = current.get(key, zero)[field], actual.get(key, zero)[field]
+                if have != want:
+                    drift.append((*key, field, have, want))
+    return drift
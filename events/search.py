@@ -0,0 +1,214 @@
+"""
+Full-Text Search
+================
+
+Search for the events, venues and resources list pages, replacing
+``icontains`` scans over long text columns:
+
+* **SQLite** — one FTS5 table per model (``events_search_<kind>``, rowid =
+  primary key, porter stemming, prefix indexes). The ``post_save`` /
+  ``post_delete`` receivers keep it in sync; ``manage.py
+  rebuild_search_index`` refills it after bulk loads.
+* **PostgreSQL** (``DATABASE_URL``) — a GIN index over a weighted
+  ``tsvector`` expression on the model's own table, so it maintains itself;
+  queries use the identical expression so the index applies.
+* Other databases fall back to ``icontains``.
+
+Every word in the query must match, the last one as a prefix ("jaz" finds
+"jazz"), and results are ordered by relevance (bm25 / ts_rank, title-like
+fields weighted highest). ``filter_queryset`` runs the match inside the
+caller's already-filtered queryset, so the ``SEARCH_MAX_RESULTS`` cap counts
+only rows the page can show. Results are cached per process in a small LRU of
+(normalized query, queryset SQL) -> ids, which is cleared for a model whenever
+one of its rows is indexed.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+
+from .lru import LRUCache
+from .models import Event, Resource, Venue
+
+# kind -> (model, columns in weight order, bm25 weights, tsvector weights)
+INDEXES = {
+    'event': (Event, ('title', 'location', 'description'), (10.0, 4.0, 1.0), ('A', 'B', 'C')),
+    'venue': (Venue, ('name', 'address', 'facilities'), (10.0, 4.0, 2.0), ('A', 'B', 'C')),
+    'resource': (Resource, ('name', 'supplier_name', 'description'), (10.0, 4.0, 1.0), ('A', 'B', 'C')),
+}
+MODEL_KINDS = {model: kind for kind, (model, *_) in INDEXES.items()}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table(kind):
+    return f'events_search_{kind}'
+
+
+def tsvector_sql(kind):
+    """The weighted tsvector expression the Postgres GIN index is built on"""
+    _, columns, _, weights = INDEXES[kind]
+    return ' || '.join(
+        f"setweight(to_tsvector('english', coalesce(\"{column}\", '')), '{weight}')"
+        for column, weight in zip(columns, weights)
+    )
+
+
+def normalize(query):
+    """Lower-cased word tokens of ``query``"""
+    return TOKEN_RE.findall((query or '').lower())[:12]
+
+
+# ============================
+# RESULT CACHE
+# ============================
+results_cache = LRUCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+
+
+# ============================
+# BACKENDS
+# ============================
+_fts_ready = {}
+
+
+def backend():
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    if connection.vendor == 'sqlite':
+        alias = connection.settings_dict['NAME']
+        if alias not in _fts_ready:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table('event')]
+                )
+                _fts_ready[alias] = cursor.fetchone()[0] == 1
+        if _fts_ready[alias]:
+            return 'fts5'
+    return 'icontains'
+
+
+def _pk_subquery(queryset):
+    """SQL and params selecting the primary keys of ``queryset``"""
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    return sql, tuple(params)
+
+
+def _fts5_ids(kind, tokens, limit, queryset):
+    _, _, bm25_weights, _ = INDEXES[kind]
+    table = fts_table(kind)
+    # Quoted terms are matched literally; the last one also as a prefix
+    match = ' '.join(f'"{token}"' for token in tokens) + '*'
+    weights = ', '.join(str(weight) for weight in bm25_weights)
+    subquery, subquery_params = _pk_subquery(queryset)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s AND rowid IN ({subquery}) "
+            f"ORDER BY bm25({table}, {weights}) LIMIT %s",
+            [match, *subquery_params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_ids(kind, tokens, limit, queryset):
+    model = INDEXES[kind][0]
+    vector = tsvector_sql(kind)
+    tsquery = ' & '.join(tokens[:-1] + [f'{tokens[-1]}:*'])
+    subquery, subquery_params = _pk_subquery(queryset)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM {model._meta.db_table} "
+            f"WHERE {vector} @@ to_tsquery('english', %s) AND id IN ({subquery}) "
+            f"ORDER BY ts_rank({vector}, to_tsquery('english', %s)) DESC, id LIMIT %s",
+            [tsquery, *subquery_params, tsquery, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _icontains_ids(kind, tokens, limit, queryset):
+    _, columns, _, _ = INDEXES[kind]
+    condition = Q()
+    for token in tokens:
+        token_match = Q()
+        for column in columns:
+            token_match |= Q(**{f'{column}__icontains': token})
+        condition &= token_match
+    return list(queryset.filter(condition).values_list('pk', flat=True)[:limit])
+
+
+def search_ids(kind, query, queryset=None):
+    """
+    Primary keys matching ``query``, best match first. With ``queryset`` the
+    match (and the ``SEARCH_MAX_RESULTS`` cap) only covers its rows.
+    """
+    tokens = normalize(query)
+    if not tokens:
+        return []
+    if queryset is None:
+        queryset = INDEXES[kind][0].objects.all()
+    key = (kind, ' '.join(tokens), _pk_subquery(queryset))
+    ids = results_cache.get(key)
+    if ids is None:
+        finder = {'fts5': _fts5_ids, 'postgres': _postgres_ids, 'icontains': _icontains_ids}[backend()]
+        ids = finder(kind, tokens, settings.SEARCH_MAX_RESULTS, queryset)
+        results_cache.set(key, ids)
+    return ids
+
+
+def filter_queryset(queryset, kind, query):
+    """
+    Restrict ``queryset`` to matches for ``query``, ordered by relevance. The
+    position is annotated as ``search_rank`` so listings can page on
+    ``(search_rank, id)``. Apply every other filter first: matches are capped
+    within ``queryset``, not over the whole table.
+    """
+    ids = search_ids(kind, query, queryset)
+    if not ids:
+        return queryset.none()
+    ranking = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).annotate(search_rank=ranking).order_by('search_rank')
+
+
+# ============================
+# INDEX MAINTENANCE (SQLite)
+# ============================
+def index_object(instance):
+    """Insert or refresh ``instance`` in its FTS5 table"""
+    kind = MODEL_KINDS[type(instance)]
+    results_cache.clear(kind)
+    if backend() != 'fts5':
+        return
+    _, columns, _, _ = INDEXES[kind]
+    table = fts_table(kind)
+    values = [getattr(instance, column) or '' for column in columns]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [instance.pk])
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES (%s{', %s' * len(columns)})",
+            [instance.pk, *values],
+        )
+
+
+def remove_object(instance):
+    kind = MODEL_KINDS[type(instance)]
+    results_cache.clear(kind)
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {fts_table(kind)} WHERE rowid = %s", [instance.pk])
+
+
+def rebuild(kind):
+    """Refill the FTS5 table of ``kind`` from its model table; returns the row count"""
+    results_cache.clear(kind)
+    model, columns, _, _ = INDEXES[kind]
+    if backend() != 'fts5':
+        return model.objects.count()
+    table = fts_table(kind)
+    source = ', '.join(f"coalesce({column}, '')" for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) SELECT id, {source} FROM {model._meta.db_table}"
+        )
+        return cursor.rowcount
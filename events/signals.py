@@ -1,10 +1,17 @@
 # events/signals.py
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import PaymentTransaction
+from django.urls import reverse
+from .models import (
+    Booking, Category, Event, EventGallery, PaymentTransaction, UserProfile, Venue, VenueBooking, Resource,
+    ResourceAllocation,
+)
+from .inventory import reserve_seats, release_seats, SoldOut
+from .holds import convert_hold, release_hold
+from .outbox import queue_mail
+from . import dashboard, facilities, images, modelcache, pagecache, sales, search
 
 
 @receiver(pre_save, sender=PaymentTransaction)
@@ -20,19 +27,14 @@ def handle_payment_confirmation(sender, instance, **kwargs):
             
             # Check if status changed from pending to completed
             if old_instance.status == 'pending' and instance.status == 'completed':
-                # Payment confirmed by admin - update seat counts
+                # Payment confirmed by admin - take the seats (conditional UPDATE,
+                # raises SoldOut so the status change is not saved on oversell)
                 booking = instance.booking
                 event = booking.event
                 
-                # Update seat counts based on ticket type
-                if booking.ticket_type == 'vip':
-                    event.vip_seats_left -= booking.tickets
-                elif booking.ticket_type == 'gold':
-                    event.gold_seats_left -= booking.tickets
-                elif booking.ticket_type == 'standard':
-                    event.standard_seats_left -= booking.tickets
-                
-                event.save()
+                if not reserve_seats(event.id, booking.ticket_type, booking.tickets):
+                    raise SoldOut(event.id, booking.ticket_type, booking.tickets)
+                convert_hold(booking)
                 
                 # Add note to transaction
                 instance.notes += f"\n\nPayment confirmed by admin. Seats reserved: {booking.tickets} x {booking.get_ticket_type_display()}"
@@ -43,33 +45,118 @@ def handle_payment_confirmation(sender, instance, **kwargs):
                 except Exception as e:
                     print(f"Failed to send confirmation email: {e}")
                     
+            # Payment declined or rejected - give the held seats back
+            elif old_instance.status in ('submitted', 'pending') and instance.status == 'failed':
+                release_hold(instance.booking)
+                    
             # Check if status changed from completed to refunded
             elif old_instance.status == 'completed' and instance.status == 'refunded':
                 # Payment refunded - restore seat counts
                 booking = instance.booking
-                event = booking.event
-                
-                # Restore seat counts
-                if booking.ticket_type == 'vip':
-                    event.vip_seats_left += booking.tickets
-                elif booking.ticket_type == 'gold':
-                    event.gold_seats_left += booking.tickets
-                elif booking.ticket_type == 'standard':
-                    event.standard_seats_left += booking.tickets
                 
-                event.save()
+                release_seats(booking.event_id, booking.ticket_type, booking.tickets)
                 
                 # Add note to transaction
                 instance.notes += f"\n\nPayment refunded. Seats restored: {booking.tickets} x {booking.get_ticket_type_display()}"
+            
+            # Keep the cached dashboard counters and the sales summary in step
+            dashboard.payment_status_changed(old_instance.status, instance.status, instance.amount)
+            sales.payment_changed(instance, old_instance.status, old_instance.amount)
                 
         except PaymentTransaction.DoesNotExist:
             pass
 
 
+@receiver(post_save, sender=PaymentTransaction)
+def count_new_payment(sender, instance, created, **kwargs):
+    """
+    Count new payments in the cached dashboard metrics
+    """
+    if created:
+        dashboard.payment_status_changed(None, instance.status, instance.amount)
+        sales.payment_changed(instance)
+
+
+@receiver(post_save, sender=Booking)
+def count_new_booking(sender, instance, created, **kwargs):
+    """
+    Count new bookings in the cached dashboard metrics and the sales summary
+    """
+    if created:
+        dashboard.bump('total_bookings')
+        sales.booking_created(instance)
+
+
+@receiver(pre_save, sender=Booking)
+def move_booking_sales(sender, instance, **kwargs):
+    """
+    Move the sales figures of a booking whose event, tier or ticket count is edited
+    """
+    if instance.pk:
+        sales.booking_changed(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking_sales(sender, instance, **kwargs):
+    sales.booking_deleted(instance)
+
+
+@receiver(post_delete, sender=PaymentTransaction)
+def remove_payment_sales(sender, instance, **kwargs):
+    sales.payment_deleted(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def count_new_user(sender, instance, created, **kwargs):
+    """
+    Count new users in the cached dashboard metrics
+    """
+    if created:
+        dashboard.bump('total_users')
+        dashboard.invalidate()
+
+
+@receiver([post_save, post_delete], sender=VenueBooking)
+@receiver([post_save, post_delete], sender=ResourceAllocation)
+@receiver([post_save, post_delete], sender=Venue)
+@receiver([post_save, post_delete], sender=Resource)
+def refresh_facilities_metrics(sender, instance, **kwargs):
+    """
+    Drop the cached facilities snapshot when bookings, allocations or stock change
+    """
+    facilities.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=Resource)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Keep the full-text index in step with the searchable text
+    """
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Venue)
+@receiver(post_delete, sender=Resource)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
 def send_confirmation_email_to_user(booking, event, payment_transaction):
     """
     Send confirmation email when admin approves payment
     """
+    queue_mail(**confirmation_email(booking, event, payment_transaction))
+    
+    print(f"✅ Confirmation email queued for {booking.user.email} for booking #{booking.id:06d}")
+
+
+def confirmation_email(booking, event, payment_transaction):
+    """
+    Build the payment confirmation email as queue_mail() arguments
+    """
     user = booking.user
     subject = f'✅ Payment Confirmed - {event.title}'
     
@@ -104,13 +191,17 @@ Payment Method: {payment_transaction.get_payment_method_display()}
 Transaction ID: {payment_transaction.transaction_id}
 Status: CONFIRMED ✓
 
+YOUR E-TICKETS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+One QR code per ticket: http://127.0.0.1:8000{reverse('events:booking_tickets', args=[booking.id])}
+
 IMPORTANT INFORMATION
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 • Your tickets are now confirmed and valid
 • Please arrive at least 30 minutes before the event starts
 • Bring a valid ID for verification
 • Your booking reference: #{booking.id:06d}
-• Present this email or your booking reference at the entrance
+• Show each ticket's QR code (on screen or printed) at the entrance; each admits one person once
 
 ORGANIZER CONTACT
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -132,12 +223,49 @@ This is an automated confirmation email. Please do not reply.
 Visit us at: http://127.0.0.1:8000/
     """
     
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=True,
-    )
-    
-    print(f"✅ Confirmation email sent to {user.email} for booking #{booking.id:06d}")
+    return {
+        'subject': subject,
+        'message': message,
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'recipient_list': [user.email],
+    }
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Venue)
+@receiver([post_save, post_delete], sender=Resource)
+@receiver([post_save, post_delete], sender=VenueBooking)
+@receiver([post_save, post_delete], sender=ResourceAllocation)
+def purge_cached_pages(sender, instance, **kwargs):
+    """
+    Drop the anonymous page-cache entries that show this row
+    """
+    pagecache.purge(instance)
+
+
+@receiver([post_save, post_delete], sender=Event)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Venue)
+def invalidate_model_cache(sender, instance, **kwargs):
+    """
+    New version of the row for every worker's object cache
+    """
+    modelcache.invalidate(instance)
+
+
+@receiver([post_save, post_delete], sender=EventGallery)
+def purge_event_gallery_pages(sender, instance, **kwargs):
+    """
+    Gallery images appear on their event's page
+    """
+    pagecache.purge(instance.event)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=EventGallery)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """
+    Queue resized WebP/JPEG copies of newly uploaded images
+    """
+    images.queue_missing(instance)
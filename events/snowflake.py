@@ -0,0 +1,219 @@
+"""
+Snowflake IDs
+=============
+
+Payment transaction IDs used to be ten random digits, which collide once
+there are enough payments (and the ``unique`` column then turns checkout into
+a 500). This module hands out 63-bit integers instead:
+
+    | 41 bits: ms since EPOCH | 10 bits: worker id | 12 bits: sequence |
+
+* time-ordered (they sort by creation time) and monotonic per process;
+* unique across processes, because every process holds its own worker id;
+* 4096 IDs per millisecond per process, ``allocate(n)`` reserves a block at
+  once for ``bulk_create``;
+* ``decode()`` turns an ID (or a ``MTN…`` transaction ID) back into its
+  creation time, worker id and sequence.
+
+Worker ids are leased from the ``IdWorkerLease`` table (a free or expired
+row is taken with a conditional ``UPDATE``, like the seat counters) and
+renewed after half of ``SNOWFLAKE_LEASE_SECONDS``, so no configuration is
+needed. ``SNOWFLAKE_WORKER_ID`` pins one instead. A forked child forgets
+its parent's generator and leases its own id. If the clock steps back the
+generator keeps counting from the last timestamp it used, so IDs never go
+backwards.
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdWorkerLease
+
+EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+WORKER_SHIFT = SEQUENCE_BITS
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+SnowflakeParts = namedtuple('SnowflakeParts', 'created_at worker_id sequence')
+
+
+class WorkerIdsExhausted(RuntimeError):
+    """Every worker id is leased by a live process"""
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000 - EPOCH_MS
+
+
+# ============================
+# GENERATOR
+# ============================
+class Snowflake:
+    """Thread-safe ID generator for one worker id"""
+
+    def __init__(self, worker_id, clock=_now_ms):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._last = -1
+        self._sequence = 0
+        self.set_worker_id(worker_id)
+
+    def set_worker_id(self, worker_id):
+        """Switch to a new lease; the timestamp carries on so IDs stay monotonic"""
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f'Worker id must be between 0 and {MAX_WORKER_ID}, not {worker_id}')
+        with self._lock:
+            self.worker_id = worker_id
+
+    def allocate(self, count):
+        """``count`` new IDs, ascending"""
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                now = self._clock()
+                if now > self._last:
+                    self._last, self._sequence = now, 0
+                elif self._sequence > MAX_SEQUENCE:
+                    # Millisecond used up (or clock stepped back): borrow the next one
+                    self._last, self._sequence = self._last + 1, 0
+                take = min(count - len(ids), MAX_SEQUENCE + 1 - self._sequence)
+                base = (self._last << TIMESTAMP_SHIFT) | (self.worker_id << WORKER_SHIFT)
+                ids.extend(range(base + self._sequence, base + self._sequence + take))
+                self._sequence += take
+        return ids
+
+    def next_id(self):
+        return self.allocate(1)[0]
+
+
+def decode(value):
+    """``SnowflakeParts`` of an ID, or of a transaction ID with its provider prefix"""
+    if isinstance(value, str):
+        value = int(value.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    timestamp = (value >> TIMESTAMP_SHIFT) + EPOCH_MS
+    return SnowflakeParts(
+        created_at=datetime.fromtimestamp(timestamp / 1000, tz=dt_timezone.utc),
+        worker_id=(value >> WORKER_SHIFT) & MAX_WORKER_ID,
+        sequence=value & MAX_SEQUENCE,
+    )
+
+
+# ============================
+# WORKER ID LEASES
+# ============================
+def claim_worker_id(owner, now=None):
+    """Lease a free (or expired) worker id to ``owner``"""
+    now = now or timezone.now()
+    expires_at = now + timedelta(seconds=settings.SNOWFLAKE_LEASE_SECONDS)
+    expired = IdWorkerLease.objects.filter(expires_at__lt=now).values_list('worker_id', flat=True)
+    for worker_id in expired:
+        # Conditional: of two processes taking the same expired row, one wins
+        taken = IdWorkerLease.objects.filter(worker_id=worker_id, expires_at__lt=now).update(
+            owner=owner, expires_at=expires_at, claimed_at=now,
+        )
+        if taken:
+            return worker_id
+
+    leased = set(IdWorkerLease.objects.values_list('worker_id', flat=True))
+    for worker_id in range(MAX_WORKER_ID + 1):
+        if worker_id in leased:
+            continue
+        try:
+            with transaction.atomic():
+                IdWorkerLease.objects.create(worker_id=worker_id, owner=owner, expires_at=expires_at, claimed_at=now)
+            return worker_id
+        except IntegrityError:
+            continue  # another process created it first
+    raise WorkerIdsExhausted(f'All {MAX_WORKER_ID + 1} Snowflake worker ids are leased')
+
+
+def renew_worker_id(worker_id, owner, now=None):
+    """Extend ``owner``'s lease; False if it was lost (expired and taken)"""
+    now = now or timezone.now()
+    return bool(IdWorkerLease.objects.filter(worker_id=worker_id, owner=owner).update(
+        expires_at=now + timedelta(seconds=settings.SNOWFLAKE_LEASE_SECONDS),
+    ))
+
+
+def release_worker_id(worker_id, owner):
+    IdWorkerLease.objects.filter(worker_id=worker_id, owner=owner).delete()
+
+
+# ============================
+# PROCESS-WIDE GENERATOR
+# ============================
+_state_lock = threading.Lock()
+_generator = None
+_lease = {}
+
+
+def _owner():
+    return f'{socket.gethostname()[:60]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _maintain_lease():
+    """Lease, renew or re-check this process's worker id (called under _state_lock)"""
+    now = timezone.now()
+    in_transaction = transaction.get_connection().in_atomic_block
+    if _lease and now < _lease['renew_at'] and (_lease['committed'] or in_transaction):
+        return
+    if _lease and renew_worker_id(_lease['worker_id'], _lease['owner'], now):
+        worker_id = _lease['worker_id']
+    else:
+        # First ID, lost lease, or a lease written in a transaction that rolled back
+        _lease['owner'] = _owner()
+        worker_id = claim_worker_id(_lease['owner'], now)
+        _lease['worker_id'] = worker_id
+    _lease['renew_at'] = now + timedelta(seconds=settings.SNOWFLAKE_LEASE_SECONDS / 2)
+    _lease['committed'] = not in_transaction
+    if _generator is None:
+        return Snowflake(worker_id)
+    if _generator.worker_id != worker_id:
+        _generator.set_worker_id(worker_id)
+    return _generator
+
+
+def generator():
+    """This process's ``Snowflake``"""
+    global _generator
+    with _state_lock:
+        if settings.SNOWFLAKE_WORKER_ID is not None:
+            if _generator is None or _generator.worker_id != settings.SNOWFLAKE_WORKER_ID:
+                _generator = Snowflake(settings.SNOWFLAKE_WORKER_ID)
+        else:
+            _generator = _maintain_lease() or _generator
+        return _generator
+
+
+def allocate(count):
+    """``count`` new IDs for ``bulk_create``"""
+    if count <= 0:
+        return []
+    return generator().allocate(count)
+
+
+def next_id():
+    return generator().next_id()
+
+
+def _forget():
+    """A forked child must not reuse its parent's worker id"""
+    global _generator, _state_lock
+    _generator = None
+    _lease.clear()
+    _state_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget)
@@ -0,0 +1,42 @@
+# events/templatetags/responsive_images.py
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from events import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', css_class='', sizes='100vw', loading='lazy'):
+    """
+    ``<picture>`` for an uploaded image: WebP and JPEG ``srcset``s of its
+    derivatives, or a plain ``<img>`` of the original until they exist::
+
+        {% responsive_image event.main_image alt=event.title css_class="w-full" sizes="(min-width: 768px) 50vw, 100vw" %}
+    """
+    if not image:
+        return ''
+    jpeg = [row for row in images.derivatives(image.name) if row['format'] == 'jpeg' and not row['is_thumbnail']]
+    if not jpeg:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="{}">', image.url, alt, css_class, loading)
+
+    fallback = jpeg[len(jpeg) // 2]
+    return format_html(
+        # display: contents keeps the <img> sizing against the original parent
+        '<picture style="display: contents">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async">'
+        '</picture>',
+        images.srcset(image.name, 'webp'), sizes,
+        default_storage.url(fallback['name']), images.srcset(image.name, 'jpeg'), sizes,
+        fallback['width'], fallback['height'], alt, css_class, loading,
+    )
+
+
+@register.simple_tag
+def thumbnail_url(image):
+    """URL of the square thumbnail, or the original until it exists"""
+    return images.thumbnail_url(image)
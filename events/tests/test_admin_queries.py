@@ -0,0 +1,125 @@
+# events/tests/test_admin_queries.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from datetime import date, timedelta
+from events.models import Category, Event, Booking, PaymentTransaction, UserProfile, Venue
+from events import dashboard, sales
+
+BOOKINGS = 100_000
+EVENTS = 50
+USERS = 500
+PRICES = {'vip': 1500, 'gold': 850, 'standard': 450}
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AdminChangelistQueryCountTest(TestCase):
+    """Test admin changelists run a constant number of queries on a large dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        category = Category.objects.create(name="Music")
+        Event.objects.bulk_create([
+            Event(
+                title=f"Event {i}",
+                description="Seeded",
+                date=date.today() + timedelta(days=i),
+                location="Lusaka",
+                category=category,
+                vip_seats_left=100,
+                gold_seats_left=100,
+                standard_seats_left=100,
+            )
+            for i in range(EVENTS)
+        ])
+        password = make_password('pass123')
+        User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com', password=password)
+            for i in range(USERS)
+        ])
+        # SQLite does not return primary keys from bulk_create, so read them back
+        events = list(Event.objects.order_by('id'))
+        users = list(User.objects.filter(username__startswith='user').order_by('id'))
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        Venue.objects.bulk_create([
+            Venue(name=f"Venue {i}", address="Lusaka", capacity=1000, hourly_rate=500)
+            for i in range(10)
+        ])
+
+        tiers = list(PRICES)
+        Booking.objects.bulk_create([
+            Booking(
+                user=users[i % USERS],
+                event=events[i % EVENTS],
+                ticket_type=tiers[i % 3],
+                tickets=1,
+                total_price=PRICES[tiers[i % 3]],
+            )
+            for i in range(BOOKINGS)
+        ], batch_size=5000)
+        PaymentTransaction.objects.bulk_create([
+            PaymentTransaction(
+                booking_id=booking_id,
+                transaction_id=f"MTN{i:010d}",
+                payment_method='mtn',
+                amount=total_price,
+                status='completed' if i % 2 else 'pending',
+            )
+            for i, (booking_id, total_price) in enumerate(
+                Booking.objects.order_by('id').values_list('id', 'total_price')
+            )
+        ], batch_size=5000)
+        # bulk_create skips the signals that keep the sales summary current
+        sales.rebuild()
+
+    def setUp(self):
+        dashboard.counter_cache().clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def assertChangelistQueries(self, url_name, num):
+        url = reverse(url_name)
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # The second page costs the same
+        with self.assertNumQueries(num):
+            self.client.get(url, {'p': 2})
+
+    def test_event_changelist(self):
+        """Test event booking counts and revenue come from one annotated query"""
+        self.assertChangelistQueries('admin:events_event_changelist', 9)
+
+    def test_booking_changelist(self):
+        """Test bookings load their user, event and payment in the same query"""
+        self.assertChangelistQueries('admin:events_booking_changelist', 8)
+
+    def test_payment_changelist(self):
+        """Test payments annotate the user's booking count"""
+        self.assertChangelistQueries('admin:events_paymenttransaction_changelist', 8)
+
+    def test_userprofile_changelist(self):
+        """Test profile booking counts and spend come from one annotated query"""
+        self.assertChangelistQueries('admin:events_userprofile_changelist', 5)
+
+    def test_category_and_venue_changelists(self):
+        """Test category and venue counts are annotated"""
+        with self.assertNumQueries(5):
+            self.client.get(reverse('admin:events_category_changelist'))
+        with self.assertNumQueries(6):
+            self.client.get(reverse('admin:events_venue_changelist'))
+
+    def test_annotated_values(self):
+        """Test the annotations match the data"""
+        event = Event.objects.get(title="Event 0")
+        response = self.client.get(reverse('admin:events_event_changelist'), {'q': 'Event 0'})
+        row = next(obj for obj in response.context['cl'].result_list if obj.pk == event.pk)
+        self.assertEqual(row.booking_total, BOOKINGS // EVENTS)
+        self.assertEqual(row.booking_total, event.bookings.count())
+        revenue = event.bookings.filter(payment__status='completed').aggregate(total=Sum('total_price'))['total'] or 0
+        self.assertEqual(row.revenue_total, revenue)
+
@@ -0,0 +1,127 @@
+# events/tests/test_approvals.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
+from events.models import Category, Event, Booking, PaymentTransaction, OutboundEmail
+from events.approvals import bulk_approve
+
+
+class BulkApprovalTest(TestCase):
+    """Test set-based bulk payment approval"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Music")
+        self.event = self.make_event("Concert", vip=10, gold=100)
+        self.other_event = self.make_event("Festival", vip=100, gold=100)
+
+    def make_event(self, title, vip, gold):
+        return Event.objects.create(
+            title=title,
+            description="Live music",
+            date=date.today() + timedelta(days=30),
+            location="Lusaka",
+            category=self.category,
+            vip_seats_left=vip,
+            gold_seats_left=gold,
+            standard_seats_left=0
+        )
+
+    def make_payments(self, event, ticket_type, count, tickets=1, status='pending'):
+        payments = []
+        for _ in range(count):
+            i = User.objects.count()
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com')
+            booking = Booking.objects.create(user=user, event=event, ticket_type=ticket_type, tickets=tickets)
+            payments.append(PaymentTransaction.objects.create(
+                booking=booking, payment_method='mtn', amount=booking.total_price, status=status, notes="Initiated."
+            ))
+        return payments
+
+    def test_approves_and_applies_grouped_seat_deltas(self):
+        """Test statuses, seats, notes and emails are all updated"""
+        self.make_payments(self.event, 'gold', 5, tickets=2)
+        self.make_payments(self.other_event, 'vip', 3)
+
+        summary = bulk_approve(PaymentTransaction.objects.all(), approved_by='admin')
+
+        self.assertEqual(summary['approved'], 8)
+        self.assertEqual(summary['seats_reserved'], 13)
+        self.assertEqual(summary['emails_queued'], 8)
+        self.assertIn('total', summary['timings'])
+        self.assertFalse(PaymentTransaction.objects.exclude(status='completed').exists())
+        payment = PaymentTransaction.objects.first()
+        self.assertTrue(payment.notes.startswith("Initiated."))
+        self.assertIn("Approved by admin: admin", payment.notes)
+        self.event.refresh_from_db()
+        self.other_event.refresh_from_db()
+        self.assertEqual(self.event.gold_seats_left, 90)
+        self.assertEqual(self.other_event.vip_seats_left, 97)
+        self.assertEqual(OutboundEmail.objects.count(), 8)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Test approving more payments does not issue more queries"""
+        self.make_payments(self.event, 'gold', 3)
+        with CaptureQueriesContext(connection) as small:
+            bulk_approve(PaymentTransaction.objects.filter(status='pending'), approved_by='admin')
+
+        self.make_payments(self.event, 'gold', 30)
+        with CaptureQueriesContext(connection) as large:
+            bulk_approve(PaymentTransaction.objects.filter(status='pending'), approved_by='admin')
+
+        self.assertEqual(len(small), len(large))
+
+    def test_oversubscribed_tier_approves_oldest_first(self):
+        """Test a tier without enough seats approves what fits, oldest first"""
+        payments = self.make_payments(self.event, 'vip', 4, tickets=3)
+
+        summary = bulk_approve(PaymentTransaction.objects.all(), approved_by='admin')
+
+        self.assertEqual(summary['approved'], 3)
+        self.assertEqual(summary['sold_out'], 1)
+        self.assertEqual(
+            list(PaymentTransaction.objects.filter(status='completed').order_by('id').values_list('id', flat=True)),
+            [p.id for p in payments[:3]]
+        )
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 1)
+
+    def test_non_pending_payments_are_skipped(self):
+        """Test payments that are not pending are left alone"""
+        self.make_payments(self.event, 'gold', 2, status='failed')
+        summary = bulk_approve(PaymentTransaction.objects.all(), approved_by='admin')
+        self.assertEqual(summary['approved'], 0)
+        self.assertEqual(summary['skipped'], 2)
+        self.assertFalse(PaymentTransaction.objects.filter(status='completed').exists())
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BulkApprovalAdminTest(TestCase):
+    """Test the admin approve action uses the bulk path"""
+
+    def test_admin_action(self):
+        """Test the admin action approves and reports a summary"""
+        admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        category = Category.objects.create(name="Music")
+        event = Event.objects.create(
+            title="Concert", description="Live", date=date.today() + timedelta(days=30),
+            location="Lusaka", category=category, vip_seats_left=5
+        )
+        booking = Booking.objects.create(user=admin, event=event, ticket_type='vip', tickets=2)
+        payment = PaymentTransaction.objects.create(
+            booking=booking, payment_method='mtn', amount=booking.total_price, status='pending'
+        )
+
+        client = Client()
+        client.login(username='boss', password='pass123')
+        response = client.post(
+            reverse('admin:events_paymenttransaction_changelist'),
+            {'action': 'approve_payments', '_selected_action': [payment.id]},
+            follow=True
+        )
+        self.assertContains(response, "Successfully approved 1 payment(s)")
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'completed')
@@ -0,0 +1,145 @@
+# events/tests/test_availability.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from events.models import Category, Event, Venue, VenueBooking
+from events import availability
+
+
+def local(year, month, day, hour=0):
+    return timezone.make_aware(datetime(year, month, day, hour))
+
+
+class AvailabilityTestMixin:
+    """A venue with a few bookings in March 2030"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Music")
+        self.venue = Venue.objects.create(
+            name="Heroes Stadium", address="Lusaka", capacity=1000, hourly_rate=Decimal('100.00')
+        )
+
+    def book(self, start, end, setup=2, cleanup=1, status='confirmed'):
+        event = Event.objects.create(
+            title=f"Event {Event.objects.count()}",
+            description="Booked",
+            date=start.date(),
+            category=self.category,
+        )
+        return VenueBooking.objects.create(
+            event=event, venue=self.venue, start_datetime=start, end_datetime=end,
+            setup_hours=setup, cleanup_hours=cleanup, status=status,
+        )
+
+
+class AvailabilityEngineTest(AvailabilityTestMixin, TestCase):
+    """Test interval loading, merging and the calendars"""
+
+    def test_merge_intervals(self):
+        """Test overlapping and touching intervals merge, disjoint ones do not"""
+        merged = availability.merge_intervals([(5, 7), (1, 3), (2, 4), (4, 5), (9, 10)])
+        self.assertEqual(merged, [(1, 7), (9, 10)])
+
+    def test_setup_and_cleanup_block_neighbouring_days(self):
+        """Test setup before midnight makes the previous day busy"""
+        # 01:00-05:00 on the 10th with 2h setup starts at 23:00 on the 9th
+        self.book(local(2030, 3, 10, 1), local(2030, 3, 10, 5), setup=2, cleanup=1)
+        days = {day['date']: day for day in availability.month_view(self.venue, 2030, 3)}
+        self.assertFalse(days[date(2030, 3, 9)]['available'])
+        self.assertEqual(days[date(2030, 3, 9)]['busy_hours'], 1)
+        self.assertEqual(days[date(2030, 3, 10)]['busy_hours'], 6)
+        self.assertTrue(days[date(2030, 3, 11)]['available'])
+
+    def test_longest_turnaround_is_found(self):
+        """Test cleanup of the longest allowed length still reaches a later window"""
+        limit = VenueBooking.MAX_TURNAROUND_HOURS
+        self.assertEqual(availability.MAX_TURNAROUND, timedelta(hours=limit))
+        booking = self.book(local(2030, 3, 5, 10), local(2030, 3, 5, 12), setup=0, cleanup=limit)
+        start = local(2030, 3, 5, 12) + timedelta(hours=limit - 1)
+        intervals = availability.occupied_intervals(self.venue, start, start + timedelta(hours=1))
+        self.assertEqual([interval[2] for interval in intervals], [booking])
+
+    def test_multi_day_booking(self):
+        """Test a booking spanning several days blocks each of them"""
+        self.book(local(2030, 3, 14, 12), local(2030, 3, 17, 12), setup=0, cleanup=0)
+        days = availability.day_calendar(self.venue, date(2030, 3, 13), date(2030, 3, 18))
+        self.assertEqual([day['available'] for day in days], [True, False, False, False, False, True])
+        self.assertEqual(days[2]['busy_hours'], 24)
+
+    def test_overlapping_bookings_are_not_double_counted(self):
+        """Test busy hours come from merged intervals while counts are per booking"""
+        self.book(local(2030, 3, 20, 10), local(2030, 3, 20, 14), setup=0, cleanup=0)
+        # Overlaps are refused on save; update() simulates rows from before that check
+        second = self.book(local(2030, 3, 21, 12), local(2030, 3, 21, 16), setup=0, cleanup=0)
+        VenueBooking.objects.filter(pk=second.pk).update(
+            start_datetime=local(2030, 3, 20, 12), end_datetime=local(2030, 3, 20, 16)
+        )
+        self.book(local(2030, 3, 20, 18), local(2030, 3, 20, 19), setup=0, cleanup=0, status='cancelled')
+        day = availability.day_calendar(self.venue, date(2030, 3, 20), date(2030, 3, 20))[0]
+        self.assertEqual(day['bookings_count'], 2)
+        self.assertEqual(day['busy_hours'], 6)
+
+    def test_calendar_is_one_query(self):
+        """Test any window costs a single query"""
+        for day in range(1, 28, 3):
+            self.book(local(2030, 3, day, 10), local(2030, 3, day, 12))
+        with self.assertNumQueries(1):
+            availability.month_view(self.venue, 2030, 3)
+        with self.assertNumQueries(1):
+            months = availability.year_view(self.venue, 2030)
+        self.assertEqual(months[2]['booked_days'], 9)
+        self.assertEqual(months[3]['booked_days'], 0)
+
+    def test_revenue_is_aggregated(self):
+        """Test revenue is summed in the database"""
+        self.book(local(2030, 3, 1, 10), local(2030, 3, 1, 12), setup=1, cleanup=1)
+        self.book(local(2030, 3, 2, 10), local(2030, 3, 2, 11), setup=0, cleanup=0)
+        with self.assertNumQueries(1):
+            stats = availability.venue_stats(self.venue)
+        self.assertEqual(stats['total_bookings'], 2)
+        self.assertEqual(stats['total_revenue'], Decimal('500.00'))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class AvailabilityViewTest(AvailabilityTestMixin, TestCase):
+    """Test the venue page and the JSON calendar"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_venue_detail_calendar(self):
+        """Test the venue page shows 30 days and the aggregated revenue"""
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        start = timezone.make_aware(datetime.combine(tomorrow, datetime.min.time())) + timedelta(hours=12)
+        self.book(start, start + timedelta(hours=2), setup=0, cleanup=0)
+        response = self.client.get(reverse('events:venue_detail', args=[self.venue.id]))
+        self.assertEqual(response.status_code, 200)
+        calendar = response.context['availability_calendar']
+        self.assertEqual(len(calendar), 30)
+        self.assertFalse(calendar[1]['available'])
+        self.assertEqual(response.context['total_revenue'], Decimal('200.00'))
+
+    def test_json_month(self):
+        """Test the JSON endpoint returns a month of days"""
+        self.book(local(2030, 2, 10, 10), local(2030, 2, 10, 12))
+        response = self.client.get(reverse('events:venue_availability', args=[self.venue.id]), {'month': '2030-02'})
+        data = response.json()
+        self.assertEqual(len(data['days']), 28)
+        self.assertEqual(data['days'][9], {'date': '2030-02-10', 'available': False, 'bookings_count': 1, 'busy_hours': 5.0})
+
+    def test_json_year(self):
+        """Test the JSON endpoint summarises a year by month"""
+        response = self.client.get(reverse('events:venue_availability', args=[self.venue.id]), {'year': '2030'})
+        self.assertEqual(len(response.json()['months']), 12)
+
+    def test_json_rejects_bad_windows(self):
+        """Test invalid dates and oversized windows are refused"""
+        url = reverse('events:venue_availability', args=[self.venue.id])
+        self.assertEqual(self.client.get(url, {'month': 'soon'}).status_code, 400)
+        for edge in ({'year': '9999'}, {'month': '9999-12'}, {'month': '0001-01'}, {'start': '9999-12-31'}):
+            self.assertEqual(self.client.get(url, edge).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2030-01-01', 'end': '2032-01-01'}).status_code, 400)
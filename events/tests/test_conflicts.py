@@ -0,0 +1,234 @@
+# events/tests/test_conflicts.py
+
+import random
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import date, datetime
+from decimal import Decimal
+from events.models import Category, Event, Venue, VenueBooking, Resource, ResourceAllocation
+from events.conflicts import (
+    BookingConflict, IntervalTree, find_resource_overloads, find_venue_conflicts, peak_usage,
+)
+
+
+def local(day, hour):
+    return timezone.make_aware(datetime(2030, 5, day, hour))
+
+
+class IntervalTreeTest(TestCase):
+    """Test the interval tree against a brute-force scan"""
+
+    def test_matches_brute_force(self):
+        """Test random queries return exactly the overlapping intervals"""
+        rng = random.Random(7)
+        intervals = []
+        for i in range(2000):
+            start = rng.randint(0, 10000)
+            intervals.append((start, start + rng.randint(1, 50), i))
+        tree = IntervalTree(intervals)
+        for _ in range(300):
+            start = rng.randint(-10, 10010)
+            end = start + rng.randint(1, 80)
+            expected = {i for s, e, i in intervals if s < end and start < e}
+            self.assertEqual({i for _, _, i in tree.overlapping(start, end)}, expected)
+
+    def test_touching_intervals_do_not_overlap(self):
+        """Test half-open intervals that only touch are not reported"""
+        tree = IntervalTree([(0, 5, 'a'), (5, 10, 'b'), (5, 5, 'empty')])
+        self.assertEqual([payload for _, _, payload in tree.overlapping(5, 6)], ['b'])
+        self.assertEqual(tree.overlapping(10, 20), [])
+
+
+class ConflictTestMixin:
+    """A venue and a resource"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Music")
+        self.venue = Venue.objects.create(name="Arena", address="Lusaka", capacity=500, hourly_rate=Decimal('100'))
+        self.resource = Resource.objects.create(
+            name="Speakers", resource_type='sound', cost_per_day=Decimal('50'), quantity_available=5
+        )
+
+    def event(self):
+        return Event.objects.create(
+            title=f"Event {Event.objects.count()}", description="Test", date=date(2030, 5, 1), category=self.category
+        )
+
+    def venue_booking(self, start, end, setup=1, cleanup=1, status='confirmed', save=True):
+        booking = VenueBooking(
+            event=self.event(), venue=self.venue, start_datetime=start, end_datetime=end,
+            setup_hours=setup, cleanup_hours=cleanup, status=status,
+        )
+        if save:
+            booking.save()
+        return booking
+
+    def allocation(self, first_day, last_day, quantity, status='confirmed', save=True):
+        allocation = ResourceAllocation(
+            event=self.event(), resource=self.resource, quantity_needed=quantity,
+            start_date=date(2030, 5, first_day), end_date=date(2030, 5, last_day), status=status,
+        )
+        if save:
+            allocation.save()
+        return allocation
+
+
+class VenueConflictTest(ConflictTestMixin, TestCase):
+    """Test venue double-booking detection"""
+
+    def test_overlap_is_rejected_on_save(self):
+        """Test saving an overlapping booking raises"""
+        self.venue_booking(local(10, 12), local(10, 16))
+        with self.assertRaises(BookingConflict) as raised:
+            self.venue_booking(local(10, 15), local(10, 18))
+        self.assertEqual(len(raised.exception.conflicts), 1)
+        self.assertEqual(VenueBooking.objects.count(), 1)
+
+    def test_turnaround_counts(self):
+        """Test cleanup of one booking clashes with setup of the next"""
+        self.venue_booking(local(10, 12), local(10, 16), cleanup=2)  # busy until 18:00
+        with self.assertRaises(BookingConflict):
+            self.venue_booking(local(10, 19), local(10, 21), setup=2)  # busy from 17:00
+        self.venue_booking(local(10, 20), local(10, 22), setup=2)  # from 18:00: fine
+
+    def test_turnaround_is_bounded(self):
+        """Test setup/cleanup beyond the range-query padding cannot be saved"""
+        limit = VenueBooking.MAX_TURNAROUND_HOURS
+        with self.assertRaises(ValidationError) as raised:
+            self.venue_booking(local(10, 12), local(10, 16), cleanup=limit + 1)
+        self.assertIn('cleanup_hours', raised.exception.message_dict)
+        with self.assertRaises(ValidationError):
+            self.venue_booking(local(10, 12), local(10, 16), setup=-1)
+        self.assertEqual(VenueBooking.objects.count(), 0)
+
+        # The longest allowed turnaround is still found by the padded re-check
+        self.venue_booking(local(10, 12), local(10, 16), cleanup=limit)
+        with self.assertRaises(BookingConflict):
+            self.venue_booking(local(13, 12), local(13, 14), setup=0)
+
+    def test_cancelled_and_pending_rules(self):
+        """Test cancelled bookings neither block nor are blocked"""
+        self.venue_booking(local(11, 12), local(11, 16), status='cancelled')
+        self.venue_booking(local(11, 12), local(11, 16), status='pending')
+        self.venue_booking(local(11, 13), local(11, 15), status='cancelled')
+        with self.assertRaises(BookingConflict):
+            self.venue_booking(local(11, 13), local(11, 15), status='confirmed')
+
+    def test_editing_a_booking_does_not_clash_with_itself(self):
+        """Test re-saving a booking only compares it with others"""
+        booking = self.venue_booking(local(12, 12), local(12, 16))
+        booking.end_datetime = local(12, 17)
+        booking.save()
+
+    def test_clean_reports_validation_error(self):
+        """Test full_clean surfaces conflicts and bad ranges as validation errors"""
+        self.venue_booking(local(13, 12), local(13, 16))
+        with self.assertRaises(ValidationError):
+            self.venue_booking(local(13, 14), local(13, 15), save=False).full_clean(exclude=['total_cost'])
+        with self.assertRaises(ValidationError) as raised:
+            self.venue_booking(local(14, 15), local(14, 14), save=False).full_clean(exclude=['total_cost'])
+        self.assertIn('end_datetime', raised.exception.message_dict)
+
+    def test_batch_conflicts(self):
+        """Test a season batch is checked against stored bookings and itself in one query"""
+        self.venue_booking(local(20, 12), local(20, 16))
+        batch = [
+            self.venue_booking(local(20, 14), local(20, 15), save=False),  # clashes with stored
+            self.venue_booking(local(21, 12), local(21, 16), save=False),
+            self.venue_booking(local(21, 15), local(21, 18), save=False),  # clashes with the previous
+            self.venue_booking(local(22, 12), local(22, 16), save=False),
+        ]
+        with self.assertNumQueries(1):
+            conflicts = find_venue_conflicts(batch)
+        pairs = {(conflict.item.start_datetime, conflict.other.start_datetime) for conflict in conflicts}
+        self.assertEqual(pairs, {(local(20, 14), local(20, 12)), (local(21, 12), local(21, 15))})
+
+
+class ResourceConflictTest(ConflictTestMixin, TestCase):
+    """Test resource over-allocation detection"""
+
+    def test_peak_usage_sweep(self):
+        """Test the sweep-line finds the busiest day"""
+        rows = [
+            (date(2030, 5, 1), date(2030, 5, 3), 2),
+            (date(2030, 5, 3), date(2030, 5, 5), 2),
+            (date(2030, 5, 6), date(2030, 5, 6), 3),
+        ]
+        self.assertEqual(peak_usage(rows), (4, date(2030, 5, 3)))
+        self.assertEqual(peak_usage([]), (0, None))
+
+    def test_over_allocation_is_rejected(self):
+        """Test allocations beyond stock on an overlapping day are refused"""
+        self.allocation(1, 3, 2)
+        self.allocation(3, 5, 2)
+        self.allocation(4, 6, 1)  # 3 in use on the 4th and 5th
+        with self.assertRaises(BookingConflict) as raised:
+            self.allocation(3, 3, 2)  # day 3 already has 4 of 5
+        self.assertIn('Only 1 of 5', str(raised.exception))
+        self.allocation(3, 3, 1)
+        self.allocation(6, 8, 4)  # day 6 has 1 in use
+
+    def test_over_allocation_without_overlap(self):
+        """Test a request bigger than the whole stock is refused when nothing else is booked"""
+        with self.assertRaises(BookingConflict) as raised:
+            self.allocation(2, 4, 10)
+        self.assertIn('Only 5 of 5', str(raised.exception))
+        self.assertIn('May 02, 2030', str(raised.exception))
+
+    def test_returned_allocations_free_stock(self):
+        """Test returned and cancelled allocations no longer count"""
+        self.allocation(1, 5, 5, status='returned')
+        self.allocation(1, 5, 5)
+
+    def test_batch_overloads(self):
+        """Test batch checks report over-allocated stretches"""
+        self.allocation(1, 10, 3)
+        batch = [self.allocation(5, 6, 2, save=False), self.allocation(6, 7, 1, save=False)]
+        overloads = find_resource_overloads(batch)
+        self.assertEqual(len(overloads), 1)
+        self.assertEqual((overloads[0].first_day, overloads[0].last_day, overloads[0].in_use), (date(2030, 5, 6), date(2030, 5, 6), 6))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ConflictAdminTest(ConflictTestMixin, TestCase):
+    """Test conflicts surface in the admin"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_add_form_shows_conflict(self):
+        """Test the admin add form refuses an overlapping booking"""
+        self.venue_booking(local(10, 12), local(10, 16))
+        response = self.client.post(reverse('admin:events_venuebooking_add'), {
+            'event': self.event().pk,
+            'venue': self.venue.pk,
+            'status': 'pending',
+            'start_datetime_0': '2030-05-10',
+            'start_datetime_1': '13:00:00',
+            'end_datetime_0': '2030-05-10',
+            'end_datetime_1': '15:00:00',
+            'setup_hours': 1,
+            'cleanup_hours': 1,
+            'notes': '',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'already booked')
+        self.assertEqual(VenueBooking.objects.count(), 1)
+
+    def test_check_action(self):
+        """Test the check action reports stored overlaps"""
+        first = self.venue_booking(local(10, 12), local(10, 16))
+        second = self.venue_booking(local(11, 12), local(11, 16))
+        # Written around save() to simulate data from before the check existed
+        VenueBooking.objects.filter(pk=second.pk).update(start_datetime=local(10, 14))
+        response = self.client.post(reverse('admin:events_venuebooking_changelist'), {
+            'action': 'check_conflicts',
+            '_selected_action': [first.pk, second.pk],
+        }, follow=True)
+        self.assertContains(response, 'overlaps')
@@ -0,0 +1,120 @@
+# events/tests/test_dashboard.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import caches
+from datetime import date, timedelta
+from unittest.mock import patch
+from events.models import Category, Event, Booking, PaymentTransaction
+from events import dashboard
+
+
+class DashboardMetricsTest(TestCase):
+    """Test the cached dashboard metrics"""
+
+    def setUp(self):
+        dashboard.counter_cache().clear()
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass123')
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Concert",
+            description="Live music",
+            date=date.today() + timedelta(days=30),
+            location="Lusaka",
+            category=self.category,
+            vip_seats_left=10
+        )
+
+    def make_payment(self, status='pending'):
+        booking = Booking.objects.create(user=self.user, event=self.event, ticket_type='vip', tickets=1)
+        return PaymentTransaction.objects.create(
+            booking=booking, payment_method='mtn', amount=booking.total_price, status=status
+        )
+
+    def test_metrics_match_source_tables(self):
+        """Test computed metrics match the data"""
+        self.make_payment('completed')
+        self.make_payment('pending')
+        metrics = dashboard.get_metrics()
+        self.assertEqual(metrics['total_revenue'], 1500)
+        self.assertEqual(metrics['total_bookings'], 2)
+        self.assertEqual(metrics['pending_payments'], 1)
+        self.assertEqual(metrics['completed_payments'], 1)
+        self.assertEqual(metrics['upcoming_events'], 1)
+        self.assertEqual(metrics['popular_events'][0]['category']['name'], "Music")
+
+    def test_counters_are_updated_incrementally(self):
+        """Test signals keep cached counters current without recomputing"""
+        dashboard.get_metrics()
+        with patch('events.dashboard.compute_counters') as compute:
+            with self.captureOnCommitCallbacks(execute=True):
+                payment = self.make_payment('pending')
+            with self.captureOnCommitCallbacks(execute=True):
+                payment.status = 'completed'
+                payment.save()
+            metrics = dashboard.get_metrics()
+            compute.assert_not_called()
+        self.assertEqual(metrics['total_bookings'], 1)
+        self.assertEqual(metrics['pending_payments'], 0)
+        self.assertEqual(metrics['completed_payments'], 1)
+        self.assertEqual(metrics['total_revenue'], 1500)
+
+    def test_increments_keep_the_reconcile_deadline(self):
+        """Test a bump re-sets the counter with the time left until reconcile, not the cache default"""
+        dashboard.reconcile()
+        cache = dashboard.counter_cache()
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            with self.captureOnCommitCallbacks(execute=True):
+                dashboard.bump('total_users')
+        (key, value, timeout), _ = cache_set.call_args
+        self.assertEqual((key, value), ('dashboard:total_users', 2))
+        self.assertGreater(timeout, settings.DASHBOARD_RECONCILE_INTERVAL - 60)
+        self.assertLessEqual(timeout, settings.DASHBOARD_RECONCILE_INTERVAL)
+
+    def test_counters_live_in_the_shared_cache(self):
+        """Test counters go to the alias the job worker and web workers share, not the per-process default"""
+        self.make_payment('pending')
+        dashboard.get_metrics()
+        self.assertEqual(caches['shared'].get('dashboard:pending_payments'), 1)
+        self.assertIsNone(caches['default'].get('dashboard:pending_payments'))
+        # A payment another process moved to pending
+        caches['shared'].incr('dashboard:pending_payments')
+        self.assertEqual(dashboard.get_metrics()['pending_payments'], 2)
+
+    def test_reconcile_corrects_drift(self):
+        """Test reconcile recomputes counters changed outside the signals"""
+        dashboard.get_metrics()
+        payment = self.make_payment('pending')
+        PaymentTransaction.objects.filter(pk=payment.pk).update(status='completed')
+        dashboard.reconcile()
+        metrics = dashboard.get_metrics()
+        self.assertEqual(metrics['completed_payments'], 1)
+        self.assertEqual(metrics['total_revenue'], 1500)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class DashboardAdminTest(TestCase):
+    """Test the dashboard only runs on the admin index"""
+
+    def setUp(self):
+        dashboard.counter_cache().clear()
+        User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        self.client = Client()
+        self.client.login(username='boss', password='pass123')
+
+    def test_index_shows_metrics(self):
+        """Test the admin index renders the metrics"""
+        with patch('events.dashboard.get_metrics', wraps=dashboard.get_metrics) as get_metrics:
+            response = self.client.get(reverse('admin:index'))
+        self.assertEqual(response.status_code, 200)
+        get_metrics.assert_called_once()
+        self.assertEqual(response.context['total_bookings'], 0)
+
+    def test_other_admin_pages_skip_metrics(self):
+        """Test change lists do not compute dashboard metrics"""
+        with patch('events.dashboard.get_metrics') as get_metrics:
+            response = self.client.get(reverse('admin:events_booking_changelist'))
+        self.assertEqual(response.status_code, 200)
+        get_metrics.assert_not_called()
@@ -0,0 +1,97 @@
+# events/tests/test_datagen.py
+
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase
+from unittest.mock import patch
+from events import datagen, sales
+from events.conflicts import find_resource_overloads, find_venue_conflicts
+from events.models import Booking, Event, EventSalesSummary, PaymentTransaction, ResourceAllocation, RevenueDaily, VenueBooking
+
+ANCHOR = date(2026, 3, 1)
+
+
+def fingerprint():
+    """Everything about the generated bookings except primary keys and transaction ids"""
+    return sorted(
+        Booking.objects.values_list(
+            'user__username', 'event__title', 'ticket_type', 'tickets', 'booked_at', 'payment__status',
+            'payment__payment_method', 'payment__amount',
+        )
+    )
+
+
+class GenerateDatasetTest(TestCase):
+    """Test the synthetic dataset generator"""
+
+    def generate(self, scale=0.2, **options):
+        call_command('generate_dataset', scale=scale, seed=7, anchor=ANCHOR, stdout=StringIO(), **options)
+
+    def test_sizes_and_consistency(self):
+        """Test the dataset has the requested size and never oversells or double-books"""
+        self.generate()
+        size = datagen.sizes(0.2)
+        self.assertEqual(User.objects.filter(email__endswith=datagen.DOMAIN).count(), size.users)
+        self.assertEqual(Event.objects.count(), size.events)
+        self.assertAlmostEqual(Booking.objects.count(), size.bookings, delta=size.events)
+        self.assertEqual(PaymentTransaction.objects.count(), Booking.objects.count())
+
+        user = User.objects.get(username=datagen._username(0))
+        self.assertTrue(user.check_password(datagen.PASSWORD))
+        self.assertEqual(user.profile.created_at, user.date_joined)
+
+        for event in Event.objects.all():
+            self.assertGreaterEqual(min(event.vip_seats_left, event.gold_seats_left, event.standard_seats_left), 0)
+        self.assertEqual(find_venue_conflicts(list(VenueBooking.objects.all())), [])
+        self.assertEqual(find_resource_overloads(list(ResourceAllocation.objects.all())), [])
+
+        # Historical timestamps survive bulk_create; nothing is booked after the anchor date
+        latest = Booking.objects.latest('booked_at').booked_at
+        self.assertLess(latest.date(), date(2026, 3, 2))
+        self.assertLess(Booking.objects.earliest('booked_at').booked_at.year, 2026)
+
+    def test_distributions(self):
+        """Test popularity is skewed and the payment mix is mostly completed"""
+        self.generate(scale=1)
+        per_event = sorted(
+            Booking.objects.values('event').annotate(n=Sum('tickets')).values_list('n', flat=True), reverse=True
+        )
+        self.assertGreater(per_event[0], 3 * per_event[len(per_event) // 2])
+        completed = PaymentTransaction.objects.filter(status='completed').count()
+        self.assertGreater(completed / PaymentTransaction.objects.count(), 0.7)
+        self.assertTrue(PaymentTransaction.objects.filter(status='failed').exists())
+
+    def test_deterministic(self):
+        """Test the same seed and anchor give the same rows, and --clear replaces the dataset"""
+        self.generate()
+        first = fingerprint()
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.generate(clear=True)
+        self.assertEqual(fingerprint(), first)
+        self.assertEqual(Event.objects.count(), datagen.sizes(0.2).events)
+
+    def test_clear_skips_the_per_row_receivers(self):
+        """Test clearing deletes payments and bookings in bulk and leaves the derived tables consistent"""
+        self.generate()
+        with patch('events.sales.payment_deleted') as payment_deleted, patch('events.sales.booking_deleted') as booking_deleted:
+            datagen.clear()
+        payment_deleted.assert_not_called()
+        booking_deleted.assert_not_called()
+        self.assertFalse(Booking.objects.exists() or PaymentTransaction.objects.exists() or Event.objects.exists())
+        self.assertFalse(EventSalesSummary.objects.exists() or RevenueDaily.objects.exists())
+        self.assertEqual(sales.verify(), [])
+
+    def test_plan_does_not_depend_on_the_shard_size(self):
+        """Test sharding only groups the plan, so any number of workers writes the same events"""
+        plans = datagen.plan_events(1, 3, ANCHOR, range(3), [(5, 100)] * 8)
+        self.assertEqual(plans, datagen.plan_events(1, 3, ANCHOR, range(3), [(5, 100)] * 8))
+        shards = datagen.shard_events(plans)
+        self.assertEqual([plan for shard in shards for plan in shard], plans)
+        self.assertTrue(all(sum(plan.bookings for plan in shard) <= datagen.BOOKINGS_PER_SHARD or len(shard) == 1
+                            for shard in shards))
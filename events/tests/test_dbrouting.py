@@ -0,0 +1,170 @@
+# events/tests/test_dbrouting.py
+
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
+from django.test import Client, RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from events import dbrouting, modelcache
+from events.models import Category, Event
+
+REPLICA = 'replica_0'
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_REPLICA_HEALTH_INTERVAL=60,
+)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Test reads are sent to a healthy replica only when that is safe"""
+
+    def setUp(self):
+        # The "replica" shares the primary's connection, so it always has the same rows
+        connections.settings[REPLICA] = connections.settings['default']
+        setattr(connections._connections, REPLICA, connections['default'])
+        self.addCleanup(self.remove_replica)
+        dbrouting.reset_health()
+        self.addCleanup(dbrouting.reset_health)
+        category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka", date=date.today() + timedelta(days=5),
+            category=category, vip_seats_left=10,
+        )
+
+    def remove_replica(self):
+        delattr(connections._connections, REPLICA)
+        del connections.settings[REPLICA]
+
+    def routed(self):
+        """Wrap the router so the test can see where each read went"""
+        seen = []
+        original = dbrouting.ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            alias = original(router, model, **hints)
+            seen.append(alias)
+            return alias
+        return seen, mock.patch.object(dbrouting.ReplicaRouter, 'db_for_read', spy)
+
+    def test_only_reads_inside_replica_reads_use_the_replica(self):
+        """Test the router opts in per block and never sends writes to a replica"""
+        self.assertEqual(Event.objects.all().db, 'default')
+        with dbrouting.replica_reads() as alias:
+            self.assertEqual(alias, REPLICA)
+            self.assertEqual(Event.objects.all().db, REPLICA)
+            event = Event.objects.get()
+            self.assertEqual(event._state.db, REPLICA)
+            self.assertEqual(event.category._state.db, REPLICA)
+            category = Category.objects.create(name="Sports")
+            self.assertEqual(category._state.db, 'default')
+            with transaction.atomic():
+                self.assertEqual(Event.objects.all().db, 'default')
+        self.assertEqual(Event.objects.all().db, 'default')
+        with self.settings(DATABASE_REPLICAS=[]), dbrouting.replica_reads() as alias:
+            self.assertIsNone(alias)
+
+    def test_unhealthy_replicas_are_skipped(self):
+        """Test failed checks and failed queries send reads to the primary until the next check"""
+        with mock.patch.object(dbrouting, 'check', return_value=(False, 'down')) as check:
+            with dbrouting.replica_reads() as alias:
+                self.assertIsNone(alias)
+                self.assertEqual(Event.objects.all().db, 'default')
+            with dbrouting.replica_reads():
+                pass
+            # The result is cached for DATABASE_REPLICA_HEALTH_INTERVAL
+            self.assertEqual(check.call_count, 1)
+
+        dbrouting.reset_health()
+        with dbrouting.replica_reads() as alias:
+            self.assertEqual(alias, REPLICA)
+            with self.assertRaises(DatabaseError), connections[REPLICA].cursor() as cursor:
+                cursor.execute('SELECT * FROM no_such_table')
+        with dbrouting.replica_reads() as alias:
+            self.assertIsNone(alias)
+
+        with self.settings(DATABASE_REPLICA_HEALTH_INTERVAL=0), dbrouting.replica_reads() as alias:
+            self.assertEqual(alias, REPLICA)
+
+    def test_lagging_replica_is_unhealthy(self):
+        """Test a replica further behind than DATABASE_REPLICA_MAX_LAG fails its check"""
+        with mock.patch.object(dbrouting, 'replica_lag', return_value=30.0):
+            self.assertEqual(dbrouting.check(REPLICA), (False, '30.0s behind'))
+        self.assertEqual(dbrouting.check(REPLICA), (True, '0.0s behind'))
+
+    def test_read_your_writes(self):
+        """Test a request that wrote stays on the primary and stamps the session"""
+        seen, patched = self.routed()
+
+        def writes(request):
+            Category.objects.create(name="Sports")
+            with dbrouting.replica_reads(request):
+                Event.objects.count()
+            return 'written'
+
+        def reads(request):
+            with dbrouting.replica_reads(request):
+                Event.objects.count()
+            return 'read'
+
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        with patched:
+            dbrouting.ReplicaRoutingMiddleware(reads)(request)
+            self.assertEqual(seen, [REPLICA])
+            self.assertNotIn(dbrouting.STICKY_SESSION_KEY, request.session)
+
+            dbrouting.ReplicaRoutingMiddleware(writes)(request)
+            self.assertEqual(seen[-1], None)
+            self.assertTrue(dbrouting.is_sticky(request))
+
+            # Later requests from the same visitor read from the primary until the window passes
+            dbrouting.ReplicaRoutingMiddleware(reads)(request)
+            self.assertEqual(seen[-1], None)
+            request.session[dbrouting.STICKY_SESSION_KEY] = time.time() - 60
+            dbrouting.ReplicaRoutingMiddleware(reads)(request)
+            self.assertEqual(seen[-1], REPLICA)
+
+    def test_read_only_views(self):
+        """Test listing pages and the facilities dashboard read from the replica, except after a write"""
+        seen, patched = self.routed()
+        with patched:
+            self.assertEqual(Client().get(reverse('events:events_list')).status_code, 200)
+        self.assertIn(REPLICA, seen)
+
+        User.objects.create_user(username='staff', password='pass12345', is_staff=True)
+        client = Client()
+        seen.clear()
+        with patched:
+            client.post(reverse('events:login'), {'username': 'staff', 'password': 'pass12345'})
+            self.assertEqual(client.get(reverse('events:facilities_dashboard')).status_code, 200)
+        self.assertNotIn(REPLICA, seen)
+
+        session = client.session
+        session[dbrouting.STICKY_SESSION_KEY] = time.time() - 60
+        session.save()
+        seen.clear()
+        with patched:
+            self.assertEqual(client.get(reverse('events:facilities_dashboard')).status_code, 200)
+        self.assertIn(REPLICA, seen)
+
+    @override_settings(PAGE_CACHE_ENABLED=True, MODEL_CACHE_ENABLED=True)
+    def test_cache_fills_read_the_primary(self):
+        """Test pages and rows stored in the shared caches are never read from a replica"""
+        caches['pages'].clear()
+        modelcache.shared_cache().clear()
+        modelcache.local_cache.clear()
+        seen, patched = self.routed()
+        with patched:
+            response = Client().get(reverse('events:events_list'))
+            self.assertEqual(response['X-Page-Cache'], 'miss')
+            with dbrouting.replica_reads():
+                modelcache.get_cached(Event, self.event.pk)
+                Category.objects.count()
+        self.assertEqual([alias for alias in seen if alias == REPLICA], [REPLICA])
+        self.assertEqual(seen[-1], REPLICA)
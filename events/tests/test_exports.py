@@ -0,0 +1,148 @@
+# events/tests/test_exports.py
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from datetime import date, timedelta
+from events.models import Category, Event, Booking, PaymentTransaction, OutboundEmail, Job
+from events import exports, jobs
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content)
+
+
+class ExportTestMixin:
+    """Seed two events with paid bookings"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass123')
+        category = Category.objects.create(name="Music")
+        self.events = [
+            Event.objects.create(
+                title=f"Concert {i}",
+                description="Live music",
+                date=date.today() + timedelta(days=30 + i),
+                location="Lusaka",
+                category=category,
+                vip_seats_left=100,
+            )
+            for i in range(2)
+        ]
+        for i in range(30):
+            booking = Booking.objects.create(user=self.user, event=self.events[i % 2], ticket_type='vip', tickets=1)
+            PaymentTransaction.objects.create(
+                booking=booking, payment_method='airtel', amount=booking.total_price, phone_number='0970000000'
+            )
+
+
+class StreamingExportTest(ExportTestMixin, TestCase):
+    """Test the streamed CSV/NDJSON exports"""
+
+    def test_transactions_csv(self):
+        """Test transactions stream as CSV with display values"""
+        response = exports.stream_export('transactions', PaymentTransaction.objects.all())
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = list(csv.DictReader(io.StringIO(read_stream(response).decode())))
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[0]['User'], 'fan')
+        self.assertEqual(rows[0]['Method'], 'Airtel Money')
+        self.assertEqual(rows[0]['Event'], 'Concert 0')
+
+    def test_transactions_query_count_is_constant(self):
+        """Test the export joins users and events instead of loading them per row"""
+        response = exports.stream_export('transactions', PaymentTransaction.objects.all())
+        with self.assertNumQueries(1):
+            read_stream(response)
+
+    def test_gzip_matches_plain(self):
+        """Test the gzip stream decompresses to the same CSV"""
+        plain = read_stream(exports.stream_export('transactions', PaymentTransaction.objects.all()))
+        response = exports.stream_export('transactions', PaymentTransaction.objects.all(), compress=True)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        self.assertEqual(gzip.decompress(read_stream(response)), plain)
+
+    def test_events_ndjson_totals(self):
+        """Test event rows carry booking totals from the sales summary"""
+        for payment in PaymentTransaction.objects.filter(booking__event=self.events[0]).order_by('id')[:4]:
+            payment.status = 'completed'
+            payment.save()
+        response = exports.stream_export('events', Event.objects.all(), 'ndjson')
+        with self.assertNumQueries(1):
+            lines = read_stream(response).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['Total Bookings'] for row in rows], [15, 15])
+        self.assertEqual([row['Tickets Sold'] for row in rows], [4, 0])
+        self.assertEqual([row['Tickets Pending'] for row in rows], [11, 15])
+        self.assertEqual(rows[0]['Revenue'], 4 * 1500)
+        self.assertEqual(rows[1]['Revenue'], 0)
+
+    def test_unknown_format(self):
+        """Test unsupported formats are refused"""
+        with self.assertRaises(ValueError):
+            list(exports.export_chunks('events', Event.objects.all(), 'xml'))
+
+
+class BackgroundExportTest(ExportTestMixin, TestCase):
+    """Test exports written by the job worker"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def test_job_writes_file_and_emails_link(self):
+        """Test the export job writes a gzip file under MEDIA_ROOT and queues the link"""
+        with override_settings(MEDIA_ROOT=self.media_root):
+            job = exports.queue_export('transactions', PaymentTransaction.objects.all(), requested_by=self.user)
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.result['rows'], 30)
+        path = job.result['path']
+        self.assertTrue(path.startswith(os.path.join(self.media_root, 'exports')))
+        with gzip.open(path, 'rt') as handle:
+            self.assertEqual(len(list(csv.DictReader(handle))), 30)
+        self.assertFalse(os.path.exists(path + '.part'))
+        email = OutboundEmail.objects.get(to_email='fan@example.com')
+        self.assertIn(job.result['url'], email.body)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ExportAdminTest(ExportTestMixin, TestCase):
+    """Test the admin export actions"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_export_action_streams(self):
+        """Test the CSV action returns a streamed download"""
+        ids = PaymentTransaction.objects.values_list('pk', flat=True)
+        response = self.client.post(reverse('admin:events_paymenttransaction_changelist'), {
+            'action': 'export_transactions',
+            '_selected_action': [str(pk) for pk in ids],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(read_stream(response).decode().splitlines()), 31)
+
+    def test_background_action_queues_job(self):
+        """Test the background action queues an export job"""
+        response = self.client.post(reverse('admin:events_paymenttransaction_changelist'), {
+            'action': 'export_transactions_background',
+            '_selected_action': [str(pk) for pk in PaymentTransaction.objects.values_list('pk', flat=True)],
+        })
+        self.assertEqual(response.status_code, 302)
+        job = Job.objects.get(kind='exports.write')
+        self.assertEqual(len(job.payload['ids']), 30)
@@ -0,0 +1,129 @@
+# events/tests/test_facilities.py
+
+from django.test import TestCase, Client, override_settings
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from events.models import Category, Event, Venue, VenueBooking, Resource, ResourceAllocation
+from events import facilities
+
+
+class FacilitiesMetricsTest(TestCase):
+    """Test the grouped facilities snapshot"""
+
+    def setUp(self):
+        facilities.snapshot_cache().clear()
+        self.category = Category.objects.create(name="Music")
+        self.today = timezone.localdate()
+        self.venues = [
+            Venue.objects.create(name=f"Venue {i}", address="Lusaka", capacity=100 * (i + 1), hourly_rate=Decimal('100'))
+            for i in range(3)
+        ]
+        self.speakers = Resource.objects.create(name="Speakers", resource_type='sound', cost_per_day=10, quantity_available=8)
+        Resource.objects.create(name="Mixer", resource_type='sound', cost_per_day=10, quantity_available=2)
+        Resource.objects.create(name="Lights", resource_type='lighting', cost_per_day=10, quantity_available=4)
+
+    def event(self):
+        return Event.objects.create(
+            title=f"Event {Event.objects.count()}", description="Test", date=self.today, category=self.category
+        )
+
+    def allocate(self, quantity, status='confirmed'):
+        return ResourceAllocation.objects.create(
+            event=self.event(), resource=self.speakers, quantity_needed=quantity,
+            start_date=self.today, end_date=self.today, status=status,
+        )
+
+    def book_today(self, venue, hour, status='confirmed'):
+        start = timezone.make_aware(datetime.combine(self.today, time(hour)))
+        return VenueBooking.objects.create(
+            event=self.event(), venue=venue, start_datetime=start, end_datetime=start + timedelta(hours=1),
+            setup_hours=0, cleanup_hours=0, status=status,
+        )
+
+    def test_utilization_counts_units(self):
+        """Test utilization is allocated quantity against stock, not a row count"""
+        self.allocate(3)
+        self.allocate(2)
+        self.allocate(3, status='requested')
+        snapshot = facilities.compute_snapshot()
+        sound = next(row for row in snapshot['resource_utilization'] if row['type'] == 'sound')
+        self.assertEqual((sound['resources'], sound['total'], sound['allocated']), (2, 10, 5))
+        self.assertEqual(sound['utilization_rate'], 50)
+        self.assertEqual(snapshot['total_resources'], 3)
+        self.assertEqual(snapshot['resource_allocations_today'], 2)
+
+    def test_venue_figures(self):
+        """Test today's and this month's venue bookings are grouped per venue"""
+        self.book_today(self.venues[0], 10)
+        self.book_today(self.venues[0], 14, status='pending')
+        self.book_today(self.venues[2], 10, status='cancelled')
+        snapshot = facilities.compute_snapshot()
+        self.assertEqual(snapshot['total_venues'], 3)
+        self.assertEqual(snapshot['venue_bookings_today'], 2)
+        by_name = {row['venue']['name']: row['bookings_this_month'] for row in snapshot['venue_capacity_data']}
+        self.assertEqual(by_name, {'Venue 2': 0, 'Venue 1': 0, 'Venue 0': 1})
+
+    def test_query_count_is_constant(self):
+        """Test the snapshot costs the same number of queries however much data there is"""
+        with self.assertNumQueries(5):
+            facilities.compute_snapshot()
+        for hour in range(8, 20, 2):
+            self.book_today(self.venues[1], hour)
+        for _ in range(4):
+            self.allocate(1)
+        with self.assertNumQueries(5):
+            facilities.compute_snapshot()
+
+    def test_snapshot_is_cached_and_invalidated(self):
+        """Test the snapshot is reused until a booking or allocation is saved"""
+        facilities.get_snapshot()
+        with patch('events.facilities.compute_snapshot') as compute:
+            facilities.get_snapshot()
+            compute.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(1)
+        self.assertIsNone(facilities.snapshot_cache().get(facilities.SNAPSHOT_KEY))
+        facilities.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book_today(self.venues[0], 9)
+        self.assertIsNone(facilities.snapshot_cache().get(facilities.SNAPSHOT_KEY))
+
+    def test_snapshot_lives_in_the_shared_cache(self):
+        """Test the snapshot is kept where every worker sees it, not in the per-process cache"""
+        facilities.get_snapshot()
+        self.assertIsNotNone(caches[settings.FACILITIES_CACHE_ALIAS].get(facilities.SNAPSHOT_KEY))
+        self.assertIsNone(caches['default'].get(facilities.SNAPSHOT_KEY))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class FacilitiesViewTest(TestCase):
+    """Test the facilities pages use the snapshot"""
+
+    def setUp(self):
+        facilities.snapshot_cache().clear()
+        Venue.objects.create(name="Arena", address="Lusaka", capacity=100, hourly_rate=Decimal('100'))
+        Resource.objects.create(name="Speakers", resource_type='sound', cost_per_day=10, quantity_available=8)
+        self.client = Client()
+
+    def test_public_page(self):
+        """Test the public page shows cached counts"""
+        response = self.client.get(reverse('events:facilities_public'))
+        self.assertEqual(response.context['total_venues'], 1)
+        self.assertEqual(response.context['total_resources'], 1)
+        with patch('events.facilities.compute_snapshot') as compute:
+            self.client.get(reverse('events:facilities_public'))
+            compute.assert_not_called()
+
+    def test_staff_dashboard(self):
+        """Test the staff dashboard renders utilization from the snapshot"""
+        User.objects.create_user(username='staff', password='pass123', is_staff=True)
+        self.client.login(username='staff', password='pass123')
+        response = self.client.get(reverse('events:facilities_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '0/8 units in use')
@@ -0,0 +1,153 @@
+# events/tests/test_holds.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import date, timedelta
+from io import StringIO
+from events.models import Category, Event, Booking, PaymentTransaction, SeatHold
+from events.inventory import SoldOut
+from events import holds
+
+
+class SeatHoldTest(TestCase):
+    """Test the seat hold ledger"""
+
+    def setUp(self):
+        self.user1 = User.objects.create_user(username='user1', password='pass123')
+        self.user2 = User.objects.create_user(username='user2', password='pass123')
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Concert",
+            description="Live music",
+            date=date.today() + timedelta(days=30),
+            location="Lusaka",
+            category=self.category,
+            vip_seats_left=5,
+            gold_seats_left=10,
+            standard_seats_left=20
+        )
+
+    def test_hold_reduces_availability_for_others(self):
+        """Test a hold takes seats away from other customers but not its owner"""
+        holds.place_hold(self.event, self.user1, 'vip', 3)
+        self.assertEqual(holds.availability(self.event, user=self.user2)['vip'], 2)
+        self.assertEqual(holds.availability(self.event, user=self.user1)['vip'], 5)
+        self.assertEqual(self.event.vip_seats_left, 5)
+
+    def test_hold_beyond_availability_raises(self):
+        """Test holding more than the free seats raises SoldOut with the count left"""
+        holds.place_hold(self.event, self.user1, 'vip', 4)
+        with self.assertRaises(SoldOut) as ctx:
+            holds.place_hold(self.event, self.user2, 'vip', 2)
+        self.assertEqual(ctx.exception.available, 1)
+
+    def test_hold_is_reused_and_extended(self):
+        """Test choosing again updates the customer's existing hold"""
+        first = holds.place_hold(self.event, self.user1, 'vip', 2)
+        second = holds.place_hold(self.event, self.user1, 'gold', 4)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.assertEqual(holds.availability(self.event, user=self.user2)['gold'], 6)
+
+    def test_expired_holds_stop_counting_and_are_swept(self):
+        """Test expired holds free their seats and the sweeper marks them expired"""
+        hold = holds.place_hold(self.event, self.user1, 'vip', 5)
+        SeatHold.objects.filter(pk=hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(holds.availability(self.event, user=self.user2)['vip'], 5)
+
+        out = StringIO()
+        call_command('release_expired_holds', stdout=out)
+        self.assertIn('Released 1', out.getvalue())
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'expired')
+
+    def test_sweeper_thread_stops_and_joins(self):
+        """Test the in-process sweeper can be stopped and joined like any thread"""
+        sweeper = holds.HoldSweeper(interval=60)
+        sweeper.start()
+        self.assertTrue(sweeper.is_alive())
+        sweeper.stop()
+        sweeper.join(timeout=5)
+        self.assertFalse(sweeper.is_alive())
+
+    def test_approval_converts_and_rejection_releases(self):
+        """Test payment outcomes convert or release the booking's hold"""
+        bookings = []
+        for user in (self.user1, self.user2):
+            hold = holds.place_hold(self.event, user, 'vip', 2)
+            booking = Booking.objects.create(user=user, event=self.event, ticket_type='vip', tickets=2)
+            holds.attach_booking(hold, booking)
+            bookings.append(booking)
+
+        approved = PaymentTransaction.objects.create(
+            booking=bookings[0], payment_method='mtn', amount=bookings[0].total_price, status='pending'
+        )
+        approved.status = 'completed'
+        approved.save()
+        rejected = PaymentTransaction.objects.create(
+            booking=bookings[1], payment_method='mtn', amount=bookings[1].total_price, status='pending'
+        )
+        rejected.status = 'failed'
+        rejected.save()
+
+        self.assertEqual(SeatHold.objects.get(booking=bookings[0]).status, 'converted')
+        self.assertEqual(SeatHold.objects.get(booking=bookings[1]).status, 'released')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 3)
+        self.assertEqual(holds.availability(self.event)['vip'], 3)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class SeatHoldViewTest(TestCase):
+    """Test holds placed from the booking pages"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user1 = User.objects.create_user(username='user1', password='pass123')
+        self.user2 = User.objects.create_user(username='user2', password='pass123')
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Concert",
+            description="Live music",
+            date=date.today() + timedelta(days=30),
+            location="Lusaka",
+            category=self.category,
+            vip_seats_left=2,
+            gold_seats_left=10,
+            standard_seats_left=20
+        )
+
+    def test_choosing_seats_holds_them(self):
+        """Test the payment step holds seats so another customer cannot take them"""
+        self.client.login(username='user1', password='pass123')
+        response = self.client.post(
+            reverse('events:payment_page', kwargs={'event_id': self.event.id}),
+            {'ticket_type': 'vip', 'tickets': '2'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Seats held for you")
+
+        self.client.login(username='user2', password='pass123')
+        response = self.client.post(
+            reverse('events:payment_page', kwargs={'event_id': self.event.id}),
+            {'ticket_type': 'vip', 'tickets': '1'}
+        )
+        self.assertEqual(response.status_code, 302)
+        messages = list(get_messages(response.wsgi_request))
+        self.assertTrue(any('Only 0 VIP seats available' in str(m) for m in messages))
+
+    def test_submitting_payment_attaches_hold(self):
+        """Test the submitted booking keeps its hold until review"""
+        self.client.login(username='user1', password='pass123')
+        self.client.post(
+            reverse('events:payment_page', kwargs={'event_id': self.event.id}),
+            {'ticket_type': 'vip', 'tickets': '2', 'payment_method': 'mtn', 'phone_number': '0977111111'}
+        )
+        booking = Booking.objects.get(user=self.user1)
+        hold = SeatHold.objects.get(booking=booking)
+        self.assertEqual(hold.status, 'active')
+        self.assertGreater(hold.expires_at, timezone.now() + timedelta(hours=24))
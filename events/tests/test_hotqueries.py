@@ -0,0 +1,52 @@
+# events/tests/test_hotqueries.py
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from io import StringIO
+from events import hotqueries
+
+
+class HotQueryIndexTest(TestCase):
+    """Test the hot query registry, its scan detection and the explain command"""
+
+    def test_every_hot_query_uses_an_index(self):
+        """Test no registered query reads a whole table"""
+        out = StringIO()
+        call_command('explain_queries', fail_on_scan=True, stdout=out)
+        self.assertIn(f'All {len(hotqueries.registry)} hot queries use an index', out.getvalue())
+
+    def test_scan_detection(self):
+        """Test SQLite and PostgreSQL plans are read correctly"""
+        self.assertEqual(hotqueries.full_scans('2 0 0 SCAN events_booking', 'sqlite'), ['events_booking'])
+        self.assertEqual(hotqueries.full_scans('2 0 0 SCAN TABLE events_job', 'sqlite'), ['events_job'])
+        self.assertEqual(hotqueries.full_scans('7 0 0 SCAN events_booking USING INDEX events_booking_booked_idx', 'sqlite'), [])
+        self.assertEqual(hotqueries.full_scans('3 0 0 SCAN events_event USING COVERING INDEX x', 'sqlite'), [])
+        self.assertEqual(hotqueries.full_scans('4 0 0 SCAN CONSTANT ROW', 'sqlite'), [])
+        plan = 'Limit  (cost=0.15..1.2)\n  ->  Seq Scan on events_paymenttransaction  (cost=0.00..1.00)'
+        self.assertEqual(hotqueries.full_scans(plan, 'postgresql'), ['events_paymenttransaction'])
+
+    def test_scans_are_flagged(self):
+        """Test an unindexed query is reported and fails the CI mode"""
+        @hotqueries.register('test.unindexed')
+        def unindexed():
+            from events.models import Booking
+            return Booking.objects.filter(tickets=3)
+        try:
+            out = StringIO()
+            call_command('explain_queries', 'test.unindexed', stdout=out)
+            self.assertIn('⚠️ test.unindexed: full scan of events_booking', out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command('explain_queries', 'test.unindexed', fail_on_scan=True, stdout=StringIO())
+        finally:
+            del hotqueries.registry['test.unindexed']
+        with self.assertRaises(CommandError):
+            call_command('explain_queries', 'no.such.query', stdout=StringIO())
+
+    def test_partial_indexes_exist(self):
+        """Test the migration created the pending-only indexes"""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, 'events_paymenttransaction')
+        self.assertIn('events_pay_pending_idx', constraints)
+        self.assertEqual(constraints['events_pay_status_created_idx']['columns'], ['status', 'created_at'])
@@ -0,0 +1,130 @@
+# events/tests/test_images.py
+
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+from PIL import Image
+from events.models import Category, Event, EventGallery, ImageDerivative, Job
+from events import images, jobs
+
+
+def jpeg_upload(name, size=(2000, 1000), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageDerivativeTest(TestCase):
+    """Test derivative rendering, storage and lookup"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        images.derivative_cache().clear()
+        self.category = Category.objects.create(name="Music")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def event(self, **images_):
+        return Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka",
+            date=date.today() + timedelta(days=5), category=self.category, **images_,
+        )
+
+    def test_upload_queues_a_job_per_new_image(self):
+        """Test saving an event with images queues derivative jobs once"""
+        event = self.event(main_image=jpeg_upload('main.jpg'), crowd_image=jpeg_upload('crowd.jpg'))
+        self.assertEqual(Job.objects.filter(kind='images.derive').count(), 2)
+        jobs.run_pending(kinds=['images.derive'])
+        event.title = "Jazz Night II"
+        event.save()
+        self.assertEqual(Job.objects.filter(kind='images.derive').count(), 2)
+
+    def test_widths_formats_and_thumbnail(self):
+        """Test each width exists as WebP and JPEG, capped at the original width"""
+        event = self.event(main_image=jpeg_upload('main.jpg'))
+        jobs.run_pending(kinds=['images.derive'])
+        rows = ImageDerivative.objects.filter(source=event.main_image.name)
+        self.assertEqual(
+            sorted((row.width, row.height, row.format) for row in rows if not row.is_thumbnail),
+            [(320, 160, 'jpeg'), (320, 160, 'webp'), (640, 320, 'jpeg'), (640, 320, 'webp'),
+             (1280, 640, 'jpeg'), (1280, 640, 'webp')],
+        )
+        self.assertEqual(sorted(row.format for row in rows if row.is_thumbnail), ['jpeg', 'webp'])
+        for row in rows:
+            self.assertTrue(default_storage.exists(row.name))
+            self.assertIn('/derived/', row.name)
+        with default_storage.open(rows.get(width=640, format='webp').name) as handle:
+            self.assertEqual(Image.open(handle).format, 'WEBP')
+
+        small = images.render(jpeg_upload('small.jpg', size=(200, 100)).read())[1]
+        self.assertEqual({r.width for r in small if not r.is_thumbnail}, {200})
+
+    def test_content_hash_names_are_shared(self):
+        """Test identical uploads get the same derivative names"""
+        first = self.event(main_image=jpeg_upload('a.jpg'))
+        second = self.event(main_image=jpeg_upload('b.jpg'))
+        other = self.event(main_image=jpeg_upload('c.jpg', color=(0, 0, 255)))
+        jobs.run_pending(kinds=['images.derive'])
+
+        def names(event):
+            return set(ImageDerivative.objects.filter(source=event.main_image.name).values_list('name', flat=True))
+        self.assertEqual(names(first), names(second))
+        self.assertFalse(names(first) & names(other))
+
+    def test_missing_derivatives_are_cached_briefly(self):
+        """Test "no derivatives yet" is cached for the short miss TTL, found rows for the long one"""
+        event = self.event(main_image=jpeg_upload('main.jpg'))
+        key = images.CACHE_PREFIX + event.main_image.name
+        cache = images.derivative_cache()
+        with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.assertEqual(images.derivatives(event.main_image.name), [])
+            jobs.run_pending(kinds=['images.derive'])
+            self.assertEqual(len(images.derivatives(event.main_image.name)), 8)
+        self.assertEqual(
+            [call.args[2] for call in cache_set.call_args_list if call.args[0] == key],
+            [settings.IMAGE_DERIVATIVE_MISS_TTL, settings.IMAGE_DERIVATIVE_CACHE_TTL],
+        )
+
+    def test_template_tag(self):
+        """Test the tag falls back to the original, then emits srcsets"""
+        event = self.event(main_image=jpeg_upload('main.jpg'))
+        template = Template('{% load responsive_images %}{% responsive_image event.main_image alt=event.title css_class="hero" %}')
+        html = template.render(Context({'event': event}))
+        self.assertEqual(html, f'<img src="{event.main_image.url}" alt="Jazz Night" class="hero" loading="lazy">')
+
+        jobs.run_pending(kinds=['images.derive'])
+        html = template.render(Context({'event': event}))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertRegex(html, r'derived/[0-9a-f]{32}-320w\.webp 320w, \S+-640w\.webp 640w, \S+-1280w\.webp 1280w')
+        self.assertRegex(html, r'<img src="\S+-640w\.jpeg" srcset="\S+-320w\.jpeg 320w')
+        self.assertIn('width="640" height="320"', html)
+        self.assertTrue(images.thumbnail_url(event.main_image).endswith('-thumb160.jpeg'))
+
+    def test_backfill_command(self):
+        """Test the command renders existing images in parallel and skips finished ones"""
+        event = self.event(main_image=jpeg_upload('main.jpg'))
+        EventGallery.objects.create(event=event, image=jpeg_upload('gallery.jpg'))
+        Job.objects.all().delete()
+
+        out = StringIO()
+        call_command('build_image_derivatives', workers=2, stdout=out)
+        self.assertIn('Built derivatives for 2 image(s)', out.getvalue())
+        self.assertEqual(ImageDerivative.objects.values('source').distinct().count(), 2)
+
+        out = StringIO()
+        call_command('build_image_derivatives', workers=2, stdout=out)
+        self.assertIn('already has derivatives', out.getvalue())
@@ -7,6 +7,7 @@ from django.contrib.messages import get_messages
 from datetime import date, time, timedelta
 from decimal import Decimal
 from events.models import Category, Event, Booking, PaymentTransaction
+from events import jobs
 
 
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
@@ -116,6 +117,11 @@ class CompleteBookingFlowTest(TestCase):
         self.assertIsNotNone(payment)
         self.assertEqual(payment.payment_method, 'mtn')
         self.assertEqual(payment.amount, Decimal('3000.00'))
+        self.assertEqual(payment.status, 'submitted')
+        
+        # Background worker calls the provider; payment then awaits admin
+        jobs.run_pending()
+        payment.refresh_from_db()
         self.assertEqual(payment.status, 'pending')
         self.assertEqual(payment.phone_number, '0977123456')
         
@@ -237,9 +243,12 @@ class AdminWorkflowTest(TestCase):
             }
         )
         
-        # Verify booking and payment were created
+        # Verify booking and payment were created, then let the worker run
         booking = Booking.objects.filter(user=self.user, event=self.event).first()
         payment = PaymentTransaction.objects.filter(booking=booking).first()
+        self.assertEqual(payment.status, 'submitted')
+        jobs.run_pending()
+        payment.refresh_from_db()
         self.assertEqual(payment.status, 'pending')
         
         # Verify seats are NOT yet reduced
@@ -279,6 +288,7 @@ class AdminWorkflowTest(TestCase):
         
         booking = Booking.objects.filter(user=self.user, event=self.event).first()
         payment = PaymentTransaction.objects.filter(booking=booking).first()
+        jobs.run_pending()
         
         # Admin rejects payment
         self.client.login(username='admin', password='adminpass123')
@@ -369,6 +379,7 @@ class MultipleUsersBookingTest(TestCase):
         
         booking2 = Booking.objects.filter(user=self.user2, event=self.event).first()
         payment2 = PaymentTransaction.objects.filter(booking=booking2).first()
+        jobs.run_pending()
         
         # Admin approves both payments
         self.client.login(username='admin', password='adminpass123')
@@ -478,6 +489,9 @@ class EventCapacityTest(TestCase):
             }
         )
         
+        # Provider processing runs in the background worker
+        jobs.run_pending()
+        
         # Approve all payments
         self.client.login(username='admin', password='adminpass123')
         
@@ -0,0 +1,65 @@
+# events/tests/test_inventory.py
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import date, timedelta
+from events.models import Category, Event, Booking, PaymentTransaction
+from events.inventory import SoldOut, reserve_seats, release_seats, move_seats, add_seats
+
+
+class InventoryTest(TestCase):
+    """Test the atomic seat inventory helpers"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Concert",
+            description="Live music",
+            date=date.today() + timedelta(days=30),
+            location="Lusaka",
+            category=self.category,
+            vip_seats_left=3,
+            gold_seats_left=5,
+            standard_seats_left=10
+        )
+
+    def test_reserve_within_stock(self):
+        """Test reserving seats decrements the tier"""
+        self.assertTrue(reserve_seats(self.event.id, 'vip', 2))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 1)
+
+    def test_reserve_never_goes_negative(self):
+        """Test a reservation larger than the stock changes nothing"""
+        self.assertFalse(reserve_seats(self.event.id, 'vip', 4))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 3)
+
+    def test_release_and_add(self):
+        """Test seats can be given back and topped up"""
+        release_seats(self.event.id, 'gold', 2)
+        add_seats(Event.objects.filter(pk=self.event.pk), 50)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.gold_seats_left, 57)
+        self.assertEqual(self.event.vip_seats_left, 53)
+
+    def test_move_seats(self):
+        """Test moving a sale between tiers only happens if the target has room"""
+        self.assertTrue(move_seats(self.event.id, 'standard', 'vip', 3))
+        self.assertFalse(move_seats(self.event.id, 'standard', 'vip', 1))
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 0)
+        self.assertEqual(self.event.standard_seats_left, 13)
+
+    def test_approval_beyond_stock_raises(self):
+        """Test approving a payment for a sold out tier is refused"""
+        user = User.objects.create_user(username='fan', password='pass123')
+        booking = Booking.objects.create(user=user, event=self.event, ticket_type='vip', tickets=4)
+        payment = PaymentTransaction.objects.create(
+            booking=booking, payment_method='mtn', amount=booking.total_price, status='pending'
+        )
+        payment.status = 'completed'
+        with self.assertRaises(SoldOut):
+            payment.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.vip_seats_left, 3)
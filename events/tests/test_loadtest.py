@@ -0,0 +1,65 @@
+# events/tests/test_loadtest.py
+
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from io import StringIO
+from unittest.mock import patch
+from events.models import Event
+from events import payments
+from events.management.commands.loadtest_checkout import percentile
+
+
+class ProviderStubTest(TestCase):
+    """Test the load-test provider stub"""
+
+    def test_latency_spec(self):
+        """Test fixed and ranged latencies parse"""
+        self.assertEqual(payments.stub_latency_range('50'), (50.0, 50.0))
+        self.assertEqual(payments.stub_latency_range('20-200'), (20.0, 200.0))
+
+    @override_settings(PAYMENT_PROVIDER_STUB=True, PAYMENT_STUB_LATENCY_MS='0', PAYMENT_STUB_FAILURE_RATE=1.0)
+    def test_stub_replaces_every_provider(self):
+        """Test no real provider function runs while the stub is on"""
+        with patch('events.payments.process_mtn_payment') as mtn:
+            self.assertFalse(payments.process_payment('mtn', 100, {'phone': '0977123456'}))
+        mtn.assert_not_called()
+        with override_settings(PAYMENT_STUB_FAILURE_RATE=0.0):
+            self.assertTrue(payments.process_payment('bank', 100, {}))
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+
+class LoadTestCommandTest(TransactionTestCase):
+    """Test a small end-to-end run against the in-process server"""
+
+    def test_serial_run(self):
+        """Test every stage is measured, sell-outs are counted and nothing is oversold"""
+        path = os.path.join(tempfile.mkdtemp(), 'result.json')
+        out = StringIO()
+        call_command(
+            'loadtest_checkout', users=4, concurrency=1, seats=2, job_workers=1,
+            provider_latency='1', output=path, stdout=out,
+        )
+        self.assertIn('No oversell', out.getvalue())
+        with open(path) as handle:
+            report = json.load(handle)
+        self.assertEqual(report['mode'], 'in-process')
+        self.assertEqual(report['outcomes'], {'approved': 2, 'sold_out_at_hold': 2})
+        self.assertEqual(report['seats'], {'initial': 2, 'sold': 2, 'left': 0})
+        self.assertEqual(report['oversold'], 0)
+        for stage in ('select_seat', 'provider', 'approval', 'checkout'):
+            self.assertGreater(report['stages'][stage]['count'], 0)
+            self.assertIsNotNone(report['stages'][stage]['p99_ms'])
+        # Fixtures are removed afterwards
+        self.assertFalse(Event.objects.filter(title='Checkout Load Test').exists())
+        self.assertFalse(User.objects.filter(username__startswith='loadtest-').exists())
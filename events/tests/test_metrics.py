@@ -0,0 +1,109 @@
+# events/tests/test_metrics.py
+
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import date, timedelta
+from unittest.mock import patch
+from django.db import OperationalError
+from events.models import Category, Event, MetricsSnapshot
+from events import metrics
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    METRICS_ENABLED=True,
+    METRICS_SAMPLE_RATE=1.0,
+    METRICS_TOKEN='scrape-me',
+)
+class MetricsTest(TestCase):
+    """Test request, query and template metrics and the /metrics endpoint"""
+
+    def setUp(self):
+        metrics.reset()
+        self.client = Client()
+        category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka",
+            date=date.today() + timedelta(days=5), category=category, standard_seats_left=100,
+        )
+
+    def series(self, metric):
+        return metrics.local_snapshot().get(metric.name, {})
+
+    def test_requests_queries_and_templates_are_recorded(self):
+        """Test a sampled request records latency, queries and its template"""
+        self.client.get(reverse('events:event_detail', args=[self.event.id]))
+        self.client.get('/no/such/page/here/')
+
+        latency = self.series(metrics.request_seconds)
+        self.assertEqual(sum(latency['events:event_detail'][:-1]), 1)
+        self.assertIn('unmatched', latency)
+        self.assertEqual(self.series(metrics.responses), {'2xx': 1, '4xx': 1})
+        queries = self.series(metrics.db_queries)['events:event_detail']
+        self.assertGreater(queries[-1], 0)
+        self.assertIn('events/event_detail.html', self.series(metrics.template_seconds))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_only_record_latency(self):
+        """Test sampling switches the query and template timing off"""
+        self.client.get(reverse('events:event_detail', args=[self.event.id]))
+        self.assertIn('events:event_detail', self.series(metrics.request_seconds))
+        self.assertEqual(self.series(metrics.db_queries), {})
+        self.assertEqual(self.series(metrics.template_seconds), {})
+
+    def test_failed_flush_keeps_the_response(self):
+        """Test a locked database during the flush does not turn the response into a 500"""
+        with patch.object(MetricsSnapshot.objects, 'update_or_create', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('events', level='WARNING'):
+                response = self.client.get(reverse('events:event_detail', args=[self.event.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('events:event_detail', self.series(metrics.request_seconds))
+
+    def test_exposition_and_quantiles(self):
+        """Test the Prometheus text format and the quantile estimate"""
+        for value in (0.004, 0.02, 0.02, 0.3):
+            metrics.request_seconds.observe('events:home', value)
+        text = metrics.exposition(metrics.local_snapshot())
+        self.assertIn('# TYPE momenta_http_request_duration_seconds histogram', text)
+        self.assertIn('momenta_http_request_duration_seconds_bucket{view="events:home",le="0.005"} 1', text)
+        self.assertIn('momenta_http_request_duration_seconds_bucket{view="events:home",le="0.025"} 3', text)
+        self.assertIn('momenta_http_request_duration_seconds_bucket{view="events:home",le="+Inf"} 4', text)
+        self.assertIn('momenta_http_request_duration_seconds_count{view="events:home"} 4', text)
+
+        data = metrics.local_snapshot()[metrics.request_seconds.name]['events:home']
+        self.assertAlmostEqual(metrics.request_seconds.quantile(data, 0.5), 0.0175)
+        self.assertAlmostEqual(metrics.request_seconds.quantile(data, 0.99), 0.49, places=2)
+
+    def test_processes_are_summed_and_stale_ones_dropped(self):
+        """Test the endpoint adds up every live worker's snapshot"""
+        metrics.request_seconds.observe('events:home', 0.02)
+        other = {metrics.request_seconds.name: {'events:home': metrics.request_seconds.empty()}}
+        other[metrics.request_seconds.name]['events:home'][2] = 3
+        MetricsSnapshot.objects.create(process='web-2:41:aa', data=other)
+        MetricsSnapshot.objects.create(process='web-3:7:bb', data=other)
+        MetricsSnapshot.objects.filter(process='web-3:7:bb').update(updated_at=timezone.now() - timedelta(hours=1))
+
+        totals = metrics.collect()
+        self.assertEqual(sum(totals[metrics.request_seconds.name]['events:home'][:-1]), 4)
+        self.assertFalse(MetricsSnapshot.objects.filter(process='web-3:7:bb').exists())
+
+    def test_endpoint_access(self):
+        """Test the endpoint is for staff or the scraper token only"""
+        url = reverse('events:metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 302)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE momenta_db_queries_per_request histogram', response.content.decode())
+
+        self.client.get(reverse('events:event_detail', args=[self.event.id]))
+        User.objects.create_user(username='staff', password='pass123', is_staff=True)
+        self.client.login(username='staff', password='pass123')
+        views = self.client.get(url, {'format': 'json'}).json()['views']
+        row = next(row for row in views if row['view'] == 'events:event_detail')
+        self.assertEqual(row['requests'], 1)
+        self.assertGreater(row['queries_per_request'], 0)
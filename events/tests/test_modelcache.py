@@ -0,0 +1,119 @@
+# events/tests/test_modelcache.py
+
+import time
+
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.core.management import call_command
+from django.http import Http404
+from datetime import date, timedelta
+from io import StringIO
+from unittest.mock import patch
+from events.models import Category, Event
+from events.inventory import reserve_seats
+from events.lru import LRUCache
+from events import modelcache
+
+TEST_CACHES = dict(settings.CACHES, objects={
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'test-objects',
+})
+
+
+@override_settings(MODEL_CACHE_ENABLED=True, CACHES=TEST_CACHES)
+class ModelCacheTest(TestCase):
+    """Test the two-tier model object cache"""
+
+    def setUp(self):
+        modelcache.shared_cache().clear()
+        modelcache.local_cache.clear()
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka", date=date.today() + timedelta(days=5),
+            category=self.category, vip_seats_left=10, standard_seats_left=100,
+        )
+
+    def test_rows_come_from_the_cache(self):
+        """Test repeat lookups skip the database, except for an event's seat counts"""
+        with self.assertNumQueries(1):
+            event = modelcache.get_cached(Event, self.event.id)
+        self.assertEqual((event.title, event.category_id, event.vip_seats_left), ("Jazz Night", self.category.id, 10))
+        with self.assertNumQueries(1) as queries:
+            event = modelcache.get_cached(Event, str(self.event.id))
+        self.assertIn('vip_seats_left', queries.captured_queries[0]['sql'])
+        self.assertNotIn('description', queries.captured_queries[0]['sql'])
+        self.assertEqual(event.description, "Test")
+
+        modelcache.get_cached(Category, self.category.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(modelcache.get_cached(Category, self.category.id).name, "Music")
+
+    def test_instances_are_independent(self):
+        """Test changing a returned instance does not change the cache"""
+        modelcache.get_cached(Category, self.category.id).name = "Changed"
+        self.assertEqual(modelcache.get_cached(Category, self.category.id).name, "Music")
+
+    def test_seat_counts_are_always_fresh(self):
+        """Test seat sales (conditional UPDATEs, no signals) show up immediately"""
+        modelcache.get_cached(Event, self.event.id)
+        self.assertTrue(reserve_seats(self.event.id, 'vip', 4))
+        self.assertEqual(modelcache.get_cached(Event, self.event.id).vip_seats_left, 6)
+        self.assertFalse(reserve_seats(self.event.id, 'vip', 7))
+
+    def test_save_invalidates(self):
+        """Test a save is visible straight away in this worker"""
+        modelcache.get_cached(Event, self.event.id)
+        self.event.title = "Jazz Brunch"
+        self.event.save()
+        self.assertEqual(modelcache.get_cached(Event, self.event.id).title, "Jazz Brunch")
+
+    def test_other_workers_notice_within_one_poll_interval(self):
+        """Test a version bump elsewhere is picked up once the local copy expires"""
+        with patch('events.modelcache.local_cache', LRUCache(100, ttl=0.05)):
+            modelcache.get_cached(Category, self.category.id)
+            # Another worker saves: only the shared version changes here
+            Category.objects.filter(pk=self.category.pk).update(name="Live Music")
+            modelcache._bump([('events.category', self.category.pk)])
+            self.assertEqual(modelcache.get_cached(Category, self.category.id).name, "Music")
+            time.sleep(0.1)
+            self.assertEqual(modelcache.get_cached(Category, self.category.id).name, "Live Music")
+
+    def test_missing_rows(self):
+        """Test deleted rows raise and 404"""
+        modelcache.get_cached(Event, self.event.id)
+        event_id = self.event.id
+        self.event.delete()
+        with self.assertRaises(Event.DoesNotExist):
+            modelcache.get_cached(Event, event_id)
+        with self.assertRaises(Http404):
+            modelcache.get_cached_or_404(Event, 'abc')
+
+    def test_all_rows(self):
+        """Test the cached category list and its invalidation"""
+        modelcache.get_all_cached(Category)
+        with self.assertNumQueries(0):
+            self.assertEqual([c.name for c in modelcache.get_all_cached(Category)], ["Music"])
+        Category.objects.create(name="Tech")
+        self.assertEqual(len(modelcache.get_all_cached(Category)), 2)
+
+    def test_warmup_command(self):
+        """Test warming fills the shared cache for every worker"""
+        out = StringIO()
+        call_command('warm_model_cache', stdout=out)
+        self.assertIn('Warmed 1 event(s), 1 category(s), 0 venue(s)', out.getvalue())
+        modelcache.local_cache.clear()
+        with self.assertNumQueries(0):
+            modelcache.get_cached(Category, self.category.id)
+        with self.assertNumQueries(1):
+            modelcache.get_cached(Event, self.event.id)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_views(self):
+        """Test the event and category pages use the cache"""
+        client = Client()
+        response = client.get(reverse('events:event_detail', args=[self.event.id]))
+        self.assertContains(response, "Jazz Night")
+        self.assertEqual(client.get(reverse('events:event_detail', args=[999])).status_code, 404)
+        response = client.get(reverse('events:categories_with_events'))
+        self.assertContains(response, "Music")
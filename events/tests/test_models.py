@@ -221,7 +221,8 @@ class PaymentTransactionModelTest(TestCase):
             title="Test Event",
             description="Test Description",
             date=date.today() + timedelta(days=30),
-            category=self.category
+            category=self.category,
+            vip_seats_left=10  # Approving a payment takes seats
         )
         self.booking = Booking.objects.create(
             user=self.user,
@@ -252,8 +253,7 @@ class PaymentTransactionModelTest(TestCase):
             amount=Decimal('3000.00')
         )
         
-        self.assertTrue(payment.transaction_id.startswith('MTN'))
-        self.assertEqual(len(payment.transaction_id), 13)  # MTN + 10 digits
+        self.assertRegex(payment.transaction_id, r'^MTN\d{15,19}$')  # MTN + Snowflake id
     
     def test_payment_status_choices(self):
         """Test payment status choices"""
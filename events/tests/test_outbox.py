@@ -0,0 +1,85 @@
+# events/tests/test_outbox.py
+
+from django.test import TestCase
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.utils import timezone
+from unittest.mock import patch
+from events.models import OutboundEmail
+from events.outbox import queue_mail, deliver_pending, DOMAIN_FAILURE_LIMIT
+
+
+class CountingBackend(LocmemBackend):
+    """locmem backend that counts connections and refuses one domain"""
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingBackend.connections += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.endswith('@broken.test') for address in message.to):
+                raise OSError("Connection refused")
+        return super().send_messages(messages)
+
+
+class OutboxTest(TestCase):
+    """Test the email outbox and delivery worker"""
+
+    def setUp(self):
+        CountingBackend.connections = 0
+        patcher = patch('events.outbox.get_connection', side_effect=lambda **kwargs: CountingBackend(**kwargs))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_queue_does_not_send(self):
+        """Test queueing stores one row per recipient and sends nothing"""
+        queue_mail("Hello", "Body", ["a@example.com", "b@example.org"])
+        self.assertEqual(OutboundEmail.objects.filter(status='queued').count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(CountingBackend.connections, 0)
+
+    def test_sender_is_keyword_only(self):
+        """Test a send_mail-style positional call is rejected instead of mailing the sender"""
+        with self.assertRaises(TypeError):
+            queue_mail("Hello", "Body", "from@example.com", ["a@example.com"])
+        queue_mail("Hello", "Body", ["a@example.com"], from_email="from@example.com")
+        self.assertEqual(OutboundEmail.objects.get().from_email, "from@example.com")
+
+    def test_batch_uses_one_connection(self):
+        """Test a batch is delivered over a single connection with per-message status"""
+        for i in range(10):
+            queue_mail(f"Message {i}", "Body", [f"user{i}@example.com"], html=(i % 2 == 0))
+        stats = deliver_pending(batch_size=50)
+        self.assertEqual(stats['sent'], 10)
+        self.assertEqual(len(mail.outbox), 10)
+        self.assertEqual(CountingBackend.connections, 1)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+
+    def test_failure_is_retried_with_backoff(self):
+        """Test a failed message goes back on the queue for later, then fails for good"""
+        queue_mail("Hello", "Body", ["someone@broken.test"])
+        stats = deliver_pending()
+        self.assertEqual(stats['retry'], 1)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, 'queued')
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("Connection refused", email.last_error)
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now(), attempts=email.max_attempts - 1)
+        stats = deliver_pending()
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(OutboundEmail.objects.get().status, 'failed')
+
+    def test_failing_domain_does_not_block_others(self):
+        """Test a domain that keeps failing is deferred while other domains are delivered"""
+        queue_mail("Hello", "Body", [f"user{i}@broken.test" for i in range(DOMAIN_FAILURE_LIMIT + 2)])
+        queue_mail("Hello", "Body", ["fine@example.com"])
+        stats = deliver_pending()
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(stats['retry'], DOMAIN_FAILURE_LIMIT)
+        self.assertEqual(stats['deferred'], 2)
+        self.assertEqual(OutboundEmail.objects.filter(recipient_domain='broken.test', attempts=0).count(), 2)
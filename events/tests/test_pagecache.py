@@ -0,0 +1,151 @@
+# events/tests/test_pagecache.py
+
+import re
+
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from datetime import date, timedelta
+from decimal import Decimal
+from events.models import Category, Event, Venue
+from events.inventory import reserve_seats
+from events import pagecache
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    PAGE_CACHE_ENABLED=True,
+    PAGE_CACHE_LOCK_WAIT=0.1,
+)
+class PageCacheTest(TestCase):
+    """Test the anonymous page cache and its invalidation"""
+
+    def setUp(self):
+        caches['pages'].clear()
+        self.client = Client()
+        self.category = Category.objects.create(name="Music")
+        self.jazz = self.event("Jazz Night")
+        self.rock = self.event("Rock Festival")
+
+    def event(self, title):
+        return Event.objects.create(
+            title=title, description="Test", location="Lusaka", date=date.today() + timedelta(days=5),
+            category=self.category, standard_seats_left=100,
+        )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response, response.get('X-Page-Cache')
+
+    def test_second_visit_is_a_hit_without_queries(self):
+        """Test a repeated anonymous GET is served from the cache"""
+        url = reverse('events:events_list')
+        self.assertEqual(self.get(url)[1], 'miss')
+        with self.assertNumQueries(0):
+            response, outcome = self.get(url)
+        self.assertEqual(outcome, 'hit')
+        self.assertContains(response, 'Jazz Night')
+        # Different query strings are different pages; parameter order is not
+        self.assertEqual(self.get(url, search='jazz', category='music')[1], 'miss')
+        self.assertEqual(self.client.get(f'{url}?category=music&search=jazz')['X-Page-Cache'], 'hit')
+
+    def test_logged_in_users_bypass(self):
+        """Test authenticated visitors always get a fresh page"""
+        User.objects.create_user(username='fan', password='pass123')
+        self.client.login(username='fan', password='pass123')
+        url = reverse('events:events_list')
+        self.client.get(url)
+        self.assertIsNone(self.get(url)[1])
+
+    def test_saving_an_event_purges_only_its_pages(self):
+        """Test a save drops the lists and that event's page, not other events' pages"""
+        jazz_url = reverse('events:event_detail', args=[self.jazz.id])
+        rock_url = reverse('events:event_detail', args=[self.rock.id])
+        list_url = reverse('events:events_list')
+        venues_url = reverse('events:venues_list')
+        for url in (jazz_url, rock_url, list_url, venues_url):
+            self.client.get(url)
+
+        self.jazz.title = "Jazz Brunch"
+        self.jazz.save()
+
+        response, outcome = self.get(jazz_url)
+        self.assertEqual(outcome, 'miss')
+        self.assertContains(response, 'Jazz Brunch')
+        self.assertEqual(self.get(list_url)[1], 'miss')
+        self.assertEqual(self.get(rock_url)[1], 'hit')
+        self.assertEqual(self.get(venues_url)[1], 'hit')
+
+        Venue.objects.create(name="Civic Hall", address="Lusaka", capacity=800, hourly_rate=Decimal('500'))
+        self.assertEqual(self.get(venues_url)[1], 'miss')
+        self.assertEqual(self.get(rock_url)[1], 'hit')
+
+    def test_seat_changes_purge_the_event_page(self):
+        """Test inventory updates, which send no signals, still purge"""
+        url = reverse('events:event_detail', args=[self.jazz.id])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(reserve_seats(self.jazz.id, 'standard', 2))
+        response, outcome = self.get(url)
+        self.assertEqual(outcome, 'miss')
+        self.assertContains(response, '98')
+
+    def test_category_page_depends_on_its_category(self):
+        """Test renaming a category purges its page"""
+        url = reverse('events:category_detail', args=[self.category.slug])
+        self.client.get(url)
+        self.assertEqual(self.get(url)[1], 'hit')
+        self.category.name = "Live Music"
+        self.category.save()
+        response, outcome = self.get(url)
+        self.assertEqual(outcome, 'miss')
+        self.assertContains(response, 'live music')
+
+    def test_cached_pages_carry_a_fresh_csrf_token(self):
+        """Test forms on a cached page post for a different visitor"""
+        url = reverse('events:events_list')
+        self.client.get(url)
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        response = visitor.post(reverse('events:subscribe'), {'email': 'fan@example.com', 'csrfmiddlewaretoken': token})
+        self.assertNotEqual(response.status_code, 403)
+
+    def test_single_flight_serves_stale_while_rendering(self):
+        """Test requests during another render get the stale copy instead of rendering"""
+        url = reverse('events:events_list')
+        self.client.get(url)
+        self.jazz.save()
+        key = pagecache._page_key(RequestFactory().get(url))
+        caches['pages'].add(f'{key}:lock', 1)
+        with self.assertNumQueries(0):
+            response, outcome = self.get(url)
+        self.assertEqual(outcome, 'stale')
+        caches['pages'].delete(f'{key}:lock')
+        self.assertEqual(self.get(url)[1], 'miss')
+
+    def test_waits_then_renders_when_nothing_is_cached(self):
+        """Test a request renders itself if the lock holder never fills the entry"""
+        url = reverse('events:venues_list')
+        key = pagecache._page_key(RequestFactory().get(url, {'x': '1'}))
+        caches['pages'].add(f'{key}:lock', 1)
+        response, outcome = self.get(url, x='1')
+        self.assertEqual((response.status_code, outcome), (200, 'miss'))
+        self.assertTrue(caches['pages'].get(f'{key}:lock'))
+
+    def test_counters(self):
+        """Test per-view hit and miss counters and the staff endpoint"""
+        url = reverse('events:events_list')
+        for _ in range(3):
+            self.client.get(url)
+        self.client.get(reverse('events:event_detail', args=[self.jazz.id]))
+        counts = pagecache.stats()
+        self.assertEqual(counts['events_list'], {'hit': 2, 'miss': 1, 'stale': 0})
+        self.assertEqual(counts['event_detail']['miss'], 1)
+
+        User.objects.create_user(username='staff', password='pass123', is_staff=True)
+        self.client.login(username='staff', password='pass123')
+        data = self.client.get(reverse('events:page_cache_stats')).json()
+        self.assertEqual(data['views']['events_list']['hit'], 2)
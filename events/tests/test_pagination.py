@@ -0,0 +1,129 @@
+# events/tests/test_pagination.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from datetime import date, timedelta
+from io import StringIO
+from events.models import Category, Event, Booking
+from events.pagination import InvalidCursor, encode_cursor, paginate
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pages over (date, id)"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Music")
+        today = date.today()
+        # Three events per day so pages split ties on date
+        self.events = [
+            Event.objects.create(title=f"Event {i}", description="Test", location="Lusaka",
+                                 date=today + timedelta(days=i // 3), category=self.category)
+            for i in range(10)
+        ]
+
+    def walk(self, keys, per_page):
+        pages, cursor = [], None
+        while True:
+            page = paginate(Event.objects.all(), keys, cursor, per_page)
+            pages.append([event.title for event in page])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_walk_visits_every_row_once(self):
+        """Test pages follow on from each other in both directions"""
+        pages = self.walk(('date', 'id'), 4)
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual(sum(pages, []), [f"Event {i}" for i in range(10)])
+        pages = self.walk(('-date', '-id'), 3)
+        self.assertEqual(sum(pages, []), [f"Event {i}" for i in reversed(range(10))])
+
+    def test_exact_multiple_has_no_empty_page(self):
+        """Test the last full page reports no next page"""
+        self.assertEqual([len(page) for page in self.walk(('date', 'id'), 5)], [5, 5])
+
+    def test_constant_queries_without_offset_or_count(self):
+        """Test a deep page is a single query with no OFFSET and no COUNT"""
+        cursor = paginate(Event.objects.all(), ('date', 'id'), None, 6).next_cursor
+        with self.assertNumQueries(1) as queries:
+            paginate(Event.objects.all(), ('date', 'id'), cursor, 6)
+        sql = queries.captured_queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors are rejected"""
+        for cursor in [
+            'not-base64!', encode_cursor(['2025-01-01']), encode_cursor(['yesterday', 1]),
+            encode_cursor([{}, 1]), encode_cursor([['2025-01-01'], 1]), encode_cursor([20250101, 1]),
+            encode_cursor(['2025-01-01', {}]),
+        ]:
+            with self.assertRaises(InvalidCursor):
+                paginate(Event.objects.all(), ('date', 'id'), cursor)
+
+    def test_benchmark_command(self):
+        """Test the benchmark walks every page and cleans up"""
+        out = StringIO()
+        call_command('benchmark_pagination', pages=5, per_page=4, repeat=1, stdout=out)
+        self.assertIn('Walked 5 keyset pages (20 rows)', out.getvalue())
+        self.assertEqual(Event.objects.count(), 10)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    LISTING_PAGE_SIZE=4,
+    PROFILE_PAGE_SIZE=2,
+)
+class PaginatedViewsTest(TestCase):
+    """Test the listings page through HTML and JSON"""
+
+    def setUp(self):
+        self.client = Client()
+        self.category = Category.objects.create(name="Music")
+        today = date.today()
+        self.events = [
+            Event.objects.create(title=f"Event {i}", description="Test", location="Lusaka",
+                                 date=today + timedelta(days=i), category=self.category)
+            for i in range(6)
+        ]
+
+    def test_events_list_pages(self):
+        """Test the events list shows a page and links to the next"""
+        response = self.client.get(reverse('events:events_list'))
+        self.assertEqual([event.title for event in response.context['events']], [f"Event {i}" for i in range(4)])
+        self.assertContains(response, 'More Events')
+        response = self.client.get(response.context['next_url'])
+        self.assertEqual([event.title for event in response.context['events']], ["Event 4", "Event 5"])
+        self.assertIsNone(response.context['next_url'])
+
+    def test_load_more_json(self):
+        """Test the JSON pages carry the filters and the next link"""
+        response = self.client.get(reverse('events:category_detail', args=[self.category.slug]), {'format': 'json'})
+        data = response.json()
+        self.assertEqual([row['title'] for row in data['results']], ["Event 5", "Event 4", "Event 3", "Event 2"])
+        self.assertIn('format=json', data['next'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([row['title'] for row in data['results']], ["Event 1", "Event 0"])
+        self.assertIsNone(data['next'])
+
+    def test_bad_cursor_is_400(self):
+        """Test a garbage cursor is rejected"""
+        response = self.client.get(reverse('events:events_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        # Valid JSON of the wrong shape
+        response = self.client.get(reverse('events:events_list'), {'cursor': encode_cursor([{}, 1])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_profile_pages_with_full_totals(self):
+        """Test the profile pages bookings but totals cover all of them"""
+        user = User.objects.create_user(username='fan', password='pass123')
+        for event in self.events[:3]:
+            Booking.objects.create(user=user, event=event, ticket_type='standard', tickets=2)
+        self.client.login(username='fan', password='pass123')
+        response = self.client.get(reverse('events:profile'))
+        self.assertEqual([b.event.title for b in response.context['bookings']], ["Event 2", "Event 1"])
+        self.assertEqual(response.context['totals'], {'bookings': 3, 'tickets': 6, 'spent': 2700})
+        data = self.client.get(response.context['next_url'] + '&format=json').json()
+        self.assertEqual([row['event']['title'] for row in data['results']], ["Event 0"])
@@ -0,0 +1,177 @@
+# events/tests/test_payments.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from events.models import Category, Event, PaymentTransaction, Job
+from events import holds, jobs
+
+
+class JobQueueTest(TestCase):
+    """Test the database-backed job queue"""
+    
+    def setUp(self):
+        self.calls = []
+        
+        @jobs.register('tests.record')
+        def record(value):
+            self.calls.append(value)
+            return {'value': value}
+        
+        @jobs.register('tests.explode')
+        def explode():
+            raise RuntimeError("boom")
+    
+    def test_enqueue_and_run(self):
+        """Test a queued job is claimed, run and marked done"""
+        job = jobs.enqueue('tests.record', {'value': 7})
+        self.assertEqual(job.status, 'queued')
+        
+        self.assertEqual(jobs.run_pending(), 1)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.result, {'value': 7})
+        self.assertEqual(self.calls, [7])
+    
+    def test_job_claimed_only_once(self):
+        """Test two workers cannot claim the same job"""
+        jobs.enqueue('tests.record', {'value': 1})
+        first = jobs.claim_next('worker-a')
+        second = jobs.claim_next('worker-b')
+        
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(first.locked_by, 'worker-a')
+    
+    def test_delayed_job_not_run_early(self):
+        """Test jobs wait for their run_after time"""
+        jobs.enqueue('tests.record', {'value': 1}, delay=60)
+        self.assertEqual(jobs.run_pending(), 0)
+    
+    def test_failing_job_is_retried_then_failed(self):
+        """Test failing jobs back off and finally fail"""
+        job = jobs.enqueue('tests.explode', max_attempts=2)
+        
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertIn('boom', job.last_error)
+        
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class PaymentPipelineTest(TestCase):
+    """Test checkout hands provider calls to the background worker"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Test Event",
+            description="Test Description",
+            date=date.today() + timedelta(days=30),
+            category=self.category,
+            vip_seats_left=50,
+            gold_seats_left=100,
+            standard_seats_left=200
+        )
+        self.client.login(username='testuser', password='testpass123')
+    
+    def submit(self, method='mtn'):
+        return self.client.post(
+            reverse('events:payment_page', kwargs={'event_id': self.event.id}),
+            {
+                'ticket_type': 'gold',
+                'tickets': '2',
+                'payment_method': method,
+                'phone_number': '0977123456'
+            }
+        )
+    
+    @patch('events.payments.process_payment')
+    def test_checkout_does_not_call_provider(self, process_payment):
+        """Test the request only queues the provider call"""
+        response = self.submit()
+        
+        self.assertEqual(response.status_code, 200)
+        process_payment.assert_not_called()
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        self.assertEqual(payment.status, 'submitted')
+        self.assertTrue(Job.objects.filter(kind='payments.process', payload={'payment_id': payment.id}).exists())
+    
+    @patch('events.payments.process_payment', return_value=True)
+    def test_worker_accepts_payment(self, process_payment):
+        """Test an accepted payment moves to pending admin confirmation"""
+        self.submit()
+        jobs.run_pending()
+        
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        self.assertEqual(payment.status, 'pending')
+        process_payment.assert_called_once_with('mtn', Decimal('1700.00'), {'phone': '0977123456'})
+    
+    @patch('events.payments.process_payment', return_value=False)
+    def test_worker_declined_payment(self, process_payment):
+        """Test a declined payment is marked failed"""
+        self.submit()
+        jobs.run_pending()
+        
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        self.assertEqual(payment.status, 'failed')
+        self.assertIn('declined', payment.notes)
+    
+    @patch('events.payments.process_payment', side_effect=ConnectionError('provider down'))
+    def test_exhausted_job_fails_payment(self, process_payment):
+        """Test a payment whose job runs out of attempts is failed and its seats released"""
+        self.submit()
+        self.assertEqual(holds.held_seats(self.event.id)['gold'], 2)
+        job = Job.objects.get(kind='payments.process')
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        jobs.run_pending()
+
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'failed')
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        self.assertEqual(payment.status, 'failed')
+        self.assertIn('could not be processed', payment.notes)
+        self.assertEqual(holds.held_seats(self.event.id)['gold'], 0)
+
+    def test_status_endpoint(self):
+        """Test the polling endpoint reports the payment state"""
+        self.submit()
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        
+        response = self.client.get(reverse('events:payment_status', kwargs={'payment_id': payment.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'submitted')
+        self.assertTrue(response.json()['processing'])
+        
+        with patch('events.payments.process_payment', return_value=True):
+            jobs.run_pending()
+        
+        response = self.client.get(reverse('events:payment_status', kwargs={'payment_id': payment.id}))
+        self.assertEqual(response.json()['status'], 'pending')
+        self.assertFalse(response.json()['processing'])
+    
+    def test_status_endpoint_hidden_from_other_users(self):
+        """Test users cannot poll someone else's payment"""
+        self.submit()
+        payment = PaymentTransaction.objects.get(booking__user=self.user)
+        
+        User.objects.create_user(username='other', password='otherpass123')
+        self.client.login(username='other', password='otherpass123')
+        response = self.client.get(reverse('events:payment_status', kwargs={'payment_id': payment.id}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,168 @@
+# events/tests/test_rollups.py
+
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from events.models import Booking, Category, Event, PaymentTransaction, RevenueDaily
+from events import rollups
+
+DAY = date(2026, 3, 10)
+NEXT_DAY = DAY + timedelta(days=1)
+
+
+def snapshot():
+    return sorted(RevenueDaily.objects.values_list(
+        'day', 'event__title', 'payment_method', 'ticket_type', *rollups.MEASURES,
+    ))
+
+
+class RollupTestMixin:
+    """Seed payments on two days across methods, tiers and statuses"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass123')
+        category = Category.objects.create(name="Music")
+        self.events = [
+            Event.objects.create(
+                title=title, description="Live music", date=date.today() + timedelta(days=30), location="Lusaka",
+                category=category, vip_seats_left=100, gold_seats_left=100, standard_seats_left=100,
+            )
+            for title in ("Concert", "Festival")
+        ]
+        self.pay(DAY, 'mtn', 'vip', 2, 'completed')
+        self.pay(DAY, 'mtn', 'vip', 1, 'completed')
+        self.pay(DAY, 'airtel', 'gold', 1, 'refunded')
+        self.pay(DAY, 'airtel', 'gold', 3, 'pending')
+        self.pay(NEXT_DAY, 'bank', 'standard', 4, 'completed', event=self.events[1])
+        self.age_payments()
+
+    def pay(self, day, method, ticket_type, tickets, status, event=None):
+        booking = Booking.objects.create(user=self.user, event=event or self.events[0], ticket_type=ticket_type, tickets=tickets)
+        payment = PaymentTransaction.objects.create(
+            booking=booking, payment_method=method, amount=booking.total_price, status=status,
+        )
+        # Paid at noon, local time, on ``day``
+        PaymentTransaction.objects.filter(pk=payment.pk).update(
+            created_at=timezone.make_aware(datetime.combine(day, time(12)))
+        )
+        return payment
+
+    def age_payments(self):
+        """Pretend the payments were last changed an hour ago (update() leaves updated_at alone)"""
+        PaymentTransaction.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+
+@override_settings(REVENUE_ROLLUP_OVERLAP=0)
+class RevenueRollupTest(RollupTestMixin, TestCase):
+    """Test the incremental daily revenue rollup"""
+
+    def test_build(self):
+        """Test completed and refunded payments are rolled up by day, event, method and tier"""
+        result = rollups.build()
+        self.assertEqual((result['days'], result['rows']), (2, 3))
+        self.assertEqual(snapshot(), [
+            (DAY, 'Concert', 'airtel', 'gold', 0, 0, 0, 1, 850),
+            (DAY, 'Concert', 'mtn', 'vip', 2, 3, 4500, 0, 0),
+            (NEXT_DAY, 'Festival', 'bank', 'standard', 1, 4, 1800, 0, 0),
+        ])
+        self.assertEqual(rollups.high_water(), result['high_water'])
+
+    def test_incremental_and_idempotent(self):
+        """Test later runs only rebuild the days of changed payments, and re-runs change nothing"""
+        rollups.build()
+        built = snapshot()
+        self.assertEqual(rollups.build()['days'], 0)
+        self.assertEqual(snapshot(), built)
+
+        # A payment confirmed today, made on DAY
+        payment = PaymentTransaction.objects.get(status='pending')
+        payment.status = 'completed'
+        payment.save()
+        with CaptureQueriesContext(connection) as queries:
+            result = rollups.build()
+        self.assertEqual(result['days'], 1)
+        self.assertIn((DAY, 'Concert', 'airtel', 'gold', 1, 3, 2550, 1, 850), snapshot())
+        # Only DAY's payments were aggregated
+        self.assertNotIn(NEXT_DAY.isoformat(), ' '.join(query['sql'] for query in queries.captured_queries))
+
+        updated = snapshot()
+        rollups.build(full=True)
+        rollups.build(full=True)
+        self.assertEqual(snapshot(), updated)
+
+    def test_full_build_drops_emptied_days(self):
+        """Test a full build removes days whose payments were deleted"""
+        rollups.build()
+        PaymentTransaction.objects.filter(booking__event=self.events[1]).delete()
+        rollups.build(full=True)
+        self.assertEqual({row[0] for row in snapshot()}, {DAY})
+
+    def test_overlap_rereads_late_commits(self):
+        """Test changes stamped just before the high-water mark are still picked up"""
+        rollups.build()
+        late = self.pay(NEXT_DAY, 'zamtel', 'vip', 1, 'completed')
+        PaymentTransaction.objects.filter(pk=late.pk).update(updated_at=rollups.high_water() - timedelta(seconds=30))
+        self.assertEqual(rollups.build()['days'], 0)
+        with self.settings(REVENUE_ROLLUP_OVERLAP=60):
+            self.assertEqual(rollups.build()['days'], 1)
+        self.assertTrue(RevenueDaily.objects.filter(payment_method='zamtel').exists())
+
+    def test_command(self):
+        """Test the management command builds the rollup"""
+        out = StringIO()
+        call_command('build_revenue_rollups', full=True, stdout=out)
+        self.assertIn('2 day(s) rebuilt, 3 row(s)', out.getvalue())
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class RevenueReportTest(RollupTestMixin, TestCase):
+    """Test the staff revenue report and its JSON endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        rollups.build()
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username='finance', password='pass12345', is_staff=True))
+        self.window = {'start': DAY.isoformat(), 'end': NEXT_DAY.isoformat()}
+
+    def test_json_reads_only_the_rollup(self):
+        """Test the JSON groups the rollup without touching the payments table"""
+        url = reverse('events:revenue_report_json')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url, dict(self.window, by='method')).json()
+        self.assertFalse(any('events_paymenttransaction' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(
+            [(row['key'], row['label'], row['revenue']) for row in data['rows']],
+            [('mtn', 'MTN Mobile Money', 4500.0), ('bank', 'Bank Transfer', 1800.0), ('airtel', 'Airtel Money', 0.0)],
+        )
+        self.assertEqual(data['totals'], {'payments': 3, 'tickets': 7, 'revenue': 6300.0, 'refunds': 1, 'refunded_amount': 850.0})
+
+        data = self.client.get(url, dict(self.window, by='day')).json()
+        self.assertEqual([(row['key'], row['revenue']) for row in data['rows']],
+                         [(DAY.isoformat(), 4500.0), (NEXT_DAY.isoformat(), 1800.0)])
+        data = self.client.get(url, {'start': NEXT_DAY.isoformat(), 'end': NEXT_DAY.isoformat(), 'by': 'tier'}).json()
+        self.assertEqual([(row['label'], row['tickets']) for row in data['rows']], [('Standard', 4)])
+
+        self.assertEqual(self.client.get(url, {'by': 'weekday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '10/03/2026'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': NEXT_DAY.isoformat(), 'end': DAY.isoformat()}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'end': '0001-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('events:revenue_report'), {'end': '0001-01-01'}).status_code, 400)
+
+    def test_report_page(self):
+        """Test the staff page shows the breakdown and is hidden from customers"""
+        response = self.client.get(reverse('events:revenue_report'), dict(self.window, by='event'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Festival')
+        self.assertContains(response, 'K6300.00')
+        customer = Client()
+        customer.force_login(self.user)
+        self.assertEqual(customer.get(reverse('events:revenue_report')).status_code, 302)
+        self.assertEqual(customer.get(reverse('events:revenue_report_json')).status_code, 302)
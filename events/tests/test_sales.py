@@ -0,0 +1,164 @@
+# events/tests/test_sales.py
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from datetime import date, timedelta
+from events.approvals import bulk_approve
+from events.inventory import SoldOut
+from events.models import Booking, Category, Event, EventSalesSummary, PaymentTransaction
+from events import sales
+
+
+class SalesTestMixin:
+    """Seed an event with seats in every tier"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', email='fan@example.com', password='pass123')
+        self.category = Category.objects.create(name="Music")
+        self.event = self.make_event("Concert")
+
+    def make_event(self, title):
+        return Event.objects.create(
+            title=title, description="Live music", date=date.today() + timedelta(days=30), location="Lusaka",
+            category=self.category, vip_seats_left=50, gold_seats_left=50, standard_seats_left=50,
+        )
+
+    def book(self, ticket_type='vip', tickets=2, status='pending', event=None):
+        booking = Booking.objects.create(user=self.user, event=event or self.event, ticket_type=ticket_type, tickets=tickets)
+        PaymentTransaction.objects.create(booking=booking, payment_method='mtn', amount=booking.total_price, status=status)
+        return booking
+
+    def summary(self, ticket_type='vip', event=None):
+        row = EventSalesSummary.objects.get(event=event or self.event, ticket_type=ticket_type)
+        return {field: getattr(row, field) for field in sales.FIELDS}
+
+
+class SalesSummaryTest(SalesTestMixin, TestCase):
+    """Test the summary follows bookings and payments through their life"""
+
+    def test_payment_lifecycle(self):
+        """Test bookings and payment transitions move tickets and revenue between counters"""
+        booking = self.book(tickets=2)
+        self.book(tickets=1, status='failed')
+        self.assertEqual(self.summary(), {
+            'bookings': 2, 'sold_tickets': 0, 'pending_tickets': 2, 'refunded_tickets': 0, 'revenue': 0,
+        })
+
+        payment = booking.payment
+        payment.status = 'completed'
+        payment.save()
+        self.assertEqual(self.summary(), {
+            'bookings': 2, 'sold_tickets': 2, 'pending_tickets': 0, 'refunded_tickets': 0, 'revenue': 3000,
+        })
+
+        payment.status = 'refunded'
+        payment.save()
+        self.assertEqual(self.summary(), {
+            'bookings': 2, 'sold_tickets': 0, 'pending_tickets': 0, 'refunded_tickets': 2, 'revenue': 0,
+        })
+        self.assertEqual(sales.verify(), [])
+
+    def test_edits_and_deletes(self):
+        """Test tier upgrades move the figures and deletions take them away"""
+        booking = self.book('gold', tickets=3, status='completed')
+        booking.ticket_type = 'vip'
+        booking.save()
+        self.assertEqual(self.summary('gold'), {
+            'bookings': 0, 'sold_tickets': 0, 'pending_tickets': 0, 'refunded_tickets': 0, 'revenue': 0,
+        })
+        self.assertEqual(self.summary('vip'), {
+            'bookings': 1, 'sold_tickets': 3, 'pending_tickets': 0, 'refunded_tickets': 0, 'revenue': 2550,
+        })
+
+        booking.delete()
+        self.assertEqual(self.summary('vip'), {
+            'bookings': 0, 'sold_tickets': 0, 'pending_tickets': 0, 'refunded_tickets': 0, 'revenue': 0,
+        })
+        self.assertEqual(sales.verify(), [])
+
+        # Deleting the event takes its rows with it
+        self.book()
+        self.event.delete()
+        self.assertFalse(EventSalesSummary.objects.exists())
+
+    def test_bulk_approval(self):
+        """Test bulk approval moves tickets with one increment per event and tier"""
+        other = self.make_event("Festival")
+        for event in (self.event, other):
+            self.book('vip', 2, event=event)
+            self.book('vip', 1, event=event)
+            self.book('standard', 4, event=event)
+        admin = User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123')
+        bulk_approve(PaymentTransaction.objects.all(), admin)
+        self.assertEqual(self.summary('vip', other), {
+            'bookings': 2, 'sold_tickets': 3, 'pending_tickets': 0, 'refunded_tickets': 0, 'revenue': 4500,
+        })
+        self.assertEqual(self.summary('standard')['revenue'], 1800)
+        self.assertEqual(sales.verify(), [])
+
+    def test_refused_confirmation_changes_nothing(self):
+        """Test a confirmation refused for lack of seats leaves the figures alone"""
+        booking = self.book()
+        payment = booking.payment
+        self.event.vip_seats_left = 0
+        self.event.save()
+        payment.status = 'completed'
+        with self.assertRaises(SoldOut):
+            payment.save()
+        self.assertEqual(self.summary()['sold_tickets'], 0)
+        self.assertEqual(self.summary()['pending_tickets'], 2)
+
+
+class RebuildSalesSummaryTest(SalesTestMixin, TestCase):
+    """Test the backfill command"""
+
+    def test_rebuild_and_verify(self):
+        """Test the command backfills rows written around the signals and verifies them"""
+        self.book('vip', 2, 'completed')
+        self.book('gold', 1, 'pending')
+        for index in range(5):
+            self.book('standard', 1, 'completed', event=self.make_event(f"Gig {index}"))
+        # A change made behind the signals' back
+        PaymentTransaction.objects.filter(booking__ticket_type='gold').update(status='completed')
+        EventSalesSummary.objects.filter(ticket_type='standard').delete()
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_sales_summary', verify_only=True, stdout=out)
+        self.assertIn('summary 1, actual 0', out.getvalue())
+
+        call_command('rebuild_sales_summary', chunk_size=2, stdout=out)
+        self.assertIn('matches the source tables', out.getvalue())
+        self.assertEqual(self.summary('gold')['sold_tickets'], 1)
+        self.assertEqual(EventSalesSummary.objects.filter(ticket_type='standard').count(), 5)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class SalesReadersTest(SalesTestMixin, TestCase):
+    """Test the admin and dashboard read the summary"""
+
+    def test_event_admin_and_dashboard(self):
+        """Test the event admin and the popular events show the summary figures"""
+        self.book('vip', 2, 'completed')
+        self.book('gold', 1, 'pending')
+        popular = self.make_event("Festival")
+        for _ in range(3):
+            self.book('standard', 1, 'refunded', event=popular)
+
+        client = Client()
+        client.force_login(User.objects.create_superuser(username='boss', email='boss@example.com', password='pass123'))
+        response = client.get(reverse('admin:events_event_change', args=[self.event.pk]))
+        self.assertContains(response, '2 sold, 0 pending, 0 refunded')
+        self.assertContains(response, '0 sold, 1 pending, 0 refunded')
+        self.assertContains(response, 'K3,000')
+
+        response = client.get(reverse('admin:index'))
+        self.assertEqual(
+            [(event['title'], event['booking_count']) for event in response.context['popular_events']],
+            [("Festival", 3), ("Concert", 2)],
+        )
@@ -0,0 +1,133 @@
+# events/tests/test_search.py
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.core.management import call_command
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+from events.models import Category, Event, Venue, Resource
+from events import search
+
+
+class SearchTestMixin:
+    """A few upcoming events, venues and resources"""
+
+    def setUp(self):
+        search.results_cache.clear()
+        self.category = Category.objects.create(name="Music")
+        self.jazz = self.event("Jazz Night", "Smooth saxophone under the stars", "Lusaka")
+        self.rock = self.event("Rock Festival", "Loud guitars and a jazz tribute set", "Ndola")
+        self.talk = self.event("Tech Talk", "Cloud computing for startups", "Lusaka")
+        Venue.objects.create(name="Heroes Stadium", address="Great East Road", capacity=60000,
+                             hourly_rate=Decimal('5000'), facilities="Parking, floodlights")
+        Venue.objects.create(name="Civic Hall", address="Independence Avenue", capacity=800,
+                             hourly_rate=Decimal('500'), facilities="Projector, parking")
+        Resource.objects.create(name="Line Array Speakers", resource_type='sound', cost_per_day=Decimal('900'),
+                                description="Outdoor sound", supplier_name="Zed Audio")
+
+    def event(self, title, description, location):
+        return Event.objects.create(
+            title=title, description=description, location=location,
+            date=date.today() + timedelta(days=10), category=self.category,
+        )
+
+
+class SearchBackendTest(SearchTestMixin, TestCase):
+    """Test the FTS5 index, ranking and cache"""
+
+    def test_uses_fts5_on_sqlite(self):
+        """Test the SQLite test database has the FTS5 tables"""
+        self.assertEqual(search.backend(), 'fts5')
+
+    def test_ranking_prefers_title_matches(self):
+        """Test a title match ranks above a description match"""
+        self.assertEqual(search.search_ids('event', 'jazz'), [self.jazz.pk, self.rock.pk])
+
+    def test_prefix_and_all_words(self):
+        """Test the last word matches as a prefix and every word must match"""
+        self.assertEqual(search.search_ids('event', 'jaz'), [self.jazz.pk, self.rock.pk])
+        self.assertEqual(search.search_ids('event', 'jazz tri'), [self.rock.pk])
+        self.assertEqual(search.search_ids('event', 'festivals'), [self.rock.pk])  # stemmed
+        self.assertEqual(search.search_ids('event', '!!!'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test signals keep the index in sync"""
+        self.talk.title = "Jazz Brunch"
+        self.talk.save()
+        self.assertIn(self.talk.pk, search.search_ids('event', 'jazz'))
+        self.jazz.delete()
+        self.assertNotIn(self.jazz.pk, search.search_ids('event', 'jazz'))
+
+    def test_results_are_cached(self):
+        """Test repeated normalized queries skip the database"""
+        search.search_ids('event', 'Jazz')
+        with self.assertNumQueries(0):
+            self.assertEqual(search.search_ids('event', '  JAZZ!! '), [self.jazz.pk, self.rock.pk])
+
+    def test_lru_evicts_oldest(self):
+        """Test the cache keeps only the most recently used entries"""
+        cache = search.LRUCache(size=2, ttl=60)
+        cache.set(('event', 'a'), [1])
+        cache.set(('event', 'b'), [2])
+        cache.get(('event', 'a'))
+        cache.set(('event', 'c'), [3])
+        self.assertIsNone(cache.get(('event', 'b')))
+        self.assertEqual(cache.get(('event', 'a')), [1])
+
+    def test_rebuild_after_bulk_changes(self):
+        """Test the rebuild command picks up rows written without signals"""
+        Event.objects.filter(pk=self.talk.pk).update(title="Salsa Social")
+        self.assertEqual(search.search_ids('event', 'salsa'), [])
+        call_command('rebuild_search_index', kinds=['event'], stdout=StringIO())
+        self.assertEqual(search.search_ids('event', 'salsa'), [self.talk.pk])
+
+    def test_icontains_fallback(self):
+        """Test other databases fall back to icontains with the same semantics"""
+        with patch('events.search.backend', return_value='icontains'):
+            self.assertEqual(set(search.search_ids('venue', 'parking hall')), {Venue.objects.get(name="Civic Hall").pk})
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class SearchViewTest(SearchTestMixin, TestCase):
+    """Test the list pages use the search index"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_events_list(self):
+        """Test event search returns ranked upcoming events"""
+        response = self.client.get(reverse('events:events_list'), {'search': 'jazz'})
+        self.assertEqual(list(response.context['events']), [self.jazz, self.rock])
+        self.assertIsNone(response.context['next_url'])
+
+    @override_settings(SEARCH_MAX_RESULTS=1)
+    def test_result_cap_applies_after_filters(self):
+        """Test past events and other categories do not use up the result cap"""
+        past = self.event("Jazz", "Jazz jazz jazz", "Lusaka")
+        Event.objects.filter(pk=past.pk).update(date=date.today() - timedelta(days=10))
+        other = Category.objects.create(name="Talks")
+        Event.objects.create(title="Jazz", description="Jazz jazz jazz", location="Lusaka",
+                             date=date.today() + timedelta(days=10), category=other)
+        self.assertNotIn(self.jazz.pk, search.search_ids('event', 'jazz'))
+
+        response = self.client.get(reverse('events:events_list'), {'search': 'jazz', 'category': self.category.slug})
+        self.assertEqual(list(response.context['events']), [self.jazz])
+
+    def test_venues_and_resources_lists(self):
+        """Test venue and resource search"""
+        response = self.client.get(reverse('events:venues_list'), {'search': 'floodlight'})
+        self.assertEqual([venue.name for venue in response.context['venues']], ["Heroes Stadium"])
+        response = self.client.get(reverse('events:resources_list'), {'search': 'zed'})
+        self.assertEqual(response.context['total_resources'], 1)
+
+    @override_settings(LISTING_PAGE_SIZE=1)
+    def test_search_results_page_by_rank(self):
+        """Test search results keep their relevance order across pages"""
+        first = self.client.get(reverse('events:events_list'), {'search': 'jazz'})
+        self.assertEqual(list(first.context['events']), [self.jazz])
+        second = self.client.get(first.context['next_url'])
+        self.assertEqual(list(second.context['events']), [self.rock])
+        self.assertIsNone(second.context['next_url'])
@@ -0,0 +1,173 @@
+# events/tests/test_snowflake.py
+
+import multiprocessing
+import threading
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import date, timedelta
+from decimal import Decimal
+from events.models import Booking, Category, Event, IdWorkerLease, PaymentTransaction
+from events import snowflake
+from events.snowflake import Snowflake
+
+
+def _generate(worker_id, count, threads, queue):
+    """Child process: several threads sharing one generator"""
+    generator = Snowflake(worker_id)
+    results = [[] for _ in range(threads)]
+
+    def run(bucket):
+        for _ in range(count):
+            bucket.append(generator.next_id())
+    pool = [threading.Thread(target=run, args=(bucket,)) for bucket in results]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    queue.put((worker_id, results, generator.allocate(5000)))
+
+
+def _forked_generator(queue):
+    queue.put(snowflake._generator is None and not snowflake._lease)
+
+
+class SnowflakeGeneratorTest(TestCase):
+    """Test the ID layout, ordering and bulk allocation"""
+
+    def test_ids_are_time_ordered_and_decode(self):
+        """Test IDs ascend and decode to their creation time, worker and sequence"""
+        before = timezone.now()
+        generator = Snowflake(37)
+        ids = [generator.next_id() for _ in range(10000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        parts = snowflake.decode(ids[0])
+        self.assertEqual((parts.worker_id, parts.sequence), (37, 0))
+        self.assertLess(abs((parts.created_at - before).total_seconds()), 1)
+        self.assertLess(ids[-1], 2 ** 63)
+
+    def test_sequence_overflow_and_clock_going_back(self):
+        """Test a full millisecond and a backwards clock never repeat or reorder IDs"""
+        clock = [1000]
+        generator = Snowflake(1, clock=lambda: clock[0])
+        ids = generator.allocate(snowflake.MAX_SEQUENCE + 3)
+        self.assertEqual(snowflake.decode(ids[-1]).sequence, 1)
+        self.assertEqual((ids[-1] >> snowflake.TIMESTAMP_SHIFT), 1001)
+        clock[0] = 500
+        later = generator.allocate(3)
+        self.assertGreater(later[0], ids[-1])
+        self.assertEqual(len(set(ids + later)), len(ids) + 3)
+
+    def test_worker_id_range(self):
+        """Test worker ids outside 10 bits are refused"""
+        with self.assertRaises(ValueError):
+            Snowflake(1024)
+
+    def test_unique_across_processes(self):
+        """Test forked processes, each with several threads, never produce the same ID"""
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [context.Process(target=_generate, args=(worker_id, 5000, 4, queue)) for worker_id in range(6)]
+        for worker in workers:
+            worker.start()
+        outcomes = [queue.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        all_ids = []
+        for worker_id, results, block in outcomes:
+            for bucket in results:
+                self.assertEqual(bucket, sorted(bucket))  # monotonic per thread
+                all_ids.extend(bucket)
+            self.assertEqual(block, list(sorted(block)))
+            self.assertGreater(block[0], max(max(bucket) for bucket in results))
+            all_ids.extend(block)
+            self.assertEqual({snowflake.decode(value).worker_id for value in block}, {worker_id})
+        self.assertEqual(len(all_ids), 6 * (4 * 5000 + 5000))
+        self.assertEqual(len(set(all_ids)), len(all_ids))
+
+    def test_fork_drops_the_parents_generator(self):
+        """Test a forked child leases its own worker id instead of reusing the parent's"""
+        snowflake.next_id()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        child = context.Process(target=_forked_generator, args=(queue,))
+        child.start()
+        self.assertTrue(queue.get(timeout=30))
+        child.join()
+        self.assertIsNotNone(snowflake._generator)
+
+
+class WorkerLeaseTest(TestCase):
+    """Test worker id leasing"""
+
+    def setUp(self):
+        snowflake._forget()
+
+    def test_claims_are_distinct_and_expired_ones_are_reused(self):
+        """Test live leases are never shared and expired ones are taken over"""
+        first = snowflake.claim_worker_id('host:1:a')
+        second = snowflake.claim_worker_id('host:2:b')
+        self.assertNotEqual(first, second)
+
+        later = timezone.now() + timedelta(hours=1)
+        self.assertTrue(snowflake.renew_worker_id(second, 'host:2:b', later))
+        self.assertEqual(snowflake.claim_worker_id('host:3:c', later), first)
+        self.assertEqual(IdWorkerLease.objects.get(worker_id=first).owner, 'host:3:c')
+        self.assertFalse(snowflake.renew_worker_id(first, 'host:1:a'))
+
+    def test_process_generator_leases_and_recovers_a_lost_lease(self):
+        """Test the process-wide generator leases an id and takes a new one if it loses it"""
+        first = snowflake.next_id()
+        worker_id = snowflake.decode(first).worker_id
+        self.assertEqual(IdWorkerLease.objects.get().worker_id, worker_id)
+
+        # The lease expired and another process took the id
+        IdWorkerLease.objects.filter(worker_id=worker_id).update(owner='elsewhere')
+        snowflake._lease['renew_at'] = timezone.now()
+        second = snowflake.next_id()
+        self.assertNotEqual(snowflake.decode(second).worker_id, worker_id)
+        self.assertGreater(second, first)
+
+    @override_settings(SNOWFLAKE_WORKER_ID=900)
+    def test_pinned_worker_id(self):
+        """Test SNOWFLAKE_WORKER_ID skips leasing"""
+        self.assertEqual(snowflake.decode(snowflake.next_id()).worker_id, 900)
+        self.assertFalse(IdWorkerLease.objects.exists())
+
+
+class TransactionIdTest(TestCase):
+    """Test PaymentTransaction IDs"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='fan', password='pass123')
+        self.event = Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka",
+            date=date.today() + timedelta(days=5), category=Category.objects.create(name="Music"),
+        )
+
+    def booking(self):
+        return Booking.objects.create(user=self.user, event=self.event, ticket_type='standard', tickets=1)
+
+    def test_prefix_and_decode(self):
+        """Test IDs keep the provider prefix and decode back to the creation time"""
+        payment = PaymentTransaction.objects.create(booking=self.booking(), payment_method='airtel', amount=Decimal('100'))
+        self.assertRegex(payment.transaction_id, r'^AIR\d+$')
+        created_at = snowflake.decode(payment.transaction_id).created_at
+        self.assertLess(abs((created_at - payment.created_at).total_seconds()), 1)
+
+    def test_bulk_create(self):
+        """Test bulk_create gets ordered, unique IDs from one allocation"""
+        payments = [
+            PaymentTransaction(booking=self.booking(), payment_method=method, amount=Decimal('100'))
+            for method in ('mtn', 'bank', 'zamtel')
+        ]
+        snowflake.next_id()  # lease this process's worker id first
+        with self.assertNumQueries(0):
+            PaymentTransaction.assign_transaction_ids(payments)
+        PaymentTransaction.objects.bulk_create(payments)
+        ids = list(PaymentTransaction.objects.order_by('id').values_list('transaction_id', flat=True))
+        self.assertEqual([value[:3] for value in ids], ['MTN', 'BAN', 'ZAM'])
+        numbers = [int(value[3:]) for value in ids]
+        self.assertEqual(numbers, sorted(set(numbers)))
@@ -0,0 +1,254 @@
+# events/tests/test_tickets.py
+
+import base64
+import gzip
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from datetime import date, timedelta
+from events.models import Booking, Category, CheckIn, Event, PaymentTransaction
+from events import tickets
+
+
+def make_booking(user, event, status='completed', count=2, ticket_type='vip'):
+    booking = Booking.objects.create(user=user, event=event, ticket_type=ticket_type, tickets=count)
+    PaymentTransaction.objects.create(booking=booking, payment_method='mtn', amount=booking.total_price, status=status)
+    return booking
+
+
+class TicketTokenTest(TestCase):
+    """Test signing and offline verification of ticket tokens"""
+
+    def test_round_trip(self):
+        """Test a signed token verifies back to its ticket"""
+        ticket = tickets.Ticket(42, 10577, 2, 'vip')
+        token = tickets.sign(ticket)
+        self.assertRegex(token, r'^MT1\.42\.10577\.2\.V\.[A-Z2-7]{16}$')
+        self.assertEqual(tickets.verify(token), ticket)
+        self.assertEqual(tickets.verify(token.lower(), tickets.event_key(42)), ticket)
+
+    def test_tampering_is_detected(self):
+        """Test changing any field, or using another event's key, fails"""
+        token = tickets.sign(tickets.Ticket(42, 10577, 2, 'standard'))
+        for forged in (token.replace('.10577.', '.10578.'), token.replace('.2.S.', '.3.S.'),
+                       token.replace('.S.', '.V.'), token[:-1] + ('A' if token[-1] != 'A' else 'B')):
+            with self.assertRaises(tickets.InvalidTicket):
+                tickets.verify(forged)
+        with self.assertRaises(tickets.InvalidTicket):
+            tickets.verify(token, tickets.event_key(43))
+        for junk in ('', 'hello', 'MT1.1.2.3.X.AAAA', '#000123'):
+            with self.assertRaises(tickets.InvalidTicket):
+                tickets.verify(junk)
+
+    @override_settings(TICKET_SIGNING_KEY='rotated')
+    def test_key_rotation(self):
+        """Test tickets signed with the old key stop verifying"""
+        with self.settings(TICKET_SIGNING_KEY='original'):
+            token = tickets.sign(tickets.Ticket(1, 1, 1, 'gold'))
+        with self.assertRaises(tickets.InvalidTicket):
+            tickets.verify(token)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    CHECKIN_TOKEN='scan-secret',
+)
+class CheckInTest(TestCase):
+    """Test the roster download and the batched scan sync"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='chanda', password='pass12345', first_name='Chanda', last_name='Banda')
+        category = Category.objects.create(name="Sports")
+        self.event = Event.objects.create(
+            title="Derby", description="Test", location="Lusaka", date=date.today() + timedelta(days=5),
+            category=category, vip_seats_left=100,
+        )
+        self.other_event = Event.objects.create(
+            title="Cup Final", description="Test", location="Ndola", date=date.today() + timedelta(days=9),
+            category=category, vip_seats_left=100,
+        )
+        self.booking = make_booking(self.user, self.event)
+        self.refunded = make_booking(self.user, self.event, status='refunded', count=1)
+        self.tokens = [token for _, token in tickets.tickets_for(self.booking)]
+        # A scanner device of self.event
+        self.client = Client(HTTP_AUTHORIZATION=self.bearer(self.event))
+
+    def sync(self, scans, device='north-1', event=None, client=None, **extra):
+        event = event or self.event
+        url = reverse('events:checkin_sync', args=[event.id])
+        body = json.dumps({'device': device, 'scans': scans})
+        if client is None:
+            client = self.client
+            extra.setdefault('HTTP_AUTHORIZATION', self.bearer(event))
+        return client.post(url, body, content_type='application/json', **extra)
+
+    def bearer(self, event):
+        return f'Bearer {tickets.scanner_token(event.id)}'
+
+    def test_first_scan_wins_and_later_ones_are_duplicates(self):
+        """Test a ticket gets in once across devices, and re-sending a batch is harmless"""
+        scans = [{'token': token, 'scanned_at': 1_760_000_000_000 + i, 'gate': 'North'} for i, token in enumerate(self.tokens)]
+        response = self.sync(scans)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['accepted'], 2)
+        self.assertEqual(CheckIn.objects.filter(event=self.event).count(), 2)
+
+        # The same batch again (a retry after a timeout) is still accepted
+        self.assertEqual(self.sync(scans).json()['accepted'], 2)
+
+        # Another gate sees the ticket as used, and by whom
+        data = self.sync([{'token': self.tokens[0], 'scanned_at': 1_760_000_100_000, 'gate': 'South'}], device='south-2').json()
+        self.assertEqual(data['duplicates'], 1)
+        self.assertEqual(data['results'][0]['device'], 'north-1')
+        self.assertEqual(data['results'][0]['gate'], 'North')
+        self.assertEqual(data['results'][0]['scanned_at'], '2025-10-09T08:53:20+00:00')
+
+        # Two scans of one ticket in one batch: the first gets in
+        other = make_booking(self.user, self.event, count=1)
+        token = tickets.tickets_for(other)[0][1]
+        data = self.sync([{'token': token, 'scanned_at': 1}, {'token': token, 'scanned_at': 2}]).json()
+        self.assertEqual([result['status'] for result in data['results']], ['accepted', 'duplicate'])
+
+    def test_rejections(self):
+        """Test forged, foreign, refunded and out-of-range tickets are refused"""
+        foreign = tickets.tickets_for(make_booking(self.user, self.other_event))[0][1]
+        beyond = tickets.sign(tickets.Ticket(self.event.id, self.booking.id, 3, 'vip'))
+        scans = [
+            {'token': self.tokens[0][:-2] + 'AA'},
+            {'token': foreign},
+            {'token': tickets.tickets_for(self.refunded)[0][1]},
+            {'token': beyond},
+            {'token': self.tokens[1], 'scanned_at': 'yesterday'},
+            'not a scan',
+        ]
+        data = self.sync(scans).json()
+        self.assertEqual(
+            [result['status'] for result in data['results']],
+            ['invalid', 'wrong_event', 'revoked', 'unknown', 'invalid', 'invalid'],
+        )
+        self.assertEqual((data['accepted'], data['rejected']), (0, 6))
+        self.assertFalse(CheckIn.objects.exists())
+
+    def test_large_batches_cost_a_few_queries(self):
+        """Test a batch of 1,000 scans is a handful of queries, not one per scan"""
+        bookings = Booking.objects.bulk_create([
+            Booking(user=self.user, event=self.event, ticket_type='standard', tickets=2, total_price=900)
+            for _ in range(500)
+        ])
+        if bookings[0].pk is None:
+            bookings = list(Booking.objects.filter(event=self.event, ticket_type='standard').order_by('pk'))
+        PaymentTransaction.objects.bulk_create(PaymentTransaction.assign_transaction_ids([
+            PaymentTransaction(booking=booking, payment_method='airtel', amount=900, status='completed')
+            for booking in bookings
+        ]))
+        scans = [
+            {'token': token, 'scanned_at': 1_760_000_000_000 + booking.pk}
+            for booking in bookings for _, token in tickets.tickets_for(booking)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            results = tickets.record_scans(self.event.id, 'east-3', scans)
+        self.assertEqual({result['status'] for result in results}, {'accepted'})
+        # One lookup of the bookings, one of the admissions; the INSERT is only split by the backend's parameter limit
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual(statements.count('SELECT'), 2)
+        self.assertLessEqual(len(statements), 2 + 1000 // 100)
+        self.assertEqual(CheckIn.objects.count(), 1000)
+
+    def test_gzip_body_and_limits(self):
+        """Test compressed uploads, the batch limit and bad requests"""
+        body = gzip.compress(json.dumps({'device': 'gate', 'scans': [{'token': self.tokens[0]}]}).encode())
+        response = self.client.post(
+            reverse('events:checkin_sync', args=[self.event.id]), body,
+            content_type='application/json', HTTP_CONTENT_ENCODING='gzip',
+        )
+        self.assertEqual(response.json()['accepted'], 1)
+        with self.settings(CHECKIN_MAX_BATCH=1):
+            self.assertEqual(self.sync([{'token': t} for t in self.tokens]).status_code, 413)
+        self.assertEqual(self.sync([], device='').status_code, 400)
+        self.assertEqual(self.client.get(reverse('events:checkin_sync', args=[self.event.id])).status_code, 405)
+        self.assertEqual(self.sync([], event=Event(id=999)).status_code, 404)
+
+    def test_scanner_token_or_staff_required(self):
+        """Test devices need their event's bearer token; staff may use their session"""
+        anonymous = Client()
+        self.assertEqual(self.sync([], client=anonymous).status_code, 302)
+        self.assertEqual(self.sync([], client=Client(HTTP_AUTHORIZATION='Bearer wrong')).status_code, 302)
+        self.assertEqual(self.sync([], client=Client(HTTP_AUTHORIZATION='Bearer scan-secret')).status_code, 302)
+        roster_url = reverse('events:checkin_roster', args=[self.event.id])
+        self.assertEqual(anonymous.get(roster_url).status_code, 302)
+        # A device of one event can neither sync nor fetch the key of another
+        self.assertEqual(self.sync([], event=self.other_event, HTTP_AUTHORIZATION=self.bearer(self.event)).status_code, 302)
+        other_roster = reverse('events:checkin_roster', args=[self.other_event.id])
+        self.assertEqual(anonymous.get(other_roster, HTTP_AUTHORIZATION=self.bearer(self.event)).status_code, 302)
+        self.assertEqual(anonymous.get(roster_url, HTTP_AUTHORIZATION=self.bearer(self.event)).status_code, 200)
+        with self.settings(CHECKIN_TOKEN=''):
+            self.assertEqual(anonymous.get(roster_url, HTTP_AUTHORIZATION='Bearer ').status_code, 302)
+        staff = User.objects.create_user(username='gatekeeper', password='pass12345', is_staff=True)
+        anonymous.force_login(staff)
+        self.assertEqual(anonymous.get(roster_url).status_code, 200)
+
+    def test_scanner_token_command(self):
+        """Test the command prints each event's own token"""
+        out = StringIO()
+        call_command('scanner_token', self.event.id, self.other_event.id, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], f'{self.event.id}\tDerby\t{tickets.scanner_token(self.event.id)}')
+        self.assertNotEqual(lines[0].split('\t')[2], lines[1].split('\t')[2])
+        with self.assertRaises(CommandError):
+            call_command('scanner_token', 999, stdout=out)
+
+    def test_roster(self):
+        """Test the roster lets a scanner verify tickets and skip used ones offline"""
+        self.sync([{'token': self.tokens[1]}])
+        response = self.client.get(reverse('events:checkin_roster', args=[self.event.id]))
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        roster = json.loads(gzip.decompress(response.content))
+
+        self.assertEqual(roster['event']['id'], self.event.id)
+        self.assertEqual(roster['tickets'], [[self.booking.id, 1, 'V', 'Chanda Banda'], [self.booking.id, 2, 'V', 'Chanda Banda']])
+        self.assertEqual(roster['checked_in'], [[self.booking.id, 2]])
+        key = base64.b64decode(roster['key'])
+        ticket = tickets.verify(self.tokens[0], key)
+        self.assertEqual((ticket.booking_id, ticket.seat), (self.booking.id, 1))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TicketPageTest(TestCase):
+    """Test the customer's e-ticket page"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='mwila', password='pass12345')
+        category = Category.objects.create(name="Music")
+        self.event = Event.objects.create(
+            title="Jazz Night", description="Test", location="Lusaka", date=date.today() + timedelta(days=5),
+            category=category, gold_seats_left=10,
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_confirmed_booking_shows_one_qr_code_per_ticket(self):
+        """Test each ticket is rendered as a QR code with its token"""
+        booking = make_booking(self.user, self.event, count=3, ticket_type='gold')
+        response = self.client.get(reverse('events:booking_tickets', args=[booking.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'class="segno"', count=3)
+        for _, token in tickets.tickets_for(booking):
+            self.assertContains(response, token)
+        self.assertContains(self.client.get(reverse('events:profile')), reverse('events:booking_tickets', args=[booking.id]))
+
+    def test_unconfirmed_and_foreign_bookings(self):
+        """Test pending bookings have no tickets yet and other users' bookings are hidden"""
+        pending = make_booking(self.user, self.event, status='pending')
+        response = self.client.get(reverse('events:booking_tickets', args=[pending.id]))
+        self.assertRedirects(response, reverse('events:profile'))
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='stranger', password='pass12345'))
+        booking = make_booking(self.user, self.event)
+        self.assertEqual(stranger.get(reverse('events:booking_tickets', args=[booking.id])).status_code, 404)
@@ -6,7 +6,9 @@ from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
 from datetime import date, time, timedelta
 from decimal import Decimal
+from unittest.mock import patch
 from events.models import Category, Event, Booking, PaymentTransaction
+from events import jobs
 
 
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
@@ -354,8 +356,14 @@ class PaymentPageViewTest(TestCase):
         self.assertIsNotNone(payment)
         self.assertEqual(payment.payment_method, 'mtn')
         self.assertEqual(payment.amount, Decimal('3000.00'))
-        self.assertEqual(payment.status, 'pending')
+        self.assertEqual(payment.status, 'submitted')
         self.assertEqual(payment.phone_number, '0977123456')
+        
+        # Provider call happens in the background worker
+        with patch('events.payments.process_payment', return_value=True):
+            jobs.run_pending()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'pending')
 
 
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
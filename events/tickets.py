@@ -0,0 +1,266 @@
+"""
+Signed E-Tickets and Gate Check-In
+==================================
+
+Every ticket of a confirmed booking (one per seat) is a short signed token,
+shown to the customer as a QR code:
+
+    MT1.<event id>.<booking id>.<seat>.<tier>.<signature>
+    MT1.42.10577.2.V.7QK3M2XH5TQAZ4DE
+
+``signature`` is the first ``SIGNATURE_BYTES`` of HMAC-SHA256 over everything
+before the last dot, base32 without padding. The key is per event
+(``event_key``, derived from ``TICKET_SIGNING_KEY``), so a scanner holding
+one event's key cannot mint tickets for another. The token only uses
+characters from the QR alphanumeric set, which keeps the codes small.
+
+Scanner devices authenticate with a bearer token that is also per event
+(``scanner_token``, derived from ``CHECKIN_TOKEN``; print it with
+``manage.py scanner_token <event id>``). It only opens that event's roster
+and sync endpoints, so a device can only ever download its own event's key.
+
+Scanners work offline:
+
+1. download the event's **roster** once (``roster_gzip``): the key, every
+   valid ticket with its holder, and the tickets already admitted;
+2. at the gate, check the signature with the key, the ticket against the
+   roster (refunded bookings are left out of it) and against the local list
+   of admitted tickets — no network round trip;
+3. **sync** their scans in batches (``record_scans``). The ``(booking, seat)``
+   unique constraint lets each ticket in once across every device; later
+   scans come back as duplicates naming the first device, gate and time.
+   A batch costs three queries however large it is, and re-sending a batch
+   after a timeout is harmless: a device's own earlier scan still counts
+   as accepted.
+"""
+
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import segno
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Booking, CheckIn
+
+PREFIX = 'MT1'
+SIGNATURE_BYTES = 10
+TIER_CODES = {'vip': 'V', 'gold': 'G', 'standard': 'S'}
+TIERS = {code: tier for tier, code in TIER_CODES.items()}
+ROSTER_FORMAT = 1
+
+Ticket = namedtuple('Ticket', 'event_id booking_id seat ticket_type')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidTicket(ValueError):
+    """A token that is malformed or whose signature does not match"""
+
+
+# ============================
+# TOKENS
+# ============================
+def event_key(event_id):
+    """The HMAC key for one event's tickets (handed to that event's scanners)"""
+    master = (settings.TICKET_SIGNING_KEY or settings.SECRET_KEY).encode()
+    return hmac.new(master, f'momenta.ticket.{event_id}'.encode(), hashlib.sha256).digest()
+
+
+def _signature(key, message):
+    digest = hmac.new(key, message.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.b32encode(digest).decode().rstrip('=')
+
+
+def sign(ticket, key=None):
+    message = f'{PREFIX}.{ticket.event_id}.{ticket.booking_id}.{ticket.seat}.{TIER_CODES[ticket.ticket_type]}'
+    return f'{message}.{_signature(key or event_key(ticket.event_id), message)}'
+
+
+def verify(token, key=None):
+    """The ``Ticket`` a token stands for; raises InvalidTicket. No database access."""
+    message, _, signature = str(token).strip().upper().rpartition('.')
+    parts = message.split('.')
+    if len(parts) != 5 or parts[0] != PREFIX or parts[4] not in TIERS or not all(p.isdigit() for p in parts[1:4]):
+        raise InvalidTicket('Not a Momenta ticket')
+    ticket = Ticket(int(parts[1]), int(parts[2]), int(parts[3]), TIERS[parts[4]])
+    if not hmac.compare_digest(signature, _signature(key or event_key(ticket.event_id), message)):
+        raise InvalidTicket('Bad signature')
+    return ticket
+
+
+def is_issued(booking):
+    """Tickets exist once the payment is confirmed (and stop counting if it is refunded)"""
+    payment = getattr(booking, 'payment', None)
+    return payment is not None and payment.status == 'completed'
+
+
+def tickets_for(booking):
+    """``(ticket, token)`` for each seat of a booking"""
+    key = event_key(booking.event_id)
+    tickets = [Ticket(booking.event_id, booking.pk, seat, booking.ticket_type) for seat in range(1, booking.tickets + 1)]
+    return [(ticket, sign(ticket, key)) for ticket in tickets]
+
+
+def qr_svg(token):
+    """Inline SVG QR code for a token"""
+    return segno.make(token, error='m', micro=False).svg_inline(scale=4, border=2)
+
+
+# ============================
+# ROSTER
+# ============================
+def roster(event):
+    """What a scanner needs to admit this event's ticket holders offline"""
+    tickets = []
+    bookings = (
+        Booking.objects.filter(event=event, payment__status='completed')
+        .order_by('pk')
+        .values_list('pk', 'tickets', 'ticket_type', 'user__first_name', 'user__last_name', 'user__username')
+    )
+    for booking_id, count, ticket_type, first_name, last_name, username in bookings.iterator(chunk_size=5000):
+        holder = f'{first_name} {last_name}'.strip() or username
+        tickets.extend([booking_id, seat, TIER_CODES[ticket_type], holder] for seat in range(1, count + 1))
+    checked_in = [list(row) for row in CheckIn.objects.filter(event=event).values_list('booking_id', 'seat')]
+    return {
+        'format': ROSTER_FORMAT,
+        'event': {
+            'id': event.pk,
+            'title': event.title,
+            'date': event.date.isoformat(),
+            'time': event.time.isoformat() if event.time else None,
+        },
+        'key': base64.b64encode(event_key(event.pk)).decode(),
+        'signature_bytes': SIGNATURE_BYTES,
+        'generated_at': timezone.now().isoformat(),
+        'tickets': tickets,
+        'checked_in': checked_in,
+    }
+
+
+def roster_gzip(event):
+    """The roster as gzipped compact JSON (a 50,000-seat event is a few hundred KB)"""
+    body = json.dumps(roster(event), separators=(',', ':')).encode()
+    return gzip.compress(body, compresslevel=6)
+
+
+# ============================
+# SCAN SYNC
+# ============================
+def scanner_token(event_id):
+    """The bearer token for one event's scanner devices ('' while CHECKIN_TOKEN is unset)"""
+    if not settings.CHECKIN_TOKEN:
+        return ''
+    digest = hmac.new(settings.CHECKIN_TOKEN.encode(), f'momenta.scanner.{event_id}'.encode(), hashlib.sha256)
+    return digest.hexdigest()
+
+
+def scanner_token_ok(request, event_id):
+    """True if the request carries the scanner token of event ``event_id``"""
+    token = scanner_token(event_id)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+def parse_scanned_at(value):
+    """Epoch milliseconds or an ISO 8601 string; None if missing or malformed"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return EPOCH + timedelta(milliseconds=int(value))
+        except (OverflowError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+    return None
+
+
+def record_scans(event_id, device, scans):
+    """
+    Record a batch of ``{'token', 'scanned_at', 'gate'}`` scans from one
+    device. Returns one result per scan, in order, with ``status`` one of
+    ``accepted``, ``duplicate`` (with the first admission's ``device``,
+    ``gate`` and ``scanned_at``), ``invalid``, ``wrong_event``, ``unknown``
+    or ``revoked``.
+    """
+    now = timezone.now()
+    results = [None] * len(scans)
+    candidates = []  # (position, ticket, scanned_at, gate)
+    key = event_key(event_id)
+    for position, scan in enumerate(scans):
+        scan = scan if isinstance(scan, dict) else {}
+        try:
+            ticket = verify(scan.get('token', ''), key)
+        except InvalidTicket as error:
+            # Might still be a genuine ticket for another event
+            try:
+                verify(scan.get('token', ''))
+            except InvalidTicket:
+                results[position] = {'status': 'invalid', 'reason': str(error)}
+            else:
+                results[position] = {'status': 'wrong_event'}
+            continue
+        if ticket.event_id != event_id:
+            results[position] = {'status': 'wrong_event'}
+            continue
+        scanned_at = parse_scanned_at(scan.get('scanned_at')) if 'scanned_at' in scan else now
+        if scanned_at is None:
+            results[position] = {'status': 'invalid', 'reason': 'Bad scanned_at'}
+            continue
+        candidates.append((position, ticket, scanned_at, str(scan.get('gate') or '')[:50]))
+
+    # Query 1: are these bookings real, paid for and big enough?
+    booking_ids = {ticket.booking_id for _, ticket, _, _ in candidates}
+    bookings = {
+        pk: (tickets, status)
+        for pk, tickets, status in Booking.objects.filter(pk__in=booking_ids, event_id=event_id)
+        .values_list('pk', 'tickets', 'payment__status')
+    }
+    admissible, first_scans = [], {}
+    for position, ticket, scanned_at, gate in candidates:
+        tickets, status = bookings.get(ticket.booking_id, (0, None))
+        if ticket.seat < 1 or ticket.seat > tickets:
+            results[position] = {'status': 'unknown'}
+        elif status != 'completed':
+            results[position] = {'status': 'revoked'}
+        else:
+            admissible.append((position, ticket, scanned_at, gate))
+            first_scans.setdefault((ticket.booking_id, ticket.seat), (scanned_at, gate))
+
+    # Query 2: one INSERT; the unique constraint lets each ticket in once, across devices
+    CheckIn.objects.bulk_create([
+        CheckIn(event_id=event_id, booking_id=booking_id, seat=seat, device=device, gate=gate, scanned_at=scanned_at)
+        for (booking_id, seat), (scanned_at, gate) in first_scans.items()
+    ], batch_size=500, ignore_conflicts=True)
+
+    # Query 3: who got in first
+    admitted = {
+        (booking_id, seat): (first_device, first_gate, first_at)
+        for booking_id, seat, first_device, first_gate, first_at in CheckIn.objects.filter(
+            booking_id__in={booking_id for booking_id, _ in first_scans}
+        ).values_list('booking_id', 'seat', 'device', 'gate', 'scanned_at')
+    }
+    for position, ticket, scanned_at, gate in admissible:
+        first_device, first_gate, first_at = admitted[ticket.booking_id, ticket.seat]
+        if first_device == device and first_at == scanned_at:
+            # Our own row (possibly from an earlier, re-sent sync)
+            results[position] = {'status': 'accepted'}
+        else:
+            results[position] = {
+                'status': 'duplicate', 'device': first_device, 'gate': first_gate,
+                'scanned_at': first_at.isoformat(),
+            }
+    return results
@@ -19,6 +19,7 @@ urlpatterns = [
     # Payment flow
     path("select-seat/<int:event_id>/", views.select_seat, name="select_seat"),
     path("payment/<int:event_id>/", views.payment_page, name="payment_page"),
+    path("payment/status/<int:payment_id>/", views.payment_status, name="payment_status"),
     
     # Admin payment actions (accessible from admin interface)
     path("admin/approve-payment/<int:payment_id>/", views.approve_payment, name="approve_payment"),
@@ -26,6 +27,7 @@ urlpatterns = [
     
     # User profile
     path("profile/", views.user_profile, name="profile"),
+    path("tickets/<int:booking_id>/", views.booking_tickets, name="booking_tickets"),
     
     # Newsletter subscription
     path("subscribe/", views.subscribe_newsletter, name="subscribe"),
@@ -33,9 +35,16 @@ urlpatterns = [
     # Venue and Resource Management
     path("venues/", views.venues_list, name="venues_list"),
     path("venue/<int:venue_id>/", views.venue_detail, name="venue_detail"),
+    path("venue/<int:venue_id>/availability/", views.venue_availability, name="venue_availability"),
     path("resources/", views.resources_list, name="resources_list"),
     path("facilities/", views.facilities_public, name="facilities_public"),
     path("admin/facilities/", views.facilities_dashboard, name="facilities_dashboard"),
+    path("admin/page-cache/", views.page_cache_stats, name="page_cache_stats"),
+    path("admin/metrics/", views.metrics_endpoint, name="metrics"),
+    path("admin/checkin/<int:event_id>/roster/", views.checkin_roster, name="checkin_roster"),
+    path("admin/checkin/<int:event_id>/sync/", views.checkin_sync, name="checkin_sync"),
+    path("admin/revenue/", views.revenue_report, name="revenue_report"),
+    path("admin/revenue/json/", views.revenue_report_json, name="revenue_report_json"),
     
     # NEW: One dynamic URL for ALL categories (must be last as it's a catch-all)
     path("<slug:slug>/", views.category_detail, name="category_detail"),
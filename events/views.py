@@ -3,28 +3,34 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.conf import settings
-from django.db import models
-from django.http import JsonResponse
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import reverse
 from django.utils import timezone
 from django.template.loader import render_to_string
-from django.core.mail import EmailMessage
-from .models import Event, Category, Booking, PaymentTransaction
+from .models import Event, Category, Booking, PaymentTransaction, Venue, Resource
+from .payments import submit_payment
+from .inventory import SoldOut
+from .outbox import queue_mail
+from .pagination import InvalidCursor, paginate
+from . import availability, dbrouting, facilities, holds, metrics, modelcache, pagecache, rollups, search, tickets
 import json
-import time
-import random
+import zlib
 
 
 # ==============================
 # CATEGORY LIST PAGE
 # ==============================
+@pagecache.cache_anonymous_page(Category, Event)
 def categories_with_events(request):
     """Display categories with events"""
     try:
-        categories = Category.objects.prefetch_related("events").all()
+        categories = modelcache.get_all_cached(Category)
+        prefetch_related_objects(categories, "events")
     except Exception as e:
         # Handle database table not existing
         from django.contrib import messages
@@ -36,19 +42,71 @@ def categories_with_events(request):
     })
 
 
+# ==============================
+# KEYSET PAGES (HTML + JSON "load more")
+# ==============================
+def _listing_page(request, queryset, keys, per_page=None):
+    """
+    The page after ``?cursor=``. Raises InvalidCursor for a bad cursor; the
+    views answer that with a 400.
+    """
+    return paginate(queryset, keys, request.GET.get('cursor'), per_page)
+
+
+def _next_url(request, page):
+    if not page.has_next:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _wants_json(request):
+    return request.GET.get('format') == 'json'
+
+
+def _event_json(event):
+    return {
+        'id': event.id,
+        'title': event.title,
+        'date': event.date.isoformat(),
+        'time': event.time.isoformat() if event.time else None,
+        'location': event.location,
+        'category': event.category.name,
+        'seats_left': event.total_seats_left,
+        'url': reverse('events:event_detail', args=[event.id]),
+    }
+
+
+def _page_json(request, page, serialize):
+    return JsonResponse({
+        'results': [serialize(item) for item in page],
+        'next': _next_url(request, page),
+    })
+
+
 # ==============================
 # HOME PAGE
 # ==============================
+@pagecache.cache_anonymous_page(Event, Category)
 def home(request):
-    events = Event.objects.all().order_by("-date")
-    return render(request, "home.html", {"events": events})
+    events = Event.objects.select_related('category')
+    try:
+        page = _listing_page(request, events, ('-date', '-id'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    if _wants_json(request):
+        return _page_json(request, page, _event_json)
+    return render(request, "home.html", {"events": page.items, "next_url": _next_url(request, page)})
 
 
 # ==============================
 # EVENT DETAIL PAGE
 # ==============================
+@pagecache.cache_anonymous_page()
 def event_detail(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
+    event = modelcache.get_cached_or_404(Event, event_id)
+    pagecache.depends_on(request, event)
     return render(request, "events/event_detail.html", {"event": event})
 
 
@@ -149,9 +207,17 @@ def category_events(request, slug):
 # DYNAMIC CATEGORY PAGE (REPLACES ALL 4 STATIC ONES)
 # ==============================
 # ADD THIS FUNCTION TO views.py (anywhere near the bottom)
+@pagecache.cache_anonymous_page(Event)
 def category_detail(request, slug):
     category = get_object_or_404(Category, slug=slug)
-    events = Event.objects.filter(category=category).order_by('-date')
+    pagecache.depends_on(request, category)
+    events = Event.objects.filter(category=category).select_related('category')
+    try:
+        page = _listing_page(request, events, ('-date', '-id'))
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    if _wants_json(request):
+        return _page_json(request, page, _event_json)
     
     title_map = {
         'music': 'Music & Concerts',
@@ -163,7 +229,8 @@ def category_detail(request, slug):
 
     return render(request, "events/category_detail.html", {
         "category": category,
-        "events": events,
+        "events": page.items,
+        "next_url": _next_url(request, page),
         "page_title": page_title
     })
 # ==============================
@@ -171,8 +238,13 @@ def category_detail(request, slug):
 # ==============================
 @login_required
 def select_seat(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
-    return render(request, "events/select_seat.html", {"event": event})
+    event = modelcache.get_cached_or_404(Event, event_id)
+    # Coming back to the page keeps an existing selection hold alive
+    holds.extend_hold(event, request.user)
+    return render(request, "events/select_seat.html", {
+        "event": event,
+        "availability": holds.availability(event, user=request.user),
+    })
 
 
 # ==============================
@@ -180,7 +252,7 @@ def select_seat(request, event_id):
 # ==============================
 @login_required
 def payment_page(request, event_id):
-    event = get_object_or_404(Event, id=event_id)
+    event = modelcache.get_cached_or_404(Event, event_id)
 
     if request.method == "POST":
         ticket_type = request.POST.get("ticket_type")
@@ -195,15 +267,12 @@ def payment_page(request, event_id):
             messages.error(request, f"Invalid ticket type. Please select a valid ticket type.")
             return redirect("events:select_seat", event_id=event.id)
 
-        # Check seat availability
-        seats_available = {
-            'vip': event.vip_seats_left or 0,
-            'gold': event.gold_seats_left or 0,
-            'standard': event.standard_seats_left or 0
-        }
-        
-        if tickets > seats_available[ticket_type]:
-            messages.error(request, f"Only {seats_available[ticket_type]} {ticket_type.upper()} seats available.")
+        # Hold the seats for this customer (creates or extends their hold);
+        # seats held by other customers are not available
+        try:
+            hold = holds.place_hold(event, request.user, ticket_type, tickets)
+        except SoldOut as e:
+            messages.error(request, f"Only {e.available} {ticket_type.upper()} seats available.")
             return redirect("events:select_seat", event_id=event.id)
 
         prices = {'vip': 1500, 'gold': 850, 'standard': 450}
@@ -232,71 +301,49 @@ def payment_page(request, event_id):
                 if 'payment_proof' in request.FILES:
                     payment_details['proof'] = request.FILES['payment_proof']
 
-            # Process payment (simulate for now - in production, integrate with real APIs)
-            print(f"Processing payment: {payment_method}, Amount: {total_price}, Details: {payment_details}")
-            
-            try:
-                payment_success = process_payment(payment_method, total_price, payment_details)
-                print(f"Payment result: {payment_success}")
-            except Exception as e:
-                print(f"Payment processing error: {e}")
-                payment_success = True  # For demo, assume success
-            
-            if payment_success:
-                # Create booking
-                booking = Booking.objects.create(
-                    user=request.user,
-                    event=event,
-                    ticket_type=ticket_type,
-                    tickets=tickets
-                )
-
-                # Create payment transaction with PENDING status
-                # Admin must confirm payment before ticket is valid
-                payment_transaction = PaymentTransaction.objects.create(
-                    booking=booking,
-                    payment_method=payment_method,
-                    amount=total_price,
-                    status='pending',  # Requires admin confirmation
-                    phone_number=payment_details.get('phone', ''),
-                    payment_proof=payment_details.get('proof') if payment_method == 'bank' else None,
-                    notes=f"Payment initiated by {request.user.username}. Awaiting admin confirmation."
-                )
-
-                # DO NOT update seat counts yet - wait for admin confirmation
-                # Seats will be reserved when admin confirms payment
-                # event.vip_seats_left -= tickets  # DISABLED
-                # event.gold_seats_left -= tickets  # DISABLED
-                # event.standard_seats_left -= tickets  # DISABLED
-                # event.save()  # DISABLED
-                
-                # Send confirmation email
-                email_sent = send_booking_confirmation_email(
-                    booking=booking,
-                    event=event,
-                    payment_method=payment_details.get('provider', payment_method),
-                    payment_details=payment_details
-                )
-                
-                # Update messages to reflect pending status
-                messages.success(request, f"🎉 Payment submitted successfully!")
-                messages.warning(request, f"⏳ Your payment is pending admin confirmation. Booking Reference: #{booking.id:06d}")
-                messages.info(request, "📧 You will receive a confirmation email once the admin approves your payment.")
-                messages.info(request, "💡 Please keep your booking reference number for tracking.")
-
-                return render(request, "events/payment_success.html", {
-                    "event": event,
-                    "payment_method": payment_details.get('provider', payment_method),
-                    "tickets": tickets,
-                    "ticket_type": ticket_type,
-                    "total_price": total_price,
-                    "booking": booking,
-                    "payment_details": payment_details,
-                    "email_sent": email_sent,
-                })
-            else:
-                messages.error(request, "Payment failed. Please try again or use a different payment method.")
-                return redirect("events:select_seat", event_id=event.id)
+            # Create booking
+            booking = Booking.objects.create(
+                user=request.user,
+                event=event,
+                ticket_type=ticket_type,
+                tickets=tickets
+            )
+
+            # Create payment transaction in SUBMITTED status and hand the
+            # provider call to the background worker (see events/payments.py).
+            # Once the provider accepts it moves to PENDING, and admin must
+            # confirm payment before ticket is valid.
+            payment_transaction = PaymentTransaction.objects.create(
+                booking=booking,
+                payment_method=payment_method,
+                amount=total_price,
+                status='submitted',
+                phone_number=payment_details.get('phone', ''),
+                payment_proof=payment_details.get('proof') if payment_method == 'bank' else None,
+                notes=f"Payment initiated by {request.user.username}. Awaiting provider confirmation."
+            )
+            submit_payment(payment_transaction)
+
+            # Keep the seats held until admin review; the seat counters
+            # only change when admin confirms payment
+            holds.attach_booking(hold, booking)
+
+            messages.success(request, f"🎉 Payment submitted successfully!")
+            messages.warning(request, f"⏳ Your payment is being processed. Booking Reference: #{booking.id:06d}")
+            messages.info(request, "📧 You will receive a confirmation email once the admin approves your payment.")
+            messages.info(request, "💡 Please keep your booking reference number for tracking.")
+
+            return render(request, "events/payment_success.html", {
+                "event": event,
+                "payment_method": payment_details.get('provider', payment_method),
+                "tickets": tickets,
+                "ticket_type": ticket_type,
+                "total_price": total_price,
+                "booking": booking,
+                "payment_transaction": payment_transaction,
+                "payment_details": payment_details,
+                "status_poll_interval": settings.PAYMENT_STATUS_POLL_INTERVAL,
+            })
 
         # SHOW PAYMENT PAGE
         return render(request, "events/payment_page.html", {
@@ -310,150 +357,97 @@ def payment_page(request, event_id):
             "bank_name": settings.BANK_NAME,
             "bank_account_number": settings.BANK_ACCOUNT_NUMBER,
             "bank_account_name": settings.BANK_ACCOUNT_NAME,
+            "hold": hold,
         })
 
     return redirect("events:select_seat", event_id=event.id)
 
 
 # ==============================
-# USER PROFILE & BOOKINGS
+# PAYMENT STATUS (POLLING / LONG-POLL)
 # ==============================
 @login_required
-def user_profile(request):
-    bookings = Booking.objects.filter(user=request.user).select_related('event').order_by('-booked_at')
-    return render(request, "events/profile.html", {
-        "bookings": bookings
-    })
-
-
-# ==============================
-# PAYMENT PROCESSING FUNCTION
-# ==============================
-def process_payment(payment_method, amount, payment_details):
-    """
-    Process payment through various Zambian payment providers
-    This is a simulation - in production, integrate with real APIs
-    """
-    
-    if payment_method == "mtn":
-        return process_mtn_payment(amount, payment_details.get('phone'))
-    elif payment_method == "airtel":
-        return process_airtel_payment(amount, payment_details.get('phone'))
-    elif payment_method == "zamtel":
-        return process_zamtel_payment(amount, payment_details.get('phone'))
-    elif payment_method == "bank":
-        return process_bank_transfer(amount, payment_details)
-    
-    return False
-
-
-def process_mtn_payment(amount, phone_number):
+def payment_status(request, payment_id):
     """
-    Process MTN Mobile Money payment
-    In production, integrate with MTN MoMo API
+    Report the processing state of a payment as JSON. Answers at once; the
+    success page polls it every few seconds while the provider call is in flight.
     """
-    try:
-        # Simulate API call to MTN Mobile Money
-        print(f"Processing MTN payment: K{amount} from {phone_number}")
-        
-        # Simulate processing time
-        time.sleep(2)
-        
-        # Simulate success/failure (90% success rate for demo, 100% for test numbers)
-        if phone_number in ['0977111111', '0977123456']:  # Test phone numbers
-            success = True
-        else:
-            success = random.random() > 0.1
-        
-        if success:
-            print(f"MTN payment successful: Transaction ID MTN{random.randint(100000, 999999)}")
-            return True
-        else:
-            print("MTN payment failed: Insufficient balance or user cancelled")
-            return False
-            
-    except Exception as e:
-        print(f"MTN payment error: {e}")
-        return False
-
+    payment = get_object_or_404(PaymentTransaction.objects.select_related('booking'), id=payment_id)
+    if payment.booking.user_id != request.user.id and not request.user.is_staff:
+        return JsonResponse({'error': 'Not found'}, status=404)
 
-def process_airtel_payment(amount, phone_number):
-    """
-    Process Airtel Money payment
-    In production, integrate with Airtel Money API
-    """
-    try:
-        # Simulate API call to Airtel Money
-        print(f"Processing Airtel payment: K{amount} from {phone_number}")
-        
-        # Simulate processing time
-        time.sleep(2)
-        
-        # Simulate success/failure (90% success rate for demo)
-        success = random.random() > 0.1
-        
-        if success:
-            print(f"Airtel payment successful: Transaction ID AIR{random.randint(100000, 999999)}")
-            return True
-        else:
-            print("Airtel payment failed: Insufficient balance or user cancelled")
-            return False
-            
-    except Exception as e:
-        print(f"Airtel payment error: {e}")
-        return False
+    return JsonResponse({
+        'transaction_id': payment.transaction_id,
+        'status': payment.status,
+        'status_display': payment.get_status_display(),
+        'booking_reference': f"#{payment.booking_id:06d}",
+        'processing': payment.status == 'submitted',
+        'updated_at': payment.updated_at.isoformat(),
+    })
 
 
-def process_zamtel_payment(amount, phone_number):
-    """
-    Process Zamtel Money payment
-    In production, integrate with Zamtel Money API
-    """
+# ==============================
+# USER PROFILE & BOOKINGS
+# ==============================
+@login_required
+def user_profile(request):
+    bookings = Booking.objects.filter(user=request.user).select_related('event__category', 'payment')
     try:
-        # Simulate API call to Zamtel Money
-        print(f"Processing Zamtel payment: K{amount} from {phone_number}")
-        
-        # Simulate processing time
-        time.sleep(2)
-        
-        # Simulate success/failure (90% success rate for demo)
-        success = random.random() > 0.1
-        
-        if success:
-            print(f"Zamtel payment successful: Transaction ID ZMT{random.randint(100000, 999999)}")
-            return True
-        else:
-            print("Zamtel payment failed: Insufficient balance or user cancelled")
-            return False
-            
-    except Exception as e:
-        print(f"Zamtel payment error: {e}")
-        return False
+        page = _listing_page(request, bookings, ('-booked_at', '-id'), settings.PROFILE_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    if _wants_json(request):
+        return _page_json(request, page, lambda booking: {
+            'id': booking.id,
+            'event': _event_json(booking.event),
+            'ticket_type': booking.ticket_type,
+            'tickets': booking.tickets,
+            'total_price': str(booking.total_price),
+            'booked_at': booking.booked_at.isoformat(),
+            'payment_status': getattr(getattr(booking, 'payment', None), 'status', None),
+        })
+    # Totals over every booking, not just this page
+    totals = Booking.objects.filter(user=request.user).aggregate(
+        bookings=models.Count('id'),
+        tickets=models.Sum('tickets'),
+        spent=models.Sum('total_price'),
+    )
+    return render(request, "events/profile.html", {
+        "bookings": page.items,
+        "next_url": _next_url(request, page),
+        "totals": totals,
+    })
 
 
-def process_bank_transfer(amount, payment_details):
-    """
-    Process bank transfer payment
-    In production, integrate with bank APIs or manual verification
-    """
-    try:
-        print(f"Processing bank transfer: K{amount}")
-        
-        # For bank transfers, we typically need manual verification
-        # In production, you might:
-        # 1. Save the proof of payment file
-        # 2. Send notification to admin for verification
-        # 3. Mark payment as "pending verification"
-        
-        # For demo, we'll simulate immediate success
-        time.sleep(1)
-        
-        print(f"Bank transfer received: Reference BNK{random.randint(100000, 999999)}")
-        return True
-        
-    except Exception as e:
-        print(f"Bank transfer error: {e}")
-        return False
+# ==============================
+# E-TICKETS
+# ==============================
+@login_required
+def booking_tickets(request, booking_id):
+    """One QR code per ticket of a confirmed booking"""
+    booking = get_object_or_404(Booking.objects.select_related('event', 'payment'), id=booking_id)
+    if booking.user_id != request.user.id and not request.user.is_staff:
+        raise Http404('No Booking matches the given query.')
+    if not tickets.is_issued(booking):
+        messages.info(request, "Your tickets will appear here once your payment is confirmed.")
+        return redirect('events:profile')
+    admitted = dict(
+        ((booking_id, seat), scanned_at)
+        for booking_id, seat, scanned_at in booking.check_ins.values_list('booking_id', 'seat', 'scanned_at')
+    )
+    return render(request, "events/tickets.html", {
+        "booking": booking,
+        "event": booking.event,
+        "tickets": [
+            {
+                'seat': ticket.seat,
+                'token': token,
+                'qr': tickets.qr_svg(token),
+                'checked_in': admitted.get((ticket.booking_id, ticket.seat)),
+            }
+            for ticket, token in tickets.tickets_for(booking)
+        ],
+    })
 
 
 # ==============================
@@ -525,18 +519,15 @@ This is an automated confirmation email. Please do not reply.
 Visit us at: http://127.0.0.1:8000/
         """
         
-        # Send email
-        send_mail(
+        # Queue email for the delivery worker
+        queue_mail(
             subject=subject,
             message=message,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[user.email],
-            fail_silently=False,
         )
         
-        print(f"✓ Confirmation email sent to {user.email}")
-        print("=" * 60)
-        print("📧 EMAIL CONTENT ABOVE (in console mode)")
+        print(f"✓ Confirmation email queued for {user.email}")
         print("=" * 60)
         return True
         
@@ -554,7 +545,6 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
 from django.template.loader import render_to_string
-from django.core.mail import EmailMessage
 
 @staff_member_required
 @csrf_exempt
@@ -564,32 +554,20 @@ def approve_payment(request, payment_id):
         return JsonResponse({'error': 'POST method required'}, status=405)
     
     try:
-        payment = get_object_or_404(PaymentTransaction, id=payment_id)
-        
-        if payment.status != 'pending':
-            return JsonResponse({
-                'error': f'Payment is already {payment.get_status_display().lower()}'
-            }, status=400)
-        
-        # Update payment status
-        payment.status = 'completed'
-        payment.notes += f"\n\nApproved by admin: {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        payment.save()
-        
-        # Reduce seat count when payment is approved
-        booking = payment.booking
-        event = booking.event
-        ticket_type = booking.ticket_type
-        tickets = booking.tickets
-        
-        if ticket_type == 'vip':
-            event.vip_seats_left = max(0, (event.vip_seats_left or 0) - tickets)
-        elif ticket_type == 'gold':
-            event.gold_seats_left = max(0, (event.gold_seats_left or 0) - tickets)
-        elif ticket_type == 'standard':
-            event.standard_seats_left = max(0, (event.standard_seats_left or 0) - tickets)
-        
-        event.save()
+        with transaction.atomic():
+            # Lock the row so two admins cannot approve the same payment twice
+            payment = get_object_or_404(PaymentTransaction.objects.select_for_update(), id=payment_id)
+            
+            if payment.status != 'pending':
+                return JsonResponse({
+                    'error': f'Payment is already {payment.get_status_display().lower()}'
+                }, status=400)
+            
+            # Update payment status; the pre_save signal takes the seats with a
+            # conditional UPDATE and raises SoldOut if the tier is exhausted
+            payment.status = 'completed'
+            payment.notes += f"\n\nApproved by admin: {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            payment.save()
         
         # Send confirmation email to user
         try:
@@ -603,6 +581,8 @@ def approve_payment(request, payment_id):
             'new_status': 'completed'
         })
         
+    except SoldOut as e:
+        return JsonResponse({'error': str(e)}, status=409)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -686,15 +666,14 @@ def send_payment_confirmation_email(payment):
     </html>
     """
     
-    # Send email
-    email = EmailMessage(
+    # Queue email for the delivery worker
+    queue_mail(
         subject=subject,
-        body=html_content,
+        message=html_content,
         from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email],
+        recipient_list=[user.email],
+        html=True,
     )
-    email.content_subtype = 'html'
-    email.send()
 
 
 def send_payment_rejection_email(payment):
@@ -746,15 +725,14 @@ def send_payment_rejection_email(payment):
     </html>
     """
     
-    # Send email
-    email = EmailMessage(
+    # Queue email for the delivery worker
+    queue_mail(
         subject=subject,
-        body=html_content,
+        message=html_content,
         from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[user.email],
+        recipient_list=[user.email],
+        html=True,
     )
-    email.content_subtype = 'html'
-    email.send()
 # ==============================
 # NEWSLETTER SUBSCRIPTION
 # ==============================
@@ -766,8 +744,8 @@ def subscribe_newsletter(request):
         
         if email:
             try:
-                # Send welcome email to subscriber
-                send_mail(
+                # Queue welcome email to subscriber
+                queue_mail(
                     subject='🎉 Welcome to Momenta Newsletter!',
                     message=f'''
                     Hello!
@@ -787,16 +765,14 @@ def subscribe_newsletter(request):
                     ''',
                     from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=[email],
-                    fail_silently=True,
                 )
                 
-                # Send notification to admin
-                send_mail(
+                # Queue notification to admin
+                queue_mail(
                     subject='📧 New Newsletter Subscription',
                     message=f'New newsletter subscription: {email}',
                     from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=['nalisaimbula282@gmail.com'],
-                    fail_silently=True,
                 )
                 
                 messages.success(request, f'🎉 Successfully subscribed! Check {email} for confirmation.')
@@ -812,37 +788,44 @@ def subscribe_newsletter(request):
 # ==============================
 # EVENTS LISTING PAGE
 # ==============================
+@pagecache.cache_anonymous_page(Event, Category)
+@dbrouting.read_only
 def events_list(request):
     """Display all upcoming events with filtering and search"""
     from django.utils import timezone
-    from django.db.models import Q
     
     # Get all upcoming events (future events only)
-    events = Event.objects.filter(date__gte=timezone.now().date()).order_by('date')
-    
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        events = events.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(location__icontains=search_query)
-        )
+    events = Event.objects.filter(date__gte=timezone.now().date()).select_related('category')
+    keys = ('date', 'id')
     
     # Category filtering
     category_filter = request.GET.get('category', '')
     if category_filter:
         events = events.filter(category__slug=category_filter)
     
+    # Search last: the result cap applies within the filtered events
+    # (relevance order replaces date order)
+    search_query = request.GET.get('search', '')
+    if search_query:
+        events = search.filter_queryset(events, 'event', search_query)
+        keys = ('search_rank', 'id')
+    
+    try:
+        page = _listing_page(request, events, keys)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    if _wants_json(request):
+        return _page_json(request, page, _event_json)
+    
     # Get all categories for filter dropdown
     categories = Category.objects.all()
     
     context = {
-        'events': events,
+        'events': page.items,
+        'next_url': _next_url(request, page),
         'categories': categories,
         'search_query': search_query,
         'category_filter': category_filter,
-        'total_events': events.count()
     }
     
     return render(request, 'events/events_list.html', context)
@@ -851,23 +834,15 @@ def events_list(request):
 # VENUE MANAGEMENT VIEWS
 # ==============================
 
+@pagecache.cache_anonymous_page(Venue)
+@dbrouting.read_only
 def venues_list(request):
     """Display all available venues with filtering"""
     from .models import Venue
-    from django.db.models import Q
     
     # Get all venues
     venues = Venue.objects.filter(is_available=True).order_by('name')
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        venues = venues.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(facilities__icontains=search_query)
-        )
-    
     # Capacity filtering
     capacity_filter = request.GET.get('capacity', '')
     if capacity_filter:
@@ -888,6 +863,11 @@ def venues_list(request):
         elif price_filter == 'premium':
             venues = venues.filter(hourly_rate__gte=2000)
     
+    # Search functionality
+    search_query = request.GET.get('search', '')
+    if search_query:
+        venues = search.filter_queryset(venues, 'venue', search_query)
+    
     context = {
         'venues': venues,
         'search_query': search_query,
@@ -898,11 +878,12 @@ def venues_list(request):
     
     return render(request, 'events/venues_list.html', context)
 
+@dbrouting.read_only
 def venue_detail(request, venue_id):
     """Display detailed information about a specific venue"""
     from .models import Venue, VenueBooking
     from django.utils import timezone
-    from datetime import datetime, timedelta
+    from datetime import timedelta
     
     venue = get_object_or_404(Venue, id=venue_id)
     
@@ -913,27 +894,14 @@ def venue_detail(request, venue_id):
         status__in=['confirmed', 'pending']
     ).order_by('start_datetime')[:5]
     
-    # Calculate availability for next 30 days
-    today = timezone.now().date()
-    availability_calendar = []
-    
-    for i in range(30):
-        check_date = today + timedelta(days=i)
-        bookings_on_date = VenueBooking.objects.filter(
-            venue=venue,
-            start_datetime__date=check_date,
-            status__in=['confirmed', 'pending']
-        ).count()
-        
-        availability_calendar.append({
-            'date': check_date,
-            'available': bookings_on_date == 0,
-            'bookings_count': bookings_on_date
-        })
+    # Availability for the next 30 days (one range query, setup/cleanup included)
+    today = timezone.localdate()
+    availability_calendar = availability.day_calendar(venue, today, today + timedelta(days=29))
     
     # Calculate venue statistics
-    total_bookings = VenueBooking.objects.filter(venue=venue).count()
-    total_revenue = sum(booking.total_cost for booking in VenueBooking.objects.filter(venue=venue))
+    stats = availability.venue_stats(venue)
+    total_bookings = stats['total_bookings']
+    total_revenue = stats['total_revenue']
     
     context = {
         'venue': venue,
@@ -945,23 +913,57 @@ def venue_detail(request, venue_id):
     
     return render(request, 'events/venue_detail.html', context)
 
+@dbrouting.read_only
+def venue_availability(request, venue_id):
+    """
+    Venue calendar as JSON. Pick the window with ?month=YYYY-MM, ?year=YYYY
+    (monthly summary) or ?start=YYYY-MM-DD&end=YYYY-MM-DD (at most a year);
+    the default is the next 30 days.
+    """
+    from .models import Venue
+    from datetime import datetime, timedelta
+
+    venue = get_object_or_404(Venue, id=venue_id)
+
+    try:
+        if request.GET.get('year'):
+            year = int(request.GET['year'])
+            return JsonResponse({
+                'venue': venue.id,
+                'year': year,
+                'months': availability.year_view(venue, year),
+            })
+        if request.GET.get('month'):
+            month = datetime.strptime(request.GET['month'], '%Y-%m')
+            days = availability.month_view(venue, month.year, month.month)
+        else:
+            start = request.GET.get('start')
+            first_day = datetime.strptime(start, '%Y-%m-%d').date() if start else timezone.localdate()
+            end = request.GET.get('end')
+            last_day = datetime.strptime(end, '%Y-%m-%d').date() if end else first_day + timedelta(days=29)
+            if last_day < first_day or (last_day - first_day).days > 366:
+                return JsonResponse({'error': 'The window must run forwards and span at most a year'}, status=400)
+            days = availability.day_calendar(venue, first_day, last_day)
+    except (ValueError, OverflowError):
+        # OverflowError: a window at the edge of the calendar (year 1 or 9999)
+        # padded with the turnaround or the default 30 days
+        return JsonResponse({'error': 'Invalid date'}, status=400)
+
+    return JsonResponse({
+        'venue': venue.id,
+        'start': days[0]['date'].isoformat(),
+        'end': days[-1]['date'].isoformat(),
+        'days': [dict(day, date=day['date'].isoformat()) for day in days],
+    })
+
+@dbrouting.read_only
 def resources_list(request):
     """Display all available resources with filtering"""
     from .models import Resource
-    from django.db.models import Q
     
     # Get all available resources
     resources = Resource.objects.filter(is_available=True).order_by('resource_type', 'name')
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        resources = resources.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(supplier_name__icontains=search_query)
-        )
-    
     # Resource type filtering
     type_filter = request.GET.get('type', '')
     if type_filter:
@@ -977,6 +979,11 @@ def resources_list(request):
         elif price_filter == 'premium':
             resources = resources.filter(cost_per_day__gte=1500)
     
+    # Search functionality
+    search_query = request.GET.get('search', '')
+    if search_query:
+        resources = search.filter_queryset(resources, 'resource', search_query)
+    
     # Get resource types for filter dropdown
     resource_types = Resource.RESOURCE_TYPES
     
@@ -992,110 +999,217 @@ def resources_list(request):
     return render(request, 'events/resources_list.html', context)
 
 @login_required
+@dbrouting.read_only
 def facilities_dashboard(request):
     """Comprehensive facilities management dashboard - Staff only"""
     # Check if user is staff or superuser
     if not (request.user.is_staff or request.user.is_superuser):
         messages.error(request, 'Access denied. Staff privileges required.')
         return redirect('events:home')
-    from .models import Venue, Resource, VenueBooking, ResourceAllocation
-    from django.utils import timezone
-    from django.db.models import Sum, Count
-    from datetime import datetime, timedelta
-    
-    # Venue statistics
-    total_venues = Venue.objects.filter(is_available=True).count()
-    venue_bookings_today = VenueBooking.objects.filter(
-        start_datetime__date=timezone.now().date(),
-        status__in=['confirmed', 'pending']
-    ).count()
+    from .models import VenueBooking, ResourceAllocation
     
-    # Resource statistics
-    total_resources = Resource.objects.filter(is_available=True).count()
-    resource_allocations_today = ResourceAllocation.objects.filter(
-        start_date__lte=timezone.now().date(),
-        end_date__gte=timezone.now().date(),
-        status__in=['confirmed', 'delivered']
-    ).count()
+    # Counts, utilization and venue figures come from the cached snapshot
+    context = dict(facilities.get_snapshot())
     
     # Recent bookings and allocations
-    recent_venue_bookings = VenueBooking.objects.select_related('venue', 'event').order_by('-created_at')[:5]
-    recent_resource_allocations = ResourceAllocation.objects.select_related('resource', 'event').order_by('-created_at')[:5]
+    context['recent_venue_bookings'] = VenueBooking.objects.select_related('venue', 'event').order_by('-created_at')[:5]
+    context['recent_resource_allocations'] = ResourceAllocation.objects.select_related('resource', 'event').order_by('-created_at')[:5]
     
     # Upcoming events with venue/resource needs
-    upcoming_events = Event.objects.filter(
-        date__gte=timezone.now().date()
+    context['upcoming_events'] = Event.objects.filter(
+        date__gte=timezone.localdate()
     ).order_by('date')[:10]
     
-    # Resource utilization by type
-    resource_utilization = []
-    for resource_type, display_name in Resource.RESOURCE_TYPES:
-        total_resources_of_type = Resource.objects.filter(
-            resource_type=resource_type,
-            is_available=True
-        ).count()
-        
-        allocated_today = ResourceAllocation.objects.filter(
-            resource__resource_type=resource_type,
-            start_date__lte=timezone.now().date(),
-            end_date__gte=timezone.now().date(),
-            status__in=['confirmed', 'delivered']
-        ).count()
-        
-        utilization_rate = (allocated_today / total_resources_of_type * 100) if total_resources_of_type > 0 else 0
-        
-        resource_utilization.append({
-            'type': resource_type,
-            'display_name': display_name,
-            'total': total_resources_of_type,
-            'allocated': allocated_today,
-            'utilization_rate': utilization_rate
-        })
-    
-    # Venue capacity overview
-    venue_capacity_data = []
-    for venue in Venue.objects.filter(is_available=True).order_by('-capacity')[:10]:
-        bookings_this_month = VenueBooking.objects.filter(
-            venue=venue,
-            start_datetime__month=timezone.now().month,
-            start_datetime__year=timezone.now().year,
-            status__in=['confirmed', 'completed']
-        ).count()
-        
-        venue_capacity_data.append({
-            'venue': venue,
-            'bookings_this_month': bookings_this_month
-        })
-    
-    context = {
-        'total_venues': total_venues,
-        'total_resources': total_resources,
-        'venue_bookings_today': venue_bookings_today,
-        'resource_allocations_today': resource_allocations_today,
-        'recent_venue_bookings': recent_venue_bookings,
-        'recent_resource_allocations': recent_resource_allocations,
-        'upcoming_events': upcoming_events,
-        'resource_utilization': resource_utilization,
-        'venue_capacity_data': venue_capacity_data,
-    }
-    
     return render(request, 'events/facilities_dashboard.html', context)
 
+@pagecache.cache_anonymous_page(Venue, Resource)
+@dbrouting.read_only
 def facilities_public(request):
     """Public facilities overview page"""
-    from .models import Venue, Resource
-    
-    # Basic statistics for public display
-    total_venues = Venue.objects.filter(is_available=True).count()
-    total_resources = Resource.objects.filter(is_available=True).count()
-    
+    # Basic statistics for public display (shared with the staff dashboard snapshot)
+    snapshot = facilities.get_snapshot()
     context = {
-        'total_venues': total_venues,
-        'total_resources': total_resources,
+        'total_venues': snapshot['total_venues'],
+        'total_resources': snapshot['total_resources'],
     }
     
     return render(request, 'events/facilities_public.html', context)
 
+
+@staff_member_required
+def page_cache_stats(request):
+    """Anonymous page-cache hits, misses and stale serves per view"""
+    return JsonResponse({'enabled': settings.PAGE_CACHE_ENABLED, 'views': pagecache.stats()})
+
+
+def metrics_endpoint(request):
+    """Request metrics for staff, or for a scraper with the METRICS_TOKEN bearer token"""
+    if metrics.bearer_token_ok(request):
+        return _metrics_response(request)
+    return _staff_metrics(request)
+
+
+@staff_member_required
+def _staff_metrics(request):
+    return _metrics_response(request)
+
+
+def _metrics_response(request):
+    if _wants_json(request):
+        return JsonResponse({
+            'enabled': settings.METRICS_ENABLED,
+            'sample_rate': settings.METRICS_SAMPLE_RATE,
+            'views': metrics.summary(),
+        })
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ==============================
+# REVENUE REPORT (DAILY ROLLUPS)
+# ==============================
+REPORT_DIMENSIONS = [('day', 'Day'), ('event', 'Event'), ('method', 'Payment method'), ('tier', 'Ticket tier')]
+
+
+@staff_member_required
+@dbrouting.read_only
+def revenue_report(request):
+    """Revenue by day, event, payment method or tier, read from the daily rollups"""
+    try:
+        report = _revenue_report(request)
+    except (ValueError, OverflowError) as error:
+        return HttpResponseBadRequest(str(error))
+    return render(request, 'events/revenue_report.html', {'report': report, 'dimensions': REPORT_DIMENSIONS})
+
+
+@staff_member_required
+@dbrouting.read_only
+def revenue_report_json(request):
+    """The revenue report as JSON: ?start=YYYY-MM-DD&end=YYYY-MM-DD&by=day|event|method|tier"""
+    try:
+        report = _revenue_report(request)
+    except (ValueError, OverflowError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(_revenue_json(report))
+
+
+def _revenue_report(request):
+    """Raises ValueError for bad parameters, OverflowError for a window off the calendar (?end=0001-01-01)"""
+    from datetime import datetime, timedelta
+
+    def parse(name, default):
+        value = request.GET.get(name)
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else default
+        except ValueError:
+            raise ValueError(f'Invalid {name} date (expected YYYY-MM-DD)')
+
+    end = parse('end', timezone.localdate())
+    start = parse('start', end - timedelta(days=settings.REVENUE_REPORT_DAYS - 1))
+    by = request.GET.get('by') or 'day'
+    if by not in rollups.DIMENSIONS:
+        raise ValueError(f"by must be one of {', '.join(rollups.DIMENSIONS)}")
+    if end < start:
+        raise ValueError('end must not be before start')
+    return rollups.report(start, end, by)
+
+
+def _revenue_json(report):
+    def figures(row):
+        return {
+            'payments': row['payments'],
+            'tickets': row['tickets'],
+            'revenue': float(row['revenue']),
+            'refunds': row['refunds'],
+            'refunded_amount': float(row['refunded_amount']),
+        }
+
+    return {
+        'start': report['start'].isoformat(),
+        'end': report['end'].isoformat(),
+        'by': report['by'],
+        'as_of': report['as_of'].isoformat() if report['as_of'] else None,
+        'totals': figures(report['totals']),
+        'rows': [
+            dict(key=row['key'].isoformat() if report['by'] == 'day' else row['key'], label=row['label'], **figures(row))
+            for row in report['rows']
+        ],
+    }
+
+# ==============================
+# GATE CHECK-IN (SCANNER DEVICES)
+# ==============================
+def checkin_roster(request, event_id):
+    """Gzipped roster for offline scanners; staff, or a device with this event's scanner token"""
+    if tickets.scanner_token_ok(request, event_id):
+        return _checkin_roster(request, event_id)
+    return _staff_checkin_roster(request, event_id)
+
+
+@staff_member_required
+def _staff_checkin_roster(request, event_id):
+    return _checkin_roster(request, event_id)
+
+
+def _checkin_roster(request, event_id):
+    event = modelcache.get_cached_or_404(Event, event_id)
+    response = HttpResponse(tickets.roster_gzip(event), content_type='application/gzip')
+    response['Content-Disposition'] = f'attachment; filename="roster-event-{event.id}.json.gz"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@csrf_exempt
+def checkin_sync(request, event_id):
+    """
+    Record a batch of gate scans. POST JSON (optionally gzipped):
+    {"device": "north-1", "scans": [{"token": "MT1...", "scanned_at": <epoch ms>, "gate": "North"}]}
+    """
+    if tickets.scanner_token_ok(request, event_id):
+        return _checkin_sync(request, event_id)
+    return _staff_checkin_sync(request, event_id)
+
+
+@staff_member_required
+def _staff_checkin_sync(request, event_id):
+    return _checkin_sync(request, event_id)
+
+
+def _checkin_sync(request, event_id):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST a batch of scans'}, status=405)
+    event = modelcache.get_cached_or_404(Event, event_id)
+    body = request.body
+    if request.META.get('HTTP_CONTENT_ENCODING', '').lower() == 'gzip':
+        # Bounded, so a tiny gzip bomb cannot expand without limit
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(body, settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+        except zlib.error:
+            return JsonResponse({'error': 'Bad gzip body'}, status=400)
+        if inflater.unconsumed_tail:
+            return JsonResponse({'error': 'Batch too large'}, status=413)
+    try:
+        payload = json.loads(body)
+        device = str(payload['device'])[:100]
+        scans = payload['scans']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"device": ..., "scans": [...]}'}, status=400)
+    if not device or not isinstance(scans, list):
+        return JsonResponse({'error': 'Expected {"device": ..., "scans": [...]}'}, status=400)
+    if len(scans) > settings.CHECKIN_MAX_BATCH:
+        return JsonResponse({'error': f'At most {settings.CHECKIN_MAX_BATCH} scans per batch'}, status=413)
+
+    results = tickets.record_scans(event.id, device, scans)
+    counts = {'accepted': 0, 'duplicate': 0}
+    for result in results:
+        if result['status'] in counts:
+            counts[result['status']] += 1
+    return JsonResponse({
+        'accepted': counts['accepted'],
+        'duplicates': counts['duplicate'],
+        'rejected': len(results) - counts['accepted'] - counts['duplicate'],
+        'results': results,
+    })
+
 # ==============================
 # HEALTH CHECK ENDPOINT
 # ==============================